@@ -0,0 +1,72 @@
+import socket
+import sys
+import threading
+import time
+
+import stem.socket
+
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+
+class FakeControlPort(stem.socket.ControlSocket):
+  """
+  Control socket attached to a thread that answers each message we send with
+  the same GETINFO reply.
+  """
+
+  def __init__(self, reply):
+    super(FakeControlPort, self).__init__()
+    self._controller_socket, tor_socket = socket.socketpair()
+
+    def answer_requests():
+      tor_file = tor_socket.makefile(mode = 'rwb')
+
+      while tor_file.readline():
+        tor_file.write(reply)
+        tor_file.flush()
+
+    tor_thread = threading.Thread(target = answer_requests)
+    tor_thread.setDaemon(True)
+    tor_thread.start()
+
+    self.connect()
+
+  def _make_socket(self):
+    return self._controller_socket
+
+def ns_all_reply(count):
+  entries = []
+
+  for i in range(count):
+    entry = RouterStatusEntryV3.create({'r': 'caerSidi%i p1aag7VwarGxqctS7/fS0y5FU+s oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0' % i})
+    entries.append(entry.get_bytes().replace(b'\n', b'\r\n') + b'\r\n')
+
+  return b'250+ns/all=\r\n' + b''.join(entries) + b'.\r\n250 OK\r\n'
+
+def measure_control_reader(count = 6000, queries = 20):
+  reply = ns_all_reply(count)
+  control_port = FakeControlPort(reply)
+
+  readers = (
+    ('line by line', lambda: control_port._recv(lambda s, sf: stem.socket.recv_message(sf))),
+    ('chunked', lambda: control_port.recv()),
+    ('chunked without raw content', lambda: control_port.recv(keep_raw_content = False)),
+  )
+
+  for label, recv in readers:
+    start_time = time.time()
+
+    for _ in range(queries):
+      control_port.send('GETINFO ns/all')
+      recv()
+
+    runtime = time.time() - start_time
+    print("Finished measure_control_reader('%s')" % label)
+    print('  Total time: %0.2f seconds' % runtime)
+    print('  Reply size: %i bytes' % len(reply))
+    print('  Time per reply: %0.5f seconds' % (runtime / queries))
+    print('')
+
+  control_port.close()
+
+if __name__ == '__main__':
+  measure_control_reader(int(sys.argv[1]) if len(sys.argv) > 1 else 6000)
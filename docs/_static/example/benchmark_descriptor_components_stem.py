@@ -0,0 +1,28 @@
+import sys
+import time
+
+import stem.descriptor
+
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+
+def measure_descriptor_components(path = None, count = 20000):
+  if path:
+    with open(path, 'rb') as descriptor_file:
+      content = descriptor_file.read()
+  else:
+    entry = RouterStatusEntryV3.create({'r': 'caerSidi p1aag7VwarGxqctS7/fS0y5FU+s oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0'})
+    content = (entry.get_bytes() + b'\n') * count
+
+  line_count = content.count(b'\n')
+  start_time = time.time()
+  stem.descriptor._descriptor_components(content, False)
+  runtime = time.time() - start_time
+
+  print("Finished measure_descriptor_components('%s')" % path)
+  print('  Total time: %0.2f seconds' % runtime)
+  print('  Processed lines: %i' % line_count)
+  print('  Lines per second: %i' % (line_count / runtime))
+  print('')
+
+if __name__ == '__main__':
+  measure_descriptor_components(sys.argv[1] if len(sys.argv) > 1 else None)
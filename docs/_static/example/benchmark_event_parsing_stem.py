@@ -0,0 +1,39 @@
+import sys
+import time
+
+import stem.response
+import stem.response.events
+
+EVENTS = (
+  'CIRC 7 BUILT $999A226EBED397F331B612FE1E4CFAE5C1F201BA=piyaz,$E57A476CD4DFBD99B4EE52A100A58610AD6E80B9=hamburgerphone PURPOSE=GENERAL TIME_CREATED=2012-11-08T16:48:36.400959',
+  'STREAM 18 SUCCEEDED 26 www.google.com:443 SOURCE_ADDR=127.0.0.1:47849 PURPOSE=USER',
+  'BW 15 25',
+  'CIRC_BW ID=11 READ=272 WRITTEN=817',
+  'CELL_STATS ID=14 OutboundQueue=19403 OutboundConn=15 OutboundAdded=create_fast:1,relay_early:2 OutboundRemoved=create_fast:1,relay_early:2 OutboundTime=create_fast:0,relay_early:0',
+)
+
+def measure_event_parsing(count = 20000):
+  messages = [stem.response.ControlMessage.from_str('650 %s\r\n' % EVENTS[i % len(EVENTS)]) for i in range(count)]
+  contents = [str(msg) for msg in messages]
+
+  start_time = time.time()
+
+  for content in contents:
+    stem.response.events._split_args(content)
+
+  split_runtime = time.time() - start_time
+  start_time = time.time()
+
+  for msg in messages:
+    stem.response.convert('EVENT', msg, arrived_at = 0)
+
+  convert_runtime = time.time() - start_time
+
+  print('Finished measure_event_parsing()')
+  print('  Processed events: %i' % count)
+  print('  Time splitting arguments per event: %0.2f microseconds' % (split_runtime * 1000000 / count))
+  print('  Time converting per event: %0.2f microseconds' % (convert_runtime * 1000000 / count))
+  print('')
+
+if __name__ == '__main__':
+  measure_event_parsing(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
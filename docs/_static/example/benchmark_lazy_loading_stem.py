@@ -0,0 +1,38 @@
+import sys
+import time
+
+import stem.descriptor
+
+from stem.descriptor.server_descriptor import RelayDescriptor
+
+def measure_lazy_attribute_access(path = None, count = 10000):
+  if path:
+    descriptors = [desc for desc in stem.descriptor.parse_file(path, 'server-descriptor 1.0')][:count]
+  else:
+    content = RelayDescriptor.content({
+      'platform': 'Tor 0.3.5.7 on Linux',
+      'proto': 'Cons=1-2 Desc=1-2 DirCache=1-2 HSDir=1-2 HSIntro=3-4 HSRend=1-2 Link=1-5 LinkAuth=1,3 Microdesc=1-2 Relay=1-2',
+      'family': '$0CE3CFB1E9CC47B63C1EBE4B6D7F8A83FA42E8D5 $1FD9AA57A0BF08B7ACE49E8F4B6E4F6C5FF4D7E6',
+      'accept': '*:80',
+      'ipv6-policy': 'accept 80,443',
+    })
+
+    descriptors = [RelayDescriptor(content) for _ in range(count)]
+
+  attributes = list(RelayDescriptor.ATTRIBUTES.keys())
+  start_time = time.time()
+
+  for desc in descriptors:
+    for attr in attributes:
+      getattr(desc, attr)
+
+  runtime = time.time() - start_time
+  print("Finished measure_lazy_attribute_access('%s')" % path)
+  print('  Total time: %0.2f seconds' % runtime)
+  print('  Processed server descriptors: %i' % len(descriptors))
+  print('  Attributes read per descriptor: %i' % len(attributes))
+  print('  Time per server descriptor: %0.5f seconds' % (runtime / len(descriptors)))
+  print('')
+
+if __name__ == '__main__':
+  measure_lazy_attribute_access(sys.argv[1] if len(sys.argv) > 1 else None)
@@ -500,6 +500,9 @@ __contact__ = 'atagar@torproject.org'
 __url__ = 'https://stem.torproject.org/'
 __license__ = 'LGPLv3'
 
+# async_control is omitted since its async/await syntax is invalid prior to
+# python 3.5, so 'from stem import *' would fail on older interpreters
+
 __all__ = [
   'client',
   'descriptor',
@@ -0,0 +1,771 @@
+# Copyright 2018, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Asyncio based controller for tor. This speaks the same protocol as our
+:class:`~stem.control.Controller`, reusing :mod:`stem.socket` framing and
+:mod:`stem.response` parsing, but rather than dedicating a couple threads to
+each connection this is driven by an asyncio event loop. Replies and events
+are dispatched as soon as they're read from the socket.
+
+**This module requires python 3.5 or later.**
+
+::
+
+  import asyncio
+
+  from stem.async_control import AsyncController
+  from stem.control import EventType
+
+  async def print_bw(event):
+    print('sent: %i, received: %i' % (event.written, event.read))
+
+  async def main():
+    controller = await AsyncController.from_port(port = 9051)
+    await controller.authenticate()
+
+    print('Tor is running version %s' % await controller.get_info('version'))
+
+    await controller.add_event_listener(print_bw, EventType.BW)
+    await asyncio.sleep(5)
+    await controller.close()
+
+  asyncio.get_event_loop().run_until_complete(main())
+
+Methods of the AsyncController are coroutines unless noted otherwise, and
+listeners can either be coroutines or plain functions. Unlike the
+:class:`~stem.control.Controller` this doesn't cache tor's responses.
+
+.. versionadded:: 1.8.0
+
+**Module Overview:**
+
+::
+
+  AsyncController - asyncio based controller for tor
+    |- from_port - constructs a controller for a control port
+    |- from_socket_file - constructs a controller for a control socket file
+    |
+    |- connect - reconnects to tor
+    |- close - shuts down our connection
+    |- is_alive - reports if our connection is open (not a coroutine)
+    |- is_authenticated - checks if we're authenticated (not a coroutine)
+    |- authenticate - authenticates this controller with tor
+    |
+    |- msg - sends a message to tor, providing its reply
+    |- get_info - issues a GETINFO query
+    |- get_conf - issues a GETCONF query for a single parameter
+    |- get_conf_map - issues a GETCONF query for multiple parameters
+    |- set_conf - sets the value of a configuration option
+    |- set_options - sets or resets the values of multiple configuration options
+    |- new_circuit - create new circuits
+    |- add_event_listener - attaches an event listener to be notified of tor events
+    +- remove_event_listener - removes a listener so it isn't notified of further events
+"""
+
+import asyncio
+import collections
+import functools
+import inspect
+import time
+
+import stem
+import stem.connection
+import stem.control
+import stem.response
+import stem.response.events
+import stem.socket
+import stem.util.connection
+import stem.util.str_tools
+
+from stem.control import (
+  MALFORMED_EVENTS,
+  MAPPED_CONFIG_KEYS,
+  UNDEFINED,
+  EventType,
+)
+
+from stem.util import log
+
+
+class AsyncController(object):
+  """
+  Connection with tor's control socket, driven by asyncio.
+
+  Messages are pipelined, so several coroutines can concurrently query tor
+  over a single connection. Replies are matched to their requests in the
+  order they're sent.
+
+  :param asyncio.StreamReader reader: stream to read tor's replies from
+  :param asyncio.StreamWriter writer: stream to write our requests to
+  :param bool is_authenticated: if the connection has already been
+    authenticated
+  """
+
+  @staticmethod
+  async def from_port(address = '127.0.0.1', port = 9051):
+    """
+    Constructs an AsyncController connected to a control port.
+
+    :param str address: ip address of the controller
+    :param int port: port number of the controller
+
+    :returns: :class:`~stem.async_control.AsyncController` attached to the
+      given port
+
+    :raises: :class:`stem.SocketError` if we're unable to establish a connection
+    """
+
+    if not stem.util.connection.is_valid_ipv4_address(address):
+      raise ValueError('Invalid IP address: %s' % address)
+    elif not stem.util.connection.is_valid_port(port):
+      raise ValueError('Invalid port: %s' % port)
+
+    return await AsyncController._from_connector(functools.partial(asyncio.open_connection, address, port))
+
+  @staticmethod
+  async def from_socket_file(path = '/var/run/tor/control'):
+    """
+    Constructs an AsyncController connected to a control socket file.
+
+    :param str path: path where the control socket is located
+
+    :returns: :class:`~stem.async_control.AsyncController` attached to the
+      given socket file
+
+    :raises: :class:`stem.SocketError` if we're unable to establish a connection
+    """
+
+    return await AsyncController._from_connector(functools.partial(asyncio.open_unix_connection, path))
+
+  @staticmethod
+  async def _from_connector(connector):
+    try:
+      reader, writer = await connector()
+    except OSError as exc:
+      raise stem.SocketError(exc)
+
+    controller = AsyncController(reader, writer)
+    controller._connector = connector
+    return controller
+
+  def __init__(self, reader, writer, is_authenticated = False):
+    self._connector = None
+    self._reader = None
+    self._writer = None
+    self._reader_task = None
+    self._event_task = None
+    self._event_queue = None
+
+    # futures for the replies we're awaiting, in the order they were sent
+
+    self._pending_replies = collections.deque()
+
+    # mapping of event types to their listeners
+
+    self._event_listeners = {}
+    self._is_authenticated = False
+
+    self._attach(reader, writer)
+
+    if is_authenticated:
+      self._is_authenticated = True
+
+  async def connect(self):
+    """
+    Reconnects to tor. This requires that we were constructed through
+    :func:`~stem.async_control.AsyncController.from_port` or
+    :func:`~stem.async_control.AsyncController.from_socket_file`.
+
+    :raises: :class:`stem.SocketError` if unable to make a connection
+    """
+
+    if not self._connector:
+      raise stem.SocketError("We weren't constructed with a way of reconnecting to tor")
+
+    await self.close()
+
+    try:
+      reader, writer = await self._connector()
+    except OSError as exc:
+      raise stem.SocketError(exc)
+
+    self._attach(reader, writer)
+
+  async def close(self):
+    """
+    Closes our connection to tor. Replies we're awaiting fail with a
+    :class:`stem.SocketClosed`. This is a no-op if we're already closed.
+    """
+
+    tasks = [task for task in (self._reader_task, self._event_task) if task and task is not _current_task()]
+    self._close()
+
+    if tasks:
+      await asyncio.wait(tasks)
+
+  def is_alive(self):
+    """
+    Checks if our connection with tor is open.
+
+    :returns: **True** if we're connected, **False** otherwise
+    """
+
+    return self._writer is not None
+
+  def is_authenticated(self):
+    """
+    Checks if our connection with tor is authenticated.
+
+    :returns: **True** if we're connected and authenticated, **False** otherwise
+    """
+
+    return self._is_authenticated if self.is_alive() else False
+
+  async def authenticate(self, password = None, chroot_path = None):
+    """
+    Authenticates with tor. This accepts the same arguments as
+    :func:`~stem.connection.authenticate`, and raises the same exceptions.
+
+    :param str password: passphrase to present to the socket if it uses
+      password authentication
+    :param str chroot_path: path prefix if in a chroot environment
+    """
+
+    # stem.connection's authentication is synchronous, so we run it within an
+    # executor with a shim that delegates back to our event loop
+
+    loop = asyncio.get_event_loop()
+    shim = _SyncShim(self, loop)
+    await loop.run_in_executor(None, functools.partial(stem.connection.authenticate, shim, password, chroot_path))
+
+    self._is_authenticated = True
+
+    if self._event_listeners:
+      await self._attach_listeners()
+
+  async def msg(self, message):
+    """
+    Sends a message to tor, providing its reply. Concurrent calls are
+    pipelined, each being provided the reply to its own message.
+
+    :param str message: message to be formatted and sent to tor
+
+    :returns: :class:`~stem.response.ControlMessage` with the response
+
+    :raises:
+      * :class:`stem.ProtocolError` the content from the socket is malformed
+      * :class:`stem.SocketClosed` if the socket is shut down
+    """
+
+    if not self.is_alive():
+      raise stem.SocketClosed()
+
+    formatted_msg = stem.socket.send_formatting(message)
+    reply = asyncio.get_event_loop().create_future()
+
+    # Appending our future and writing must be done without yielding to the
+    # event loop so replies arrive in the order of our deque.
+
+    self._pending_replies.append(reply)
+
+    try:
+      self._writer.write(stem.util.str_tools._to_bytes(formatted_msg))
+
+      if log.is_tracing():
+        log_message = formatted_msg.replace('\r\n', '\n').rstrip()
+        msg_div = '\n' if '\n' in log_message else ' '
+        log.trace('Sent to tor:%s%s' % (msg_div, log_message))
+
+      await self._writer.drain()
+    except OSError as exc:
+      log.info('Failed to send message: %s' % exc)
+
+      # We raise rather than await our reply, so take it out of our deque
+      # before _close() fails it. Otherwise its exception is never retrieved.
+
+      if reply in self._pending_replies:
+        self._pending_replies.remove(reply)
+
+      reply.cancel()
+      self._close()
+      raise stem.SocketClosed(exc)
+
+    return await reply
+
+  async def get_info(self, params, default = UNDEFINED, get_bytes = False):
+    """
+    Queries the control socket for the given GETINFO option. If provided a
+    default then that's returned if the GETINFO option is undefined or the
+    call fails for any reason.
+
+    :param str,list params: GETINFO option or options to be queried
+    :param object default: response if the query fails
+    :param bool get_bytes: provides **bytes** values rather than a **str**
+
+    :returns:
+      Response depends upon how we were called as follows...
+
+      * **str** with the response if our param was a **str**
+      * **dict** with the 'param => response' mapping if our param was a **list**
+      * default if one was provided and our call failed
+
+    :raises:
+      * :class:`stem.ControllerError` if the call fails and we weren't
+        provided a default response
+      * :class:`stem.InvalidArguments` if the 'params' requested was
+        invalid
+    """
+
+    start_time = time.time()
+
+    if stem.util._is_str(params):
+      is_multiple = False
+      params = set([params])
+    else:
+      if not params:
+        return {}
+
+      is_multiple = True
+      params = set(params)
+
+    try:
+      response = await self.msg('GETINFO %s' % ' '.join(params))
+      stem.response.convert('GETINFO', response)
+      response._assert_matches(params)
+
+      if not get_bytes:
+        response.entries = dict((k, stem.util.str_tools._to_unicode(v)) for (k, v) in response.entries.items())
+
+      log.debug('GETINFO %s (runtime: %0.4f)' % (' '.join(params), time.time() - start_time))
+
+      if is_multiple:
+        return response.entries
+      else:
+        return list(response.entries.values())[0]
+    except stem.ControllerError as exc:
+      log.debug('GETINFO %s (failed: %s)' % (' '.join(params), exc))
+
+      if default != UNDEFINED:
+        return default
+      else:
+        raise
+
+  async def get_conf(self, param, default = UNDEFINED, multiple = False):
+    """
+    Queries the current value for a configuration option. See
+    :func:`~stem.control.Controller.get_conf` for details.
+
+    :param str param: configuration option to be queried
+    :param object default: response if the option is unset or the query fails
+    :param bool multiple: if **True** then provides a list with all of the
+      present values (this is an empty list if the config option is unset)
+
+    :returns:
+      Response depends upon how we were called as follows...
+
+      * **str** with the configuration value if **multiple** was **False**,
+        **None** if it was unset
+      * **list** with the response strings if multiple was **True**
+      * default if one was provided and the configuration option was either
+        unset or our call failed
+
+    :raises:
+      * :class:`stem.ControllerError` if the call fails and we weren't
+        provided a default response
+      * :class:`stem.InvalidArguments` if the configuration option
+        requested was invalid
+    """
+
+    param = param.lower().strip()
+
+    if not param:
+      return default if default != UNDEFINED else None
+
+    entries = await self.get_conf_map(param, default, multiple)
+    return stem.control._case_insensitive_lookup(entries, param, default)
+
+  async def get_conf_map(self, params, default = UNDEFINED, multiple = True):
+    """
+    Queries multiple configuration options, providing back a mapping of those
+    options to their values. See :func:`~stem.control.Controller.get_conf_map`
+    for details.
+
+    :param str,list params: configuration option(s) to be queried
+    :param object default: value for the mappings if the configuration option
+      is either undefined or the query fails
+    :param bool multiple: if **True** then the values provided are lists with
+      all of the present values
+
+    :returns: **dict** of the 'config key => value' mappings
+
+    :raises:
+      * :class:`stem.ControllerError` if the call fails and we weren't provided
+        a default response
+      * :class:`stem.InvalidArguments` if the configuration option requested
+        was invalid
+    """
+
+    start_time = time.time()
+
+    if stem.util._is_str(params):
+      params = [params]
+
+    params = [entry for entry in params if entry.strip()]
+
+    if params == []:
+      return {}
+
+    lookup_params = set([MAPPED_CONFIG_KEYS.get(entry, entry) for entry in params])
+
+    try:
+      response = await self.msg('GETCONF %s' % ' '.join(lookup_params))
+      stem.response.convert('GETCONF', response)
+
+      reply = dict(response.entries)
+      stem.control._match_conf_case(reply, params)
+
+      log.debug('GETCONF %s (runtime: %0.4f)' % (' '.join(lookup_params), time.time() - start_time))
+      return stem.control._get_conf_dict_to_response(reply, default, multiple)
+    except stem.ControllerError as exc:
+      log.debug('GETCONF %s (failed: %s)' % (' '.join(lookup_params), exc))
+
+      if default != UNDEFINED:
+        return dict((param, default) for param in params)
+      else:
+        raise
+
+  async def set_conf(self, param, value):
+    """
+    Changes the value of a tor configuration option.
+
+    :param str param: configuration option to be set
+    :param str,list value: value to set the parameter to
+
+    :raises:
+      * :class:`stem.ControllerError` if the call fails
+      * :class:`stem.InvalidArguments` if configuration options
+        requested was invalid
+      * :class:`stem.InvalidRequest` if the configuration setting is
+        impossible or if there's a syntax error in the configuration values
+    """
+
+    await self.set_options({param: value}, False)
+
+  async def set_options(self, params, reset = False):
+    """
+    Changes multiple tor configuration options via either a SETCONF or
+    RESETCONF query. See :func:`~stem.control.Controller.set_options` for
+    details.
+
+    :param dict,list params: mapping of configuration options to the values
+      we're setting it to
+    :param bool reset: issues a RESETCONF, returning **None** values to their
+      defaults if **True**
+
+    :raises:
+      * :class:`stem.ControllerError` if the call fails
+      * :class:`stem.InvalidArguments` if configuration options
+        requested was invalid
+      * :class:`stem.InvalidRequest` if the configuration setting is
+        impossible or if there's a syntax error in the configuration values
+    """
+
+    start_time = time.time()
+
+    if isinstance(params, dict):
+      params = list(params.items())
+
+    query = stem.control._set_options_query(params, reset)
+    response = await self.msg(query)
+    stem.control._check_set_options_response(query, params, response)
+    log.debug('%s (runtime: %0.4f)' % (query, time.time() - start_time))
+
+  async def new_circuit(self, path = None, purpose = 'general', await_build = False, timeout = None):
+    """
+    Requests a new circuit. If the path isn't provided, one is automatically
+    selected.
+
+    :param list,str path: one or more relays to make a circuit through
+    :param str purpose: 'general' or 'controller'
+    :param bool await_build: blocks until the circuit is built if **True**
+    :param float timeout: seconds to wait when **await_build** is **True**
+
+    :returns: str of the circuit id of the newly created circuit
+
+    :raises:
+      * :class:`stem.ControllerError` if the call fails
+      * :class:`stem.InvalidRequest` if one of the parameters were invalid
+      * :class:`stem.CircuitExtensionFailed` if we were waiting for the circuit
+        to build but it failed
+      * :class:`stem.Timeout` if **timeout** was reached
+    """
+
+    circ_queue, circ_listener = None, None
+
+    if await_build:
+      circ_queue = asyncio.Queue()
+      circ_listener = circ_queue.put_nowait
+      await self.add_event_listener(circ_listener, EventType.CIRC)
+
+    try:
+      response = await self.msg(stem.control._extend_circuit_query('0', path, purpose))
+      new_circuit = stem.control._extended_circuit_id(response)
+
+      if await_build:
+        await asyncio.wait_for(self._await_circuit_build(circ_queue, new_circuit), timeout)
+
+      return new_circuit
+    except asyncio.TimeoutError:
+      raise stem.Timeout('Reached our %0.1f second timeout' % timeout)
+    finally:
+      if circ_listener:
+        await self.remove_event_listener(circ_listener)
+
+  async def _await_circuit_build(self, circ_queue, circuit_id):
+    while True:
+      circ = await circ_queue.get()
+
+      if circ.id == circuit_id and stem.control._is_circuit_built(circ):
+        return
+
+  async def add_event_listener(self, listener, *events):
+    """
+    Directs further tor controller events to a given function. The listener
+    is called with a :class:`~stem.response.events.Event` subclass, and if
+    it's a coroutine then it's awaited before further events are delivered.
+
+    If a new control connection is initialized then this listener will be
+    reattached.
+
+    If tor emits a malformed event it can be received by listening for the
+    stem.control.MALFORMED_EVENTS constant.
+
+    :param functor listener: function to be called when an event is received
+    :param stem.control.EventType events: event types to be listened for
+
+    :raises: :class:`stem.ProtocolError` if unable to set the events
+    """
+
+    for event_type in events:
+      self._event_listeners.setdefault(event_type, []).append(listener)
+
+    failed_events = (await self._attach_listeners())[1]
+
+    # restricted the failures to just things we requested
+
+    failed_events = set(failed_events).intersection(set(events))
+
+    if failed_events:
+      raise stem.ProtocolError('SETEVENTS rejected %s' % ', '.join(failed_events))
+
+  async def remove_event_listener(self, listener):
+    """
+    Stops a listener from being notified of further tor events.
+
+    :param functor listener: listener to be removed
+
+    :raises: :class:`stem.ProtocolError` if unable to set the events
+    """
+
+    event_types_changed = False
+
+    for event_type, event_listeners in list(self._event_listeners.items()):
+      if listener in event_listeners:
+        event_listeners.remove(listener)
+
+        if len(event_listeners) == 0:
+          event_types_changed = True
+          del self._event_listeners[event_type]
+
+    if event_types_changed and self.is_authenticated():
+      response = await self.msg('SETEVENTS %s' % ' '.join(self._event_listeners.keys()))
+
+      if not response.is_ok():
+        raise stem.ProtocolError('SETEVENTS received unexpected response\n%s' % response)
+
+  async def _attach_listeners(self):
+    """
+    Attempts to subscribe to our listener's events. This is a no-op if we're
+    not currently authenticated.
+
+    :returns: tuple of the form (set_events, failed_events)
+
+    :raises: :class:`stem.ControllerError` if unable to make our request to tor
+    """
+
+    set_events, failed_events = [], []
+
+    if self.is_authenticated():
+      event_types = [event_type for event_type in self._event_listeners.keys() if event_type != MALFORMED_EVENTS]
+      response = await self.msg('SETEVENTS %s' % ' '.join(event_types))
+
+      if response.is_ok():
+        set_events = event_types
+      else:
+        # see if we can set some subset of our events
+
+        for event in event_types:
+          response = await self.msg('SETEVENTS %s' % ' '.join(set_events + [event]))
+
+          if response.is_ok():
+            set_events.append(event)
+          else:
+            failed_events.append(event)
+
+    return (set_events, failed_events)
+
+  def _attach(self, reader, writer):
+    """
+    Starts using the given streams, spawning tasks to read from them.
+    """
+
+    self._reader, self._writer = reader, writer
+    self._is_authenticated = False
+    self._event_queue = asyncio.Queue()
+    self._reader_task = asyncio.ensure_future(self._reader_loop(reader))
+    self._event_task = asyncio.ensure_future(self._event_loop(self._event_queue))
+
+  def _close(self):
+    """
+    Closes our streams and fails any replies we're awaiting.
+    """
+
+    if self._writer:
+      self._writer.close()
+
+    if self._reader_task and self._reader_task is not _current_task():
+      self._reader_task.cancel()
+
+    if self._event_queue:
+      self._event_queue.put_nowait(None)  # lets our event task finish
+
+    self._reader, self._writer = None, None
+    self._reader_task, self._event_task, self._event_queue = None, None, None
+    self._is_authenticated = False
+
+    while self._pending_replies:
+      reply = self._pending_replies.popleft()
+
+      if not reply.done():
+        reply.set_exception(stem.SocketClosed('Socket closed while awaiting a reply'))
+
+  async def _reader_loop(self, reader):
+    """
+    Reads messages from tor, resolving replies we're awaiting and queuing
+    events for our listeners.
+    """
+
+    event_queue = self._event_queue
+    parser = stem.socket._MessageParser()
+
+    while True:
+      try:
+        line = await reader.readline()
+        control_message = parser.add_line(line)
+      except asyncio.CancelledError:
+        return
+      except (stem.SocketClosed, OSError, ValueError) as exc:
+        # OSError if the connection fails, and ValueError if a line exceeds
+        # our StreamReader's limit
+
+        if not isinstance(exc, stem.SocketClosed):
+          log.info(stem.socket.ERROR_MSG % ('SocketClosed', 'received exception "%s"' % exc))
+
+        if reader is self._reader:
+          self._close()
+
+        return
+      except stem.ProtocolError as exc:
+        # discard the remainder of the malformed message and fail the request
+        # it was a reply to
+
+        parser = stem.socket._MessageParser()
+        self._resolve_reply(None, exc)
+        continue
+
+      if control_message is None:
+        continue
+
+      parser = stem.socket._MessageParser()
+
+      if control_message.content()[-1][0] == '650':
+        event_queue.put_nowait(control_message)
+      else:
+        self._resolve_reply(control_message)
+
+  def _resolve_reply(self, control_message, exc = None):
+    if not self._pending_replies:
+      log.info('Tor provided a reply we weren\'t expecting: %s' % (exc if exc else control_message))
+      return
+
+    reply = self._pending_replies.popleft()
+
+    # if our caller was cancelled then we still consume their reply so
+    # subsequent replies are matched to the right request
+
+    if reply.done():
+      return
+    elif exc:
+      reply.set_exception(exc)
+    else:
+      reply.set_result(control_message)
+
+  async def _event_loop(self, event_queue):
+    """
+    Delivers events to our listeners in the order they're received.
+    """
+
+    while True:
+      event_message = await event_queue.get()
+
+      if event_message is None:
+        return
+
+      await self._handle_event(event_message)
+
+  async def _handle_event(self, event_message):
+    try:
+      stem.response.convert('EVENT', event_message, arrived_at = time.time())
+      event_type = event_message.type
+    except stem.ProtocolError as exc:
+      log.error('Tor sent a malformed event (%s): %s' % (exc, event_message))
+      event_type = MALFORMED_EVENTS
+
+    for listener in list(self._event_listeners.get(event_type, [])):
+      try:
+        result = listener(event_message)
+
+        if inspect.isawaitable(result):
+          await result
+      except Exception as exc:
+        log.warn('Event listener raised an uncaught exception (%s): %s' % (exc, event_message))
+
+
+def _current_task():
+  """
+  Provides the task we're running within. Python 3.7 moved this from the Task
+  class to the asyncio module, and 3.9 dropped the former.
+  """
+
+  if hasattr(asyncio, 'current_task'):
+    return asyncio.current_task()
+  else:
+    return asyncio.Task.current_task()
+
+
+class _SyncShim(object):
+  """
+  Provides a blocking msg() and connect() for an AsyncController so it can be
+  used with :mod:`stem.connection` from outside its event loop.
+  """
+
+  def __init__(self, controller, loop):
+    self._controller = controller
+    self._loop = loop
+
+  def msg(self, message):
+    return asyncio.run_coroutine_threadsafe(self._controller.msg(message), self._loop).result()
+
+  def connect(self):
+    return asyncio.run_coroutine_threadsafe(self._controller.connect(), self._loop).result()
@@ -21,8 +21,24 @@ a wrapper for :class:`~stem.socket.RelaySocket`, much the same way as
     +- create_circuit - establishes a new circuit
 
   Circuit - Circuit we've established through a relay.
+    |- open_stream - opens a new stream on this circuit
     |- send - sends a message through this circuit
     +- close - closes this circuit
+
+  Stream - Stream multiplexed over a circuit.
+    |- write - sends data over this stream
+    |- read - provides data we've received
+    +- close - closes this stream
+
+.. data:: CIRCUIT_WINDOW
+
+  Number of RELAY_DATA cells that can be in flight on a circuit before the
+  other end needs to acknowledge them with a RELAY_SENDME.
+
+.. data:: STREAM_WINDOW
+
+  Number of RELAY_DATA cells that can be in flight on a stream before the
+  other end needs to acknowledge them with a RELAY_SENDME.
 """
 
 import hashlib
@@ -32,8 +48,9 @@ import stem
 import stem.client.cell
 import stem.socket
 import stem.util.connection
+import stem.util.str_tools
 
-from stem.client.datatype import ZERO, LinkProtocol, Address, KDF, split
+from stem.client.datatype import ZERO, LinkProtocol, Address, KDF, RelayCommand, Size, split
 
 __all__ = [
   'cell',
@@ -42,6 +59,25 @@ __all__ = [
 
 DEFAULT_LINK_PROTOCOLS = (3, 4, 5)
 
+# Flow control windows (tor-spec sections 7.3 and 7.4). Windows begin at these
+# values, and we acknowledge cells with a RELAY_SENDME as they drop by the
+# increment.
+
+CIRCUIT_WINDOW = 1000
+CIRCUIT_WINDOW_INCREMENT = 100
+STREAM_WINDOW = 500
+STREAM_WINDOW_INCREMENT = 50
+
+# Most data a RELAY_DATA cell can carry (PAYLOAD_LEN minus the relay header).
+
+RELAY_DATA_LEN = 498
+
+# Reason we provide in RELAY_END cells (tor-spec section 6.3), 'REASON_DONE'.
+
+END_REASON_DONE = 6
+
+MAX_STREAM_ID = 65535
+
 
 class Relay(object):
   """
@@ -55,6 +91,7 @@ class Relay(object):
     self._orport = orport
     self._orport_lock = threading.RLock()
     self._circuits = {}
+    self._received = b''  # content that doesn't yet form a full cell
 
   @staticmethod
   def connect(address, port, link_protocols = DEFAULT_LINK_PROTOCOLS):
@@ -114,7 +151,21 @@ class Relay(object):
       conn.close()
       raise stem.SocketError('Unable to establish a common link protocol with %s:%i' % (address, port))
 
-    versions_reply = stem.client.cell.Cell.pop(response, 2)[0]
+    # VERSIONS cells have a variable length, so our read can end before it
+    # does. Whatever follows it (such as CERTS cells) is kept for our Relay.
+
+    header_size = Size.SHORT.size + Size.CHAR.size + Size.SHORT.size
+
+    while len(response) < header_size or len(response) < header_size + Size.SHORT.unpack(response[header_size - Size.SHORT.size:header_size]):
+      received = conn.recv()
+
+      if not received:
+        conn.close()
+        raise stem.SocketError('Connection with %s:%i closed during link negotiation' % (address, port))
+
+      response += received
+
+    versions_reply, remainder = stem.client.cell.Cell.pop(response, 2)
     common_protocols = set(link_protocols).intersection(versions_reply.versions)
 
     if not common_protocols:
@@ -128,7 +179,9 @@ class Relay(object):
     link_protocol = max(common_protocols)
     conn.send(stem.client.cell.NetinfoCell(relay_addr, []).pack(link_protocol))
 
-    return Relay(conn, link_protocol)
+    relay = Relay(conn, link_protocol)
+    relay._received = remainder
+    return relay
 
   def is_alive(self):
     """
@@ -172,13 +225,21 @@ class Relay(object):
       create_fast_cell = stem.client.cell.CreateFastCell(circ_id)
       self._orport.send(create_fast_cell.pack(self.link_protocol))
 
-      response = stem.client.cell.Cell.unpack(self._orport.recv(), self.link_protocol)
-      created_fast_cells = filter(lambda cell: isinstance(cell, stem.client.cell.CreatedFastCell), response)
+      created_fast_cell = None
+
+      while created_fast_cell is None:
+        for cell_content in self._recv():
+          try:
+            cell = stem.client.cell.Cell.pop(cell_content, self.link_protocol)[0]
+          except (ValueError, NotImplementedError):
+            continue  # cells we don't handle, such as from link negotiation
 
-      if not created_fast_cells:
-        raise ValueError('We should get a CREATED_FAST response from a CREATE_FAST request')
+          if isinstance(cell, stem.client.cell.CreatedFastCell) and cell.circ_id == circ_id:
+            created_fast_cell = cell
+            break
+          elif isinstance(cell, stem.client.cell.DestroyCell) and cell.circ_id == circ_id:
+            raise ValueError('We should get a CREATED_FAST response from a CREATE_FAST request, but the relay destroyed the circuit instead')
 
-      created_fast_cell = list(created_fast_cells)[0]
       kdf = KDF.from_value(create_fast_cell.key_material + created_fast_cell.key_material)
 
       if created_fast_cell.derivative_key != kdf.key_hash:
@@ -189,6 +250,75 @@ class Relay(object):
 
       return circ
 
+  def _recv(self):
+    """
+    Reads from our socket, providing the cells we receive to their circuit.
+    This blocks until we've received at least one full cell.
+
+    :returns: **list** of **bytes** for the cells no circuit claimed
+
+    :raises: :class:`stem.SocketClosed` if our socket is closed
+    """
+
+    with self._orport_lock:
+      unclaimed = []
+
+      while True:
+        cells = self._pop_cells()
+
+        if cells:
+          break
+
+        received = self._orport.recv()
+
+        if not received:
+          raise stem.SocketClosed('Our connection with the relay has been closed')
+
+        self._received += received
+
+      for circ_id, command, cell_content in cells:
+        circ = self._circuits.get(circ_id)
+
+        if circ and command in (stem.client.cell.RelayCell.VALUE, stem.client.cell.DestroyCell.VALUE):
+          circ._receive(command, cell_content)
+        else:
+          unclaimed.append(cell_content)
+
+      return unclaimed
+
+  def _pop_cells(self):
+    """
+    Pops the full cells we've received.
+
+    :returns: **list** of (circ_id, command, content) tuples
+    """
+
+    cells = []
+    header_size = self.link_protocol.circ_id_size.size + Size.CHAR.size
+
+    while len(self._received) >= header_size:
+      circ_id, content = self.link_protocol.circ_id_size.pop(self._received)
+      command = Size.CHAR.unpack(content[:Size.CHAR.size])
+
+      # VERSIONS cells and commands of 128 or above have a variable length
+      # (tor-spec section 3).
+
+      if command == stem.client.cell.VersionsCell.VALUE or command >= 128:
+        if len(self._received) < header_size + Size.SHORT.size:
+          break
+
+        cell_size = header_size + Size.SHORT.size + Size.SHORT.unpack(self._received[header_size:header_size + Size.SHORT.size])
+      else:
+        cell_size = self.link_protocol.fixed_cell_length
+
+      if len(self._received) < cell_size:
+        break
+
+      cell_content, self._received = split(self._received, cell_size)
+      cells.append((circ_id, command, cell_content))
+
+    return cells
+
   def __iter__(self):
     with self._orport_lock:
       for circ in self._circuits.values():
@@ -212,6 +342,7 @@ class Circuit(object):
   :var hashlib.sha1 backward_digest: digest for backward integrity check
   :var bytes forward_key: forward encryption key
   :var bytes backward_key: backward encryption key
+  :var bool is_closed: **True** once this circuit has been closed or destroyed
   """
 
   def __init__(self, relay, circ_id, kdf):
@@ -229,11 +360,70 @@ class Circuit(object):
     self.backward_digest = hashlib.sha1(kdf.backward_digest)
     self.forward_key = Cipher(algorithms.AES(kdf.forward_key), ctr, default_backend()).encryptor()
     self.backward_key = Cipher(algorithms.AES(kdf.backward_key), ctr, default_backend()).decryptor()
+    self.is_closed = False
+
+    self._streams = {}  # stream id => Stream
+    self._last_stream_id = 0
+    self._unclaimed = []  # relay cells not belonging to an open stream
+
+    self._package_window = CIRCUIT_WINDOW  # cells we can send
+    self._deliver_window = CIRCUIT_WINDOW  # cells we can receive
+
+  def open_stream(self, command = RelayCommand.BEGIN_DIR, data = b''):
+    """
+    Opens a new stream on this circuit. Several streams can be open at once,
+    with their data interleaved on the circuit.
+
+    .. versionadded:: 1.8.0
+
+    :param stem.client.datatype.RelayCommand command: command that opens the
+      stream, such as RELAY_BEGIN_DIR for directory requests
+    :param bytes data: payload of our opening cell
+
+    :returns: :class:`~stem.client.Stream` that's been opened
+
+    :raises:
+      * :class:`stem.ProtocolError` if the relay refused our stream
+      * :class:`stem.SocketClosed` if our connection or circuit is closed
+    """
+
+    with self.relay._orport_lock:
+      if self.is_closed:
+        raise stem.SocketClosed('Circuit %i is closed' % self.id)
+      elif len(self._streams) >= MAX_STREAM_ID:
+        raise stem.ProtocolError('Circuit %i has no stream ids remaining' % self.id)
+
+      stream_id = self._last_stream_id
+
+      while True:
+        stream_id = stream_id % MAX_STREAM_ID + 1
+
+        if stream_id not in self._streams:
+          break
+
+      self._last_stream_id = stream_id
+
+      stream = Stream(self, stream_id)
+      self._streams[stream_id] = stream
+      self._send(command, data, stream_id)
+
+      while not stream._is_connected and not stream.is_closed:
+        self._await()
+
+      if not stream._is_connected:
+        raise stem.ProtocolError('Relay refused to open stream %i on circuit %i (reason %s)' % (stream_id, self.id, stream.end_reason))
+
+      return stream
 
   def send(self, command, data = '', stream_id = 0):
     """
     Sends a message over the circuit.
 
+    .. versionchanged:: 1.8.0
+       Responses belonging to streams opened via
+       :func:`~stem.client.Circuit.open_stream` are provided to those streams
+       rather than returned.
+
     :param stem.client.datatype.RelayCommand command: command to be issued
     :param bytes data: message payload
     :param int stream_id: specific stream this concerns
@@ -242,9 +432,25 @@ class Circuit(object):
     """
 
     with self.relay._orport_lock:
-      # Encrypt and send the cell. Our digest/key only updates if the cell is
-      # successfully sent.
+      self._send(command, data, stream_id)
+      self._await()
+
+      reply_cells, self._unclaimed = self._unclaimed, []
+      return reply_cells
+
+  def close(self):
+    with self.relay._orport_lock:
+      if not self.is_closed:
+        self.relay._orport.send(stem.client.cell.DestroyCell(self.id).pack(self.relay.link_protocol))
+        self._set_closed()
 
+  def _send(self, command, data, stream_id):
+    """
+    Encrypts and sends a relay cell. Our digest/key only updates if the cell is
+    successfully sent.
+    """
+
+    with self.relay._orport_lock:
       cell = stem.client.cell.RelayCell(self.id, command, data, stream_id = stream_id)
       payload, forward_key, forward_digest = cell.encrypt(self.relay.link_protocol, self.forward_key, self.forward_digest)
       self.relay._orport.send(payload)
@@ -252,33 +458,179 @@ class Circuit(object):
       self.forward_digest = forward_digest
       self.forward_key = forward_key
 
-      # Decrypt relay cells received in response. Again, our digest/key only
-      # updates when handled successfully.
+  def _await(self):
+    """
+    Blocks until we've received more cells from our relay.
+    """
 
-      reply = self.relay._orport.recv()
-      reply_cells = []
+    if self.is_closed:
+      raise stem.SocketClosed('Circuit %i is closed' % self.id)
 
-      if len(reply) % self.relay.link_protocol.fixed_cell_length != 0:
-        raise stem.ProtocolError('Circuit response should be a series of RELAY cells, but received an unexpected size for a response: %i' % len(reply))
+    self.relay._recv()
 
-      while reply:
-        encrypted_cell, reply = split(reply, self.relay.link_protocol.fixed_cell_length)
-        decrypted_cell, backward_key, backward_digest = stem.client.cell.RelayCell.decrypt(self.relay.link_protocol, encrypted_cell, self.backward_key, self.backward_digest)
+  def _receive(self, command, content):
+    """
+    Handles a cell our relay received for this circuit. Relay cells are
+    decrypted, and provided to the stream they concern.
+    """
 
-        if self.id != decrypted_cell.circ_id:
-          raise stem.ProtocolError('Response should be for circuit id %i, not %i' % (self.id, decrypted_cell.circ_id))
+    if command == stem.client.cell.DestroyCell.VALUE:
+      self._set_closed()
+      return
 
-        self.backward_digest = backward_digest
-        self.backward_key = backward_key
+    # Again, our digest/key only updates when handled successfully.
 
-        reply_cells.append(decrypted_cell)
+    cell, backward_key, backward_digest = stem.client.cell.RelayCell.decrypt(self.relay.link_protocol, content, self.backward_key, self.backward_digest)
 
-      return reply_cells
+    self.backward_digest = backward_digest
+    self.backward_key = backward_key
+
+    if cell.command == RelayCommand.DATA:
+      self._deliver_window -= 1
+
+      if self._deliver_window <= CIRCUIT_WINDOW - CIRCUIT_WINDOW_INCREMENT:
+        # Authenticated SENDMEs (version 1) echo our running digest as of the
+        # cell that prompted it (proposal 289).
+
+        digest = self.backward_digest.digest()
+        self._send(RelayCommand.SENDME, Size.CHAR.pack(1) + Size.SHORT.pack(len(digest)) + digest, 0)
+        self._deliver_window += CIRCUIT_WINDOW_INCREMENT
+    elif cell.command == RelayCommand.SENDME and cell.stream_id == 0:
+      self._package_window += CIRCUIT_WINDOW_INCREMENT
+      return
+
+    stream = self._streams.get(cell.stream_id) if cell.stream_id else None
+
+    if stream:
+      stream._receive(cell)
+    else:
+      self._unclaimed.append(cell)
+
+  def _set_closed(self):
+    self.is_closed = True
+
+    for stream in list(self._streams.values()):
+      stream._set_closed()
+
+    self.relay._circuits.pop(self.id, None)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exit_type, value, traceback):
+    self.close()
+
+
+class Stream(object):
+  """
+  Stream multiplexed over a :class:`~stem.client.Circuit`. Data we receive
+  is buffered until read, and we acknowledge it with a RELAY_SENDME as it's
+  read. Our relay stops sending once :data:`~stem.client.STREAM_WINDOW` cells
+  are unacknowledged, so buffered data is bounded.
+
+  .. versionadded:: 1.8.0
+
+  :var stem.client.Circuit circuit: circuit this stream is on
+  :var int id: stream id
+  :var bool is_closed: **True** once this stream has been closed by either
+    ourselves or the relay
+  :var int end_reason: reason the relay provided when closing our stream,
+    **None** if it hasn't
+  """
+
+  def __init__(self, circuit, stream_id):
+    self.circuit = circuit
+    self.id = stream_id
+    self.is_closed = False
+    self.end_reason = None
+
+    self._is_connected = False
+    self._received = bytearray()
+
+    self._package_window = STREAM_WINDOW
+    self._deliver_window = STREAM_WINDOW
+
+  def write(self, data):
+    """
+    Sends data over this stream. This blocks if our flow control windows are
+    exhausted until the relay acknowledges what we've sent.
+
+    :param bytes data: data to be sent
+
+    :raises: :class:`stem.SocketClosed` if this stream is closed
+    """
+
+    data = stem.util.str_tools._to_bytes(data)
+    circ = self.circuit
+
+    with circ.relay._orport_lock:
+      while data:
+        while circ._package_window <= 0 or self._package_window <= 0:
+          if self.is_closed:
+            break
+
+          circ._await()
+
+        if self.is_closed:
+          raise stem.SocketClosed('Stream %i is closed' % self.id)
+
+        cell_data, data = split(data, RELAY_DATA_LEN)
+        circ._send(RelayCommand.DATA, cell_data, self.id)
+
+        circ._package_window -= 1
+        self._package_window -= 1
+
+  def read(self):
+    """
+    Provides the data we've received, blocking until we have some.
+
+    :returns: **bytes** we've received, this is empty once the stream is
+      closed and we've read everything
+    """
+
+    circ = self.circuit
+
+    with circ.relay._orport_lock:
+      while not self._received and not self.is_closed:
+        circ._await()
+
+      data, self._received = bytes(self._received), bytearray()
+
+      while not self.is_closed and self._deliver_window <= STREAM_WINDOW - STREAM_WINDOW_INCREMENT:
+        circ._send(RelayCommand.SENDME, b'', self.id)
+        self._deliver_window += STREAM_WINDOW_INCREMENT
+
+      return data
 
   def close(self):
-    with self.relay._orport_lock:
-      self.relay._orport.send(stem.client.cell.DestroyCell(self.id).pack(self.relay.link_protocol))
-      del self.relay._circuits[self.id]
+    """
+    Closes this stream. Data we've received can still be read.
+    """
+
+    circ = self.circuit
+
+    with circ.relay._orport_lock:
+      if not self.is_closed:
+        if not circ.is_closed:
+          circ._send(RelayCommand.END, Size.CHAR.pack(END_REASON_DONE), self.id)
+
+        self._set_closed()
+
+  def _receive(self, cell):
+    if cell.command == RelayCommand.DATA:
+      self._received += cell.data
+      self._deliver_window -= 1
+    elif cell.command == RelayCommand.CONNECTED:
+      self._is_connected = True
+    elif cell.command == RelayCommand.SENDME:
+      self._package_window += STREAM_WINDOW_INCREMENT
+    elif cell.command == RelayCommand.END:
+      self.end_reason = Size.CHAR.unpack(cell.data[:Size.CHAR.size]) if cell.data else None
+      self._set_closed()
+
+  def _set_closed(self):
+    self.is_closed = True
+    self.circuit._streams.pop(self.id, None)
 
   def __enter__(self):
     return self
@@ -421,17 +421,17 @@ class RelayCell(CircuitCell):
 
     cell = RelayCell._unpack(payload, circ_id, link_protocol)
 
-    # TODO: Implement our decryption digest. It is used to support relaying
-    # within multi-hop circuits. On first glance this should go something
-    # like...
-    #
-    #   # Our updated digest is calculated based on this cell with a blanked
-    #   # digest field.
-    #
-    #   digest_cell = RelayCell(self.circ_id, self.command, self.data, 0, self.stream_id, self.recognized, self.unused)
-    #   new_digest.update(digest_cell.pack(link_protocol))
+    # Our running digest is updated with the payload, blanking its digest
+    # field. This is echoed back in authenticated SENDMEs.
+
+    digest_start = Size.CHAR.size + Size.SHORT.size * 2
+    digest_end = digest_start + RELAY_DIGEST_SIZE.size
+    new_digest.update(payload[:digest_start] + ZERO * RELAY_DIGEST_SIZE.size + payload[digest_end:])
+
+    # TODO: Check the cell's digest against our own. This is used to support
+    # relaying within multi-hop circuits...
     #
-    #   is_encrypted == cell.recognized != 0 or self.digest == new_digest
+    #   is_encrypted == cell.recognized != 0 or cell.digest != new_digest
     #
     # ... or something like that. Until we attempt to support relaying this is
     # both moot and difficult to exercise in order to ensure we get it right.
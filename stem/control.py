@@ -112,9 +112,12 @@ If you're fine with allowing your script to raise exceptions then this can be mo
     |
     |- add_event_listener - attaches an event listener to be notified of tor events
     |- remove_event_listener - removes a listener so it isn't notified of further events
+    |- set_event_workers - notifies listeners from a pool of threads
     |
     |- is_caching_enabled - true if the controller has enabled caching
     |- set_caching - enables or disables caching
+    |- set_cache_limit - bounds the size and ttl of a portion of our cache
+    |- get_cache_stats - provides our cache's hits, misses, and evictions
     |- clear_cache - clears any cached results
     |
     |- load_conf - loads configuration information as if it was in the torrc
@@ -123,9 +126,13 @@ If you're fine with allowing your script to raise exceptions then this can be mo
     |- is_feature_enabled - checks if a given controller feature is enabled
     |- enable_feature - enables a controller feature that has been disabled by default
     |
+    |- is_circuit_tracking_enabled - true if we're tracking circuits and streams
+    |- set_circuit_tracking - models circuits and streams from events rather than querying tor
+    |
     |- get_circuit - provides an active circuit
     |- get_circuits - provides a list of active circuits
     |- new_circuit - create new circuits
+    |- new_circuits - create several new circuits at once
     |- extend_circuit - create new circuits and extend existing ones
     |- repurpose_circuit - change a circuit's purpose
     |- close_circuit - close a circuit
@@ -144,6 +151,7 @@ If you're fine with allowing your script to raise exceptions then this can be mo
 
   BaseController - Base controller class asynchronous message handling
     |- msg - communicates with the tor process
+    |- msg_async - sends a message without waiting for its reply
     |- is_alive - reports if our connection to tor is open or closed
     |- is_localhost - returns if the connection is for the local system or not
     |- connection_time - time when we last connected or disconnected
@@ -152,9 +160,17 @@ If you're fine with allowing your script to raise exceptions then this can be mo
     |- close - shuts down our connection to the tor process
     |- get_socket - provides the socket used for control communication
     |- get_latest_heartbeat - timestamp for when we last heard from tor
+    |- set_event_queue_limit - bounds the number of events awaiting our listeners
+    |- get_event_queue_stats - provides our number of queued, dropped, and coalesced events
     |- add_status_listener - notifies a callback of changes in our status
     +- remove_status_listener - prevents further notification of status changes
 
+  ReplyFuture - Reply tor will provide for a message
+    |- done - checks if the reply has arrived
+    |- result - blocks until we have the reply
+    |- exception - blocks until we have the reply, providing its exception
+    +- add_done_callback - notifies a function when the reply arrives
+
 .. data:: State (enum)
 
   Enumeration for states that a controller can have.
@@ -238,6 +254,22 @@ If you're fine with allowing your script to raise exceptions then this can be mo
   **DNS**       DNS lookups for our traffic (torrc's **DNSPort** and **DNSListenAddress**)
   **CONTROL**   controller applications (torrc's **ControlPort** and **ControlListenAddress**)
   ============= ===========
+
+.. data:: EventQueuePolicy (enum)
+
+  Action taken when an event arrives and our queue of events awaiting our
+  listeners is full.
+
+  .. versionadded:: 1.8.0
+
+  ================ ===========
+  EventQueuePolicy Description
+  ================ ===========
+  **BLOCK**        stop reading from the socket until there's room
+  **DROP_OLDEST**  discard the event that's been queued the longest
+  **DROP_NEWEST**  discard the event that just arrived
+  **COALESCE**     replace any queued **BW**, **CONN_BW**, **CIRC_BW**, **STREAM_BW**, **CELL_STATS**, or **TB_EMPTY** event for the same connection, circuit, or stream with the one that just arrived, blocking for other events
+  ================ ===========
 """
 
 import calendar
@@ -278,7 +310,7 @@ import stem.util.system
 import stem.util.tor_tools
 import stem.version
 
-from stem import UNDEFINED, CircStatus, Signal
+from stem import UNDEFINED, CircStatus, Signal, StreamStatus
 from stem.util import log
 
 # When closing the controller we attempt to finish processing enqueued events,
@@ -288,6 +320,30 @@ EVENTS_LISTENING_TIMEOUT = 0.1
 
 MALFORMED_EVENTS = 'MALFORMED_EVENTS'
 
+# Maximum number of lines we buffer when streaming a reply's data block to a
+# descriptor parser. The reader thread waits for the parser beyond this.
+
+STREAM_BUFFER_LINES = 1000
+
+# number of closed circuits our circuit tracker remembers, so callers awaiting
+# them can learn why they failed
+
+TRACKED_CLOSED_CIRCUITS = 100
+
+# Default (max entries, ttl) limits of our request cache's namespaces, either
+# being None if unbounded. Entries beyond the limit are evicted in least
+# recently used order. Answers such as 'GETINFO ip-to-country/*' would
+# otherwise accumulate for as long as our controller lives.
+
+CACHE_LIMITS = {
+  'getinfo': (1000, None),
+  'getconf': (1000, None),
+}
+
+# placed on our event queues to wake and stop the threads processing them
+
+_STOP_EVENT_LOOP = object()
+
 # state changes a control socket can have
 
 State = stem.util.enum.Enum('INIT', 'RESET', 'CLOSED')
@@ -338,6 +394,28 @@ Listener = stem.util.enum.UppercaseEnum(
   'CONTROL',
 )
 
+EventQueuePolicy = stem.util.enum.UppercaseEnum(
+  'BLOCK',
+  'DROP_OLDEST',
+  'DROP_NEWEST',
+  'COALESCE',
+)
+
+# Event types that can be coalesced by EventQueuePolicy.COALESCE, mapped to the
+# number of leading arguments that identify what they're for. For instance,
+# CONN_BW events are coalesced by their 'ID=<connection id>' argument.
+# TB_EMPTY events are identified by their bucket, along with the 'ID=<conn id>'
+# that follows it for ORCONN buckets.
+
+COALESCIBLE_EVENTS = {
+  b'BW': 0,
+  b'CELL_STATS': 1,
+  b'CIRC_BW': 1,
+  b'CONN_BW': 1,
+  b'STREAM_BW': 1,
+  b'TB_EMPTY': 1,
+}
+
 # torrc options that cannot be changed once tor's running
 
 IMMUTABLE_CONFIG_OPTIONS = set(map(stem.util.str_tools._to_unicode, map(str.lower, (
@@ -455,6 +533,52 @@ class CreateHiddenServiceOutput(collections.namedtuple('CreateHiddenServiceOutpu
   """
 
 
+class CircuitBuildResult(collections.namedtuple('CircuitBuildResult', ['path', 'id', 'status', 'reason', 'build_time', 'error'])):
+  """
+  Outcome of a circuit requested through
+  :func:`~stem.control.Controller.new_circuits`.
+
+  .. versionadded:: 1.8.0
+
+  :var list,str path: relays we asked the circuit to be built through
+  :var str id: circuit id, **None** if tor declined our request
+  :var stem.CircStatus status: last status we saw for the circuit, this is
+    **BUILT** if it was built
+  :var stem.CircClosureReason reason: reason the circuit failed or was closed
+  :var float build_time: seconds from our request until the circuit was built
+    or failed
+  :var stem.ControllerError error: why the circuit wasn't built, **None** if it
+    was or we didn't await its construction
+  """
+
+
+class EventQueueStats(collections.namedtuple('EventQueueStats', ['queued', 'dropped', 'coalesced'])):
+  """
+  Statistics for the events awaiting our listeners.
+
+  .. versionadded:: 1.8.0
+
+  :var int queued: number of events presently awaiting our listeners
+  :var int dropped: number of events discarded due to our queue limit
+  :var int coalesced: number of events replaced by a newer event of the same
+    type
+  """
+
+
+class CacheStats(collections.namedtuple('CacheStats', ['entries', 'hits', 'misses', 'evictions', 'expirations'])):
+  """
+  Statistics for our cache of tor's replies.
+
+  .. versionadded:: 1.8.0
+
+  :var int entries: number of values presently cached
+  :var int hits: number of lookups answered from our cache
+  :var int misses: number of lookups we didn't have a value for
+  :var int evictions: number of values discarded due to our size limit
+  :var int expirations: number of values discarded due to our ttl
+  """
+
+
 def with_default(yields = False):
   """
   Provides a decorator to support having a default value. This should be
@@ -530,6 +654,105 @@ def event_description(event):
   return EVENT_DESCRIPTIONS.get(event.lower())
 
 
+class ReplyFuture(object):
+  """
+  Reply for a message we've sent to tor, as provided by
+  :func:`~stem.control.BaseController.msg_async`. This mirrors the interface of
+  python 3's concurrent.futures.Future.
+
+  .. versionadded:: 1.8.0
+  """
+
+  def __init__(self, data_handler = None):
+    self._reply = None
+    self._exc = None
+    self._is_done = threading.Event()
+    self._callbacks = []
+    self._callbacks_lock = threading.Lock()
+    self._data_handler = data_handler  # receives the lines of our reply's data block
+
+  def done(self):
+    """
+    Checks if our reply has arrived (or failed).
+
+    :returns: **True** if our reply has arrived, **False** otherwise
+    """
+
+    return self._is_done.is_set()
+
+  def result(self, timeout = None):
+    """
+    Blocks until our reply arrives, then provides it.
+
+    :param float timeout: maximum number of seconds to wait, blocks
+      indefinitely if **None**
+
+    :returns: :class:`~stem.response.ControlMessage` tor replied with
+
+    :raises:
+      * :class:`stem.Timeout` if our reply doesn't arrive in time
+      * :class:`stem.ControllerError` if we failed to get a reply, for
+        instance :class:`stem.SocketClosed` if our socket was shut down
+    """
+
+    exc = self.exception(timeout)
+
+    if exc:
+      raise exc
+
+    return self._reply
+
+  def exception(self, timeout = None):
+    """
+    Blocks until our reply arrives, then provides the exception we failed
+    with.
+
+    :param float timeout: maximum number of seconds to wait, blocks
+      indefinitely if **None**
+
+    :returns: :class:`stem.ControllerError` we failed with, **None** if we
+      received our reply
+
+    :raises: :class:`stem.Timeout` if our reply doesn't arrive in time
+    """
+
+    self._is_done.wait(timeout)
+
+    if not self._is_done.is_set():
+      raise stem.Timeout('Reply not received within %0.1f seconds' % timeout)
+
+    return self._exc
+
+  def add_done_callback(self, callback):
+    """
+    Calls the given function when our reply arrives. If we already have our
+    reply then this calls the function immediately. Functions are provided
+    this future as their only argument, and called from the thread that
+    received our reply, so shouldn't block.
+
+    :param function callback: function to be called with this future
+    """
+
+    with self._callbacks_lock:
+      if not self.done():
+        self._callbacks.append(callback)
+        return
+
+    callback(self)
+
+  def _set_result(self, reply, exc = None):
+    with self._callbacks_lock:
+      self._reply, self._exc = reply, exc
+      self._is_done.set()
+      callbacks, self._callbacks = self._callbacks, []
+
+    for callback in callbacks:
+      try:
+        callback(self)
+      except Exception as callback_exc:
+        log.warn('Reply callback %s failed: %s' % (callback, callback_exc))
+
+
 class BaseController(object):
   """
   Controller for the tor process. This is a minimal base class for other
@@ -553,15 +776,22 @@ class BaseController(object):
     self._status_listeners = []  # tuples of the form (callback, spawn_thread)
     self._status_listeners_lock = threading.RLock()
 
-    # queues where incoming messages are directed
-    self._reply_queue = queue.Queue()
-    self._event_queue = queue.Queue()
+    # Futures for messages we've sent, in the order we sent them. Tor replies
+    # to commands in order so these are resolved as a FIFO.
+
+    self._pending_replies = collections.deque()
+    self._pending_replies_lock = threading.Lock()
+
+    # replies whose data block we're streaming to a parser
+    self._reply_streams = set()
+
+    # queue where incoming events are directed
+    self._event_queue = _EventQueue(lambda: bool(self._pending_replies))
 
     # thread to continually pull from the control socket
     self._reader_thread = None
 
     # thread to pull from the _event_queue and call handle_event
-    self._event_notice = threading.Event()
     self._event_thread = None
 
     # saves our socket's prior _connect() and _close() methods so they can be
@@ -588,6 +818,11 @@ class BaseController(object):
     """
     Sends a message to our control socket and provides back its reply.
 
+    .. versionchanged:: 1.8.0
+       This is now a blocking wrapper around
+       :func:`~stem.control.BaseController.msg_async`. Other threads no longer
+       wait on this to finish before sending their own messages.
+
     :param str message: message to be formatted and sent to tor
 
     :returns: :class:`~stem.response.ControlMessage` with the response
@@ -600,73 +835,72 @@ class BaseController(object):
       * :class:`stem.SocketClosed` if the socket is shut down
     """
 
-    with self._msg_lock:
-      # If our _reply_queue isn't empty then one of a few things happened...
-      #
-      # - Our connection was closed and probably re-restablished. This was
-      #   in reply to pulling for an asynchronous event and getting this is
-      #   expected - ignore it.
-      #
-      # - Pulling for asynchronous events produced an error. If this was a
-      #   ProtocolError then it's a tor bug, and if a non-closure SocketError
-      #   then it was probably a socket glitch. Deserves an INFO level log
-      #   message.
-      #
-      # - This is a leftover response for a msg() call. We can't tell who an
-      #   exception was earmarked for, so we only know that this was the case
-      #   if it's a ControlMessage.
-      #
-      #   This is the most concerning situation since it indicates that one of
-      #   our callers didn't get their reply. However, this is still a
-      #   perfectly viable use case. For instance...
-      #
-      #   1. We send a request.
-      #   2. The reader thread encounters an exception, for instance a socket
-      #      error. We enqueue the exception.
-      #   3. The reader thread receives the reply.
-      #   4. We raise the socket error, and have an undelivered message.
-      #
-      #   Thankfully this only seems to arise in edge cases around rapidly
-      #   closing/reconnecting the socket.
+    try:
+      return self.msg_async(message).result()
+    except stem.SocketClosed:
+      # If the recv() thread caused the SocketClosed then we could still be
+      # in the process of closing. Calling close() here so that we can
+      # provide an assurance to the caller that when we raise a SocketClosed
+      # exception we are shut down afterward for realz.
+
+      self.close()
+      raise
 
-      while not self._reply_queue.empty():
-        try:
-          response = self._reply_queue.get_nowait()
-
-          if isinstance(response, stem.SocketClosed):
-            pass  # this is fine
-          elif isinstance(response, stem.ProtocolError):
-            log.info('Tor provided a malformed message (%s)' % response)
-          elif isinstance(response, stem.ControllerError):
-            log.info('Socket experienced a problem (%s)' % response)
-          elif isinstance(response, stem.response.ControlMessage):
-            log.info('Failed to deliver a response: %s' % response)
-        except queue.Empty:
-          # the empty() method is documented to not be fully reliable so this
-          # isn't entirely surprising
+  def msg_async(self, message):
+    """
+    Sends a message to our control socket without waiting for its reply. Tor
+    processes commands in the order they're received, so this allows several
+    to be in flight at once rather than paying a round trip for each...
 
-          break
+    ::
+
+      futures = [controller.msg_async('GETINFO %s' % key) for key in keys]
+      replies = [future.result() for future in futures]
+
+    .. versionadded:: 1.8.0
+
+    :param str message: message to be formatted and sent to tor
+
+    :returns: :class:`~stem.control.ReplyFuture` for tor's reply
+
+    :raises:
+      * :class:`stem.SocketError` if unable to send the message
+      * :class:`stem.SocketClosed` if the socket is shut down
+    """
+
+    self._unbound_reply_streams()
+    return self._msg_async(message, ReplyFuture())
+
+  def _msg_async(self, message, future):
+    """
+    Sends a message, resolving the given future with its reply.
+    """
+
+    # Our lock ensures that futures are queued in the order that their
+    # messages are sent. It's reentrant, so callers can hold it to issue a
+    # sequence of messages without others interleaving theirs.
+
+    with self._msg_lock:
+      with self._pending_replies_lock:
+        self._pending_replies.append(future)
+
+      self._event_queue.reply_awaited()
 
       try:
         self._socket.send(message)
-        response = self._reply_queue.get()
+      except stem.ControllerError:
+        # Nothing was sent so no reply is coming. Unless the reader has
+        # already failed our future we need to drop it, otherwise the reply
+        # to the next message would be attributed to it.
 
-        # If the message we received back had an exception then re-raise it to the
-        # caller. Otherwise return the response.
+        with self._pending_replies_lock:
+          if future in self._pending_replies:
+            self._pending_replies.remove(future)
 
-        if isinstance(response, stem.ControllerError):
-          raise response
-        else:
-          return response
-      except stem.SocketClosed:
-        # If the recv() thread caused the SocketClosed then we could still be
-        # in the process of closing. Calling close() here so that we can
-        # provide an assurance to the caller that when we raise a SocketClosed
-        # exception we are shut down afterward for realz.
-
-        self.close()
         raise
 
+    return future
+
   def is_alive(self):
     """
     Checks if our socket is currently connected. This is a pass-through for our
@@ -761,6 +995,50 @@ class BaseController(object):
 
     return self._last_heartbeat
 
+  def set_event_queue_limit(self, limit, policy = EventQueuePolicy.BLOCK):
+    """
+    Bounds the number of events that can await our listeners. By default this
+    is unbounded, so a listener that can't keep up with tor causes our memory
+    usage to grow without limit.
+
+    The **BLOCK** and **COALESCE** policies stop reading from our socket while
+    our queue is full. Replies to our messages are read by the same thread, so
+    while any reply is awaited events are queued beyond our limit instead.
+    Otherwise a listener that sends a message while our queue is full could
+    never receive its reply.
+
+    When :func:`~stem.control.Controller.set_event_workers` is used events
+    awaiting our workers count against this limit too.
+
+    .. versionadded:: 1.8.0
+
+    :param int limit: maximum number of events to queue, **None** if
+      unbounded
+    :param stem.control.EventQueuePolicy policy: action taken when an event
+      arrives and our queue is full
+
+    :raises: **ValueError** if the limit or policy are invalid
+    """
+
+    if limit is not None and limit < 1:
+      raise ValueError('Event queue limit must be positive: %s' % limit)
+    elif policy not in EventQueuePolicy:
+      raise ValueError("'%s' isn't a recognized event queue policy" % policy)
+
+    self._event_queue.set_limit(limit, policy)
+
+  def get_event_queue_stats(self):
+    """
+    Provides statistics for the events awaiting our listeners.
+
+    .. versionadded:: 1.8.0
+
+    :returns: :class:`~stem.control.EventQueueStats` with our queue's size and
+      the number of events we've dropped or coalesced
+    """
+
+    return self._event_queue.stats()
+
   def add_status_listener(self, callback, spawn = True):
     """
     Notifies a given function when the state of our socket changes. Functions
@@ -841,8 +1119,9 @@ class BaseController(object):
     # awake from recv() raising a closure exception. Wake up the event thread
     # too so it can end.
 
-    self._event_notice.set()
+    self._event_queue.put(_STOP_EVENT_LOOP, ignore_limit = True)
     self._is_authenticated = False
+    self._fail_pending_replies(stem.SocketClosed('Socket closed before tor replied'))
 
     # joins on our threads if it's safe to do so
 
@@ -934,23 +1213,124 @@ class BaseController(object):
 
     while self.is_alive():
       try:
-        control_message = self._socket.recv()
+        control_message = self._socket.recv(self._reply_data_handler, keep_raw_content = False)
         self._last_heartbeat = time.time()
 
         if control_message.content()[-1][0] == '650':
           # asynchronous message, adds to the event queue and wakes up its handler
-          self._event_queue.put(control_message)
-          self._event_notice.set()
+          self._receive_event(control_message)
         else:
-          # response to a msg() call
-          self._reply_queue.put(control_message)
+          # response to the oldest message we're awaiting a reply for
+          self._resolve_pending_reply(control_message)
+      except stem.SocketClosed as exc:
+        self._fail_pending_replies(exc)
       except stem.ControllerError as exc:
-        # Assume that all exceptions belong to the reader. This isn't always
-        # true, but the msg() call can do a better job of sorting it out.
-        #
-        # Be aware that the msg() method relies on this to unblock callers.
+        # A malformed message or socket glitch. Tor replies in order so this
+        # was most likely for the oldest message we're awaiting a reply for.
 
-        self._reply_queue.put(exc)
+        self._resolve_pending_reply(None, exc)
+
+  def _receive_event(self, event_message):
+    """
+    Called by our reader thread for each event it reads, queuing it for our
+    event thread. This is done in the order events and replies arrive, so
+    this shouldn't block.
+
+    :param stem.response.ControlMessage event_message: unparsed event
+    """
+
+    self._event_queue.put(event_message)
+
+  def _reply_data_handler(self):
+    """
+    Provides the function that should receive the data block lines of the
+    reply we're reading, if we're streaming it.
+    """
+
+    # replies are for the oldest message we're awaiting a reply for
+
+    with self._pending_replies_lock:
+      return self._pending_replies[0]._data_handler if self._pending_replies else None
+
+  def _msg_streaming(self, message):
+    """
+    Sends a message, streaming the lines of its reply's data block as they're
+    read rather than including them in the reply.
+
+    :param str message: message to be formatted and sent to tor
+
+    :returns: tuple of the form (future, reply_stream) where the
+      :class:`~stem.control.ReplyFuture` is resolved when the whole reply has
+      been read, and the reply stream is a file with the data block's lines
+
+    :raises:
+      * :class:`stem.SocketError` if unable to send the message
+      * :class:`stem.SocketClosed` if the socket is shut down
+    """
+
+    self._unbound_reply_streams()
+
+    reply_stream = _ReplyStream()
+    future = ReplyFuture(reply_stream._add_line)
+    future.add_done_callback(lambda future: self._finish_reply_stream(reply_stream))
+
+    self._reply_streams.add(reply_stream)
+
+    try:
+      self._msg_async(message, future)
+    except:
+      self._finish_reply_stream(reply_stream)
+      raise
+
+    return future, reply_stream
+
+  def _unbound_reply_streams(self):
+    """
+    Lifts the buffer limit of the replies we're streaming. Replies can't be
+    read past a stream's buffer until its parser catches up, so if the
+    parser's thread awaits another reply that would deadlock.
+    """
+
+    for reply_stream in list(self._reply_streams):
+      reply_stream._set_unbounded()
+
+  def _finish_reply_stream(self, reply_stream):
+    reply_stream._finish()
+    self._reply_streams.discard(reply_stream)
+
+  def _resolve_pending_reply(self, reply, exc = None):
+    """
+    Delivers a reply (or failure) to the oldest message awaiting one.
+
+    :param stem.response.ControlMessage reply: reply from tor
+    :param stem.ControllerError exc: failure to deliver instead
+    """
+
+    with self._pending_replies_lock:
+      future = self._pending_replies.popleft() if self._pending_replies else None
+
+    if future:
+      future._set_result(reply, exc)
+    elif isinstance(exc, stem.ProtocolError):
+      log.info('Tor provided a malformed message (%s)' % exc)
+    elif exc:
+      log.info('Socket experienced a problem (%s)' % exc)
+    else:
+      log.info('Failed to deliver a response: %s' % reply)
+
+  def _fail_pending_replies(self, exc):
+    """
+    Fails all messages that are awaiting a reply.
+
+    :param stem.ControllerError exc: exception to fail with
+    """
+
+    with self._pending_replies_lock:
+      futures = list(self._pending_replies)
+      self._pending_replies.clear()
+
+    for future in futures:
+      future._set_result(None, exc)
 
   def _event_loop(self):
     """
@@ -963,10 +1343,20 @@ class BaseController(object):
     socket_closed_at = None
 
     while True:
+      # Blocks until we either have an event or are woken up by _close(). Our
+      # queue retains its order so we finish processing the events that
+      # arrived before our controller closed.
+
+      event_message = self._event_queue.get()
+
       try:
-        event_message = self._event_queue.get_nowait()
+        if event_message is _STOP_EVENT_LOOP:
+          if not self.is_alive():
+            break
+
+          continue  # we've since reconnected
+
         self._handle_event(event_message)
-        self._event_queue.task_done()
 
         # Attempt to finish processing enqueued events when our controller closes
 
@@ -975,12 +1365,13 @@ class BaseController(object):
             socket_closed_at = time.time()
           elif time.time() - socket_closed_at > EVENTS_LISTENING_TIMEOUT:
             break
-      except queue.Empty:
-        if not self.is_alive():
-          break
+      finally:
+        self._event_queue.task_done()
+
+    # Discard events we didn't get to. This also unblocks our reader if it's
+    # waiting for room in a full queue.
 
-        self._event_notice.wait(0.05)
-        self._event_notice.clear()
+    self._event_queue.clear()
 
 
 class Controller(BaseController):
@@ -1040,7 +1431,7 @@ class Controller(BaseController):
 
   def __init__(self, control_socket, is_authenticated = False):
     self._is_caching_enabled = True
-    self._request_cache = {}
+    self._request_cache = _RequestCache()
     self._last_newnym = 0.0
 
     self._cache_lock = threading.RLock()
@@ -1049,6 +1440,8 @@ class Controller(BaseController):
 
     self._event_listeners = {}
     self._event_listeners_lock = threading.RLock()
+    self._event_workers = None  # _EventWorkers if notifying from a thread pool
+    self._circuit_tracker = None  # _CircuitTracker if tracking circuits
     self._enabled_features = []
     self._is_geoip_unavailable = None
 
@@ -1091,6 +1484,9 @@ class Controller(BaseController):
     self.clear_cache()
     super(Controller, self).close()
 
+    if self._event_workers:
+      self._event_workers.stop()
+
   def authenticate(self, *args, **kwargs):
     """
     A convenience method to authenticate the controller. This is just a
@@ -1762,6 +2158,10 @@ class Controller(BaseController):
     directly from disk instead, which will not work remotely or if our process
     lacks read permissions.
 
+    .. versionchanged:: 1.8.0
+       Descriptors are provided as they're read from our socket rather than
+       after reading the whole reply.
+
     :param list default: items to provide if the query fails
 
     :returns: iterates over
@@ -1773,12 +2173,7 @@ class Controller(BaseController):
     """
 
     if self.get_version() >= stem.version.Requirement.GETINFO_MICRODESCRIPTORS:
-      desc_content = self.get_info('md/all', get_bytes = True)
-
-      if not desc_content:
-        raise stem.DescriptorUnavailable('Descriptor information is unavailable, tor might still be downloading it')
-
-      for desc in stem.descriptor.microdescriptor._parse_file(io.BytesIO(desc_content)):
+      for desc in self._get_info_descriptors('md/all', stem.descriptor.microdescriptor._parse_file):
         yield desc
     else:
       # TODO: remove when tor versions that require this are obsolete
@@ -1894,6 +2289,10 @@ class Controller(BaseController):
     really need server descriptors then you can get them by setting
     'UseMicrodescriptors 0'.
 
+    .. versionchanged:: 1.8.0
+       Descriptors are provided as they're read from our socket rather than
+       after reading the whole reply.
+
     :param list default: items to provide if the query fails
 
     :returns: iterates over
@@ -1904,21 +2303,14 @@ class Controller(BaseController):
       default was provided
     """
 
-    # TODO: We should iterate over the descriptors as they're read from the
-    # socket rather than reading the whole thing into memory.
-    #
-    # https://trac.torproject.org/8248
-
-    desc_content = self.get_info('desc/all-recent', get_bytes = True)
-
-    if not desc_content:
+    try:
+      for desc in self._get_info_descriptors('desc/all-recent', stem.descriptor.server_descriptor._parse_file):
+        yield desc
+    except stem.DescriptorUnavailable:
       if not self._is_server_descriptors_available():
         raise stem.ControllerError(SERVER_DESCRIPTORS_UNSUPPORTED)
-      else:
-        raise stem.DescriptorUnavailable('Descriptor information is unavailable, tor might still be downloading it')
 
-    for desc in stem.descriptor.server_descriptor._parse_file(io.BytesIO(desc_content)):
-      yield desc
+      raise
 
   def _is_server_descriptors_available(self):
     """
@@ -2000,6 +2392,10 @@ class Controller(BaseController):
     Provides an iterator for all of the router status entries that tor
     currently knows about.
 
+    .. versionchanged:: 1.8.0
+       Descriptors are provided as they're read from our socket rather than
+       after reading the whole reply.
+
     :param list default: items to provide if the query fails
 
     :returns: iterates over
@@ -2010,25 +2406,56 @@ class Controller(BaseController):
       default was provided
     """
 
-    # TODO: We should iterate over the descriptors as they're read from the
-    # socket rather than reading the whole thing into memory.
-    #
-    # https://trac.torproject.org/8248
-
-    desc_content = self.get_info('ns/all', get_bytes = True)
-
-    if not desc_content:
-      raise stem.DescriptorUnavailable('Descriptor information is unavailable, tor might still be downloading it')
-
-    desc_iterator = stem.descriptor.router_status_entry._parse_file(
-      io.BytesIO(desc_content),
-      False,
+    parse_func = functools.partial(
+      stem.descriptor.router_status_entry._parse_file,
+      validate = False,
       entry_class = stem.descriptor.router_status_entry.RouterStatusEntryV3,
     )
 
-    for desc in desc_iterator:
+    for desc in self._get_info_descriptors('ns/all', parse_func):
       yield desc
 
+  def _get_info_descriptors(self, param, parse_func):
+    """
+    Provides the descriptors of a GETINFO query, parsing them as they're read
+    from our socket rather than reading the whole reply into memory.
+
+    :param str param: GETINFO option with descriptor content
+    :param function parse_func: parses descriptors from a file
+
+    :returns: iterates over the descriptors tor provides
+
+    :raises:
+      * :class:`stem.DescriptorUnavailable` if tor doesn't have any
+        descriptors yet
+      * :class:`stem.ControllerError` if unable to query tor
+    """
+
+    start_time = time.time()
+    future, reply_stream = self._msg_streaming('GETINFO %s' % param)
+    is_empty = True
+
+    try:
+      for desc in parse_func(reply_stream):
+        is_empty = False
+        yield desc
+    finally:
+      reply_stream.close()  # our reader shouldn't wait on us if we stop early
+
+    try:
+      response = future.result()
+    except stem.SocketClosed:
+      self.close()
+      raise
+
+    stem.response.convert('GETINFO', response)
+    response._assert_matches(set([param]))
+
+    if is_empty:
+      raise stem.DescriptorUnavailable('Descriptor information is unavailable, tor might still be downloading it')
+
+    log.debug('GETINFO %s (runtime: %0.4f)' % (param, time.time() - start_time))
+
   @with_default()
   def get_hidden_service_descriptor(self, address, default = UNDEFINED, servers = None, await_result = True, timeout = None):
     """
@@ -2256,7 +2683,7 @@ class Controller(BaseController):
       if LOG_CACHE_FETCHES:
         log.trace('GETCONF %s (cache fetch)' % ' '.join(reply.keys()))
 
-      return self._get_conf_dict_to_response(reply, default, multiple)
+      return _get_conf_dict_to_response(reply, default, multiple)
 
     try:
       response = self.msg('GETCONF %s' % ' '.join(lookup_params))
@@ -2268,26 +2695,9 @@ class Controller(BaseController):
 
         self._set_cache(to_cache, 'getconf')
 
-      # Maps the entries back to the parameters that the user requested so the
-      # capitalization matches (ie, if they request "exitpolicy" then that
-      # should be the key rather than "ExitPolicy"). When the same
-      # configuration key is provided multiple times this determines the case
-      # based on the first and ignores the rest.
-      #
-      # This retains the tor provided camel casing of MAPPED_CONFIG_KEYS
-      # entries since the user didn't request those by their key, so we can't
-      # be sure what they wanted.
-
-      for key in reply:
-        if not key.lower() in MAPPED_CONFIG_KEYS.values():
-          user_expected_key = _case_insensitive_lookup(params, key, key)
-
-          if key != user_expected_key:
-            reply[user_expected_key] = reply[key]
-            del reply[key]
-
+      _match_conf_case(reply, params)
       log.debug('GETCONF %s (runtime: %0.4f)' % (' '.join(lookup_params), time.time() - start_time))
-      return self._get_conf_dict_to_response(reply, default, multiple)
+      return _get_conf_dict_to_response(reply, default, multiple)
     except stem.ControllerError as exc:
       log.debug('GETCONF %s (failed: %s)' % (' '.join(lookup_params), exc))
 
@@ -2296,27 +2706,6 @@ class Controller(BaseController):
       else:
         raise
 
-  def _get_conf_dict_to_response(self, config_dict, default, multiple):
-    """
-    Translates a dictionary of 'config key => [value1, value2...]' into the
-    return value of :func:`~stem.control.Controller.get_conf_map`, taking into
-    account what the caller requested.
-    """
-
-    return_dict = {}
-
-    for key, values in list(config_dict.items()):
-      if values == []:
-        # config option was unset
-        if default != UNDEFINED:
-          return_dict[key] = default
-        else:
-          return_dict[key] = [] if multiple else None
-      else:
-        return_dict[key] = values if multiple else values[0]
-
-    return return_dict
-
   @with_default()
   def is_set(self, param, default = UNDEFINED):
     """
@@ -2438,50 +2827,19 @@ class Controller(BaseController):
 
     start_time = time.time()
 
-    # constructs the SETCONF or RESETCONF query
-    query_comp = ['RESETCONF' if reset else 'SETCONF']
-
     if isinstance(params, dict):
       params = list(params.items())
 
-    for param, value in params:
-      if isinstance(value, str):
-        query_comp.append('%s="%s"' % (param, value.strip()))
-      elif isinstance(value, collections.Iterable):
-        query_comp.extend(['%s="%s"' % (param, val.strip()) for val in value])
-      elif not value:
-        query_comp.append(param)
-      else:
-        raise ValueError('Cannot set %s to %s since the value was a %s but we only accept strings' % (param, value, type(value).__name__))
-
-    query = ' '.join(query_comp)
+    query = _set_options_query(params, reset)
     response = self.msg(query)
-    stem.response.convert('SINGLELINE', response)
-
-    if response.is_ok():
-      log.debug('%s (runtime: %0.4f)' % (query, time.time() - start_time))
-
-      if self.is_caching_enabled():
-        # clear cache for params; the CONF_CHANGED event will set cache for changes
-        to_cache = dict((k.lower(), None) for k, v in params)
-        self._set_cache(to_cache, 'getconf')
-        self._confchanged_cache_invalidation(dict(params))
-    else:
-      log.debug('%s (failed, code: %s, message: %s)' % (query, response.code, response.message))
-      immutable_params = [k for k, v in params if stem.util.str_tools._to_unicode(k).lower() in IMMUTABLE_CONFIG_OPTIONS]
+    _check_set_options_response(query, params, response)
+    log.debug('%s (runtime: %0.4f)' % (query, time.time() - start_time))
 
-      if immutable_params:
-        raise stem.InvalidArguments(message = "%s cannot be changed while tor's running" % ', '.join(sorted(immutable_params)), arguments = immutable_params)
-
-      if response.code == '552':
-        if response.message.startswith("Unrecognized option: Unknown option '"):
-          key = response.message[37:response.message.find("'", 37)]
-          raise stem.InvalidArguments(response.code, response.message, [key])
-        raise stem.InvalidRequest(response.code, response.message)
-      elif response.code in ('513', '553'):
-        raise stem.InvalidRequest(response.code, response.message)
-      else:
-        raise stem.ProtocolError('Returned unexpected status code: %s' % response.code)
+    if self.is_caching_enabled():
+      # clear cache for params; the CONF_CHANGED event will set cache for changes
+      to_cache = dict((k.lower(), None) for k, v in params)
+      self._set_cache(to_cache, 'getconf')
+      self._confchanged_cache_invalidation(dict(params))
 
   @with_default()
   def get_hidden_service_conf(self, default = UNDEFINED):
@@ -3162,7 +3520,35 @@ class Controller(BaseController):
         if not response.is_ok():
           raise stem.ProtocolError('SETEVENTS received unexpected response\n%s' % response)
 
-  def _get_cache(self, param, namespace = None):
+  def set_event_workers(self, workers):
+    """
+    Notifies listeners from a pool of threads rather than our event thread.
+    Events of a given type are still delivered in the order they arrive, but
+    different event types are notified concurrently so a slow listener only
+    delays events of its own type.
+
+    Events awaiting our workers count against our
+    :func:`~stem.control.BaseController.set_event_queue_limit`, and its policy
+    applies when they reach it. Events already handed to our workers are
+    neither dropped nor coalesced.
+
+    .. versionadded:: 1.8.0
+
+    :param int workers: number of threads to notify listeners with, zero to
+      notify listeners from our event thread
+    """
+
+    if workers < 0:
+      raise ValueError('Number of event workers must be positive: %s' % workers)
+
+    with self._event_listeners_lock:
+      prior_workers = self._event_workers
+      self._event_workers = _EventWorkers(workers, self._event_queue) if workers else None
+
+    if prior_workers:
+      prior_workers.stop()
+
+  def _get_cache(self, param, namespace = None):
     """
     Queries our request cache for the given key.
 
@@ -3176,8 +3562,7 @@ class Controller(BaseController):
       if not self.is_caching_enabled():
         return None
 
-      cache_key = '%s.%s' % (namespace, param) if namespace else param
-      return self._request_cache.get(cache_key, None)
+      return self._request_cache.get(param, namespace)
 
   def _get_cache_map(self, params, namespace = None):
     """
@@ -3194,10 +3579,10 @@ class Controller(BaseController):
 
       if self.is_caching_enabled():
         for param in params:
-          cache_key = '%s.%s' % (namespace, param) if namespace else param
+          value = self._request_cache.get(param, namespace)
 
-          if cache_key in self._request_cache:
-            cached_values[param] = self._request_cache[cache_key]
+          if value is not None:
+            cached_values[param] = value
 
       return cached_values
 
@@ -3217,10 +3602,7 @@ class Controller(BaseController):
       # if params is None then clear the namespace
 
       if params is None and namespace:
-        for cache_key in list(self._request_cache.keys()):
-          if cache_key.startswith('%s.' % namespace):
-            del self._request_cache[cache_key]
-
+        self._request_cache.remove_namespace(namespace)
         return
 
       # remove uncacheable items
@@ -3232,16 +3614,10 @@ class Controller(BaseController):
             del params[key]
 
       for key, value in list(params.items()):
-        if namespace:
-          cache_key = '%s.%s' % (namespace, key)
-        else:
-          cache_key = key
-
         if value is None:
-          if cache_key in list(self._request_cache.keys()):
-            del self._request_cache[cache_key]
+          self._request_cache.remove(key, namespace)
         else:
-          self._request_cache[cache_key] = value
+          self._request_cache.set(key, value, namespace)
 
   def _confchanged_cache_invalidation(self, params):
     """
@@ -3288,13 +3664,64 @@ class Controller(BaseController):
     if not self._is_caching_enabled:
       self.clear_cache()
 
+  def set_cache_limit(self, namespace, max_entries = None, ttl = None):
+    """
+    Bounds how much of a given portion of our cache we retain. Cached values
+    are divided into the following namespaces...
+
+      * **getinfo** and **getconf** for the results of
+        :func:`~stem.control.Controller.get_info` and
+        :func:`~stem.control.Controller.get_conf`
+      * **listeners** for the addresses of each listener type
+      * our other cached results, such as **exit_policy**, **version**, and
+        **user**, are each their own namespace
+
+    Values beyond **max_entries** are evicted in least recently used order, and
+    values are discarded **ttl** seconds after they're cached. By default
+    'getinfo' and 'getconf' retain up to a thousand values.
+
+    .. versionadded:: 1.8.0
+
+    :param str namespace: portion of our cache to be bounded
+    :param int max_entries: maximum number of values we retain, **None** if
+      unbounded
+    :param float ttl: seconds we retain each value for, **None** if they don't
+      expire
+
+    :raises: **ValueError** if either limit is negative
+    """
+
+    if max_entries is not None and max_entries < 0:
+      raise ValueError('Cache limit must be positive: %s' % max_entries)
+    elif ttl is not None and ttl < 0:
+      raise ValueError('Cache ttl must be positive: %s' % ttl)
+
+    with self._cache_lock:
+      self._request_cache.set_limit(namespace, max_entries, ttl)
+
+  def get_cache_stats(self, namespace = None):
+    """
+    Provides statistics for our cache of tor's replies.
+
+    .. versionadded:: 1.8.0
+
+    :param str namespace: portion of our cache to provide statistics for, all
+      of it if **None**
+
+    :returns: :class:`~stem.control.CacheStats` with the number of values
+      we've cached, and the hits, misses, and values we've discarded
+    """
+
+    with self._cache_lock:
+      return self._request_cache.stats(namespace)
+
   def clear_cache(self):
     """
     Drops any cached results.
     """
 
     with self._cache_lock:
-      self._request_cache = {}
+      self._request_cache.clear()
       self._last_newnym = 0.0
       self._is_geoip_unavailable = None
 
@@ -3416,6 +3843,70 @@ class Controller(BaseController):
 
     self._enabled_features += [entry.upper() for entry in features]
 
+  def is_circuit_tracking_enabled(self):
+    """
+    **True** if we're tracking tor's circuits and streams, **False** otherwise.
+
+    .. versionadded:: 1.8.0
+
+    :returns: bool to indicate if circuit tracking is enabled
+    """
+
+    return self._circuit_tracker is not None
+
+  def set_circuit_tracking(self, enabled):
+    """
+    Keeps a model of tor's circuits and streams, updated by the CIRC, STREAM,
+    and CIRC_MINOR events tor sends us. While enabled
+    :func:`~stem.control.Controller.get_circuits`,
+    :func:`~stem.control.Controller.get_streams`, and awaiting circuits to be
+    built are answered from this model rather than querying tor, which is
+    helpful if you check these frequently.
+
+    .. versionadded:: 1.8.0
+
+    :param bool enabled: **True** to track circuits and streams, **False** to
+      stop doing so
+
+    :raises: :class:`stem.ControllerError` if unable to subscribe to events or
+      query tor's circuits and streams
+    """
+
+    with self._event_listeners_lock:
+      if enabled == self.is_circuit_tracking_enabled():
+        return
+
+      if not enabled:
+        tracker, self._circuit_tracker = self._circuit_tracker, None
+        self.remove_event_listener(tracker.listener)
+        return
+
+      events = [EventType.CIRC, EventType.STREAM]
+
+      if not self.is_authenticated() or self.get_version() >= stem.version.Requirement.EVENT_CIRC_MINOR:
+        events.append(EventType.CIRC_MINOR)
+
+      # our tracker applies events from the moment we subscribe to them, and
+      # our GETINFO replies replace anything that preceded them
+
+      tracker = _CircuitTracker()
+      self._circuit_tracker = tracker
+
+      try:
+        self.add_event_listener(tracker.listener, *events)
+
+        if self.is_authenticated():
+          self._seed_circuit_tracker(tracker)
+      except:
+        self._circuit_tracker = None
+
+        try:
+          self.remove_event_listener(tracker.listener)
+        except stem.ControllerError:
+          pass
+
+        raise
+
   @with_default()
   def get_circuit(self, circuit_id, default = UNDEFINED):
     """
@@ -3435,9 +3926,17 @@ class Controller(BaseController):
       An exception is only raised if we weren't provided a default response.
     """
 
-    for circ in self.get_circuits():
-      if circ.id == circuit_id:
+    tracker = self._get_circuit_tracker()
+
+    if tracker:
+      circ = tracker.circuit(circuit_id)
+
+      if circ:
         return circ
+    else:
+      for circ in self.get_circuits():
+        if circ.id == circuit_id:
+          return circ
 
     raise ValueError("Tor currently does not have a circuit with the id of '%s'" % circuit_id)
 
@@ -3446,7 +3945,12 @@ class Controller(BaseController):
     """
     get_circuits(default = UNDEFINED)
 
-    Provides tor's currently available circuits.
+    Provides tor's currently available circuits. If we're tracking circuits
+    this is answered without querying tor.
+
+    .. versionchanged:: 1.8.0
+       Provided by our tracker when :func:`~stem.control.Controller.set_circuit_tracking`
+       is enabled.
 
     :param object default: response if the query fails
 
@@ -3455,15 +3959,12 @@ class Controller(BaseController):
     :raises: :class:`stem.ControllerError` if the call fails and no default was provided
     """
 
-    circuits = []
-    response = self.get_info('circuit-status')
+    tracker = self._get_circuit_tracker()
 
-    for circ in response.splitlines():
-      circ_message = stem.socket.recv_message(io.BytesIO(stem.util.str_tools._to_bytes('650 CIRC %s\r\n' % circ)))
-      stem.response.convert('EVENT', circ_message, arrived_at = 0)
-      circuits.append(circ_message)
+    if tracker:
+      return tracker.circuits()
 
-    return circuits
+    return _status_events('CIRC', self.get_info('circuit-status'))
 
   def new_circuit(self, path = None, purpose = 'general', await_build = False, timeout = None):
     """
@@ -3487,6 +3988,116 @@ class Controller(BaseController):
 
     return self.extend_circuit('0', path, purpose, await_build, timeout)
 
+  def new_circuits(self, paths, purpose = 'general', await_build = True, timeout = None):
+    """
+    Requests several new circuits at once. Our requests are pipelined and
+    construction of every circuit is awaited together, so this is much quicker
+    than calling :func:`~stem.control.Controller.new_circuit` for each...
+
+    ::
+
+      for result in controller.new_circuits([[guard, relay] for relay in relays], timeout = 30):
+        print('%s: %s (%s)' % (result.path[1], result.status, result.error))
+
+    Unlike :func:`~stem.control.Controller.new_circuit` a circuit that can't be
+    built doesn't raise an exception. Rather, the outcome of each is provided
+    by its result.
+
+    .. versionadded:: 1.8.0
+
+    :param list paths: paths to build circuits through, each of which is one or
+      more relays or **None** for tor to select one
+    :param str purpose: 'general' or 'controller'
+    :param bool await_build: blocks until the circuits are built or have failed
+      if **True**
+    :param float timeout: seconds to wait when **await_build** is **True**,
+      circuits that are still being built by then have a :class:`stem.Timeout`
+      error
+
+    :returns: **list** of :class:`~stem.control.CircuitBuildResult` for each
+      path, in the order they were provided
+
+    :raises: :class:`stem.ControllerError` if the call fails
+    """
+
+    # As with extend_circuit() we either await changes from our circuit
+    # tracker or attach a CIRC listener prior to our requests. The listener is
+    # shared by all our circuits.
+
+    circ_queue, circ_listener = queue.Queue(), None
+    tracker = self._get_circuit_tracker() if await_build else None
+
+    if tracker:
+      tracker_changes = tracker.changes()
+    elif await_build:
+      def circ_listener(event):
+        circ_queue.put(event)
+
+      self.add_event_listener(circ_listener, EventType.CIRC)
+
+    try:
+      if None in paths:
+        path_opt_version = stem.version.Requirement.EXTENDCIRCUIT_PATH_OPTIONAL
+
+        if not self.get_version() >= path_opt_version:
+          raise stem.InvalidRequest(512, 'EXTENDCIRCUIT requires the path prior to version %s' % path_opt_version)
+
+      start_time = time.time()
+      futures = [self.msg_async(_extend_circuit_query('0', path, purpose)) for path in paths]
+      results, pending = [], {}  # pending is a mapping of circuit ids to their result index
+
+      for path, future in zip(paths, futures):
+        try:
+          circuit_id = _extended_circuit_id(future.result())
+        except stem.InvalidRequest as exc:
+          results.append(CircuitBuildResult(path, None, None, None, None, exc))
+          continue
+
+        pending[circuit_id] = len(results)
+        results.append(CircuitBuildResult(path, circuit_id, None, None, None, None))
+
+      if not await_build:
+        return results
+      elif tracker:
+        circuits = tracker.await_circuits(list(pending.keys()), tracker_changes, timeout, start_time)
+      else:
+        circuits, unfinished = {}, set(pending.keys())
+
+        while unfinished:
+          try:
+            circ = _get_with_timeout(circ_queue, timeout, start_time)
+          except stem.Timeout:
+            break
+
+          if circ.id in unfinished:
+            circuits[circ.id] = circ
+
+            if _is_circuit_finished(circ):
+              unfinished.remove(circ.id)
+
+      for circuit_id, index in pending.items():
+        circ = circuits.get(circuit_id)
+
+        if not circ or not _is_circuit_finished(circ):
+          status = circ.status if circ else None
+          results[index] = results[index]._replace(status = status, error = stem.Timeout('Reached our %0.1f second timeout' % timeout))
+          continue
+
+        build_time = circ.arrived_at - start_time if circ.arrived_at else None
+
+        try:
+          _is_circuit_built(circ)
+          error = None
+        except stem.CircuitExtensionFailed as exc:
+          error = exc
+
+        results[index] = results[index]._replace(status = circ.status, reason = circ.reason, build_time = build_time, error = error)
+
+      return results
+    finally:
+      if circ_listener:
+        self.remove_event_listener(circ_listener)
+
   def extend_circuit(self, circuit_id = '0', path = None, purpose = 'general', await_build = False, timeout = None):
     """
     Either requests the creation of a new circuit or extends an existing one.
@@ -3529,12 +4140,16 @@ class Controller(BaseController):
 
     # Attaches a temporary listener for CIRC events if we'll be waiting for it
     # to build. This is icky, but we can't reliably do this via polling since
-    # we then can't get the failure if it can't be created.
+    # we then can't get the failure if it can't be created. If we're tracking
+    # circuits we instead await changes after this point.
 
     circ_queue, circ_listener = queue.Queue(), None
     start_time = time.time()
+    tracker = self._get_circuit_tracker() if await_build else None
 
-    if await_build:
+    if tracker:
+      tracker_changes = tracker.changes()
+    elif await_build:
       def circ_listener(event):
         circ_queue.put(event)
 
@@ -3550,41 +4165,17 @@ class Controller(BaseController):
         if not self.get_version() >= path_opt_version:
           raise stem.InvalidRequest(512, 'EXTENDCIRCUIT requires the path prior to version %s' % path_opt_version)
 
-      args = [circuit_id]
-
-      if stem.util._is_str(path):
-        path = [path]
-
-      if path:
-        args.append(','.join(path))
+      response = self.msg(_extend_circuit_query(circuit_id, path, purpose))
+      new_circuit = _extended_circuit_id(response)
 
-      if purpose:
-        args.append('purpose=%s' % purpose)
-
-      response = self.msg('EXTENDCIRCUIT %s' % ' '.join(args))
-      stem.response.convert('SINGLELINE', response)
-
-      if response.code in ('512', '552'):
-        raise stem.InvalidRequest(response.code, response.message)
-      elif not response.is_ok():
-        raise stem.ProtocolError('EXTENDCIRCUIT returned unexpected response code: %s' % response.code)
-
-      if not response.message.startswith('EXTENDED '):
-        raise stem.ProtocolError('EXTENDCIRCUIT response invalid:\n%s', response)
-
-      new_circuit = response.message.split(' ', 1)[1]
-
-      if await_build:
+      if tracker:
+        tracker.await_build(new_circuit, tracker_changes, timeout, start_time)
+      elif await_build:
         while True:
           circ = _get_with_timeout(circ_queue, timeout, start_time)
 
-          if circ.id == new_circuit:
-            if circ.status == CircStatus.BUILT:
-              break
-            elif circ.status == CircStatus.FAILED:
-              raise stem.CircuitExtensionFailed('Circuit failed to be created: %s' % circ.reason, circ)
-            elif circ.status == CircStatus.CLOSED:
-              raise stem.CircuitExtensionFailed('Circuit was closed prior to build', circ)
+          if circ.id == new_circuit and _is_circuit_built(circ):
+            break
 
       return new_circuit
     finally:
@@ -3640,7 +4231,12 @@ class Controller(BaseController):
     """
     get_streams(default = UNDEFINED)
 
-    Provides the list of streams tor is currently handling.
+    Provides the list of streams tor is currently handling. If we're tracking
+    circuits this is answered without querying tor.
+
+    .. versionchanged:: 1.8.0
+       Provided by our tracker when :func:`~stem.control.Controller.set_circuit_tracking`
+       is enabled.
 
     :param object default: response if the query fails
 
@@ -3650,15 +4246,12 @@ class Controller(BaseController):
       provided
     """
 
-    streams = []
-    response = self.get_info('stream-status')
+    tracker = self._get_circuit_tracker()
 
-    for stream in response.splitlines():
-      message = stem.socket.recv_message(io.BytesIO(stem.util.str_tools._to_bytes('650 STREAM %s\r\n' % stream)))
-      stem.response.convert('EVENT', message, arrived_at = 0)
-      streams.append(message)
+    if tracker:
+      return tracker.streams()
 
-    return streams
+    return _status_events('STREAM', self.get_info('stream-status'))
 
   def attach_stream(self, stream_id, circuit_id, exiting_hop = None):
     """
@@ -3905,6 +4498,16 @@ class Controller(BaseController):
       except stem.ProtocolError as exc:
         log.warn('Unable to issue the SETEVENTS request to re-attach our listeners (%s)' % exc)
 
+    # our circuits and streams are specific to this tor instance
+
+    tracker = self._circuit_tracker
+
+    if tracker:
+      try:
+        self._seed_circuit_tracker(tracker)
+      except stem.ControllerError as exc:
+        log.warn('Unable to query the circuits and streams of the new tor instance for our circuit tracker (%s)' % exc)
+
     # issue TAKEOWNERSHIP if we're the owning process for this tor instance
 
     owning_pid = self.get_conf('__OwningControllerProcess', None)
@@ -3924,6 +4527,59 @@ class Controller(BaseController):
       else:
         log.warn('We were unable assert ownership of tor through TAKEOWNERSHIP, despite being configured to be the owning process through __OwningControllerProcess. (%s)' % response)
 
+  def _get_circuit_tracker(self):
+    """
+    Provides our circuit tracker if we're tracking circuits and connected to
+    tor, **None** otherwise.
+    """
+
+    tracker = self._circuit_tracker
+    return tracker if tracker and self.is_authenticated() else None
+
+  def _seed_circuit_tracker(self, tracker):
+    """
+    Provides our tracker with tor's present circuits and streams. Our reader
+    thread applies each reply as it's read, so they're in order with the
+    events that surround them.
+
+    :raises: :class:`stem.ControllerError` if unable to query tor
+    """
+
+    failures, seeded = [], []
+
+    def seed(param, event_type, set_func, is_seeded, future):
+      try:
+        response = future.result()
+        stem.response.convert('GETINFO', response)
+        response._assert_matches(set([param]))
+        set_func(_status_events(event_type, stem.util.str_tools._to_unicode(response.entries[param])))
+      except stem.ControllerError as exc:
+        failures.append(exc)
+      finally:
+        is_seeded.set()
+
+    self._unbound_reply_streams()
+
+    for param, event_type, set_func in (('circuit-status', 'CIRC', tracker.set_circuits), ('stream-status', 'STREAM', tracker.set_streams)):
+      future, is_seeded = ReplyFuture(), threading.Event()
+      future.add_done_callback(functools.partial(seed, param, event_type, set_func, is_seeded))
+      self._msg_async('GETINFO %s' % param, future)
+      seeded.append(is_seeded)
+
+    for is_seeded in seeded:
+      is_seeded.wait()
+
+    if failures:
+      raise failures[0]
+
+  def _receive_event(self, event_message):
+    tracker = self._circuit_tracker
+
+    if tracker:
+      tracker.update(event_message)
+
+    super(Controller, self)._receive_event(event_message)
+
   def _handle_event(self, event_message):
     try:
       stem.response.convert('EVENT', event_message, arrived_at = time.time())
@@ -3933,13 +4589,18 @@ class Controller(BaseController):
       event_type = MALFORMED_EVENTS
 
     with self._event_listeners_lock:
-      for listener_type, event_listeners in list(self._event_listeners.items()):
-        if listener_type == event_type:
-          for listener in event_listeners:
-            try:
-              listener(event_message)
-            except Exception as exc:
-              log.warn('Event listener raised an uncaught exception (%s): %s' % (exc, event_message))
+      event_listeners = self._event_listeners.get(event_type)
+
+      if not event_listeners:
+        return
+
+      event_listeners = list(event_listeners)
+      event_workers = self._event_workers
+
+    if event_workers:
+      event_workers.submit(event_type, event_listeners, event_message)
+    else:
+      _notify_listeners(event_listeners, event_message)
 
   def _attach_listeners(self):
     """
@@ -3985,6 +4646,934 @@ class Controller(BaseController):
     return (set_events, failed_events)
 
 
+def _coalescing_key(event_message):
+  """
+  Provides the key by which EventQueuePolicy.COALESCE replaces queued events.
+
+  :param stem.response.ControlMessage event_message: event to be queued
+
+  :returns: **tuple** with the event's type and arguments identifying it,
+    **None** if the event can't be coalesced
+  """
+
+  args = event_message.content(get_bytes = True)[0][2].split(b' ', 3)
+  arg_count = COALESCIBLE_EVENTS.get(args[0])
+
+  if arg_count is None or len(args) <= arg_count:
+    return None
+  elif args[0] == b'TB_EMPTY' and args[1] == b'ORCONN':
+    arg_count += 1
+
+  return tuple(args[:arg_count + 1])
+
+
+class _CircuitTracker(object):
+  """
+  Model of tor's circuits and streams, kept up to date by the CIRC, STREAM,
+  and CIRC_MINOR events we receive. Events are applied by our reader thread as
+  they're read so they're in order with the GETINFO replies that seed us.
+
+  Each change is numbered so callers can await changes to a circuit that
+  happen after a given point.
+  """
+
+  def __init__(self):
+    self._circuits = collections.OrderedDict()  # circuit id => (change, CircuitEvent)
+    self._closed_circuits = collections.OrderedDict()  # circuit id => (change, CircuitEvent)
+    self._streams = collections.OrderedDict()  # stream id => StreamEvent
+    self._changes = 0
+    self._cond = threading.Condition()
+
+  def circuits(self):
+    with self._cond:
+      return [circ for _, circ in self._circuits.values()]
+
+  def circuit(self, circuit_id):
+    with self._cond:
+      return self._circuits[circuit_id][1] if circuit_id in self._circuits else None
+
+  def streams(self):
+    with self._cond:
+      return list(self._streams.values())
+
+  def changes(self):
+    """
+    Provides the number of changes we've seen so far.
+    """
+
+    with self._cond:
+      return self._changes
+
+  def await_build(self, circuit_id, since, timeout, start_time):
+    """
+    Blocks until the given circuit is built after the change with the given
+    number.
+
+    :raises:
+      * :class:`stem.CircuitExtensionFailed` if the circuit failed
+      * :class:`stem.Timeout` if **timeout** was reached
+    """
+
+    circ = self.await_circuits([circuit_id], since, timeout, start_time).get(circuit_id)
+
+    if not circ or not _is_circuit_built(circ):
+      raise stem.Timeout('Reached our %0.1f second timeout' % timeout)
+
+  def await_circuits(self, circuit_ids, since, timeout, start_time):
+    """
+    Blocks until each of the given circuits is built, has failed, or has been
+    closed after the change with the given number.
+
+    :returns: **dict** of circuit ids to their last event after that change,
+      circuits that are still being built when **timeout** is reached are
+      either absent or have an event with their present status
+    """
+
+    circuits, unfinished = {}, set(circuit_ids)
+
+    with self._cond:
+      while True:
+        for circuit_id in list(unfinished):
+          change, circ = self._circuits.get(circuit_id) or self._closed_circuits.get(circuit_id) or (0, None)
+
+          if change > since:
+            circuits[circuit_id] = circ
+
+            if _is_circuit_finished(circ):
+              unfinished.remove(circuit_id)
+
+        if not unfinished:
+          return circuits
+
+        if timeout:
+          time_left = timeout - (time.time() - start_time)
+
+          if time_left <= 0:
+            return circuits
+
+          self._cond.wait(time_left)
+        else:
+          self._cond.wait()
+
+  def set_circuits(self, circuits):
+    with self._cond:
+      self._changes += 1
+      self._circuits = collections.OrderedDict([(circ.id, (self._changes, circ)) for circ in circuits])
+      self._cond.notify_all()
+
+  def set_streams(self, streams):
+    with self._cond:
+      self._streams = collections.OrderedDict([(stream.id, stream) for stream in streams])
+
+  def update(self, event_message):
+    """
+    Applies an event to our model if it's one we track.
+
+    :param stem.response.ControlMessage event_message: unparsed event
+    """
+
+    event_type = event_message.content(get_bytes = True)[0][2].split(b' ', 1)[0]
+
+    if event_type not in (b'CIRC', b'STREAM', b'CIRC_MINOR'):
+      return
+
+    # parse our own copy since our event thread does so for listeners
+
+    try:
+      event = stem.response.ControlMessage(event_message.content(get_bytes = True), None)
+      stem.response.convert('EVENT', event, arrived_at = time.time())
+    except stem.ProtocolError:
+      return  # our event thread will report this as a malformed event
+
+    with self._cond:
+      if event_type == b'STREAM':
+        if event.status in (StreamStatus.CLOSED, StreamStatus.FAILED):
+          self._streams.pop(event.id, None)
+        else:
+          self._streams[event.id] = event
+
+        return
+
+      if event_type == b'CIRC_MINOR':
+        if event.id not in self._circuits:
+          return
+
+        event = _apply_circ_minor(self._circuits[event.id][1], event)
+
+      self._changes += 1
+
+      if event.status in (CircStatus.CLOSED, CircStatus.FAILED):
+        self._circuits.pop(event.id, None)
+        self._closed_circuits[event.id] = (self._changes, event)
+
+        while len(self._closed_circuits) > TRACKED_CLOSED_CIRCUITS:
+          self._closed_circuits.popitem(last = False)
+      else:
+        self._circuits[event.id] = (self._changes, event)
+
+      self._cond.notify_all()
+
+  def listener(self, event):
+    """
+    Event listener that subscribes us to the events we track. Events are
+    applied as they're read, so this is a no-op.
+    """
+
+    pass
+
+
+class _ReplyStream(object):
+  """
+  Read-only file over the data block of a reply as it's read from the control
+  socket. Our reader thread adds lines as they arrive, and descriptor parsers
+  read them from another thread. We buffer at most **STREAM_BUFFER_LINES**,
+  beyond which our reader waits for the parser to catch up.
+
+  Like the streaming file of :class:`~stem.descriptor.remote.Query`, content
+  before the last position we were asked to tell() is discarded. Our parsers
+  only seek back to positions they've told, so this suffices for them.
+  """
+
+  def __init__(self):
+    self._lines = collections.deque()
+    self._cond = threading.Condition()
+    self._limit = STREAM_BUFFER_LINES
+    self._is_finished = False  # reply has been fully read
+    self._is_closed = False  # parser no longer wants our content
+
+    self._position = 0
+    self._mark = 0  # position of our last tell()
+    self._since_mark = []  # lines read since our last tell()
+
+  def readline(self):
+    with self._cond:
+      while not self._lines and not self._is_finished:
+        self._cond.wait()
+
+      if not self._lines:
+        return b''
+
+      line = self._lines.popleft()
+      self._cond.notify_all()
+
+    self._since_mark.append(line)
+    self._position += len(line)
+    return line
+
+  def tell(self):
+    self._mark = self._position
+    self._since_mark = []
+    return self._position
+
+  def seek(self, position):
+    if position != self._mark:
+      raise IOError('Unable to seek to %i, streamed content is only available from %i' % (position, self._mark))
+
+    with self._cond:
+      self._lines.extendleft(reversed(self._since_mark))
+
+    self._position, self._since_mark = self._mark, []
+
+  def close(self):
+    """
+    Discards content we've received or will receive, so our reader won't wait
+    on us.
+    """
+
+    with self._cond:
+      self._is_closed = True
+      self._lines.clear()
+      self._cond.notify_all()
+
+  def _add_line(self, line):
+    with self._cond:
+      while self._limit and len(self._lines) >= self._limit and not self._is_closed and not self._is_finished:
+        self._cond.wait()
+
+      if not self._is_closed and not self._is_finished:
+        self._lines.append(line + b'\n')
+        self._cond.notify_all()
+
+  def _set_unbounded(self):
+    with self._cond:
+      self._limit = None
+      self._cond.notify_all()
+
+  def _finish(self):
+    with self._cond:
+      self._is_finished = True
+      self._cond.notify_all()
+
+
+class _EventQueue(object):
+  """
+  Queue of events awaiting our listeners. This is similar to a queue.Queue,
+  but when we have a limit we can drop or coalesce events rather than
+  blocking.
+
+  :var int limit: maximum number of events we can hold, **None** if unbounded,
+    this includes events held by our event workers
+  :var stem.control.EventQueuePolicy policy: action taken when we're full
+  :var int dropped: number of events we've discarded
+  :var int coalesced: number of events replaced by a newer one
+
+  :param function is_reply_awaited: indicates if a reply to one of our
+    messages is awaited, in which case we exceed our limit rather than block
+  """
+
+  def __init__(self, is_reply_awaited = None):
+    self.limit = None
+    self.policy = EventQueuePolicy.BLOCK
+    self.dropped = 0
+    self.coalesced = 0
+
+    # Our reader thread both queues events and reads replies to our messages.
+    # If it blocks while a reply is awaited, and that reply is awaited by a
+    # listener, neither could proceed. So while replies are awaited we exceed
+    # our limit rather than block.
+
+    self._is_reply_awaited = is_reply_awaited
+
+    # Entries are [event_message, coalescing_key] lists so coalescing can
+    # replace a queued event in place, retaining its position.
+
+    self._entries = collections.deque()
+    self._coalescible = {}  # coalescing key => entry
+    self._unfinished = 0
+
+    # Events we've handed to our event workers count against our limit until
+    # they're provided to their listeners.
+
+    self._held = 0
+
+    self._lock = threading.Lock()
+    self._not_empty = threading.Condition(self._lock)
+    self._not_full = threading.Condition(self._lock)
+    self._all_done = threading.Condition(self._lock)
+
+  def set_limit(self, limit, policy):
+    with self._lock:
+      self.limit = limit
+      self.policy = policy
+      self._not_full.notify_all()
+
+  def stats(self):
+    with self._lock:
+      return EventQueueStats(len(self._entries) + self._held, self.dropped, self.coalesced)
+
+  def hold(self):
+    """
+    Counts an event that's awaiting an event worker against our limit.
+    """
+
+    with self._lock:
+      self._held += 1
+
+  def release(self, count = 1):
+    """
+    Indicates that events we're holding have been provided to their listeners
+    or discarded.
+
+    :param int count: number of events to release
+    """
+
+    with self._lock:
+      self._held = max(0, self._held - count)
+      self._not_full.notify_all()
+
+  def reply_awaited(self):
+    """
+    Wakes a blocked put() so it can check if a reply is now awaited.
+    """
+
+    with self._lock:
+      self._not_full.notify_all()
+
+  def qsize(self):
+    with self._lock:
+      return len(self._entries)
+
+  def put(self, event_message, ignore_limit = False):
+    """
+    Queues an event, applying our policy if we're full.
+
+    :param stem.response.ControlMessage event_message: event to be queued
+    :param bool ignore_limit: queues the message regardless of our limit
+    """
+
+    with self._lock:
+      key = None
+
+      if not ignore_limit:
+        if self.policy == EventQueuePolicy.COALESCE:
+          key = _coalescing_key(event_message)
+          entry = self._coalescible.get(key) if key else None
+
+          if entry:
+            entry[0] = event_message
+            self.coalesced += 1
+            return
+
+        while self._is_full():
+          if self.policy == EventQueuePolicy.DROP_NEWEST:
+            self.dropped += 1
+            return
+          elif self.policy == EventQueuePolicy.DROP_OLDEST and not self._entries:
+            # everything's with our event workers, so this is all we can drop
+
+            self.dropped += 1
+            return
+          elif self.policy == EventQueuePolicy.DROP_OLDEST and self._entries[0][0] is not _STOP_EVENT_LOOP:
+            self._pop()
+            self._task_done()
+            self.dropped += 1
+          elif self._is_reply_awaited and self._is_reply_awaited():
+            break
+          else:
+            self._not_full.wait()
+
+      entry = [event_message, key]
+
+      if key:
+        self._coalescible[key] = entry
+
+      self._entries.append(entry)
+      self._unfinished += 1
+      self._not_empty.notify()
+
+  def get(self):
+    """
+    Blocks until we have an event, then provides it.
+
+    :returns: oldest :class:`~stem.response.ControlMessage` in our queue
+    """
+
+    with self._lock:
+      while not self._entries:
+        self._not_empty.wait()
+
+      return self._pop()
+
+  def task_done(self):
+    with self._lock:
+      self._task_done()
+
+  def join(self):
+    with self._lock:
+      while self._unfinished:
+        self._all_done.wait()
+
+  def clear(self):
+    """
+    Discards everything that's in our queue.
+    """
+
+    with self._lock:
+      while self._entries:
+        if self._pop() is not _STOP_EVENT_LOOP:
+          self.dropped += 1
+
+        self._task_done()
+
+  def _is_full(self):
+    return self.limit is not None and len(self._entries) + self._held >= self.limit
+
+  def _pop(self):
+    event_message, key = self._entries.popleft()
+
+    if key:
+      del self._coalescible[key]
+
+    self._not_full.notify()
+    return event_message
+
+  def _task_done(self):
+    self._unfinished -= 1
+
+    if self._unfinished <= 0:
+      self._unfinished = 0
+      self._all_done.notify_all()
+
+
+def _notify_listeners(event_listeners, event):
+  """
+  Provides an event to each of the given listeners.
+
+  :param list event_listeners: functors to be notified
+  :param stem.response.events.Event event: event to provide them
+  """
+
+  for listener in event_listeners:
+    try:
+      listener(event)
+    except Exception as exc:
+      log.warn('Event listener raised an uncaught exception (%s): %s' % (exc, event))
+
+
+class _EventWorkers(object):
+  """
+  Pool of threads that notify our event listeners. Each event type is notified
+  by at most one thread at a time so its events are delivered in order, while
+  other event types are notified by the rest of the pool.
+
+  Events awaiting our threads are held by our controller's event queue, so
+  they count against its limit.
+
+  :var int size: number of threads in our pool
+  """
+
+  def __init__(self, size, event_queue):
+    self.size = size
+    self._event_queue = event_queue
+
+    self._lock = threading.Lock()
+    self._threads = []
+
+    # Event types with pending events, and the (listeners, event) tuples for
+    # each. Types are in the ready queue unless a thread is notifying them.
+
+    self._ready = queue.Queue()
+    self._pending = {}
+
+  def submit(self, event_type, event_listeners, event):
+    """
+    Queues an event to be provided to its listeners.
+
+    :param str event_type: type of event being provided
+    :param list event_listeners: functors to be notified
+    :param stem.response.events.Event event: event to provide them
+    """
+
+    self._event_queue.hold()
+
+    with self._lock:
+      if not self._threads:
+        for i in range(self.size):
+          worker = threading.Thread(target = self._run, args = (self._ready, self._pending), name = 'Event worker %i' % (i + 1))
+          worker.setDaemon(True)
+          worker.start()
+          self._threads.append(worker)
+
+      if event_type in self._pending:
+        self._pending[event_type].append((event_listeners, event))
+        return
+
+      self._pending[event_type] = collections.deque([(event_listeners, event)])
+
+    self._ready.put(event_type)
+
+  def stop(self):
+    """
+    Stops our threads, dropping any events we haven't yet notified listeners
+    of. The pool starts anew if further events are submitted.
+    """
+
+    with self._lock:
+      threads, ready, pending = self._threads, self._ready, self._pending
+      self._threads, self._ready, self._pending = [], queue.Queue(), {}
+
+      dropped = sum([len(events) for events in pending.values()])
+      pending.clear()
+
+    self._event_queue.release(dropped)
+
+    for t in threads:
+      ready.put(_STOP_EVENT_LOOP)
+
+    for t in threads:
+      if t.is_alive() and threading.current_thread() != t:
+        t.join()
+
+  def _run(self, ready, pending):
+    while True:
+      event_type = ready.get()
+
+      if event_type is _STOP_EVENT_LOOP:
+        break
+
+      with self._lock:
+        if not pending.get(event_type):
+          continue  # discarded when we were stopped
+
+        event_listeners, event = pending[event_type].popleft()
+
+      _notify_listeners(event_listeners, event)
+      self._event_queue.release()
+
+      # Take turns with other event types so a busy one can't starve them.
+
+      with self._lock:
+        if pending.get(event_type):
+          ready.put(event_type)
+        else:
+          pending.pop(event_type, None)
+
+
+class _RequestCache(object):
+  """
+  Cache of tor's replies. Values are divided into namespaces, each of which can
+  retain a limited number of values for a limited time. Values without a
+  namespace are each their own.
+
+  Callers are expected to hold our controller's cache lock.
+  """
+
+  def __init__(self):
+    self._limits = dict(CACHE_LIMITS)  # namespace => (max entries, ttl)
+    self._entries = {}  # namespace => OrderedDict of key => (cached at, value)
+    self._stats = {}  # namespace => [hits, misses, evictions, expirations]
+    self._last_expired = {}  # namespace => when we last discarded expired values
+
+  def get(self, key, namespace = None):
+    """
+    Provides a cached value, refreshing its position in our eviction order.
+
+    :returns: cached value, or **None** if we don't have it
+    """
+
+    namespace = namespace if namespace else key
+    entries, stats = self._entries.get(namespace), self._namespace_stats(namespace)
+    cached_at, value = entries.pop(key, (None, None)) if entries else (None, None)
+
+    if value is not None and self._is_expired(namespace, cached_at, time.time()):
+      value = None
+      stats[3] += 1
+
+    if value is None:
+      stats[1] += 1
+      return None
+
+    entries[key] = (cached_at, value)
+    stats[0] += 1
+    return value
+
+  def set(self, key, value, namespace = None):
+    namespace = namespace if namespace else key
+    entries = self._entries.setdefault(namespace, collections.OrderedDict())
+    entries.pop(key, None)
+    entries[key] = (time.time(), value)
+    self._trim(namespace)
+
+  def remove(self, key, namespace = None):
+    entries = self._entries.get(namespace if namespace else key)
+
+    if entries:
+      entries.pop(key, None)
+
+  def remove_namespace(self, namespace):
+    self._entries.pop(namespace, None)
+
+  def set_limit(self, namespace, max_entries, ttl):
+    self._limits[namespace] = (max_entries, ttl)
+    self._last_expired.pop(namespace, None)
+    self._trim(namespace)
+
+  def stats(self, namespace = None):
+    if namespace:
+      entries = self._entries.get(namespace, {})
+      return CacheStats(len(entries), *self._stats.get(namespace, [0, 0, 0, 0]))
+
+    totals = [sum(stats[i] for stats in self._stats.values()) for i in range(4)]
+    return CacheStats(sum(len(entries) for entries in self._entries.values()), *totals)
+
+  def clear(self):
+    self._entries = {}
+    self._last_expired = {}
+
+  def _namespace_stats(self, namespace):
+    stats = self._stats.get(namespace)
+
+    if stats is None:
+      stats = self._stats[namespace] = [0, 0, 0, 0]
+
+    return stats
+
+  def _is_expired(self, namespace, cached_at, now):
+    ttl = self._limits.get(namespace, (None, None))[1]
+    return ttl is not None and cached_at + ttl <= now
+
+  def _trim(self, namespace):
+    """
+    Evicts our least recently used values until we're within our limit. At
+    most once per ttl we also sweep for values that have expired, so values
+    that are never asked for again don't linger.
+    """
+
+    entries = self._entries.get(namespace)
+
+    if not entries:
+      return
+
+    max_entries, ttl = self._limits.get(namespace, (None, None))
+    stats = self._namespace_stats(namespace)
+
+    if ttl is not None:
+      now = time.time()
+
+      if now - self._last_expired.get(namespace, 0) >= ttl:
+        self._last_expired[namespace] = now
+
+        for key, (cached_at, _) in list(entries.items()):
+          if self._is_expired(namespace, cached_at, now):
+            del entries[key]
+            stats[3] += 1
+
+    if max_entries is not None:
+      while len(entries) > max_entries:
+        entries.popitem(last = False)
+        stats[2] += 1
+
+
+def _match_conf_case(reply, params):
+  """
+  Maps GETCONF entries back to the parameters that the user requested so the
+  capitalization matches (ie, if they request "exitpolicy" then that should be
+  the key rather than "ExitPolicy"). When the same configuration key is
+  provided multiple times this determines the case based on the first and
+  ignores the rest.
+
+  This retains the tor provided camel casing of MAPPED_CONFIG_KEYS entries
+  since the user didn't request those by their key, so we can't be sure what
+  they wanted.
+
+  :param dict reply: 'config key => [value1, value2...]' mappings to be
+    adjusted in place
+  :param list params: configuration options the user requested
+  """
+
+  for key in list(reply.keys()):
+    if not key.lower() in MAPPED_CONFIG_KEYS.values():
+      user_expected_key = _case_insensitive_lookup(params, key, key)
+
+      if key != user_expected_key:
+        reply[user_expected_key] = reply[key]
+        del reply[key]
+
+
+def _get_conf_dict_to_response(config_dict, default, multiple):
+  """
+  Translates a dictionary of 'config key => [value1, value2...]' into the
+  return value of :func:`~stem.control.Controller.get_conf_map`, taking into
+  account what the caller requested.
+  """
+
+  return_dict = {}
+
+  for key, values in list(config_dict.items()):
+    if values == []:
+      # config option was unset
+      if default != UNDEFINED:
+        return_dict[key] = default
+      else:
+        return_dict[key] = [] if multiple else None
+    else:
+      return_dict[key] = values if multiple else values[0]
+
+  return return_dict
+
+
+def _set_options_query(params, reset):
+  """
+  Constructs a SETCONF or RESETCONF query.
+
+  :param list params: **(key, value)** tuples for the options to be set
+  :param bool reset: constructs a RESETCONF if **True**, SETCONF otherwise
+
+  :returns: **str** with the query for tor
+
+  :raises: **ValueError** if a value isn't a string, list, or **None**
+  """
+
+  query_comp = ['RESETCONF' if reset else 'SETCONF']
+
+  for param, value in params:
+    if isinstance(value, str):
+      query_comp.append('%s="%s"' % (param, value.strip()))
+    elif isinstance(value, collections.Iterable):
+      query_comp.extend(['%s="%s"' % (param, val.strip()) for val in value])
+    elif not value:
+      query_comp.append(param)
+    else:
+      raise ValueError('Cannot set %s to %s since the value was a %s but we only accept strings' % (param, value, type(value).__name__))
+
+  return ' '.join(query_comp)
+
+
+def _check_set_options_response(query, params, response):
+  """
+  Checks that tor accepted a SETCONF or RESETCONF query.
+
+  :param str query: query we sent tor
+  :param list params: **(key, value)** tuples for the options we set
+  :param stem.response.ControlMessage response: tor's reply
+
+  :raises:
+    * :class:`stem.InvalidArguments` if configuration options requested was
+      invalid
+    * :class:`stem.InvalidRequest` if the configuration setting is impossible
+      or if there's a syntax error in the configuration values
+    * :class:`stem.ProtocolError` if tor's reply is unexpected
+  """
+
+  stem.response.convert('SINGLELINE', response)
+
+  if response.is_ok():
+    return
+
+  log.debug('%s (failed, code: %s, message: %s)' % (query, response.code, response.message))
+  immutable_params = [k for k, v in params if stem.util.str_tools._to_unicode(k).lower() in IMMUTABLE_CONFIG_OPTIONS]
+
+  if immutable_params:
+    raise stem.InvalidArguments(message = "%s cannot be changed while tor's running" % ', '.join(sorted(immutable_params)), arguments = immutable_params)
+
+  if response.code == '552':
+    if response.message.startswith("Unrecognized option: Unknown option '"):
+      key = response.message[37:response.message.find("'", 37)]
+      raise stem.InvalidArguments(response.code, response.message, [key])
+    raise stem.InvalidRequest(response.code, response.message)
+  elif response.code in ('513', '553'):
+    raise stem.InvalidRequest(response.code, response.message)
+  else:
+    raise stem.ProtocolError('Returned unexpected status code: %s' % response.code)
+
+
+def _extend_circuit_query(circuit_id, path, purpose):
+  """
+  Constructs an EXTENDCIRCUIT query.
+
+  :param str circuit_id: id of a circuit to be extended, zero for a new one
+  :param list,str path: one or more relays to make a circuit through
+  :param str purpose: 'general' or 'controller'
+
+  :returns: **str** with the query for tor
+  """
+
+  args = [circuit_id]
+
+  if stem.util._is_str(path):
+    path = [path]
+
+  if path:
+    args.append(','.join(path))
+
+  if purpose:
+    args.append('purpose=%s' % purpose)
+
+  return 'EXTENDCIRCUIT %s' % ' '.join(args)
+
+
+def _extended_circuit_id(response):
+  """
+  Provides the circuit id from tor's reply to an EXTENDCIRCUIT query.
+
+  :param stem.response.ControlMessage response: tor's reply
+
+  :returns: **str** with the circuit id
+
+  :raises:
+    * :class:`stem.InvalidRequest` if one of the parameters were invalid
+    * :class:`stem.ProtocolError` if tor's reply is unexpected
+  """
+
+  stem.response.convert('SINGLELINE', response)
+
+  if response.code in ('512', '552'):
+    raise stem.InvalidRequest(response.code, response.message)
+  elif not response.is_ok():
+    raise stem.ProtocolError('EXTENDCIRCUIT returned unexpected response code: %s' % response.code)
+
+  if not response.message.startswith('EXTENDED '):
+    raise stem.ProtocolError('EXTENDCIRCUIT response invalid:\n%s', response)
+
+  return response.message.split(' ', 1)[1]
+
+
+def _status_events(event_type, status):
+  """
+  Provides events for each line of a 'GETINFO circuit-status' or
+  'GETINFO stream-status' reply.
+
+  :param str event_type: type of event the lines are akin to
+  :param str status: content of the GETINFO reply
+
+  :returns: **list** of :class:`~stem.response.events.Event` for each line
+  """
+
+  events = []
+
+  for line in status.splitlines():
+    event = stem.socket.recv_message(io.BytesIO(stem.util.str_tools._to_bytes('650 %s %s\r\n' % (event_type, line))))
+    stem.response.convert('EVENT', event, arrived_at = 0)
+    events.append(event)
+
+  return events
+
+
+def _apply_circ_minor(circ, circ_minor):
+  """
+  Provides a circuit's CIRC event, updated with the changes of a CIRC_MINOR
+  event.
+
+  :param stem.response.events.CircuitEvent circ: event for the circuit
+  :param stem.response.events.CircMinorEvent circ_minor: changes to the circuit
+
+  :returns: :class:`~stem.response.events.CircuitEvent` with our changes
+  """
+
+  positional_args = circ.positional_args[:2]
+  path_args = circ_minor.positional_args[2:3] or circ.positional_args[2:3]
+
+  keyword_args = dict(circ.keyword_args)
+  keyword_args.update([(k, v) for (k, v) in circ_minor.keyword_args.items() if k not in ('OLD_PURPOSE', 'OLD_HS_STATE')])
+
+  # values with spaces, such as a SOCKS_USERNAME, were quoted so they need to
+  # be again
+
+  keyword_args = [('%s="%s"' if ' ' in v else '%s=%s') % (k, v) for (k, v) in keyword_args.items()]
+  event = stem.socket.recv_message(io.BytesIO(stem.util.str_tools._to_bytes('650 CIRC %s\r\n' % ' '.join(positional_args + path_args + keyword_args))))
+
+  # retain when the circuit's status changed, so callers can tell how long it
+  # took to be built
+
+  stem.response.convert('EVENT', event, arrived_at = circ.arrived_at)
+  return event
+
+
+def _is_circuit_finished(circ):
+  """
+  Checks if a circuit is no longer being built, either because it's done or
+  failed.
+
+  :param stem.response.events.CircuitEvent circ: event for our circuit
+
+  :returns: **True** if the circuit is built, failed, or closed
+  """
+
+  return circ.status in (CircStatus.BUILT, CircStatus.FAILED, CircStatus.CLOSED)
+
+
+def _is_circuit_built(circ):
+  """
+  Checks the CIRC event for a circuit we're waiting to be built.
+
+  :param stem.response.events.CircuitEvent circ: event for our circuit
+
+  :returns: **True** if the circuit is built, **False** if it's still in
+    progress
+
+  :raises: :class:`stem.CircuitExtensionFailed` if the circuit failed
+  """
+
+  if circ.status == CircStatus.BUILT:
+    return True
+  elif circ.status == CircStatus.FAILED:
+    raise stem.CircuitExtensionFailed('Circuit failed to be created: %s' % circ.reason, circ)
+  elif circ.status == CircStatus.CLOSED:
+    raise stem.CircuitExtensionFailed('Circuit was closed prior to build', circ)
+
+  return False
+
+
 def _parse_circ_path(path):
   """
   Parses a circuit path as a list of **(fingerprint, nickname)** tuples. Tor
@@ -9,6 +9,7 @@ Package for parsing and processing descriptor data.
 ::
 
   parse_file - Parses the descriptors in a file.
+  validate_signatures - Checks the signatures of many descriptors.
   create - Creates a new custom descriptor.
   create_signing_key - Cretes a signing key that can be used for creating descriptors.
 
@@ -31,6 +32,7 @@ Package for parsing and processing descriptor data.
   =========== ===========
   SHA1        SHA1 hash
   SHA256      SHA256 hash
+  SHA3_256    SHA3-256 hash
   =========== ===========
 
 .. data:: DigestEncoding (enum)
@@ -89,6 +91,8 @@ import codecs
 import collections
 import copy
 import io
+import mmap
+import multiprocessing
 import os
 import random
 import re
@@ -107,8 +111,14 @@ try:
 except ImportError:
   from stem.util.ordereddict import OrderedDict
 
+if stem.prereq._is_lru_cache_available():
+  from functools import lru_cache
+else:
+  from stem.util.lru_cache import lru_cache
+
 __all__ = [
   'export',
+  'index',
   'reader',
   'remote',
   'extrainfo_descriptor',
@@ -118,6 +128,7 @@ __all__ = [
   'router_status_entry',
   'tordnsel',
   'parse_file',
+  'validate_signatures',
   'Descriptor',
 ]
 
@@ -132,6 +143,13 @@ KEYWORD_CHAR = 'a-zA-Z0-9-'
 WHITESPACE = ' \t'
 KEYWORD_LINE = re.compile('^([%s]+)(?:[%s]+(.*))?$' % (KEYWORD_CHAR, WHITESPACE))
 SPECIFIC_KEYWORD_LINE = '^(%%s)(?:[%s]+(.*))?$' % WHITESPACE
+
+# Characters that can follow a keyword in a SPECIFIC_KEYWORD_LINE, for memory
+# mapped files to match the same lines. The regex's '$' only matches before a
+# '\n', so a carriage return doesn't end a keyword and 'keyword\r\n' isn't a
+# match for either.
+
+MAPPED_KEYWORD_TERMINATORS = (b'',) + tuple(c.encode('ascii') for c in WHITESPACE) + (b'\n',)
 PGP_BLOCK_START = re.compile('^-----BEGIN ([%s%s]+)-----$' % (KEYWORD_CHAR, WHITESPACE))
 PGP_BLOCK_END = '-----END %s-----'
 EMPTY_COLLECTION = ([], {}, set())
@@ -140,6 +158,11 @@ DIGEST_TYPE_INFO = b'\x00\x01'
 DIGEST_PADDING = b'\xFF'
 DIGEST_SEPARATOR = b'\x00'
 
+# Number of public keys we keep loaded. Authority signing keys are few and
+# long lived, but relays each have their own signing and onion keys.
+
+PUBLIC_KEY_CACHE_SIZE = 8192
+
 CRYPTO_BLOB = """
 MIGJAoGBAJv5IIWQ+WDWYUdyA/0L8qbIkEVH/cwryZWoIaPAzINfrw1WfNZGtBmg
 skFtXhOHHqTRN4GPPrZsAIUOQGzQtGb66IQgT4tO/pj+P6QmSCCdTfhvGfgTCsC+
@@ -149,6 +172,7 @@ WPi4Fl2qryzTb3QO5r5x7T8OsG2IBUET1bLQzmtbC560SYR49IvVAgMBAAE=
 DigestHash = stem.util.enum.UppercaseEnum(
   'SHA1',
   'SHA256',
+  'SHA3_256',
 )
 
 DigestEncoding = stem.util.enum.UppercaseEnum(
@@ -194,7 +218,7 @@ class SigningKey(collections.namedtuple('SigningKey', ['private', 'public', 'pub
   """
 
 
-def parse_file(descriptor_file, descriptor_type = None, validate = False, document_handler = DocumentHandler.ENTRIES, normalize_newlines = None, **kwargs):
+def parse_file(descriptor_file, descriptor_type = None, validate = False, document_handler = DocumentHandler.ENTRIES, normalize_newlines = None, memory_map = False, **kwargs):
   """
   Simple function to read the descriptor contents from a file, providing an
   iterator for its :class:`~stem.descriptor.__init__.Descriptor` contents.
@@ -254,6 +278,10 @@ def parse_file(descriptor_file, descriptor_type = None, validate = False, docume
     which to parse the :class:`~stem.descriptor.networkstatus.NetworkStatusDocument`
   :param bool normalize_newlines: converts windows newlines (CRLF), this is the
     default when reading data directories on windows
+  :param bool memory_map: if **descriptor_file** is a path then read it through
+    a memory map, finding descriptor boundaries without scanning line by line.
+    This is much faster for large files like tor's cached-descriptors, but the
+    file must not be truncated while we're reading it.
   :param dict kwargs: additional arguments for the descriptor constructor
 
   :returns: iterator for :class:`~stem.descriptor.__init__.Descriptor` instances in the file
@@ -277,7 +305,7 @@ def parse_file(descriptor_file, descriptor_type = None, validate = False, docume
     handler = _parse_file_for_tarfile
 
   if handler:
-    for desc in handler(descriptor_file, descriptor_type, validate, document_handler, **kwargs):
+    for desc in handler(descriptor_file, descriptor_type, validate, document_handler, memory_map = memory_map, **kwargs):
       yield desc
 
     return
@@ -352,9 +380,17 @@ def parse_file(descriptor_file, descriptor_type = None, validate = False, docume
 
 
 def _parse_file_for_path(descriptor_file, *args, **kwargs):
+  memory_map = kwargs.pop('memory_map', False)
+
   with open(descriptor_file, 'rb') as desc_file:
-    for desc in parse_file(desc_file, *args, **kwargs):
-      yield desc
+    mapped_file = _MemoryMappedFile.for_file(desc_file) if memory_map else None
+
+    try:
+      for desc in parse_file(mapped_file if mapped_file else desc_file, *args, **kwargs):
+        yield desc
+    finally:
+      if mapped_file:
+        mapped_file.close()
 
 
 def _parse_file_for_tar_path(descriptor_file, *args, **kwargs):
@@ -445,6 +481,94 @@ def _parse_metrics_file(descriptor_type, major_version, minor_version, descripto
     raise TypeError("Unrecognized metrics descriptor format. type: '%s', version: '%i.%i'" % (descriptor_type, major_version, minor_version))
 
 
+def validate_signatures(descriptors, key_certs = None, workers = None):
+  """
+  Checks the signatures of many descriptors at once, decrypting them within a
+  pool of processes. This is for bulk validation such as checking a year of
+  archived consensuses and votes...
+
+  ::
+
+    import stem.descriptor
+
+    certs = list(stem.descriptor.parse_file('cached-certs', 'dir-key-certificate-3 1.0'))
+    consensuses = list(stem.descriptor.parse_file('consensuses-2018-06.tar', document_handler = stem.descriptor.DocumentHandler.BARE_DOCUMENT))
+
+    for consensus, result in zip(consensuses, stem.descriptor.validate_signatures(consensuses, certs)):
+      if result:
+        print('%s is not validly signed: %s' % (consensus.get_archive_path(), result))
+
+  This supports :class:`~stem.descriptor.networkstatus.NetworkStatusDocumentV3`
+  (consensuses and votes), :class:`~stem.descriptor.server_descriptor.RelayDescriptor`,
+  and :class:`~stem.descriptor.hidden_service_descriptor.HiddenServiceDescriptor`.
+  Descriptors of other types have a **ValueError** as their result.
+
+  .. versionadded:: 1.8.0
+
+  :param list descriptors: descriptors to be validated
+  :param list key_certs: :class:`~stem.descriptor.networkstatus.KeyCertificate`
+    to validate network status documents against
+  :param int workers: number of processes to validate with, if **None** this
+    is the number of cpus and if zero we validate within this process
+
+  :returns: **list** with the result for each descriptor, **None** if it's
+    validly signed and otherwise the **ValueError** explaining why it isn't
+  """
+
+  descriptors = list(descriptors)
+  results = [None] * len(descriptors)
+  pending, pending_signatures = [], []
+
+  for i, desc in enumerate(descriptors):
+    try:
+      signatures = desc._signatures(key_certs)
+    except ValueError as exc:
+      results[i] = exc
+      continue
+
+    pending.append(i)
+    pending_signatures.append(signatures)
+
+  if workers == 0 or not pending:
+    signed_digests = [_signed_digests(signatures) for signatures in pending_signatures]
+  else:
+    pool = multiprocessing.Pool(workers)
+
+    try:
+      signed_digests = pool.map(_signed_digests, pending_signatures)
+    finally:
+      pool.terminate()
+      pool.join()
+
+  for i, (digests, exc) in zip(pending, signed_digests):
+    if exc is None:
+      try:
+        descriptors[i]._check_signatures(digests)
+      except ValueError as check_exc:
+        exc = check_exc
+
+    results[i] = exc
+
+  return results
+
+
+def _signed_digests(signatures):
+  """
+  Decrypts the digests of several signatures. This is a separate function so
+  it can be called within a worker process.
+
+  :param list signatures: (signing_key, signature) tuples
+
+  :returns: **tuple** of the form (digests, exception), the later being the
+    first **ValueError** we encountered (if any)
+  """
+
+  try:
+    return [_digest_for_signature(signing_key, signature) for signing_key, signature in signatures], None
+  except ValueError as exc:
+    return None, exc
+
+
 def _descriptor_content(attr = None, exclude = (), header_template = (), footer_template = ()):
   """
   Constructs a minimal descriptor with the given attributes. The content we
@@ -920,55 +1044,32 @@ class Descriptor(object):
     :raises: ValueError if unable to provide a validly signed digest
     """
 
-    if not stem.prereq.is_crypto_available():
-      raise ValueError('Generating the signed digest requires the cryptography module')
+    return _digest_for_signature(signing_key, signature)
 
-    from cryptography.hazmat.backends import default_backend
-    from cryptography.hazmat.primitives.serialization import load_der_public_key
-    from cryptography.utils import int_to_bytes, int_from_bytes
-
-    key = load_der_public_key(_bytes_for_block(signing_key), default_backend())
-    modulus = key.public_numbers().n
-    public_exponent = key.public_numbers().e
+  def _signatures(self, key_certs = None):
+    """
+    Provides the signatures that :func:`~stem.descriptor.validate_signatures`
+    should decrypt for us.
 
-    sig_as_bytes = _bytes_for_block(signature)
-    sig_as_long = int_from_bytes(sig_as_bytes, byteorder='big')  # convert signature to an int
-    blocksize = len(sig_as_bytes)  # 256B for NetworkStatusDocuments, 128B for others
+    :param list key_certs: key certificates to validate against
 
-    # use the public exponent[e] & the modulus[n] to decrypt the int
-    decrypted_int = pow(sig_as_long, public_exponent, modulus)
+    :returns: **list** of (signing_key, signature) tuples
 
-    # convert the int to a byte array
-    decrypted_bytes = int_to_bytes(decrypted_int, blocksize)
+    :raises: **ValueError** if we don't have signatures that can be validated
+    """
 
-    ############################################################################
-    # The decrypted bytes should have a structure exactly along these lines.
-    # 1 byte  - [null '\x00']
-    # 1 byte  - [block type identifier '\x01'] - Should always be 1
-    # N bytes - [padding '\xFF' ]
-    # 1 byte  - [separator '\x00' ]
-    # M bytes - [message]
-    # Total   - 128 bytes
-    # More info here http://www.ietf.org/rfc/rfc2313.txt
-    #                esp the Notes in section 8.1
-    ############################################################################
+    raise ValueError("%s doesn't have signatures we can validate" % type(self).__name__)
 
-    try:
-      if decrypted_bytes.index(DIGEST_TYPE_INFO) != 0:
-        raise ValueError('Verification failed, identifier missing')
-    except ValueError:
-      raise ValueError('Verification failed, malformed data')
+  def _check_signatures(self, signed_digests):
+    """
+    Checks the digests our signatures decrypted to.
 
-    try:
-      identifier_offset = 2
+    :param list signed_digests: digests for each of our **_signatures()**
 
-      # find the separator
-      seperator_index = decrypted_bytes.index(DIGEST_SEPARATOR, identifier_offset)
-    except ValueError:
-      raise ValueError('Verification failed, seperator not found')
+    :raises: **ValueError** if we're not validly signed
+    """
 
-    digest_hex = codecs.encode(decrypted_bytes[seperator_index + 1:], 'hex_codec')
-    return stem.util.str_tools._to_unicode(digest_hex.upper())
+    raise ValueError("%s doesn't have signatures we can validate" % type(self).__name__)
 
   def _content_range(self, start = None, end = None):
     """
@@ -999,39 +1100,55 @@ class Descriptor(object):
 
     return content[start_index:end_index]
 
-  def __getattr__(self, name):
-    # We can't use standard hasattr() since it calls this function, recursing.
-    # Doing so works since it stops recursing after several dozen iterations
-    # (not sure why), but horrible in terms of performance.
+  @classmethod
+  def _attributes_by_parser(cls):
+    """
+    Provides a mapping of our parsing functions to a tuple of **(attribute,
+    default)** pairs for the attributes it populates. This is computed once
+    for each descriptor class.
+    """
 
-    def has_attr(attr):
-      try:
-        super(Descriptor, self).__getattribute__(attr)
-        return True
-      except:
-        return False
+    attributes_by_parser = cls.__dict__.get('_ATTRIBUTES_BY_PARSER')
+
+    if attributes_by_parser is None:
+      attributes_by_parser = {}
+
+      for attr, (default, parsing_function) in cls.ATTRIBUTES.items():
+        attributes_by_parser[parsing_function] = attributes_by_parser.get(parsing_function, ()) + ((attr, default),)
 
-    # If an attribute we should have isn't present it means either...
+      cls._ATTRIBUTES_BY_PARSER = attributes_by_parser
+
+    return attributes_by_parser
+
+  def __getattr__(self, name):
+    # This is only called when an attribute is missing, so if it's one that
+    # we should have then either...
     #
     #   a. we still need to lazy load this
     #   b. we read the whole descriptor but it wasn't present, so needs the default
 
-    if name in self.ATTRIBUTES and not has_attr(name):
-      default, parsing_function = self.ATTRIBUTES[name]
+    attribute = self.ATTRIBUTES.get(name)
 
-      if self._lazy_loading:
-        try:
-          parsing_function(self, self._entries)
-        except (ValueError, KeyError):
-          # Set defaults for anything the parsing function should've covered.
-          # Despite having a validation failure some attributes might be set in
-          # which case we keep them.
+    if attribute is None:
+      return super(Descriptor, self).__getattribute__(name)
 
-          for attr_name, (attr_default, attr_parser) in self.ATTRIBUTES.items():
-            if parsing_function == attr_parser and not has_attr(attr_name):
-              setattr(self, attr_name, _copy(attr_default))
-      else:
-        setattr(self, name, _copy(default))
+    default, parsing_function = attribute
+
+    if self._lazy_loading:
+      try:
+        parsing_function(self, self._entries)
+      except (ValueError, KeyError):
+        # Set defaults for anything the parsing function should've covered.
+        # Despite having a validation failure some attributes might be set in
+        # which case we keep them.
+
+        attrs = self.__dict__
+
+        for attr_name, attr_default in self._attributes_by_parser()[parsing_function]:
+          if attr_name not in attrs:
+            attrs[attr_name] = _copy(attr_default)
+    else:
+      setattr(self, name, _copy(default))
 
     return super(Descriptor, self).__getattribute__(name)
 
@@ -1091,6 +1208,94 @@ class NewlineNormalizer(object):
     return self._wrapped_file.tell(*args)
 
 
+class _MemoryMappedFile(mmap.mmap):
+  """
+  Read-only memory map of a descriptor file. Besides the file methods mmap
+  provides this lets us find lines with a given keyword through mmap.find()
+  rather than reading the file line by line.
+  """
+
+  name = None
+
+  @staticmethod
+  def for_file(descriptor_file):
+    """
+    Memory maps the given file, starting at its current position.
+
+    :param file descriptor_file: opened file to be mapped
+
+    :returns: :class:`~stem.descriptor.__init__._MemoryMappedFile` for the
+      file, or **None** if it cannot be mapped (for instance, if it's empty)
+    """
+
+    try:
+      position = descriptor_file.tell()
+
+      if os.fstat(descriptor_file.fileno()).st_size <= position:
+        return None  # mmap can't map empty files
+
+      mapped_file = _MemoryMappedFile(descriptor_file.fileno(), 0, access = mmap.ACCESS_READ)
+    except (AttributeError, EnvironmentError, ValueError):
+      return None
+
+    mapped_file.name = getattr(descriptor_file, 'name', None)
+    mapped_file.seek(position)
+    return mapped_file
+
+  def readlines(self):
+    # python 2.7's mmap.read() requires a size
+
+    remainder = self[self.tell():]
+    self.seek(len(self))
+    return io.BytesIO(remainder).readlines()
+
+  def find_line(self, prefixes, start, end = None, is_keyword = True):
+    """
+    Provides the first line at or after the start that begins with one of the
+    given prefixes.
+
+    :param list prefixes: **bytes** the line should begin with
+    :param int start: position to search from, this should be a line's start
+    :param int end: position that lines must begin before
+    :param bool is_keyword: only match lines where the prefix is followed by
+      whitespace or the end of the line
+
+    :returns: **tuple** of the form (position, prefix), this is (-1, None) if
+      no line matches
+    """
+
+    if end is None:
+      end = len(self)
+
+    match_position, match_prefix = -1, None
+
+    for prefix in prefixes:
+      position = start if self[start:start + len(prefix)] == prefix else self._next_line(prefix, start)
+
+      while position != -1 and position < end:
+        if match_position != -1 and position >= match_position:
+          break  # an earlier line already matched another prefix
+        elif not is_keyword or self[position + len(prefix):position + len(prefix) + 1] in MAPPED_KEYWORD_TERMINATORS:
+          match_position, match_prefix = position, prefix
+          break
+
+        position = self._next_line(prefix, position + 1)
+
+    return match_position, match_prefix
+
+  def line_end(self, position):
+    """
+    Provides the position after the line that contains the given position.
+    """
+
+    newline = self.find(b'\n', position)
+    return len(self) if newline == -1 else newline + 1
+
+  def _next_line(self, prefix, position):
+    index = self.find(b'\n' + prefix, position)
+    return -1 if index == -1 else index + 1
+
+
 def _read_until_keywords(keywords, descriptor_file, inclusive = False, ignore_first = False, skip = False, end_position = None, include_ending_keyword = False):
   """
   Reads from the descriptor file until we get to one of the given keywords or reach the
@@ -1110,12 +1315,15 @@ def _read_until_keywords(keywords, descriptor_file, inclusive = False, ignore_fi
     **True**
   """
 
-  content = None if skip else []
-  ending_keyword = None
-
   if stem.util._is_str(keywords):
     keywords = (keywords,)
 
+  if isinstance(descriptor_file, _MemoryMappedFile):
+    return _read_mapped_until_keywords(keywords, descriptor_file, inclusive, ignore_first, skip, end_position, include_ending_keyword)
+
+  content = None if skip else []
+  ending_keyword = None
+
   if ignore_first:
     first_line = descriptor_file.readline()
 
@@ -1155,6 +1363,44 @@ def _read_until_keywords(keywords, descriptor_file, inclusive = False, ignore_fi
     return content
 
 
+def _read_mapped_until_keywords(keywords, mapped_file, inclusive, ignore_first, skip, end_position, include_ending_keyword):
+  """
+  Counterpart of :func:`~stem.descriptor.__init__._read_until_keywords` for
+  memory mapped files. Rather than matching each line against our keywords
+  this jumps directly to the line that ends our content.
+  """
+
+  start = mapped_file.tell()
+  search_start = mapped_file.line_end(start) if ignore_first else start
+  ending_keyword = None
+
+  # lines that begin at or after the end_position aren't read
+
+  if end_position and end_position < len(mapped_file):
+    is_line_start = mapped_file[end_position - 1:end_position] == b'\n'
+    search_end = end_position if is_line_start else mapped_file.line_end(end_position)
+  else:
+    search_end = len(mapped_file)
+
+  search_end = max(search_start, search_end)
+  keyword_bytes = [stem.util.str_tools._to_bytes(keyword) for keyword in keywords]
+  position, keyword = mapped_file.find_line(keyword_bytes, search_start, search_end)
+
+  if position == -1:
+    end = search_end
+  else:
+    ending_keyword = keywords[keyword_bytes.index(keyword)]
+    end = mapped_file.line_end(position) if inclusive else position
+
+  content = None if skip else io.BytesIO(mapped_file[start:end]).readlines()
+  mapped_file.seek(end)
+
+  if include_ending_keyword:
+    return (content, ending_keyword)
+  else:
+    return content
+
+
 def _bytes_for_block(content):
   """
   Provides the base64 decoded content of a pgp-style block.
@@ -1173,38 +1419,132 @@ def _bytes_for_block(content):
   return base64.b64decode(stem.util.str_tools._to_bytes(content))
 
 
-def _get_pseudo_pgp_block(remaining_contents):
+@lru_cache(maxsize = PUBLIC_KEY_CACHE_SIZE)
+def _public_key(signing_key):
+  """
+  Loads a public key. This is costly relative to using the key, so keys are
+  cached by their block.
+
+  :param str signing_key: key block to be loaded
+
+  :returns: **cryptography.hazmat.primitives.asymmetric.rsa.RSAPublicKey**
+    for the key
+  """
+
+  from cryptography.hazmat.backends import default_backend
+  from cryptography.hazmat.primitives.serialization import load_der_public_key
+
+  return load_der_public_key(_bytes_for_block(signing_key), default_backend())
+
+
+def _digest_for_signature(signing_key, signature):
+  """
+  Provides the signed digest we should have given this key and signature.
+
+  :param str signing_key: key block used to make this signature
+  :param str signature: signed digest for this descriptor content
+
+  :returns: the digest string encoded in uppercase hex
+
+  :raises: ValueError if unable to provide a validly signed digest
   """
-  Checks if given contents begins with a pseudo-Open-PGP-style block and, if
-  so, pops it off and provides it back to the caller.
 
-  :param list remaining_contents: lines to be checked for a public key block
+  if not stem.prereq.is_crypto_available():
+    raise ValueError('Generating the signed digest requires the cryptography module')
+
+  key = _public_key(signing_key)
+  sig_as_bytes = _bytes_for_block(signature)
+
+  if hasattr(key, 'recover_data_from_signature'):
+    # Added in cryptography 3.3. This decrypts the signature and checks its
+    # padding within openssl, which is several times faster than doing so
+    # ourselves.
 
-  :returns: **tuple** of the (block_type, content) or None if it doesn't exist
+    from cryptography.exceptions import InvalidSignature
+    from cryptography.hazmat.primitives.asymmetric.padding import PKCS1v15
+
+    try:
+      digest = key.recover_data_from_signature(sig_as_bytes, PKCS1v15(), None)
+    except InvalidSignature:
+      raise ValueError('Verification failed, malformed data')
+
+    return stem.util.str_tools._to_unicode(codecs.encode(digest, 'hex_codec').upper())
+
+  from cryptography.utils import int_to_bytes, int_from_bytes
+
+  modulus = key.public_numbers().n
+  public_exponent = key.public_numbers().e
+
+  sig_as_long = int_from_bytes(sig_as_bytes, byteorder='big')  # convert signature to an int
+  blocksize = len(sig_as_bytes)  # 256B for NetworkStatusDocuments, 128B for others
+
+  # use the public exponent[e] & the modulus[n] to decrypt the int
+  decrypted_int = pow(sig_as_long, public_exponent, modulus)
+
+  # convert the int to a byte array
+  decrypted_bytes = int_to_bytes(decrypted_int, blocksize)
+
+  ############################################################################
+  # The decrypted bytes should have a structure exactly along these lines.
+  # 1 byte  - [null '\x00']
+  # 1 byte  - [block type identifier '\x01'] - Should always be 1
+  # N bytes - [padding '\xFF' ]
+  # 1 byte  - [separator '\x00' ]
+  # M bytes - [message]
+  # Total   - 128 bytes
+  # More info here http://www.ietf.org/rfc/rfc2313.txt
+  #                esp the Notes in section 8.1
+  ############################################################################
+
+  try:
+    if decrypted_bytes.index(DIGEST_TYPE_INFO) != 0:
+      raise ValueError('Verification failed, identifier missing')
+  except ValueError:
+    raise ValueError('Verification failed, malformed data')
+
+  try:
+    identifier_offset = 2
+
+    # find the separator
+    seperator_index = decrypted_bytes.index(DIGEST_SEPARATOR, identifier_offset)
+  except ValueError:
+    raise ValueError('Verification failed, seperator not found')
+
+  digest_hex = codecs.encode(decrypted_bytes[seperator_index + 1:], 'hex_codec')
+  return stem.util.str_tools._to_unicode(digest_hex.upper())
+
+
+def _get_pseudo_pgp_block(lines, start = 0):
+  """
+  Checks if the line at the given index begins a pseudo-Open-PGP-style block
+  and, if so, provides it back to the caller along with the index of the first
+  line after it.
+
+  :param list lines: descriptor content split into lines
+  :param int start: index of the line to be checked for a public key block
+
+  :returns: **tuple** of the (block_type, content, end_index) or None if it
+    doesn't exist
 
   :raises: **ValueError** if the contents starts with a key block but it's
     malformed (for instance, if it lacks an ending line)
   """
 
-  if not remaining_contents:
+  if start >= len(lines):
     return None  # nothing left
 
-  block_match = PGP_BLOCK_START.match(remaining_contents[0])
+  block_match = PGP_BLOCK_START.match(lines[start])
 
   if block_match:
     block_type = block_match.groups()[0]
-    block_lines = []
     end_line = PGP_BLOCK_END % block_type
 
-    while True:
-      if not remaining_contents:
-        raise ValueError("Unterminated pgp style block (looking for '%s'):\n%s" % (end_line, '\n'.join(block_lines)))
-
-      line = remaining_contents.pop(0)
-      block_lines.append(line)
+    try:
+      end_index = lines.index(end_line, start) + 1
+    except ValueError:
+      raise ValueError("Unterminated pgp style block (looking for '%s'):\n%s" % (end_line, '\n'.join(lines[start:])))
 
-      if line == end_line:
-        return (block_type, '\n'.join(block_lines))
+    return (block_type, '\n'.join(lines[start:end_index]), end_index)
   else:
     return None
 
@@ -1343,10 +1683,17 @@ def _descriptor_components(raw_contents, validate, extra_keywords = (), non_asci
 
   entries = OrderedDict()
   extra_entries = []  # entries with a keyword in extra_keywords
-  remaining_lines = raw_contents.split('\n')
 
-  while remaining_lines:
-    line = remaining_lines.pop(0)
+  # Walking the lines by index rather than popping them off the front of a
+  # list, which would make us quadratic with respect to the descriptor size.
+
+  lines = raw_contents.split('\n')
+  line_count = len(lines)
+  index = 0
+
+  while index < line_count:
+    line = lines[index]
+    index += 1
 
     # V2 network status documents explicitly can contain blank lines...
     #
@@ -1379,18 +1726,19 @@ def _descriptor_components(raw_contents, validate, extra_keywords = (), non_asci
     if value is None:
       value = ''
 
-    try:
-      block_attr = _get_pseudo_pgp_block(remaining_lines)
+    block_type, block_contents = None, None
 
-      if block_attr:
-        block_type, block_contents = block_attr
-      else:
-        block_type, block_contents = None, None
-    except ValueError:
-      if not validate:
-        continue
+    if index < line_count and lines[index].startswith('-----BEGIN '):
+      try:
+        block_attr = _get_pseudo_pgp_block(lines, index)
+      except ValueError:
+        if not validate:
+          break  # unterminated block consumes the rest of our content
 
-      raise
+        raise
+
+      if block_attr:
+        block_type, block_contents, index = block_attr
 
     if validate and keyword not in non_ascii_fields:
       try:
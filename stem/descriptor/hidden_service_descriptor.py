@@ -279,15 +279,23 @@ class HiddenServiceDescriptor(Descriptor):
       self._parse(entries, validate)
 
       if not skip_crypto_validation and stem.prereq.is_crypto_available():
-        signed_digest = self._digest_for_signature(self.permanent_key, self.signature)
-        digest_content = self._content_range('rendezvous-service-descriptor ', '\nsignature\n')
-        content_digest = hashlib.sha1(digest_content).hexdigest().upper()
-
-        if signed_digest != content_digest:
-          raise ValueError('Decrypted digest does not match local digest (calculated: %s, local: %s)' % (signed_digest, content_digest))
+        self._check_signatures([self._digest_for_signature(self.permanent_key, self.signature)])
     else:
       self._entries = entries
 
+  def _signatures(self, key_certs = None):
+    if not self.permanent_key or not self.signature:
+      raise ValueError('Hidden service descriptor must have a permanent-key and signature to be validated')
+
+    return [(self.permanent_key, self.signature)]
+
+  def _check_signatures(self, signed_digests):
+    digest_content = self._content_range('rendezvous-service-descriptor ', '\nsignature\n')
+    content_digest = hashlib.sha1(digest_content).hexdigest().upper()
+
+    if signed_digests[0] != content_digest:
+      raise ValueError('Decrypted digest does not match local digest (calculated: %s, local: %s)' % (signed_digests[0], content_digest))
+
   @lru_cache()
   def introduction_points(self, authentication_cookie = None):
     """
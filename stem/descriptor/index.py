@@ -0,0 +1,498 @@
+# Copyright 2018, Damian Johnson and The Tor Project
+# See LICENSE for licensing information
+
+"""
+Persistent index for descriptors within local files and archives, such as
+`CollecTor's <https://collector.torproject.org/>`_ monthly tarballs. Finding
+a descriptor within an archive otherwise requires reading through the whole
+thing. Instead this records where each descriptor resides in a sqlite
+database so lookups only need to read and parse the matching descriptors...
+
+::
+
+  from stem.descriptor.index import DescriptorIndex
+
+  with DescriptorIndex('/home/atagar/descriptor_index.sqlite') as index:
+    # only archives that are new or have changed since we last added them are read
+
+    index.add('/home/atagar/collector/')
+
+    # server descriptor moria1 had on the first of June
+
+    desc = index.get_latest('9695DFC35FFEB861329B9F1AB04C46397020CE31', datetime.datetime(2018, 6, 1))
+    print('moria1 had an exit policy of %s' % desc.exit_policy)
+
+Descriptors within plain files and uncompressed tarballs are read by seeking
+directly to them. Compressed tarballs can also be indexed, but as they lack
+random access each read needs to decompress the archive up to the
+descriptor's position. For frequent lookups please decompress CollecTor's
+tarballs first (for instance with 'xz --decompress').
+
+**Module Overview:**
+
+::
+
+  IndexEntry - Location of an indexed descriptor.
+
+  DescriptorIndex - Persistent index of descriptor locations.
+    |- add - indexes descriptors within files, directories, or archives
+    |- entries - provides the indexed locations that match a query
+    |- get_descriptors - provides the descriptors that match a query
+    |- get_latest - provides the latest descriptor a relay published
+    |- read - reads and parses an indexed descriptor
+    +- close - closes our index
+
+.. versionadded:: 1.8.0
+"""
+
+import bz2
+import collections
+import datetime
+import gzip
+import io
+import os
+import tarfile
+
+import stem.descriptor
+import stem.prereq
+import stem.util
+import stem.util.str_tools
+import stem.util.system
+
+from stem.descriptor import DocumentHandler
+from stem.util import log
+
+SCHEMA_VERSION = 2  # version of our scheme, bump this if you change the following
+SCHEMA = (
+  'CREATE TABLE schema(version INTEGER)',
+  'INSERT INTO schema(version) VALUES (%i)' % SCHEMA_VERSION,
+
+  'CREATE TABLE files(path TEXT PRIMARY KEY, size INTEGER, last_modified REAL)',
+  'CREATE TABLE descriptors(descriptor_type TEXT, fingerprint TEXT, digest TEXT, published REAL, path TEXT, archive_path TEXT, compression TEXT, offset INTEGER, length INTEGER, type_annotation TEXT)',
+  'CREATE INDEX descriptors_by_fingerprint ON descriptors(fingerprint, published)',
+  'CREATE INDEX descriptors_by_digest ON descriptors(digest)',
+  'CREATE INDEX descriptors_by_path ON descriptors(path)',
+)
+
+# leading bytes of compressed tarballs
+
+COMPRESSION_MAGIC = (
+  (b'\x1f\x8b', 'gz'),
+  (b'BZh', 'bz2'),
+  (b'\xfd7zXZ\x00', 'xz'),
+)
+
+
+class IndexEntry(collections.namedtuple('IndexEntry', ['descriptor_type', 'fingerprint', 'digest', 'published', 'path', 'archive_path', 'compression', 'offset', 'length', 'type_annotation'])):
+  """
+  Location of an indexed descriptor.
+
+  :var str descriptor_type: descriptor's @type name, such as
+    'server-descriptor'
+  :var str fingerprint: fingerprint of the relay or authority the descriptor is
+    for, **None** if not applicable
+  :var str digest: digest provided by the descriptor's **digest()** method,
+    **None** if it lacks one
+  :var datetime published: when the descriptor was published (or the
+    **valid_after** of a consensus), **None** if unknown
+  :var str path: absolute path of the file or archive the descriptor is within
+  :var str archive_path: path of the member within an archive, **None** if not
+    from an archive
+  :var str compression: compression of the archive ('gz', 'bz2', or 'xz'),
+    **None** if uncompressed
+  :var int offset: position where the descriptor starts within the file, or
+    decompressed archive
+  :var int length: size of the descriptor in bytes
+  :var str type_annotation: full @type annotation of the descriptor, such as
+    '@type server-descriptor 1.0'
+  """
+
+
+class DescriptorIndex(object):
+  """
+  Sqlite backed index of where descriptors reside within local files and
+  archives. Connections are used from a single thread, so please use separate
+  :class:`~stem.descriptor.index.DescriptorIndex` instances if you need them
+  from multiple threads.
+
+  :param str path: location of the index, this is created if it doesn't exist
+
+  :raises:
+    * **ImportError** if the sqlite3 module is unavailable
+    * **IOError** if the index can't be read or is from an incompatible
+      version of stem
+  """
+
+  def __init__(self, path):
+    if not stem.prereq.is_sqlite_available():
+      raise ImportError('DescriptorIndex requires the sqlite3 module')
+
+    import sqlite3
+
+    self._path = path
+
+    try:
+      self._conn = sqlite3.connect(path)
+
+      try:
+        schema = self._conn.execute('SELECT version FROM schema').fetchone()[0]
+      except sqlite3.OperationalError:
+        schema = None
+
+        with self._conn:
+          for cmd in SCHEMA:
+            self._conn.execute(cmd)
+    except sqlite3.DatabaseError as exc:
+      raise IOError('Unable to use %s as a descriptor index: %s' % (path, exc))
+
+    if schema is not None and schema != SCHEMA_VERSION:
+      self._conn.close()
+      raise IOError("Stem's current descriptor index schema version is %s, but %s was version %s" % (SCHEMA_VERSION, path, schema))
+
+  def add(self, target, descriptor_type = None):
+    """
+    Indexes the descriptors within the given files, directories, or archives.
+    Files we've previously indexed are skipped unless they've changed, in
+    which case they're indexed anew. Files we've previously indexed that no
+    longer exist are dropped from our index. Contents we're unable to parse,
+    and the index's own database, are skipped.
+
+    :param str,list target: path or list of paths for descriptor files,
+      directories, or archives
+    :param str descriptor_type: `descriptor type
+      <https://metrics.torproject.org/collector.html#data-formats>`_, this is
+      guessed if not provided
+
+    :returns: **int** for the number of descriptors we indexed
+
+    :raises: **IOError** if a target doesn't exist or can't be read
+    """
+
+    indexed = 0
+
+    # sqlite keeps its journal alongside the database while we're writing
+
+    index_path = os.path.abspath(self._path)
+    index_files = [index_path + suffix for suffix in ('', '-journal', '-wal', '-shm')]
+
+    for target_path in ([target] if stem.util._is_str(target) else target):
+      target_path = os.path.abspath(target_path)
+      self._remove_missing_files(target_path)
+
+      if os.path.isdir(target_path):
+        for root, _, files in os.walk(target_path):
+          for filename in sorted(files):
+            path = os.path.join(root, filename)
+
+            if path not in index_files:
+              indexed += self._add_file(path, descriptor_type)
+      elif os.path.exists(target_path):
+        if target_path not in index_files:
+          indexed += self._add_file(target_path, descriptor_type)
+      else:
+        raise IOError("%s doesn't exist" % target_path)
+
+    return indexed
+
+  def entries(self, fingerprint = None, digest = None, descriptor_type = None, start = None, end = None):
+    """
+    Provides the location of indexed descriptors that match the given
+    criteria, ordered by when they were published.
+
+    :param str fingerprint: relay or authority fingerprint
+    :param str digest: descriptor digest
+    :param str descriptor_type: descriptor @type name, such as
+      'server-descriptor'
+    :param datetime start: only include descriptors published at or after this
+    :param datetime end: only include descriptors published at or before this
+
+    :returns: **list** of :class:`~stem.descriptor.index.IndexEntry`
+    """
+
+    return self._entries(fingerprint, digest, descriptor_type, start, end)
+
+  def get_descriptors(self, fingerprint = None, digest = None, descriptor_type = None, start = None, end = None, validate = False):
+    """
+    Provides the indexed descriptors that match the given criteria, ordered by
+    when they were published. Only the matching descriptors are read.
+
+    :param str fingerprint: relay or authority fingerprint
+    :param str digest: descriptor digest
+    :param str descriptor_type: descriptor @type name, such as
+      'server-descriptor'
+    :param datetime start: only include descriptors published at or after this
+    :param datetime end: only include descriptors published at or before this
+    :param bool validate: checks the validity of the descriptor's content if
+      **True**, skips these checks otherwise
+
+    :returns: iterator for the :class:`~stem.descriptor.__init__.Descriptor`
+      instances that match
+
+    :raises:
+      * **ValueError** if the contents is malformed and validate is **True**
+      * **IOError** if an indexed file can no longer be read
+    """
+
+    for entry in self._entries(fingerprint, digest, descriptor_type, start, end):
+      yield self.read(entry, validate)
+
+  def get_latest(self, fingerprint, when = None, descriptor_type = 'server-descriptor', validate = False):
+    """
+    Provides the latest descriptor a relay published as of the given time.
+
+    :param str fingerprint: relay or authority fingerprint
+    :param datetime when: provides the latest descriptor published at or
+      before this time, the latest we have if **None**
+    :param str descriptor_type: descriptor @type name
+    :param bool validate: checks the validity of the descriptor's content if
+      **True**, skips these checks otherwise
+
+    :returns: :class:`~stem.descriptor.__init__.Descriptor` we have for this
+      relay, **None** if we don't have one
+
+    :raises:
+      * **ValueError** if the contents is malformed and validate is **True**
+      * **IOError** if the indexed file can no longer be read
+    """
+
+    entries = self._entries(fingerprint, None, descriptor_type, None, when, newest_first = True, limit = 1)
+    return self.read(entries[0], validate) if entries else None
+
+  def read(self, entry, validate = False):
+    """
+    Reads and parses an indexed descriptor.
+
+    :param stem.descriptor.index.IndexEntry entry: descriptor to be read
+    :param bool validate: checks the validity of the descriptor's content if
+      **True**, skips these checks otherwise
+
+    :returns: :class:`~stem.descriptor.__init__.Descriptor` for this entry
+
+    :raises:
+      * **ValueError** if the contents is malformed and validate is **True**
+      * **IOError** if the indexed file can no longer be read
+    """
+
+    with _open(entry.path, entry.compression) as indexed_file:
+      indexed_file.seek(entry.offset)
+      content = indexed_file.read(entry.length)
+
+    if len(content) != entry.length:
+      raise IOError('%s has changed since it was indexed, please add it again' % entry.path)
+
+    desc = next(stem.descriptor.parse_file(io.BytesIO(content), entry.type_annotation[len('@type '):], validate = validate, document_handler = DocumentHandler.DOCUMENT))
+    desc._set_path(entry.path)
+
+    if entry.archive_path:
+      desc._set_archive_path(entry.archive_path)
+
+    return desc
+
+  def close(self):
+    """
+    Closes our index.
+    """
+
+    self._conn.close()
+
+  def _entries(self, fingerprint, digest, descriptor_type, start, end, newest_first = False, limit = None):
+    conditions, params = [], []
+
+    for column, value in (('fingerprint', fingerprint), ('digest', digest), ('descriptor_type', descriptor_type)):
+      if value is not None:
+        conditions.append('%s = ?' % column)
+        params.append(value)
+
+    if start is not None:
+      conditions.append('published >= ?')
+      params.append(stem.util.datetime_to_unix(start))
+
+    if end is not None:
+      conditions.append('published <= ?')
+      params.append(stem.util.datetime_to_unix(end))
+
+    query = 'SELECT descriptor_type, fingerprint, digest, published, path, archive_path, compression, offset, length, type_annotation FROM descriptors'
+
+    if conditions:
+      query += ' WHERE ' + ' AND '.join(conditions)
+
+    query += ' ORDER BY published DESC' if newest_first else ' ORDER BY published'
+
+    if limit is not None:
+      query += ' LIMIT %i' % limit
+
+    entries = []
+
+    for row in self._conn.execute(query, params):
+      published = datetime.datetime.utcfromtimestamp(row[3]) if row[3] is not None else None
+      entries.append(IndexEntry(row[0], row[1], row[2], published, row[4], row[5], row[6], row[7], row[8], row[9]))
+
+    return entries
+
+  def _remove_missing_files(self, target_path):
+    """
+    Drops indexed files at or under the given path that no longer exist.
+    """
+
+    prefix = os.path.join(target_path, '')
+    missing = [(path,) for (path,) in self._conn.execute('SELECT path FROM files') if (path == target_path or path.startswith(prefix)) and not os.path.exists(path)]
+
+    if missing:
+      with self._conn:
+        self._conn.executemany('DELETE FROM descriptors WHERE path = ?', missing)
+        self._conn.executemany('DELETE FROM files WHERE path = ?', missing)
+
+  def _add_file(self, path, descriptor_type):
+    """
+    Indexes a descriptor file or archive if it's new or has changed.
+
+    :returns: **int** for the number of descriptors we indexed
+    """
+
+    size, last_modified = os.path.getsize(path), os.path.getmtime(path)
+
+    if self._conn.execute('SELECT 1 FROM files WHERE path = ? AND size = ? AND last_modified = ?', (path, size, last_modified)).fetchone():
+      return 0
+
+    rows = []
+
+    if stem.util.system.is_tarfile(path):
+      compression = _compression(path)
+
+      with tarfile.open(path) as tar_file:
+        for member in tar_file:
+          if member.isfile():
+            content = tar_file.extractfile(member).read()
+            rows += _index_content(content, io.BytesIO(content), descriptor_type, path, member.name, compression, member.offset_data)
+    else:
+      with open(path, 'rb') as descriptor_file:
+        content = descriptor_file.read()
+        descriptor_file.seek(0)
+        rows += _index_content(content, descriptor_file, descriptor_type, path, None, None, 0)
+
+    with self._conn:
+      self._conn.execute('DELETE FROM descriptors WHERE path = ?', (path,))
+      self._conn.executemany('INSERT INTO descriptors(descriptor_type, fingerprint, digest, published, path, archive_path, compression, offset, length, type_annotation) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+      self._conn.execute('INSERT OR REPLACE INTO files(path, size, last_modified) VALUES (?, ?, ?)', (path, size, last_modified))
+
+    return len(rows)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exit_type, value, traceback):
+    self.close()
+
+
+def _index_content(content, descriptor_file, descriptor_type, path, archive_path, compression, base_offset):
+  """
+  Provides index rows for the descriptors within a file or archive member.
+
+  :param bytes content: content of the file or archive member
+  :param file descriptor_file: file to parse the content from
+  :param str descriptor_type: descriptor type, guessed if **None**
+  :param str path: absolute path of the file or archive
+  :param str archive_path: path of the archive member, **None** if not from an
+    archive
+  :param str compression: compression of the archive
+  :param int base_offset: position where the content starts within the file
+    or decompressed archive
+
+  :returns: **list** of tuples with the descriptors table's columns
+  """
+
+  try:
+    descriptors = list(stem.descriptor.parse_file(descriptor_file, descriptor_type, document_handler = DocumentHandler.BARE_DOCUMENT))
+  except (TypeError, ValueError, IOError) as exc:
+    location = path if archive_path is None else '%s (%s)' % (path, archive_path)
+    exc_msg = u', '.join([stem.util.str_tools._to_unicode(arg) if stem.util._is_str(arg) else u'%s' % (arg,) for arg in exc.args])
+    log.debug(u'Unable to index %s: %s' % (stem.util.str_tools._to_unicode(location), exc_msg))
+    return []
+
+  # Our descriptors' type_annotation() is always version 1.0, so we use the
+  # annotation the content was parsed with when we have it.
+
+  if descriptor_type:
+    content_annotation = '@type %s' % descriptor_type
+  elif content.startswith(b'@type '):
+    content_annotation = stem.util.str_tools._to_unicode(content.split(b'\n', 1)[0]).strip()
+  else:
+    content_annotation = None
+
+  rows, position = [], 0
+
+  for desc in descriptors:
+    try:
+      type_annotation = desc.type_annotation()
+    except NotImplementedError:
+      continue
+
+    desc_content = desc.get_bytes()
+    offset = content.find(desc_content, position)
+
+    if offset != -1:
+      length = len(desc_content)
+      position = offset + length
+    elif len(descriptors) == 1:
+      # Documents without their router status entries aren't contiguous within
+      # the file, but these are the file's sole content.
+
+      offset, length = 0, len(content)
+    else:
+      continue
+
+    published = getattr(desc, 'published', None) or getattr(desc, 'valid_after', None)
+
+    try:
+      digest = desc.digest()
+    except (AttributeError, NotImplementedError, ValueError):
+      digest = None
+
+    rows.append((
+      type_annotation.name,
+      getattr(desc, 'fingerprint', None),
+      digest,
+      stem.util.datetime_to_unix(published) if published else None,
+      path,
+      archive_path,
+      compression,
+      base_offset + offset,
+      length,
+      content_annotation if content_annotation else str(type_annotation),
+    ))
+
+  return rows
+
+
+def _compression(path):
+  """
+  Provides the compression used by an archive, **None** if uncompressed.
+  """
+
+  with open(path, 'rb') as archive_file:
+    header = archive_file.read(6)
+
+  for magic, compression in COMPRESSION_MAGIC:
+    if header.startswith(magic):
+      return compression
+
+  return None
+
+
+def _open(path, compression):
+  """
+  Opens a file for reading, decompressing it if needed.
+  """
+
+  if compression == 'gz':
+    return gzip.GzipFile(path, 'rb')
+  elif compression == 'bz2':
+    return bz2.BZ2File(path, 'rb')
+  elif compression == 'xz':
+    if not stem.prereq.is_lzma_available():
+      raise IOError('Reading %s requires the lzma module' % path)
+
+    import lzma
+    return lzma.LZMAFile(path, 'rb')
+  else:
+    return open(path, 'rb')
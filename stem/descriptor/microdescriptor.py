@@ -76,6 +76,7 @@ from stem.descriptor import (
   _descriptor_content,
   _descriptor_components,
   _read_until_keywords,
+  _MemoryMappedFile,
   _values,
   _parse_simple_line,
   _parse_protocol_line,
@@ -138,17 +139,26 @@ def _parse_file(descriptor_file, validate = False, **kwargs):
     else:
       break
 
-    while True:
-      last_position = descriptor_file.tell()
-      line = descriptor_file.readline()
+    if isinstance(descriptor_file, _MemoryMappedFile):
+      start = descriptor_file.tell()
+      end, _ = descriptor_file.find_line((b'@', b'onion-key'), start, is_keyword = False)
 
-      if not line:
-        break  # EOF
-      elif line.startswith(b'@') or line.startswith(b'onion-key'):
-        descriptor_file.seek(last_position)
-        break
-      else:
-        descriptor_lines.append(line)
+      if end == -1:
+        end = len(descriptor_file)
+
+      descriptor_lines.append(descriptor_file.read(end - start))
+    else:
+      while True:
+        last_position = descriptor_file.tell()
+        line = descriptor_file.readline()
+
+        if not line:
+          break  # EOF
+        elif line.startswith(b'@') or line.startswith(b'onion-key'):
+          descriptor_file.seek(last_position)
+          break
+        else:
+          descriptor_lines.append(line)
 
     if descriptor_lines:
       if descriptor_lines[0].startswith(b'@type'):
@@ -188,7 +198,7 @@ def _parse_id_line(descriptor, entries):
 _parse_onion_key_line = _parse_key_block('onion-key', 'onion_key', 'RSA PUBLIC KEY')
 _parse_ntor_onion_key_line = _parse_simple_line('ntor-onion-key', 'ntor_onion_key')
 _parse_family_line = _parse_simple_line('family', 'family', func = lambda v: v.split(' '))
-_parse_p6_line = _parse_simple_line('p6', 'exit_policy_v6', func = lambda v: stem.exit_policy.MicroExitPolicy(v))
+_parse_p6_line = _parse_simple_line('p6', 'exit_policy_v6', func = lambda v: stem.exit_policy._get_interned_policy(stem.exit_policy.MicroExitPolicy, v))
 _parse_pr_line = _parse_protocol_line('pr', 'protocols')
 
 
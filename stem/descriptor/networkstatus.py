@@ -53,14 +53,37 @@ For more information see :func:`~stem.descriptor.__init__.DocumentHandler`...
   DocumentSignature - Signature of a document by a directory authority
   DetachedSignature - Stand alone signature used when making the consensus
   DirectoryAuthority - Directory authority as defined in a v3 network status document
+
+  ConsensusTable - Compact column oriented listing of router status entries
+    |- fingerprint - fingerprint of a row
+    |- address - address of a row
+    |- flags_for - flags of a row
+    |- row - router status entry for a row
+    |- index - row of a fingerprint
+    |- flag_mask - bitmask for a set of flags
+    +- select - rows that match a set of criteria
+
+  ExitIndex - Relays that allow exiting to a destination
+    |- exits_to - relays that allow exiting to this destination
+    +- exits_to_many - relays for each of several destinations
 """
 
+import array
+import binascii
+import bisect
+import calendar
 import collections
 import datetime
 import hashlib
 import io
+import re
+import socket
+import struct
 
 import stem.descriptor.router_status_entry
+import stem.exit_policy
+import stem.prereq
+import stem.util.connection
 import stem.util.str_tools
 import stem.util.tor_tools
 import stem.version
@@ -158,6 +181,14 @@ ROUTERS_START = 'r'
 FOOTER_START = 'directory-footer'
 V2_FOOTER_START = 'directory-signature'
 
+# Consensus diffs (proposal 140) are ed style scripts prefaced with the sha3
+# digests of the documents they transform between. The digest of the document
+# they're from is of its signed portion, whereas the digest of the document
+# they produce is of its full content.
+
+DIFF_VERSION_LINE = b'network-status-diff-version 1'
+DIFF_COMMAND = re.compile(b'^([0-9]+)(?:,([0-9]+|\\$))?([acd])$')
+
 DEFAULT_PARAMS = {
   'bwweightscale': 10000,
   'cbtdisabled': 0,
@@ -418,6 +449,141 @@ def _parse_file_detached_sigs(detached_signature_file, validate = False):
       break  # done parsing file
 
 
+def _is_consensus_diff(content):
+  """
+  Checks if the given content is a consensus diff rather than a document.
+
+  :param bytes content: content to check
+
+  :returns: **True** if this is a consensus diff, **False** otherwise
+  """
+
+  return content.startswith(DIFF_VERSION_LINE)
+
+
+def _apply_consensus_diff(content, diff):
+  """
+  Applies the ed style commands of a consensus diff to a document. This
+  supports the subset of ed tor uses (`proposal 140
+  <https://gitweb.torproject.org/torspec.git/tree/proposals/140-consensus-diffs.txt>`_)...
+
+  ::
+
+    <n>a        append the following lines after line n
+    <n>[,<m>]c  replace lines n through m with the following lines
+    <n>[,<m>]d  delete lines n through m
+
+  ... where commands are listed in descending order, so earlier edits never
+  shift the line numbers of later ones. Lines following an append or change
+  are terminated by a line with a single period.
+
+  :param bytes content: document the diff is from
+  :param bytes diff: consensus diff to apply
+
+  :returns: **tuple** of the form (from_digest, to_digest, content) with the
+    hex sha3-256 digests the diff claims to transform between and the
+    resulting document content
+
+  :raises: **ValueError** if the diff is malformed or doesn't fit the content
+  """
+
+  diff_lines = diff.split(b'\n')
+  lines = content.split(b'\n')
+
+  for line_list in (diff_lines, lines):
+    if line_list and not line_list[-1]:
+      line_list.pop()  # content ends with a newline
+
+  if len(diff_lines) < 2 or diff_lines[0] != DIFF_VERSION_LINE:
+    raise ValueError("Consensus diffs should start with '%s'" % stem.util.str_tools._to_unicode(DIFF_VERSION_LINE))
+
+  hash_line = diff_lines[1].split(b' ')
+
+  if len(hash_line) != 3 or hash_line[0] != b'hash':
+    raise ValueError("Consensus diff should have a 'hash <from> <to>' line, but was: %s" % stem.util.str_tools._to_unicode(diff_lines[1]))
+
+  from_digest, to_digest = [stem.util.str_tools._to_unicode(digest).upper() for digest in hash_line[1:]]
+  index, previous_start = 2, None
+
+  while index < len(diff_lines):
+    command_line = diff_lines[index]
+    match = DIFF_COMMAND.match(command_line)
+
+    if not match:
+      raise ValueError('Malformed consensus diff command: %s' % stem.util.str_tools._to_unicode(command_line))
+
+    start, end, command = match.groups()
+    start = int(start)
+
+    if end is None:
+      end = start
+    elif end == b'$':
+      end = len(lines)
+    else:
+      end = int(end)
+
+    if command == b'a' and end != start:
+      raise ValueError("Consensus diff appends can't have a range: %s" % stem.util.str_tools._to_unicode(command_line))
+    elif command != b'a' and (start < 1 or end < start):
+      raise ValueError('Consensus diff command has an invalid range: %s' % stem.util.str_tools._to_unicode(command_line))
+    elif end > len(lines):
+      raise ValueError('Consensus diff command is beyond the end of the document (%i lines): %s' % (len(lines), stem.util.str_tools._to_unicode(command_line)))
+    elif previous_start is not None and end >= previous_start:
+      raise ValueError('Consensus diff commands must be in descending order: %s' % stem.util.str_tools._to_unicode(command_line))
+
+    previous_start = start
+    index += 1
+
+    if command == b'd':
+      del lines[start - 1:end]
+      continue
+
+    try:
+      text_end = diff_lines.index(b'.', index)
+    except ValueError:
+      raise ValueError("Consensus diff command lacks a terminating '.': %s" % stem.util.str_tools._to_unicode(command_line))
+
+    if command == b'a':
+      lines[start:start] = diff_lines[index:text_end]
+    else:
+      lines[start - 1:end] = diff_lines[index:text_end]
+
+    index = text_end + 1
+
+  content = b'\n'.join(lines) + b'\n' if lines else b''
+  return from_digest, to_digest, content
+
+
+def _carry_over_entries(entry_class, unchanged_entries):
+  """
+  Provides a constructor for entry_class that reuses entries with identical
+  content rather than parsing them again.
+
+  :param class entry_class: class to construct instances of
+  :param dict unchanged_entries: mapping of entry content to the entry we
+    previously parsed it as
+
+  :returns: **function** with the same arguments as the entry_class
+    constructor
+  """
+
+  def _entry(content, validate, document):
+    entry = unchanged_entries.get(content)
+
+    if type(entry) is not entry_class:
+      return entry_class(content, validate, document)
+
+    # shallow copy without copy.copy(), which is slow since it checks for
+    # pickling methods through our __getattr__
+
+    carried_over = entry_class.__new__(entry_class)
+    carried_over.__dict__.update(entry.__dict__)
+    carried_over.document = document
+    return carried_over
+
+  return _entry
+
+
 class NetworkStatusDocument(Descriptor):
   """
   Common parent for network status documents.
@@ -432,12 +598,19 @@ class NetworkStatusDocument(Descriptor):
         * Referer: :class:`~stem.descriptor.networkstatus.DetachedSignature` **consensus_digest** attribute
         * Format: **SHA1/HEX**
 
+      * **Consensus diffs**
+
+        * Referer: 'X-Or-Diff-From-Consensus' header and 'hash' line of a diff
+        * Format: **SHA3_256/HEX**
+
     .. versionadded:: 1.8.0
 
     :param stem.descriptor.DigestHash hash_type: digest hashing algorithm
     :param stem.descriptor.DigestEncoding encoding: digest encoding
 
     :returns: **hashlib.HASH** or **str** based on our encoding argument
+
+    :raises: **ImportError** if a sha3 digest is requested but unavailable
     """
 
     content = self._content_range(end = '\ndirectory-signature ')
@@ -446,8 +619,13 @@ class NetworkStatusDocument(Descriptor):
       return stem.descriptor._encode_digest(hashlib.sha1(content), encoding)
     elif hash_type == DigestHash.SHA256:
       return stem.descriptor._encode_digest(hashlib.sha256(content), encoding)
+    elif hash_type == DigestHash.SHA3_256:
+      if not stem.prereq._is_sha3_available():
+        raise ImportError('sha3 digests require python 3.6+ or the pysha3 module (https://pypi.org/project/pysha3/)')
+
+      return stem.descriptor._encode_digest(hashlib.sha3_256(content), encoding)
     else:
-      raise NotImplementedError('Network status document digests are only available in sha1 and sha256, not %s' % hash_type)
+      raise NotImplementedError('Network status document digests are only available in sha1, sha256, and sha3_256, not %s' % hash_type)
 
 
 def _parse_version_line(keyword, attribute, expected_version):
@@ -1175,7 +1353,7 @@ class NetworkStatusDocumentV3(NetworkStatusDocument):
   def create(cls, attr = None, exclude = (), validate = True, sign = False, authorities = None, routers = None):
     return cls(cls.content(attr, exclude, sign, authorities, routers), validate = validate)
 
-  def __init__(self, raw_content, validate = False, default_params = True):
+  def __init__(self, raw_content, validate = False, default_params = True, _unchanged_routers = None):
     """
     Parse a v3 network status document.
 
@@ -1212,10 +1390,15 @@ class NetworkStatusDocumentV3(NetworkStatusDocument):
     if validate and self.is_vote and len(self.directory_authorities) != 1:
       raise ValueError('Votes should only have an authority entry for the one that issued it, got %i: %s' % (len(self.directory_authorities), self.directory_authorities))
 
+    entry_class = RouterStatusEntryMicroV3 if self.is_microdescriptor else RouterStatusEntryV3
+
+    if _unchanged_routers:
+      entry_class = _carry_over_entries(entry_class, _unchanged_routers)
+
     router_iter = stem.descriptor.router_status_entry._parse_file(
       document_file,
       validate,
-      entry_class = RouterStatusEntryMicroV3 if self.is_microdescriptor else RouterStatusEntryV3,
+      entry_class = entry_class,
       entry_keyword = ROUTERS_START,
       section_end_keywords = (FOOTER_START, V2_FOOTER_START),
       extra_args = (self,),
@@ -1274,27 +1457,74 @@ class NetworkStatusDocumentV3(NetworkStatusDocument):
     :raises: **ValueError** if an insufficient number of valid signatures are present.
     """
 
+    signatures = self._signatures(key_certs)
+    self._check_signatures([self._digest_for_signature(signing_key, signature) for signing_key, signature in signatures])
+
+  def _signatures(self, key_certs = None):
+    signing_keys = dict([(cert.fingerprint, cert.signing_key) for cert in key_certs]) if key_certs else {}
+    return [(signing_keys[sig.identity], sig.signature) for sig in self.signatures if sig.identity in signing_keys]
+
+  def _check_signatures(self, signed_digests):
     # sha1 hash of the body and header
 
     digest_content = self._content_range('network-status-version', 'directory-signature ')
     local_digest = hashlib.sha1(digest_content).hexdigest().upper()
 
-    valid_digests, total_digests = 0, 0
+    valid_digests = len([digest for digest in signed_digests if digest == local_digest])
+    total_digests = len(signed_digests)
     required_digests = len(self.signatures) / 2.0
-    signing_keys = dict([(cert.fingerprint, cert.signing_key) for cert in key_certs])
 
-    for sig in self.signatures:
-      if sig.identity not in signing_keys:
-        continue
+    if valid_digests < required_digests:
+      raise ValueError('Network Status Document has %i valid signatures out of %i total, needed %i' % (valid_digests, total_digests, required_digests))
+
+  def apply_diff(self, diff, validate = False):
+    """
+    Provides the document that results from applying a consensus diff (`proposal
+    140 <https://gitweb.torproject.org/torspec.git/tree/proposals/140-consensus-diffs.txt>`_)
+    to ourselves. Router status entries the diff leaves untouched are carried
+    over from this document rather than parsed again, so only the entries that
+    changed are read.
 
-      signed_digest = self._digest_for_signature(signing_keys[sig.identity], sig.signature)
-      total_digests += 1
+    ::
 
-      if signed_digest == local_digest:
-        valid_digests += 1
+      downloader = stem.descriptor.remote.DescriptorDownloader()
+      consensus = downloader.get_consensus(document_handler = DocumentHandler.DOCUMENT).run()[0]
 
-    if valid_digests < required_digests:
-      raise ValueError('Network Status Document has %i valid signatures out of %i total, needed %i' % (valid_digests, total_digests, required_digests))
+      # an hour later, fetch only what changed since then
+
+      consensus = downloader.get_consensus(from_consensus = consensus, document_handler = DocumentHandler.DOCUMENT).run()[0]
+
+    .. versionadded:: 1.8.0
+
+    :param bytes diff: consensus diff to apply
+    :param bool validate: checks the validity of the new document if **True**,
+      skips these checks otherwise
+
+    :returns: :class:`~stem.descriptor.networkstatus.NetworkStatusDocumentV3`
+      the diff produces
+
+    :raises:
+      * **ValueError** if the diff is malformed, is from a different document,
+        or doesn't produce the document it claims to
+      * **ImportError** if sha3 digests are unavailable
+    """
+
+    from_digest, to_digest, content = _apply_consensus_diff(self.get_bytes(), stem.util.str_tools._to_bytes(diff))
+    our_digest = self.digest(DigestHash.SHA3_256)
+
+    if from_digest != our_digest:
+      raise ValueError('Consensus diff is from a document with digest %s, but ours is %s' % (from_digest, our_digest))
+
+    # unlike the digest of the document we're from, the digest of the
+    # document we produce is of its full content, signatures included
+
+    result_digest = hashlib.sha3_256(content).hexdigest().upper()
+
+    if result_digest != to_digest:
+      raise ValueError('Consensus diff should produce a document with digest %s, but we got %s' % (to_digest, result_digest))
+
+    unchanged_routers = dict((entry.get_bytes(), entry) for entry in self.routers.values())
+    return NetworkStatusDocumentV3(content, validate, self._default_params, _unchanged_routers = unchanged_routers)
 
   def get_unrecognized_lines(self):
     if self._lazy_loading:
@@ -2012,3 +2242,507 @@ class BridgeNetworkStatusDocument(NetworkStatusDocument):
     )
 
     self.routers = dict((desc.fingerprint, desc) for desc in router_iter)
+
+
+class ConsensusTable(object):
+  """
+  Compact listing of the router status entries in a v3 network status
+  document. Rather than a :class:`~stem.descriptor.router_status_entry.RouterStatusEntryV3`
+  per relay this keeps their most commonly used attributes in columns, each
+  an **array** with a value for every row.
+
+  This uses a fraction of the memory of a fully populated
+  :class:`~stem.descriptor.networkstatus.NetworkStatusDocumentV3`, and lets
+  us filter relays without materializing each of them...
+
+  ::
+
+    from stem.descriptor import parse_file
+    from stem.descriptor.networkstatus import ConsensusTable
+
+    table = ConsensusTable(parse_file('/home/atagar/.tor/cached-consensus'))
+
+    for index in table.select(flags = ('Exit', 'Fast'), min_bandwidth = 5000):
+      print('%s (%s)' % (table.nicknames[index], table.fingerprint(index)))
+
+  Row objects can be constructed on demand through
+  :func:`~stem.descriptor.networkstatus.ConsensusTable.row`.
+
+  Bandwidths and ports that were absent from the consensus are zero, as is the
+  published timestamp of entries that lack one.
+
+  .. versionadded:: 1.8.0
+
+  :var stem.descriptor.networkstatus.NetworkStatusDocumentV3 document: document
+    our entries came from, without its **routers**
+  :var list flag_names: flag of each bit in our **flags** column
+  :var list nicknames: relay nicknames
+  :var array addresses: IPv4 addresses as integers
+  :var array or_ports: ORPorts
+  :var array dir_ports: DirPorts
+  :var array bandwidths: bandwidth in kilobytes/s from the 'w' line
+  :var array measured: measured bandwidth in kilobytes/s from the 'w' line
+  :var array flags: bitmask of each relay's flags
+  :var array published: unix timestamp for when each relay's descriptor was
+    published
+  """
+
+  def __init__(self, entries = ()):
+    """
+    Constructs a table from router status entries, such as those provided by
+    :func:`~stem.descriptor.__init__.parse_file` with the
+    :data:`~stem.descriptor.__init__.DocumentHandler` **ENTRIES**. Entries are
+    processed one at a time, so only the table itself is held in memory.
+
+    :param iterator entries: :class:`~stem.descriptor.router_status_entry.RouterStatusEntryV3`
+      or :class:`~stem.descriptor.router_status_entry.RouterStatusEntryMicroV3`
+      from a single document
+
+    :raises: **ValueError** if we have more distinct flags than fit in our
+      bitmask
+    """
+
+    self.document = None
+    self.flag_names = []
+    self.nicknames = []
+    self.addresses = array.array('L')
+    self.or_ports = array.array('H')
+    self.dir_ports = array.array('H')
+    self.bandwidths = array.array('L')
+    self.measured = array.array('L')
+    self.flags = array.array('L')
+    self.published = array.array('L')
+
+    self._entry_class = RouterStatusEntryV3
+    self._fingerprints = bytearray()  # concatenated 20 byte binary fingerprints
+    self._contents = bytearray()  # concatenated entry content for constructing rows
+    self._content_offsets = array.array('L')
+
+    for entry in entries:
+      self._append(entry)
+
+  def fingerprint(self, index):
+    """
+    Provides the fingerprint of the given row.
+
+    :param int index: row to provide the fingerprint of
+
+    :returns: **str** with the relay's fingerprint
+    """
+
+    fingerprint = binascii.hexlify(bytes(self._fingerprints[index * 20:(index + 1) * 20])).upper()
+    return stem.util.str_tools._to_unicode(fingerprint)
+
+  def address(self, index):
+    """
+    Provides the address of the given row.
+
+    :param int index: row to provide the address of
+
+    :returns: **str** with the relay's IPv4 address
+    """
+
+    return socket.inet_ntoa(struct.pack('!L', self.addresses[index]))
+
+  def flags_for(self, index):
+    """
+    Provides the flags of the given row.
+
+    :param int index: row to provide the flags of
+
+    :returns: **list** of :data:`~stem.Flag` associated with the relay
+    """
+
+    bitmask = self.flags[index]
+    return [flag for bit, flag in enumerate(self.flag_names) if bitmask & (1 << bit)]
+
+  def row(self, index):
+    """
+    Constructs a router status entry for the given row.
+
+    :param int index: row to be constructed
+
+    :returns: :class:`~stem.descriptor.router_status_entry.RouterStatusEntryV3`
+      or :class:`~stem.descriptor.router_status_entry.RouterStatusEntryMicroV3`
+      for the row
+    """
+
+    start = self._content_offsets[index]
+    end = self._content_offsets[index + 1] if index + 1 < len(self._content_offsets) else len(self._contents)
+
+    return self._entry_class(bytes(self._contents[start:end]), False, self.document)
+
+  def index(self, fingerprint):
+    """
+    Provides the row of a relay.
+
+    :param str fingerprint: fingerprint of the relay to look up
+
+    :returns: **int** row of the relay
+
+    :raises: **ValueError** if the relay isn't in our table
+    """
+
+    try:
+      target = binascii.unhexlify(stem.util.str_tools._to_bytes(fingerprint))
+    except (TypeError, binascii.Error):
+      raise ValueError("'%s' isn't a valid fingerprint" % fingerprint)
+
+    position = self._fingerprints.find(target)
+
+    while position != -1:
+      if position % 20 == 0:
+        return position // 20
+
+      position = self._fingerprints.find(target, position + 1)
+
+    raise ValueError('%s is not in our consensus' % fingerprint)
+
+  def flag_mask(self, flags):
+    """
+    Provides the bitmask for a set of flags, for use with our **flags** column.
+
+    :param list flags: :data:`~stem.Flag` to include in the mask
+
+    :returns: **int** bitmask for the flags, this is **None** if any of them
+      don't appear in our table
+    """
+
+    mask = 0
+
+    for flag in flags:
+      if flag not in self.flag_names:
+        return None
+
+      mask |= 1 << self.flag_names.index(flag)
+
+    return mask
+
+  def select(self, flags = (), exclude_flags = (), min_bandwidth = None):
+    """
+    Provides the rows that match all of the given criteria.
+
+    :param list flags: :data:`~stem.Flag` relays must have
+    :param list exclude_flags: :data:`~stem.Flag` relays must not have
+    :param int min_bandwidth: minimum bandwidth in kilobytes/s
+
+    :returns: **list** of matching row indices
+    """
+
+    required = self.flag_mask(flags)
+
+    if required is None:
+      return []  # nobody has one of these flags
+
+    excluded = self.flag_mask([flag for flag in exclude_flags if flag in self.flag_names])
+
+    if min_bandwidth is None:
+      return [index for index, bitmask in enumerate(self.flags) if bitmask & required == required and not bitmask & excluded]
+    else:
+      return [index for index, (bitmask, bandwidth) in enumerate(zip(self.flags, self.bandwidths)) if bitmask & required == required and not bitmask & excluded and bandwidth >= min_bandwidth]
+
+  def _append(self, entry):
+    if self.document is None:
+      self.document = entry.document
+      self._entry_class = type(entry)
+
+      # ordering our bits like the document's flags, so flags_for() provides
+      # them in the same order as our entries
+
+      if self.document and self.document.known_flags:
+        self.flag_names = list(self.document.known_flags)[:self.flags.itemsize * 8]
+
+    bitmask = 0
+
+    for flag in (entry.flags or []):
+      if flag not in self.flag_names:
+        if len(self.flag_names) >= self.flags.itemsize * 8:
+          raise ValueError('Consensus tables can only have %i distinct flags' % (self.flags.itemsize * 8))
+
+        self.flag_names.append(flag)
+
+      bitmask |= 1 << self.flag_names.index(flag)
+
+    try:
+      address = struct.unpack('!L', socket.inet_aton(entry.address))[0]
+    except (TypeError, socket.error):
+      address = 0
+
+    self._fingerprints += binascii.unhexlify(stem.util.str_tools._to_bytes(entry.fingerprint)) if entry.fingerprint else b'\x00' * 20
+    self._content_offsets.append(len(self._contents))
+    self._contents += entry.get_bytes()
+    self.nicknames.append(entry.nickname)
+    self.addresses.append(address)
+    self.or_ports.append(entry.or_port or 0)
+    self.dir_ports.append(entry.dir_port or 0)
+    self.bandwidths.append(entry.bandwidth or 0)
+    self.measured.append(entry.measured or 0)
+    self.flags.append(bitmask)
+    self.published.append(calendar.timegm(entry.published.utctimetuple()) if entry.published else 0)
+
+  def __len__(self):
+    return len(self.nicknames)
+
+  def __iter__(self):
+    for index in range(len(self)):
+      yield self.row(index)
+
+  def __contains__(self, fingerprint):
+    try:
+      self.index(fingerprint)
+      return True
+    except ValueError:
+      return False
+
+
+class ExitIndex(object):
+  """
+  Index for quickly finding the relays of a consensus that allow exiting to a
+  destination. Rather than checking each relay's exit policy this dedupes
+  them (relays commonly share identical policies), and precomputes the relays
+  that accept each range of ports...
+
+  ::
+
+    from stem.descriptor import parse_file
+    from stem.descriptor.networkstatus import ExitIndex
+
+    consensus = next(parse_file('/home/atagar/.tor/cached-microdesc-consensus', document_handler = 'DOCUMENT'))
+    microdescriptors = parse_file('/home/atagar/.tor/cached-microdescs')
+
+    index = ExitIndex(consensus, microdescriptors)
+
+    for fingerprint in index.exits_to('75.119.206.243', 443):
+      print(fingerprint)
+
+  Exit policies are taken from the given microdescriptors or server
+  descriptors, falling back to the router status entry's own policy summary
+  if it has one. IPv6 destinations are checked against the relay's IPv6
+  policy.
+
+  Server descriptor policies usually reject the relay's own address, so few
+  are identical. Relays are indexed by the ports their policy accepts for
+  most addresses, with the address ranges where it differs checked when
+  queried.
+
+  .. versionadded:: 1.8.0
+
+  :var list fingerprints: fingerprints of the relays we've indexed
+  """
+
+  def __init__(self, consensus, descriptors = None):
+    """
+    :param stem.descriptor.networkstatus.NetworkStatusDocumentV3 consensus:
+      document with the relays to index, or its router status entries
+    :param iterator descriptors: :class:`~stem.descriptor.microdescriptor.Microdescriptor`
+      or :class:`~stem.descriptor.server_descriptor.RelayDescriptor` for the
+      consensus' relays
+    """
+
+    entries = list(consensus.routers.values()) if hasattr(consensus, 'routers') else list(consensus)
+    self.fingerprints = [entry.fingerprint for entry in entries]
+
+    # microdescriptors are matched by digest, and server descriptors by
+    # fingerprint
+
+    by_digest, by_fingerprint = {}, {}
+
+    for desc in (descriptors if descriptors is not None else []):
+      if hasattr(desc, 'fingerprint'):
+        by_fingerprint[desc.fingerprint] = desc
+      else:
+        by_digest[desc.digest()] = desc
+
+    policies, policies_v6 = collections.OrderedDict(), collections.OrderedDict()
+
+    for entry in entries:
+      desc = by_fingerprint.get(entry.fingerprint) or by_digest.get(getattr(entry, 'microdescriptor_digest', None))
+
+      if desc is not None:
+        policy, policy_v6 = desc.exit_policy, desc.exit_policy_v6
+      else:
+        policy, policy_v6 = getattr(entry, 'exit_policy', None), None
+
+      if policy is not None:
+        policies.setdefault(policy, []).append(entry.fingerprint)
+
+      if policy_v6 is not None:
+        policies_v6.setdefault(policy_v6, []).append(entry.fingerprint)
+
+    self._tables = {
+      False: _ExitTable(policies, False),
+      True: _ExitTable(policies_v6, True),
+    }
+
+  def exits_to(self, address, port, ipv6 = False):
+    """
+    Provides the relays that allow exiting to a given destination.
+
+    :param str,int address: IPv4 or IPv6 address (with or without brackets),
+      or its integer representation
+    :param int port: port number
+    :param bool ipv6: if the address is an integer, **True** if it's IPv6 and
+      **False** if it's IPv4
+
+    :returns: **frozenset** with the fingerprints of relays that permit exiting
+      to this destination
+
+    :raises: **ValueError** if provided with a malformed address or port
+    """
+
+    is_ipv6, address_int = stem.exit_policy._destination_address(address, ipv6)
+
+    if not stem.util.connection.is_valid_port(port):
+      raise ValueError("'%s' isn't a valid port" % port)
+
+    return self._tables[is_ipv6].exits_to(address_int, int(port))
+
+  def exits_to_many(self, destinations, ipv6 = False):
+    """
+    Provides the relays that allow exiting to each of the given destinations.
+
+    :param list destinations: **(address, port)** tuples to be checked
+    :param bool ipv6: if addresses are integers, **True** if they're IPv6 and
+      **False** if they're IPv4
+
+    :returns: **list** with a **frozenset** of fingerprints for each destination
+
+    :raises: **ValueError** if provided with a malformed address or port
+    """
+
+    return [self.exits_to(address, port, ipv6) for address, port in destinations]
+
+
+class _ExitTable(object):
+  """
+  Relays that allow exiting to each destination of an IP version.
+
+  Each policy has a port table for the bulk of the address space. Relays are
+  grouped by these, and we precompute the relays that accept each range of
+  ports. Address ranges where a policy differs (such as the relay's own
+  address or private ranges) are overrides. Relays with the same port table
+  for a range are grouped, so policies that reject private addresses just
+  remove a group of relays from our result.
+
+  :param dict policies: mapping of exit policies to their relays' fingerprints
+  :param bool is_ipv6: **True** if this is for IPv6 destinations, **False**
+    otherwise
+  """
+
+  def __init__(self, policies, is_ipv6):
+    self._is_ipv6 = is_ipv6
+    self._unindexed = []  # (compiled policy, fingerprints) we check for every destination
+
+    max_address = 1 << (128 if is_ipv6 else 32)
+    relays_by_table = collections.OrderedDict()  # (port_starts, results) => fingerprints
+    overrides = {}  # (min_address, end) => {(port_starts, results) => fingerprints}
+
+    for policy, fingerprints in policies.items():
+      compiled = policy.compile()
+      address_starts, port_tables, linear_rules, _ = compiled._tables[is_ipv6]
+
+      if linear_rules is not None:
+        self._unindexed.append((compiled, frozenset(fingerprints)))
+        continue
+
+      # port table that covers the most addresses
+
+      coverage = {}
+
+      for i, port_table in enumerate(port_tables):
+        end = address_starts[i + 1] if i + 1 < len(address_starts) else max_address
+        coverage[id(port_table)] = coverage.get(id(port_table), 0) + end - address_starts[i]
+
+      common_table = max(port_tables, key = lambda port_table: coverage[id(port_table)])
+      relays_by_table.setdefault(_port_table_key(common_table), set()).update(fingerprints)
+
+      for i, port_table in enumerate(port_tables):
+        if port_table is not common_table:
+          end = address_starts[i + 1] if i + 1 < len(address_starts) else max_address
+          overrides.setdefault((address_starts[i], end), {}).setdefault(_port_table_key(port_table), set()).update(fingerprints)
+
+    # relays that accept each range of ports
+
+    port_boundaries = set([1])
+
+    for port_starts, _ in relays_by_table:
+      port_boundaries.update(port_starts)
+
+    self._port_starts, self._port_relays = [], []
+
+    for port in sorted(port_boundaries):
+      relays = set()
+
+      for (port_starts, results), fingerprints in relays_by_table.items():
+        if results[bisect.bisect_right(port_starts, port) - 1]:
+          relays.update(fingerprints)
+
+      relays = frozenset(relays)
+
+      if self._port_relays and self._port_relays[-1] == relays:
+        continue
+
+      self._port_starts.append(port)
+      self._port_relays.append(relays)
+
+    # Overrides within each range of addresses. These are tuples of the form...
+    #
+    #   (overridden relays, ((port_starts, results, relays), ...))
+
+    starting, ending = {}, {}
+
+    for min_address, end in overrides:
+      starting.setdefault(min_address, []).append((min_address, end))
+      ending.setdefault(end, []).append((min_address, end))
+
+    self._address_starts, self._address_overrides = [0], [(frozenset(), ())]
+    active, override_cache = set(), {}
+
+    for boundary in sorted(set(starting).union(ending)):
+      if boundary >= max_address:
+        break
+
+      active.difference_update(ending.get(boundary, []))
+      active.update(starting.get(boundary, []))
+
+      applicable = tuple(sorted(active))
+
+      if applicable not in override_cache:
+        overridden, replacements = set(), {}
+
+        for address_range in applicable:
+          for table_key, fingerprints in overrides[address_range].items():
+            overridden.update(fingerprints)
+            replacements.setdefault(table_key, set()).update(fingerprints)
+
+        override_cache[applicable] = (frozenset(overridden), tuple([(port_starts, results, frozenset(fingerprints)) for (port_starts, results), fingerprints in replacements.items()]))
+
+      if boundary == 0:
+        self._address_overrides[0] = override_cache[applicable]
+      else:
+        self._address_starts.append(boundary)
+        self._address_overrides.append(override_cache[applicable])
+
+  def exits_to(self, address, port):
+    relays = self._port_relays[bisect.bisect_right(self._port_starts, port) - 1]
+    overridden, replacements = self._address_overrides[bisect.bisect_right(self._address_starts, address) - 1]
+
+    if overridden:
+      relays = relays.difference(overridden)
+
+      for port_starts, results, fingerprints in replacements:
+        if results[bisect.bisect_right(port_starts, port) - 1]:
+          relays = relays.union(fingerprints)
+
+    for compiled, fingerprints in self._unindexed:
+      if compiled.can_exit_to(address, port, self._is_ipv6):
+        relays = relays.union(fingerprints)
+      else:
+        relays = relays.difference(fingerprints)
+
+    return relays
+
+
+def _port_table_key(port_table):
+  port_starts, results = port_table
+  return (tuple(port_starts), tuple(results))
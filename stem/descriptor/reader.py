@@ -82,7 +82,10 @@ and picks up where it left off if run again...
    use this modle please `let me know <https://www.atagar.com/contact/>`_.
 """
 
+import collections
+import io
 import mimetypes
+import multiprocessing
 import os
 import tarfile
 import threading
@@ -240,6 +243,58 @@ def save_processed_files(path, processed_files):
       output_file.write('%s %i\n' % (path, timestamp))
 
 
+def _parse_in_worker(path, content, archive_path, validate, document_handler, kwargs):
+  """
+  Parses a descriptor file or archive member within a worker process.
+
+  :param str path: location of the descriptor file or archive
+  :param bytes content: archive member's content, **None** if we should read
+    the path
+  :param str archive_path: path of the member within its archive
+
+  :returns: **tuple** of the form (descriptors, exception), the later being the
+    TypeError, ValueError, or IOError we encountered (if any)
+  """
+
+  descriptors = []
+
+  try:
+    if content is None:
+      with open(path, 'rb') as descriptor_file:
+        for desc in stem.descriptor.parse_file(descriptor_file, validate = validate, document_handler = document_handler, **kwargs):
+          _load_attributes(desc)
+          descriptors.append(desc)
+    else:
+      for desc in stem.descriptor.parse_file(io.BytesIO(content), validate = validate, document_handler = document_handler, **kwargs):
+        desc._set_path(path)
+        desc._set_archive_path(archive_path)
+        _load_attributes(desc)
+        descriptors.append(desc)
+  except (TypeError, ValueError, IOError) as exc:
+    return descriptors, exc
+
+  return descriptors, None
+
+
+def _load_attributes(desc):
+  """
+  Parses the attributes of a lazily loaded descriptor, along with those of
+  any router status entries it has. Otherwise our workers would only tokenize
+  descriptors, leaving their parsing to our caller's process.
+
+  :param stem.descriptor.Descriptor desc: descriptor to be parsed
+  """
+
+  for attr in desc.ATTRIBUTES:
+    try:
+      getattr(desc, attr)
+    except Exception:
+      pass  # left for our caller to encounter if they use this attribute
+
+  for router in getattr(desc, 'routers', {}).values():
+    _load_attributes(router)
+
+
 class DescriptorReader(object):
   """
   Iterator for the descriptor data on the local file system. This can process
@@ -266,10 +321,19 @@ class DescriptorReader(object):
     listings from this path, errors are ignored
   :param stem.descriptor.__init__.DocumentHandler document_handler: method in
     which to parse :class:`~stem.descriptor.networkstatus.NetworkStatusDocument`
+  :param int workers: number of processes to parse files and archive members
+    with, if zero then we parse them within our reader thread. Descriptors
+    that are lazily loaded are fully parsed by these processes.
+  :param bool ordered: when parsing with workers this determines if
+    descriptors are provided in the order that we read their files (**True**)
+    or as soon as a worker finishes parsing them (**False**)
   :param dict kwargs: additional arguments for the descriptor constructor
+
+  .. versionchanged:: 1.8.0
+     Added the workers and ordered arguments.
   """
 
-  def __init__(self, target, validate = False, follow_links = False, buffer_size = 100, persistence_path = None, document_handler = stem.descriptor.DocumentHandler.ENTRIES, **kwargs):
+  def __init__(self, target, validate = False, follow_links = False, buffer_size = 100, persistence_path = None, document_handler = stem.descriptor.DocumentHandler.ENTRIES, workers = 0, ordered = True, **kwargs):
     self._targets = [target] if stem.util._is_str(target) else target
 
     # expand any relative paths we got
@@ -280,6 +344,8 @@ class DescriptorReader(object):
     self._follow_links = follow_links
     self._persistence_path = persistence_path
     self._document_handler = document_handler
+    self._workers = workers
+    self._ordered = ordered
     self._kwargs = kwargs
     self._read_listeners = []
     self._skip_listeners = []
@@ -294,6 +360,13 @@ class DescriptorReader(object):
     self._is_stopped = threading.Event()
     self._is_stopped.set()
 
+    # Process pool when parsing with workers. Each pending result is a tuple of
+    # the form (path, mime_type, is_archive, AsyncResult).
+
+    self._pool = None
+    self._pending_results = collections.deque()
+    self._result_notice = threading.Event()
+
     # Descriptors that we have read but not yet provided to the caller. A
     # FINISHED entry is used by the reading thread to indicate the end.
 
@@ -391,6 +464,10 @@ class DescriptorReader(object):
         raise ValueError('Already running, you need to call stop() first')
       else:
         self._is_stopped.clear()
+
+        if self._workers:
+          self._pool = multiprocessing.Pool(self._workers)
+
         self._reader_thread = threading.Thread(target = self._read_descriptor_files, name='Descriptor reader')
         self._reader_thread.setDaemon(True)
         self._reader_thread.start()
@@ -415,6 +492,12 @@ class DescriptorReader(object):
       self._reader_thread.join()
       self._reader_thread = None
 
+      if self._pool:
+        self._pool.terminate()
+        self._pool.join()
+        self._pool = None
+        self._pending_results.clear()
+
       if self._persistence_path:
         try:
           processed_files = self.get_processed_files()
@@ -439,6 +522,9 @@ class DescriptorReader(object):
       else:
         self._handle_file(target, new_processed_files)
 
+    while self._pending_results and not self._is_stopped.is_set():
+      self._deliver_result()
+
     self._processed_files = new_processed_files
 
     if not self._is_stopped.is_set():
@@ -510,6 +596,10 @@ class DescriptorReader(object):
     try:
       self._notify_read_listeners(target)
 
+      if self._pool:
+        self._submit(target, mime_type)
+        return
+
       with open(target, 'rb') as target_file:
         for desc in stem.descriptor.parse_file(target_file, validate = self._validate, document_handler = self._document_handler, **self._kwargs):
           if self._is_stopped.is_set():
@@ -540,6 +630,17 @@ class DescriptorReader(object):
         if tar_entry.isfile():
           entry = tar_file.extractfile(tar_entry)
 
+          if self._pool:
+            try:
+              self._submit(target, None, tar_entry.name, entry.read())
+            finally:
+              entry.close()
+
+            if self._is_stopped.is_set():
+              return
+
+            continue
+
           try:
             for desc in stem.descriptor.parse_file(entry, validate = self._validate, document_handler = self._document_handler, **self._kwargs):
               if self._is_stopped.is_set():
@@ -561,6 +662,71 @@ class DescriptorReader(object):
       if tar_file:
         tar_file.close()
 
+  def _submit(self, path, mime_type, archive_path = None, content = None):
+    """
+    Provides a descriptor file or archive member to our workers. If we
+    already have a couple pending for each worker then this blocks until one
+    of them is done.
+    """
+
+    while len(self._pending_results) >= self._workers * 2 and not self._is_stopped.is_set():
+      self._deliver_result()
+
+    args = (path, content, archive_path, self._validate, self._document_handler, self._kwargs)
+    result = self._pool.apply_async(_parse_in_worker, args, callback = lambda _: self._result_notice.set())
+    self._pending_results.append((path, mime_type, archive_path is not None, result))
+
+  def _deliver_result(self):
+    """
+    Waits for a worker to finish parsing one of our pending files, then
+    enqueues its descriptors. If we're ordered that's the file we submitted
+    first, otherwise it's whichever is done first.
+    """
+
+    pending = None
+
+    while pending is None and not self._is_stopped.is_set():
+      if self._ordered:
+        if self._pending_results[0][3].ready():
+          pending = self._pending_results.popleft()
+      else:
+        for entry in self._pending_results:
+          if entry[3].ready():
+            pending = entry
+            self._pending_results.remove(entry)
+            break
+
+      if pending is None:
+        # Our callback notifies us when results are ready, but the timeout
+        # lets us check if we've been stopped.
+
+        self._result_notice.wait(0.1)
+        self._result_notice.clear()
+
+    if pending is None:
+      return
+
+    path, mime_type, is_archive, result = pending
+
+    try:
+      descriptors, exc = result.get()
+    except Exception as result_exc:
+      descriptors, exc = [], IOError(result_exc)  # worker failed to provide its results back to us
+
+    for desc in descriptors:
+      if self._is_stopped.is_set():
+        return
+
+      self._unreturned_descriptors.put(desc)
+      self._iter_notice.set()
+
+    if isinstance(exc, IOError):
+      self._notify_skip_listeners(path, ReadFailed(exc))
+    elif isinstance(exc, TypeError) and not is_archive:
+      self._notify_skip_listeners(path, UnrecognizedType(mime_type))
+    elif exc:
+      self._notify_skip_listeners(path, ParsingFailure(exc))
+
   def _notify_read_listeners(self, path):
     for listener in self._read_listeners:
       listener(path)
@@ -54,6 +54,13 @@ content. For example...
     |- start - issues the query if it isn't already running
     +- run - blocks until the request is finished and provides the results
 
+  BatchQuery - Several queries issued concurrently, with merged results
+    |- start - issues the queries if they aren't already running
+    +- run - blocks until the requests are finished and provides the results
+
+  ConnectionPool - Relay connections that are reused between ORPort downloads
+    +- close - closes our connections
+
   DescriptorDownloader - Configurable class for issuing queries
     |- use_directory_mirrors - use directory mirrors to download future descriptors
     |- their_server_descriptor - provides the server descriptor of the relay we download from
@@ -76,6 +83,16 @@ content. For example...
   Maximum number of microdescriptors that can requested at a time by their
   hashes.
 
+.. data:: POOL_IDLE_TIMEOUT
+
+  Default number of seconds that a
+  :class:`~stem.descriptor.remote.ConnectionPool` keeps unused connections.
+
+.. data:: BATCH_WORKERS
+
+  Default number of concurrent downloads made by a
+  :class:`~stem.descriptor.remote.BatchQuery`.
+
 .. data:: Compression (enum)
 
   Compression when downloading descriptors.
@@ -129,8 +146,28 @@ Compression = stem.util.enum.Enum(
 MAX_FINGERPRINTS = 96
 MAX_MICRODESCRIPTOR_HASHES = 90
 
+BATCH_WORKERS = 4
+
+POOL_IDLE_TIMEOUT = 60
+
 SINGLETON_DOWNLOADER = None
 
+# Descriptor types we can parse as their content arrives. Network status
+# documents are absent because we need their full content (the router status
+# entries are read after the footer).
+
+STREAMABLE_TYPES = (
+  'server-descriptor',
+  'bridge-server-descriptor',
+  'extra-info',
+  'bridge-extra-info',
+  'microdescriptor',
+)
+
+# Number of bytes read from the socket at a time when streaming.
+
+STREAM_READ_SIZE = 16384
+
 # Detached signatures do *not* have a specified type annotation. But our
 # parsers expect that all descriptors have a type. As such making one up.
 # This may change in the future if these ever get an official @type.
@@ -335,6 +372,15 @@ class Query(object):
      Serge has replaced Bifroest as our bridge authority. Avoiding descriptor
      downloads from it instead.
 
+  .. versionchanged:: 1.8.0
+     Added the from_consensus argument.
+
+  .. versionchanged:: 1.8.0
+     Added the stream argument.
+
+  .. versionchanged:: 1.8.0
+     Added the connection_pool argument.
+
   :var str resource: resource being fetched, such as '/tor/server/all'
   :var str descriptor_type: type of descriptors being fetched (for options see
     :func:`~stem.descriptor.__init__.parse_file`), this is guessed from the
@@ -349,6 +395,15 @@ class Query(object):
     fails
   :var bool fall_back_to_authority: when retrying request issues the last
     request to a directory authority if **True**
+  :var stem.descriptor.networkstatus.NetworkStatusDocumentV3 from_consensus:
+    consensus we already have, if provided we ask for a diff from it and apply
+    that rather than downloading the full document (this requires sha3 support)
+  :var bool stream: download and parse descriptors as we iterate over the
+    query, decompressing content as it arrives and providing each descriptor
+    as soon as it's complete
+  :var stem.descriptor.remote.ConnectionPool connection_pool: reuses relay
+    connections and circuits from this pool when downloading from a
+    :class:`~stem.ORPort`, connecting anew for each request if **None**
 
   :var str content: downloaded descriptor content
   :var Exception error: exception if a problem occured
@@ -376,9 +431,24 @@ class Query(object):
   :param bool start: start making the request when constructed (default is **True**)
   :param bool block: only return after the request has been completed, this is
     the same as running **query.run(True)** (default is **False**)
+
+  **Streaming**
+
+  Responses such as '/tor/server/all' are tens of megabytes. When **stream** is
+  set we don't keep the response (so **content** remains **None**). Instead
+  the request is made when we're iterated over, and only the descriptor being
+  read is kept in memory. Iterating again makes a new request.
+
+  A request is retried if it fails before providing any descriptors.
+  Afterward failures are raised (or set as our **error** if iterating) since
+  retrying would provide the same descriptors again.
+
+  Only server, extrainfo, and microdescriptors are streamed from DirPorts.
+  Other queries (such as for the consensus) and downloads from ORPorts are
+  read in full as usual.
   """
 
-  def __init__(self, resource, descriptor_type = None, endpoints = None, compression = None, retries = 2, fall_back_to_authority = False, timeout = None, start = True, block = False, validate = False, document_handler = stem.descriptor.DocumentHandler.ENTRIES, **kwargs):
+  def __init__(self, resource, descriptor_type = None, endpoints = None, compression = None, retries = 2, fall_back_to_authority = False, timeout = None, start = True, block = False, validate = False, document_handler = stem.descriptor.DocumentHandler.ENTRIES, from_consensus = None, stream = False, connection_pool = None, **kwargs):
     if not resource.startswith('/'):
       raise ValueError("Resources should start with a '/': %s" % resource)
 
@@ -420,6 +490,9 @@ class Query(object):
     self.compression = compression
     self.retries = retries
     self.fall_back_to_authority = fall_back_to_authority
+    self.from_consensus = from_consensus
+    self.stream = stream
+    self.connection_pool = connection_pool
 
     self.content = None
     self.error = None
@@ -446,9 +519,13 @@ class Query(object):
 
   def start(self):
     """
-    Starts downloading the scriptors if we haven't started already.
+    Starts downloading the scriptors if we haven't started already. Streaming
+    queries instead download as they're iterated over.
     """
 
+    if self._is_streaming():
+      return
+
     with self._downloader_thread_lock:
       if self._downloader_thread is None:
         self._downloader_thread = threading.Thread(
@@ -484,6 +561,12 @@ class Query(object):
     return list(self._run(suppress))
 
   def _run(self, suppress):
+    if self._is_streaming():
+      for desc in self._run_streaming(suppress):
+        yield desc
+
+      return
+
     with self._downloader_thread_lock:
       self.start()
       self._downloader_thread.join()
@@ -511,6 +594,13 @@ class Query(object):
               io.BytesIO(self.content),
               validate = self.validate,
             )
+          elif self.from_consensus is not None and stem.descriptor.networkstatus._is_consensus_diff(self.content):
+            consensus = self.from_consensus.apply_diff(self.content, self.validate)
+
+            if self.document_handler == stem.descriptor.DocumentHandler.ENTRIES:
+              results = consensus.routers.values()
+            else:
+              results = [consensus]
           else:
             results = stem.descriptor.parse_file(
               io.BytesIO(self.content),
@@ -530,6 +620,80 @@ class Query(object):
 
           raise self.error
 
+  def _run_streaming(self, suppress):
+    self.start_time = time.time()
+    self.error = None
+    self.is_done = False
+    self.runtime = None
+
+    retries, timeout = self.retries, self.timeout
+    provided_descriptors = False
+
+    try:
+      while True:
+        try:
+          for desc in self._stream_descriptors(retries == 0 and self.fall_back_to_authority, timeout):
+            provided_descriptors = True
+            yield desc
+
+          self.runtime = time.time() - self.start_time
+          log.trace("Descriptors streamed from '%s' in %0.2fs" % (self.download_url, self.runtime))
+          return
+        except Exception as exc:
+          # Malformed content (ValueError) won't improve with another attempt.
+          # Otherwise we retry so long as we haven't provided any descriptors.
+
+          if timeout is not None:
+            timeout = self.timeout - (time.time() - self.start_time)
+
+          if not provided_descriptors and not isinstance(exc, ValueError) and retries > 0 and (timeout is None or timeout > 0):
+            log.debug("Unable to download descriptors from '%s' (%i retries remaining): %s" % (self.download_url, retries, exc))
+            retries -= 1
+            continue
+
+          log.debug("Unable to download descriptors from '%s': %s" % (self.download_url, exc))
+          self.error = exc
+
+          if suppress:
+            return
+
+          raise
+    finally:
+      self.is_done = True
+
+  def _stream_descriptors(self, use_authority, timeout):
+    """
+    Makes a request, parsing descriptors as its content arrives.
+    """
+
+    endpoint = self._pick_endpoint(use_authority)
+
+    if isinstance(endpoint, stem.ORPort):
+      content, self.reply_headers = _download_from_orport(endpoint, self.compression, self.resource, pool = self.connection_pool)
+      descriptor_file = io.BytesIO(content)
+      response = None
+    elif isinstance(endpoint, stem.DirPort):
+      self.download_url = 'http://%s:%i/%s' % (endpoint.address, endpoint.port, self.resource.lstrip('/'))
+      response = _request_from_dirport(self.download_url, self.compression, timeout)
+      self.reply_headers = response.headers
+      descriptor_file = _StreamingFile(response, response.headers.get('Content-Encoding'))
+    else:
+      raise ValueError("BUG: endpoints can only be ORPorts or DirPorts, '%s' was a %s" % (endpoint, type(endpoint).__name__))
+
+    try:
+      for desc in stem.descriptor.parse_file(descriptor_file, self.descriptor_type, validate = self.validate, document_handler = self.document_handler, **self.kwargs):
+        yield desc
+    finally:
+      if response is not None:
+        response.close()
+
+  def _is_streaming(self):
+    """
+    Checks if we should parse descriptors as they're downloaded.
+    """
+
+    return self.stream and self.from_consensus is None and self.descriptor_type.split(' ')[0] in STREAMABLE_TYPES
+
   def __iter__(self):
     for desc in self._run(True):
       yield desc
@@ -555,12 +719,19 @@ class Query(object):
     try:
       self.start_time = time.time()
       endpoint = self._pick_endpoint(use_authority = retries == 0 and self.fall_back_to_authority)
+      headers = {}
+
+      # Tor replies with a diff if it has one from our consensus, and the full
+      # document otherwise.
+
+      if self.from_consensus is not None and stem.prereq._is_sha3_available():
+        headers['X-Or-Diff-From-Consensus'] = self.from_consensus.digest(stem.descriptor.DigestHash.SHA3_256)
 
       if isinstance(endpoint, stem.ORPort):
-        self.content, self.reply_headers = _download_from_orport(endpoint, self.compression, self.resource)
+        self.content, self.reply_headers = _download_from_orport(endpoint, self.compression, self.resource, headers, self.connection_pool)
       elif isinstance(endpoint, stem.DirPort):
         self.download_url = 'http://%s:%i/%s' % (endpoint.address, endpoint.port, self.resource.lstrip('/'))
-        self.content, self.reply_headers = _download_from_dirport(self.download_url, self.compression, timeout)
+        self.content, self.reply_headers = _download_from_dirport(self.download_url, self.compression, timeout, headers)
       else:
         raise ValueError("BUG: endpoints can only be ORPorts or DirPorts, '%s' was a %s" % (endpoint, type(endpoint).__name__))
 
@@ -582,6 +753,323 @@ class Query(object):
       self.is_done = True
 
 
+class BatchQuery(object):
+  """
+  Several :class:`~stem.descriptor.remote.Query` instances that are issued
+  concurrently, with their descriptors merged into a single result. This is
+  used to fetch more descriptors by their fingerprints or hashes than fit in
+  a single request...
+
+  ::
+
+    import stem.descriptor.remote
+
+    consensus = stem.descriptor.remote.get_consensus(microdescriptor = True).run()
+    digests = [entry.microdescriptor_digest for entry in consensus]
+
+    for desc in stem.descriptor.remote.get_microdescriptors(digests, batch = True):
+      print(desc.identifiers)
+
+  Each query picks its own endpoint, so when the downloader uses directory
+  mirrors our requests are spread among them. Queries retry independently of
+  each other, picking a new endpoint with each attempt.
+
+  Descriptors are provided in the order of our queries. If a query fails we
+  provide the descriptors that preceded it, then raise its error.
+
+  Streaming queries (see :class:`~stem.descriptor.remote.Query`) are made
+  one after another as we're iterated over, rather than concurrently.
+
+  .. versionadded:: 1.8.0
+
+  :var list queries: :class:`~stem.descriptor.remote.Query` instances we're
+    running
+  :var int workers: maximum number of queries that run at once
+
+  :var Exception error: exception of the first query that failed
+  :var bool is_done: flag that indicates if all of our queries have finished
+
+  :var float start_time: unix timestamp when we first started running
+  :var float runtime: time our queries took, this is **None** if they're not
+    yet finished
+
+  :param list resources: resources being fetched, such as
+    '/tor/server/fp/<fp1>+<fp2>'
+  :param int workers: maximum number of queries that run at once
+  :param bool start: start making the requests when constructed (default is **True**)
+  :param bool block: only return after the requests have been completed, this
+    is the same as running **query.run(True)** (default is **False**)
+  :param query_args: additional arguments for the
+    :class:`~stem.descriptor.remote.Query` constructor
+  """
+
+  def __init__(self, resources, workers = BATCH_WORKERS, start = True, block = False, **query_args):
+    if workers < 1:
+      raise ValueError('BatchQuery requires at least one worker, %s was provided' % workers)
+
+    self.queries = [Query(resource, start = False, **query_args) for resource in resources]
+    self.workers = workers
+
+    self.error = None
+    self.is_done = False
+
+    self.start_time = None
+    self.runtime = None
+
+    self._pending = list(reversed(list(enumerate(self.queries))))
+    self._finished = [threading.Event() for _ in self.queries]
+    self._worker_threads = None
+    self._worker_threads_lock = threading.RLock()
+
+    if start:
+      self.start()
+
+    if block:
+      self.run(True)
+
+  def start(self):
+    """
+    Starts downloading the descriptors if we haven't started already.
+    """
+
+    with self._worker_threads_lock:
+      if self._worker_threads is None:
+        self.start_time = time.time()
+        self._worker_threads = []
+
+        for i in range(min(self.workers, len(self.queries))):
+          worker = threading.Thread(
+            name = 'Descriptor batch query %i' % (i + 1),
+            target = self._worker_loop,
+          )
+
+          worker.setDaemon(True)
+          worker.start()
+          self._worker_threads.append(worker)
+
+        if not self.queries:
+          self._finish()
+
+  def run(self, suppress = False):
+    """
+    Blocks until our requests are complete then provides the descriptors. If
+    we haven't yet started our requests then this does so.
+
+    :param bool suppress: avoids raising exceptions if **True**
+
+    :returns: list for the requested :class:`~stem.descriptor.__init__.Descriptor` instances
+
+    :raises: the same exceptions as :func:`~stem.descriptor.remote.Query.run`
+    """
+
+    return list(self._run(suppress))
+
+  def _run(self, suppress):
+    self.start()
+
+    for query, finished in zip(self.queries, self._finished):
+      finished.wait()
+
+      for desc in query._run(True):
+        yield desc
+
+      if query.error:
+        if self.error is None:
+          self.error = query.error
+
+        if suppress:
+          return
+
+        raise query.error
+
+  def __iter__(self):
+    for desc in self._run(True):
+      yield desc
+
+  def _worker_loop(self):
+    while True:
+      with self._worker_threads_lock:
+        if not self._pending:
+          return
+
+        index, query = self._pending.pop()
+
+      # streaming queries download as we iterate over them
+
+      if not query._is_streaming():
+        query.start()
+        query._downloader_thread.join()
+
+      with self._worker_threads_lock:
+        if query.error and self.error is None:
+          self.error = query.error
+
+      self._finished[index].set()
+
+      if all([finished.is_set() for finished in self._finished]):
+        self._finish()
+
+  def _finish(self):
+    with self._worker_threads_lock:
+      if not self.is_done:
+        self.runtime = time.time() - self.start_time
+        self.is_done = True
+
+
+class ConnectionPool(object):
+  """
+  Relay connections and circuits that are kept open between downloads from
+  ORPorts. Establishing a connection requires a TLS handshake, link protocol
+  negotiation, and circuit creation. When making many requests of the same
+  relays it's far quicker to instead open a new stream on an existing
+  circuit...
+
+  ::
+
+    from stem.descriptor.remote import ConnectionPool, DescriptorDownloader
+
+    with ConnectionPool() as pool:
+      downloader = DescriptorDownloader(
+        endpoints = [stem.ORPort('128.31.0.34', 9101)],
+        connection_pool = pool,
+      )
+
+      for fingerprint in fingerprints:
+        desc = downloader.get_server_descriptors(fingerprint).run()[0]
+
+  Each connection is used by one request at a time, so concurrent requests of
+  the same relay establish additional connections. Unused connections are
+  closed after **idle_timeout** seconds. This is checked as the pool is used,
+  so please call :func:`~stem.descriptor.remote.ConnectionPool.close` when
+  you're done with it.
+
+  .. versionadded:: 1.8.0
+
+  :var float idle_timeout: seconds before we close an unused connection
+  """
+
+  def __init__(self, idle_timeout = POOL_IDLE_TIMEOUT):
+    self.idle_timeout = idle_timeout
+
+    self._idle = {}  # (address, port) => list of idle _PooledCircuit
+    self._idle_lock = threading.RLock()
+    self._is_closed = False
+
+  def close(self):
+    """
+    Closes all of our unused connections. Connections that are presently
+    downloading are closed when they finish.
+    """
+
+    with self._idle_lock:
+      for pooled in sum(self._idle.values(), []):
+        pooled.close()
+
+      self._idle = {}
+      self._is_closed = True
+
+  def _acquire(self, endpoint):
+    """
+    Provides an idle circuit for the given ORPort, establishing a new
+    connection if we lack one.
+
+    :param stem.ORPort endpoint: relay to provide a circuit for
+
+    :returns: :class:`~stem.descriptor.remote._PooledCircuit` for the relay
+
+    :raises: :class:`stem.SocketError` if unable to establish a connection
+    """
+
+    key = (endpoint.address, endpoint.port)
+
+    with self._idle_lock:
+      self._close_expired()
+      pooled_circuits = self._idle.get(key, [])
+
+      while pooled_circuits:
+        pooled = pooled_circuits.pop()
+
+        if pooled.is_usable():
+          return pooled
+
+        pooled.close()
+
+    link_protocols = endpoint.link_protocols if endpoint.link_protocols else [3]
+    relay = stem.client.Relay.connect(endpoint.address, endpoint.port, link_protocols)
+
+    try:
+      return _PooledCircuit(key, relay, relay.create_circuit())
+    except:
+      relay.close()
+      raise
+
+  def _release(self, pooled, reusable):
+    """
+    Provides a circuit back to the pool once its request has finished.
+
+    :param stem.descriptor.remote._PooledCircuit pooled: circuit being released
+    :param bool reusable: **False** if the circuit shouldn't be used again
+    """
+
+    with self._idle_lock:
+      if reusable and pooled.is_usable() and not self._is_closed:
+        pooled.last_used = time.time()
+        self._idle.setdefault(pooled.key, []).append(pooled)
+      else:
+        pooled.close()
+
+      self._close_expired()
+
+  def _close_expired(self):
+    now = time.time()
+
+    with self._idle_lock:
+      for key, pooled_circuits in list(self._idle.items()):
+        for pooled in [p for p in pooled_circuits if now - p.last_used >= self.idle_timeout]:
+          pooled.close()
+          pooled_circuits.remove(pooled)
+
+        if not pooled_circuits:
+          del self._idle[key]
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self, exit_type, value, traceback):
+    self.close()
+
+
+class _PooledCircuit(object):
+  """
+  Relay connection and circuit within a
+  :class:`~stem.descriptor.remote.ConnectionPool`.
+
+  :var tuple key: (address, port) of the relay
+  :var stem.client.Relay relay: connection with the relay
+  :var stem.client.Circuit circuit: circuit established through the relay
+  :var float last_used: unix timestamp when we were last used
+  """
+
+  def __init__(self, key, relay, circuit):
+    self.key = key
+    self.relay = relay
+    self.circuit = circuit
+    self.last_used = time.time()
+
+  def is_usable(self):
+    """
+    Checks if our connection and circuit are still open.
+    """
+
+    return not self.circuit.is_closed and self.relay.is_alive()
+
+  def close(self):
+    try:
+      self.relay.close()
+    except Exception as exc:
+      log.debug('Unable to close pooled connection with %s:%i: %s' % (self.key[0], self.key[1], exc))
+
+
 class DescriptorDownloader(object):
   """
   Configurable class that issues :class:`~stem.descriptor.remote.Query`
@@ -648,21 +1136,29 @@ class DescriptorDownloader(object):
 
     return self.query('/tor/server/authority', **query_args)
 
-  def get_server_descriptors(self, fingerprints = None, **query_args):
+  def get_server_descriptors(self, fingerprints = None, batch = False, workers = BATCH_WORKERS, **query_args):
     """
     Provides the server descriptors with the given fingerprints. If no
     fingerprints are provided then this returns all descriptors known
     by the relay.
 
+    .. versionchanged:: 1.8.0
+       Added the batch and workers arguments.
+
     :param str,list fingerprints: fingerprint or list of fingerprints to be
       retrieved, gets all descriptors if **None**
+    :param bool batch: splits our fingerprints into several requests that are
+      issued concurrently if **True**
+    :param int workers: maximum number of concurrent requests when batching
     :param query_args: additional arguments for the
       :class:`~stem.descriptor.remote.Query` constructor
 
-    :returns: :class:`~stem.descriptor.remote.Query` for the server descriptors
+    :returns: :class:`~stem.descriptor.remote.Query` for the server descriptors,
+      or a :class:`~stem.descriptor.remote.BatchQuery` if batching
 
     :raises: **ValueError** if we request more than 96 descriptors by their
-      fingerprints (this is due to a limit on the url length by squid proxies).
+      fingerprints without batching (this is due to a limit on the url length
+      by squid proxies).
     """
 
     resource = '/tor/server/all'
@@ -671,28 +1167,38 @@ class DescriptorDownloader(object):
       fingerprints = [fingerprints]
 
     if fingerprints:
-      if len(fingerprints) > MAX_FINGERPRINTS:
+      if batch:
+        return self._batch_query('/tor/server/fp/%s', '+', fingerprints, MAX_FINGERPRINTS, workers, query_args)
+      elif len(fingerprints) > MAX_FINGERPRINTS:
         raise ValueError('Unable to request more than %i descriptors at a time by their fingerprints' % MAX_FINGERPRINTS)
 
       resource = '/tor/server/fp/%s' % '+'.join(fingerprints)
 
     return self.query(resource, **query_args)
 
-  def get_extrainfo_descriptors(self, fingerprints = None, **query_args):
+  def get_extrainfo_descriptors(self, fingerprints = None, batch = False, workers = BATCH_WORKERS, **query_args):
     """
     Provides the extrainfo descriptors with the given fingerprints. If no
     fingerprints are provided then this returns all descriptors in the present
     consensus.
 
+    .. versionchanged:: 1.8.0
+       Added the batch and workers arguments.
+
     :param str,list fingerprints: fingerprint or list of fingerprints to be
       retrieved, gets all descriptors if **None**
+    :param bool batch: splits our fingerprints into several requests that are
+      issued concurrently if **True**
+    :param int workers: maximum number of concurrent requests when batching
     :param query_args: additional arguments for the
       :class:`~stem.descriptor.remote.Query` constructor
 
-    :returns: :class:`~stem.descriptor.remote.Query` for the extrainfo descriptors
+    :returns: :class:`~stem.descriptor.remote.Query` for the extrainfo descriptors,
+      or a :class:`~stem.descriptor.remote.BatchQuery` if batching
 
     :raises: **ValueError** if we request more than 96 descriptors by their
-      fingerprints (this is due to a limit on the url length by squid proxies).
+      fingerprints without batching (this is due to a limit on the url length
+      by squid proxies).
     """
 
     resource = '/tor/extra/all'
@@ -701,14 +1207,16 @@ class DescriptorDownloader(object):
       fingerprints = [fingerprints]
 
     if fingerprints:
-      if len(fingerprints) > MAX_FINGERPRINTS:
+      if batch:
+        return self._batch_query('/tor/extra/fp/%s', '+', fingerprints, MAX_FINGERPRINTS, workers, query_args)
+      elif len(fingerprints) > MAX_FINGERPRINTS:
         raise ValueError('Unable to request more than %i descriptors at a time by their fingerprints' % MAX_FINGERPRINTS)
 
       resource = '/tor/extra/fp/%s' % '+'.join(fingerprints)
 
     return self.query(resource, **query_args)
 
-  def get_microdescriptors(self, hashes, **query_args):
+  def get_microdescriptors(self, hashes, batch = False, workers = BATCH_WORKERS, **query_args):
     """
     Provides the microdescriptors with the given hashes. To get these see the
     **microdescriptor_digest** attribute of
@@ -735,38 +1243,60 @@ class DescriptorDownloader(object):
       ntor-onion-key kWOHNd+2uBlMpcIUbbpFLiq/rry66Ep6MlwmNpwzcBg=
       id ed25519 xE/GeYImYAIB0RbzJXFL8kDLpDrj/ydCuCdvOgC4F/4
 
+    .. versionchanged:: 1.8.0
+       Added the batch and workers arguments.
+
     :param str,list hashes: microdescriptor hash or list of hashes to be
       retrieved
+    :param bool batch: splits our hashes into several requests that are
+      issued concurrently if **True**
+    :param int workers: maximum number of concurrent requests when batching
     :param query_args: additional arguments for the
       :class:`~stem.descriptor.remote.Query` constructor
 
-    :returns: :class:`~stem.descriptor.remote.Query` for the microdescriptors
+    :returns: :class:`~stem.descriptor.remote.Query` for the microdescriptors,
+      or a :class:`~stem.descriptor.remote.BatchQuery` if batching
 
     :raises: **ValueError** if we request more than 92 microdescriptors by their
-      hashes (this is due to a limit on the url length by squid proxies).
+      hashes without batching (this is due to a limit on the url length by
+      squid proxies).
     """
 
     if isinstance(hashes, str):
       hashes = [hashes]
 
-    if len(hashes) > MAX_MICRODESCRIPTOR_HASHES:
+    if batch:
+      return self._batch_query('/tor/micro/d/%s', '-', hashes, MAX_MICRODESCRIPTOR_HASHES, workers, query_args)
+    elif len(hashes) > MAX_MICRODESCRIPTOR_HASHES:
       raise ValueError('Unable to request more than %i microdescriptors at a time by their hashes' % MAX_MICRODESCRIPTOR_HASHES)
 
     return self.query('/tor/micro/d/%s' % '-'.join(hashes), **query_args)
 
-  def get_consensus(self, authority_v3ident = None, microdescriptor = False, **query_args):
+  def get_consensus(self, authority_v3ident = None, microdescriptor = False, from_consensus = None, **query_args):
     """
     Provides the present router status entries.
 
+    When given a consensus we've previously downloaded this asks for a diff
+    from it instead of the full document (`proposal 140
+    <https://gitweb.torproject.org/torspec.git/tree/proposals/140-consensus-diffs.txt>`_).
+    The diff is applied to our prior consensus, checked against the digest it
+    should produce, and only router status entries that changed are parsed.
+    Directories without a diff from it reply with the full document instead.
+
     .. versionchanged:: 1.5.0
        Added the microdescriptor argument.
 
+    .. versionchanged:: 1.8.0
+       Added the from_consensus argument.
+
     :param str authority_v3ident: fingerprint of the authority key for which
       to get the consensus, see `'v3ident' in tor's config.c
       <https://gitweb.torproject.org/tor.git/tree/src/or/config.c>`_
       for the values.
     :param bool microdescriptor: provides the microdescriptor consensus if
       **True**, standard consensus otherwise
+    :param stem.descriptor.networkstatus.NetworkStatusDocumentV3 from_consensus:
+      previously downloaded consensus of the same flavor to request a diff from
     :param query_args: additional arguments for the
       :class:`~stem.descriptor.remote.Query` constructor
 
@@ -782,6 +1312,9 @@ class DescriptorDownloader(object):
     if authority_v3ident:
       resource += '/%s' % authority_v3ident
 
+    if from_consensus is not None:
+      query_args['from_consensus'] = from_consensus
+
     consensus_query = self.query(resource, **query_args)
 
     # if we're performing validation then check that it's signed by the
@@ -925,8 +1458,24 @@ class DescriptorDownloader(object):
 
     return Query(resource, **args)
 
+  def _batch_query(self, resource, separator, identifiers, limit, workers, query_args):
+    """
+    Issues a :class:`~stem.descriptor.remote.BatchQuery` that requests our
+    identifiers in chunks of at most the given limit.
+    """
+
+    args = dict(self._default_args)
+    args.update(query_args)
+
+    if 'endpoints' not in args:
+      args['endpoints'] = self._endpoints
+
+    identifiers = list(identifiers)
+    resources = [resource % separator.join(identifiers[i:i + limit]) for i in range(0, len(identifiers), limit)]
+    return BatchQuery(resources, workers, **args)
+
 
-def _download_from_orport(endpoint, compression, resource):
+def _download_from_orport(endpoint, compression, resource, headers = None, pool = None):
   """
   Downloads descriptors from the given orport. Payload is just like an http
   response (headers and all)...
@@ -947,6 +1496,9 @@ def _download_from_orport(endpoint, compression, resource):
   :param stem.ORPort endpoint: endpoint to download from
   :param list compression: compression methods for the request
   :param str resource: descriptor resource to download
+  :param dict headers: additional headers for the request
+  :param stem.descriptor.remote.ConnectionPool pool: pool to reuse our
+    connection from, if **None** then we connect anew
 
   :returns: two value tuple of the form (data, reply_headers)
 
@@ -955,43 +1507,89 @@ def _download_from_orport(endpoint, compression, resource):
     * :class:`stem.SocketError` if unable to establish a connection
   """
 
-  link_protocols = endpoint.link_protocols if endpoint.link_protocols else [3]
+  if pool is None:
+    link_protocols = endpoint.link_protocols if endpoint.link_protocols else [3]
 
-  with stem.client.Relay.connect(endpoint.address, endpoint.port, link_protocols) as relay:
-    with relay.create_circuit() as circ:
-      request = '\r\n'.join((
-        'GET %s HTTP/1.0' % resource,
-        'Accept-Encoding: %s' % ', '.join(compression),
-        'User-Agent: %s' % stem.USER_AGENT,
-      )) + '\r\n\r\n'
+    with stem.client.Relay.connect(endpoint.address, endpoint.port, link_protocols) as relay:
+      with relay.create_circuit() as circ:
+        response = _request_from_circuit(circ, compression, resource, headers)
+  else:
+    pooled = pool._acquire(endpoint)
+    reusable = False
 
-      circ.send(RelayCommand.BEGIN_DIR, stream_id = 1)
-      response = b''.join([cell.data for cell in circ.send(RelayCommand.DATA, request, stream_id = 1)])
-      first_line, data = response.split(b'\r\n', 1)
-      header_data, body_data = data.split(b'\r\n\r\n', 1)
+    try:
+      response = _request_from_circuit(pooled.circuit, compression, resource, headers)
+      reusable = True
+    finally:
+      pool._release(pooled, reusable)
 
-      if not first_line.startswith(b'HTTP/1.0 2'):
-        raise stem.ProtocolError("Response should begin with HTTP success, but was '%s'" % str_tools._to_unicode(first_line))
+  first_line, data = response.split(b'\r\n', 1)
+  header_data, body_data = data.split(b'\r\n\r\n', 1)
 
-      headers = {}
+  if not first_line.startswith(b'HTTP/1.0 2'):
+    raise stem.ProtocolError("Response should begin with HTTP success, but was '%s'" % str_tools._to_unicode(first_line))
+
+  headers = {}
+
+  for line in str_tools._to_unicode(header_data).splitlines():
+    if ': ' not in line:
+      raise stem.ProtocolError("'%s' is not a HTTP header:\n\n%s" % line)
+
+    key, value = line.split(': ', 1)
+    headers[key] = value
+
+  return _decompress(body_data, headers.get('Content-Encoding')), headers
+
+
+def _request_from_circuit(circ, compression, resource, headers = None):
+  """
+  Opens a directory stream on the given circuit and issues a request.
+
+  :param stem.client.Circuit circ: circuit to make our request on
+  :param list compression: compression methods for the request
+  :param str resource: descriptor resource to download
+  :param dict headers: additional headers for the request
+
+  :returns: **bytes** with the response, read until the relay closes our
+    stream
+  """
+
+  request_lines = [
+    'GET %s HTTP/1.0' % resource,
+    'Accept-Encoding: %s' % ', '.join(compression),
+    'User-Agent: %s' % stem.USER_AGENT,
+  ]
+
+  if headers:
+    request_lines += ['%s: %s' % (key, value) for key, value in headers.items()]
 
-      for line in str_tools._to_unicode(header_data).splitlines():
-        if ': ' not in line:
-          raise stem.ProtocolError("'%s' is not a HTTP header:\n\n%s" % line)
+  request = '\r\n'.join(request_lines) + '\r\n\r\n'
+
+  stream = circ.open_stream(RelayCommand.BEGIN_DIR)
+  response = []
+
+  try:
+    stream.write(request)
 
-        key, value = line.split(': ', 1)
-        headers[key] = value
+    while True:
+      data = stream.read()
 
-      return _decompress(body_data, headers.get('Content-Encoding')), headers
+      if not data:
+        return b''.join(response)
 
+      response.append(data)
+  finally:
+    stream.close()
 
-def _download_from_dirport(url, compression, timeout):
+
+def _download_from_dirport(url, compression, timeout, headers = None):
   """
   Downloads descriptors from the given url.
 
   :param str url: dirport url from which to download from
   :param list compression: compression methods for the request
   :param float timeout: duration before we'll time out our request
+  :param dict headers: additional headers for the request
 
   :returns: two value tuple of the form (data, reply_headers)
 
@@ -1000,19 +1598,39 @@ def _download_from_dirport(url, compression, timeout):
     * **urllib2.URLError** for most request failures
   """
 
-  response = urllib.urlopen(
-    urllib.Request(
-      url,
-      headers = {
-        'Accept-Encoding': ', '.join(compression),
-        'User-Agent': stem.USER_AGENT,
-      }
-    ),
+  response = _request_from_dirport(url, compression, timeout, headers)
+  return _decompress(response.read(), response.headers.get('Content-Encoding')), response.headers
+
+
+def _request_from_dirport(url, compression, timeout, headers = None):
+  """
+  Issues a request to the given url, without reading its response.
+
+  :param str url: dirport url from which to download from
+  :param list compression: compression methods for the request
+  :param float timeout: duration before we'll time out our request
+  :param dict headers: additional headers for the request
+
+  :returns: response from urlopen()
+
+  :raises:
+    * **socket.timeout** if our request timed out
+    * **urllib2.URLError** for most request failures
+  """
+
+  request_headers = {
+    'Accept-Encoding': ', '.join(compression),
+    'User-Agent': stem.USER_AGENT,
+  }
+
+  if headers:
+    request_headers.update(headers)
+
+  return urllib.urlopen(
+    urllib.Request(url, headers = request_headers),
     timeout = timeout,
   )
 
-  return _decompress(response.read(), response.headers.get('Content-Encoding')), response.headers
-
 
 def _decompress(data, encoding):
   """
@@ -1058,6 +1676,193 @@ def _decompress(data, encoding):
     raise ValueError("'%s' isn't a recognized type of encoding" % encoding)
 
 
+def _decompressor(encoding):
+  """
+  Provides an object that incrementally decompresses descriptor data through
+  its decompress() method. This is the streaming counterpart of
+  :func:`~stem.descriptor.remote._decompress`.
+
+  :param str encoding: 'Content-Encoding' header of the response
+
+  :raises:
+    * **ValueError** if encoding is unrecognized
+    * **ImportError** if missing the decompression module
+  """
+
+  if encoding == Compression.PLAINTEXT:
+    return None
+  elif encoding in (Compression.GZIP, 'deflate'):
+    return zlib.decompressobj(zlib.MAX_WBITS | 32)
+  elif encoding == Compression.ZSTD:
+    if not stem.prereq.is_zstd_available():
+      raise ImportError('Decompressing zstd data requires https://pypi.python.org/pypi/zstandard')
+
+    import zstd
+    return zstd.ZstdDecompressor().decompressobj()
+  elif encoding == Compression.LZMA:
+    if not stem.prereq.is_lzma_available():
+      raise ImportError('Decompressing lzma data requires https://docs.python.org/3/library/lzma.html')
+
+    import lzma
+    return lzma.LZMADecompressor()
+  else:
+    raise ValueError("'%s' isn't a recognized type of encoding" % encoding)
+
+
+class _StreamingFile(object):
+  """
+  Read-only file over a response that decompresses its content as it's read.
+  Content before the last position we were asked to tell() is discarded, so
+  only the descriptor we're parsing is kept in memory. Our parsers only seek
+  back to positions they've told, so this suffices for them.
+
+  Gzip and lzma content is decompressed at most STREAM_READ_SIZE bytes at a
+  time. Zstd's decompressor lacks a bound on its output, so highly compressed
+  zstd content can briefly occupy more memory than this.
+
+  :param file response: response to read from
+  :param str encoding: 'Content-Encoding' header of the response
+  """
+
+  def __init__(self, response, encoding):
+    self._response = response
+    self._decompressor = _decompressor(encoding)
+    self._is_eof = False
+
+    self._buffer = bytearray()
+    self._buffer_start = 0  # position of the buffer's first byte
+    self._position = 0
+    self._mark = 0  # earliest position we can seek to
+
+  def read(self, size = -1):
+    if size is None or size < 0:
+      while self._fill():
+        pass
+    else:
+      while len(self._buffer) - (self._position - self._buffer_start) < size and self._fill():
+        pass
+
+    return self._consume(size)
+
+  def readline(self):
+    searched = 0  # bytes after our position that lack a newline
+
+    while True:
+      offset = self._position - self._buffer_start
+      newline = self._buffer.find(b'\n', offset + searched)
+
+      if newline != -1:
+        return self._consume(newline + 1 - offset)
+
+      searched = len(self._buffer) - offset
+
+      if not self._fill():
+        return self._consume(-1)
+
+  def readlines(self):
+    lines = []
+
+    while True:
+      line = self.readline()
+
+      if not line:
+        return lines
+
+      lines.append(line)
+
+  def tell(self):
+    self._mark = self._position
+    return self._position
+
+  def seek(self, position):
+    if position < self._mark or position > self._buffer_start + len(self._buffer):
+      raise IOError('Unable to seek to %i, streamed content is only available from %i to %i' % (position, self._mark, self._buffer_start + len(self._buffer)))
+
+    self._position = position
+
+  def _consume(self, size):
+    start = self._position - self._buffer_start
+    end = len(self._buffer) if size is None or size < 0 else min(start + size, len(self._buffer))
+    self._position += end - start
+    return bytes(self._buffer[start:end])
+
+  def _fill(self):
+    """
+    Reads and decompresses more of our response.
+
+    :returns: **True** if we read more content, **False** if at the end
+    """
+
+    if self._is_eof:
+      return False
+
+    # discard what we can no longer seek to, unless it's too little to bother
+
+    discardable = self._mark - self._buffer_start
+
+    if discardable > STREAM_READ_SIZE and discardable * 2 > len(self._buffer):
+      del self._buffer[:discardable]
+      self._buffer_start = self._mark
+
+    while True:
+      if self._has_pending_output():
+        data = self._decompress(b'')
+      else:
+        data = self._response.read(STREAM_READ_SIZE)
+
+        if not data:
+          self._is_eof = True
+
+          if self._decompressor is not None and hasattr(self._decompressor, 'flush'):
+            remainder = self._decompressor.flush()
+            self._buffer += remainder
+            return bool(remainder)
+
+          return False
+
+        if self._decompressor is not None:
+          data = self._decompress(data)
+
+      if data:
+        self._buffer += data
+        return True
+
+  def _decompress(self, data):
+    """
+    Decompresses up to STREAM_READ_SIZE bytes, retaining the rest of our input
+    for later calls if our decompressor can bound its output.
+
+    :param bytes data: compressed content to decompress
+
+    :returns: **bytes** of decompressed content
+    """
+
+    decompressor = self._decompressor
+
+    if hasattr(decompressor, 'unconsumed_tail'):  # zlib
+      return decompressor.decompress(decompressor.unconsumed_tail + data, STREAM_READ_SIZE)
+    elif hasattr(decompressor, 'needs_input'):  # lzma
+      return decompressor.decompress(data, STREAM_READ_SIZE)
+    else:
+      return decompressor.decompress(data)
+
+  def _has_pending_output(self):
+    """
+    Checks if our decompressor can provide more content without further input.
+    """
+
+    decompressor = self._decompressor
+
+    if decompressor is None:
+      return False
+    elif getattr(decompressor, 'unconsumed_tail', None):
+      return True
+    elif hasattr(decompressor, 'needs_input'):
+      return not decompressor.eof and not decompressor.needs_input
+    else:
+      return False
+
+
 def _guess_descriptor_type(resource):
   # Attempts to determine the descriptor type based on the resource url. This
   # raises a ValueError if the resource isn't recognized.
@@ -277,7 +277,7 @@ def _parse_p_line(descriptor, entries):
   value = _value('p', entries)
 
   try:
-    descriptor.exit_policy = stem.exit_policy.MicroExitPolicy(value)
+    descriptor.exit_policy = stem.exit_policy._get_interned_policy(stem.exit_policy.MicroExitPolicy, value)
   except ValueError as exc:
     raise ValueError('%s exit policy is malformed (%s): p %s' % (descriptor._name(), exc, value))
 
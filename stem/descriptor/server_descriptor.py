@@ -415,7 +415,7 @@ def _parse_exit_policy(descriptor, entries):
     if descriptor._unparsed_exit_policy and stem.util.str_tools._to_unicode(descriptor._unparsed_exit_policy[0]) == 'reject *:*':
       descriptor.exit_policy = REJECT_ALL_POLICY
     else:
-      descriptor.exit_policy = stem.exit_policy.ExitPolicy(*descriptor._unparsed_exit_policy)
+      descriptor.exit_policy = stem.exit_policy._get_interned_policy(stem.exit_policy.ExitPolicy, *descriptor._unparsed_exit_policy)
 
     del descriptor._unparsed_exit_policy
 
@@ -436,7 +436,7 @@ _parse_contact_line = _parse_bytes_line('contact', 'contact')
 _parse_published_line = _parse_timestamp_line('published', 'published')
 _parse_read_history_line = functools.partial(_parse_history_line, 'read-history', 'read_history_end', 'read_history_interval', 'read_history_values')
 _parse_write_history_line = functools.partial(_parse_history_line, 'write-history', 'write_history_end', 'write_history_interval', 'write_history_values')
-_parse_ipv6_policy_line = _parse_simple_line('ipv6-policy', 'exit_policy_v6', func = lambda v: stem.exit_policy.MicroExitPolicy(v))
+_parse_ipv6_policy_line = _parse_simple_line('ipv6-policy', 'exit_policy_v6', func = lambda v: stem.exit_policy._get_interned_policy(stem.exit_policy.MicroExitPolicy, v))
 _parse_allow_single_hop_exits_line = _parse_if_present('allow-single-hop-exits', 'allow_single_hop_exits')
 _parse_tunneled_dir_server_line = _parse_if_present('tunnelled-dir-server', 'allow_tunneled_dir_requests')
 _parse_proto_line = _parse_protocol_line('proto', 'protocols')
@@ -855,16 +855,7 @@ class RelayDescriptor(ServerDescriptor):
           raise ValueError('Fingerprint does not match the hash of our signing key (fingerprint: %s, signing key hash: %s)' % (self.fingerprint.lower(), key_hash))
 
       if not skip_crypto_validation and stem.prereq.is_crypto_available():
-        signed_digest = self._digest_for_signature(self.signing_key, self.signature)
-
-        if signed_digest != self.digest():
-          raise ValueError('Decrypted digest does not match local digest (calculated: %s, local: %s)' % (signed_digest, self.digest()))
-
-        if self.onion_key_crosscert and stem.prereq.is_crypto_available():
-          onion_key_crosscert_digest = self._digest_for_signature(self.onion_key, self.onion_key_crosscert)
-
-          if onion_key_crosscert_digest != self._onion_key_crosscert_digest():
-            raise ValueError('Decrypted onion-key-crosscert digest does not match local digest (calculated: %s, local: %s)' % (onion_key_crosscert_digest, self._onion_key_crosscert_digest()))
+        self._check_signatures([self._digest_for_signature(signing_key, signature) for signing_key, signature in self._signatures()])
 
       if stem.prereq._is_pynacl_available() and self.certificate:
         self.certificate.validate(self)
@@ -970,6 +961,24 @@ class RelayDescriptor(ServerDescriptor):
 
     return RouterStatusEntryV3.create(attr)
 
+  def _signatures(self, key_certs = None):
+    if not self.signing_key or not self.signature:
+      raise ValueError('Descriptor must have a signing-key and router-signature to be validated')
+
+    signatures = [(self.signing_key, self.signature)]
+
+    if self.onion_key_crosscert:
+      signatures.append((self.onion_key, self.onion_key_crosscert))
+
+    return signatures
+
+  def _check_signatures(self, signed_digests):
+    if signed_digests[0] != self.digest():
+      raise ValueError('Decrypted digest does not match local digest (calculated: %s, local: %s)' % (signed_digests[0], self.digest()))
+
+    if self.onion_key_crosscert and signed_digests[1] != self._onion_key_crosscert_digest():
+      raise ValueError('Decrypted onion-key-crosscert digest does not match local digest (calculated: %s, local: %s)' % (signed_digests[1], self._onion_key_crosscert_digest()))
+
   @lru_cache()
   def _onion_key_crosscert_digest(self):
     """
@@ -28,6 +28,7 @@ exiting to a destination is permissible or not. For instance...
     |- MicroExitPolicy - Microdescriptor exit policy
     |
     |- can_exit_to - check if exiting to this destination is allowed or not
+    |- compile - provides lookup tables for quickly checking destinations
     |- is_exiting_allowed - check if any exiting is allowed
     |- summary - provides a short label, similar to a microdescriptor
     |- has_private - checks if policy has anything expanded from the 'private' keyword
@@ -37,6 +38,10 @@ exiting to a destination is permissible or not. For instance...
     |- __str__  - string representation
     +- __iter__ - ExitPolicyRule entries that this contains
 
+  CompiledExitPolicy - Lookup tables for checking destinations against a policy
+    |- can_exit_to - check if exiting to this destination is allowed or not
+    +- can_exit_to_many - checks a list of destinations
+
   ExitPolicyRule - Single rule of an exit policy chain
     |- MicroExitPolicyRule - Single rule for a microdescriptor policy
     |
@@ -67,8 +72,11 @@ exiting to a destination is permissible or not. For instance...
 
 from __future__ import absolute_import
 
+import bisect
 import re
 import socket
+import threading
+import weakref
 import zlib
 
 import stem.prereq
@@ -99,6 +107,13 @@ PRIVATE_ADDRESSES = (
   '172.16.0.0/12',
 )
 
+# Policies parsed from descriptors. Thousands of relays publish identical
+# policies, so these share a single instance (and with it our parsed rules and
+# caches). Entries are dropped once nothing references them.
+
+_INTERNED_POLICIES = weakref.WeakValueDictionary()
+_INTERNED_POLICIES_LOCK = threading.Lock()
+
 
 def get_config_policy(rules, ip_address = None):
   """
@@ -163,6 +178,33 @@ def get_config_policy(rules, ip_address = None):
   return ExitPolicy(*result)
 
 
+def _get_interned_policy(policy_class, *args):
+  """
+  Provides a policy constructed with the given arguments, reusing an existing
+  instance if we have one. Callers should treat the result as immutable since
+  it may be shared.
+
+  :param class policy_class: :class:`~stem.exit_policy.ExitPolicy` or
+    :class:`~stem.exit_policy.MicroExitPolicy`
+  :param list args: arguments for the policy's constructor
+
+  :returns: policy of the given class
+
+  :raises: **ValueError** if the policy is malformed
+  """
+
+  key = (policy_class, args)
+
+  with _INTERNED_POLICIES_LOCK:
+    policy = _INTERNED_POLICIES.get(key)
+
+    if policy is None:
+      policy = policy_class(*args)
+      _INTERNED_POLICIES[key] = policy
+
+    return policy
+
+
 def _flag_private_rules(rules):
   """
   Determine if part of our policy was expanded from the 'private' keyword. This
@@ -264,6 +306,7 @@ class ExitPolicy(object):
 
     self._rules = None
     self._hash = None
+    self._compiled = None
 
     # Result when no rules apply. According to the spec policies default to 'is
     # allowed', but our microdescriptor policy subclass might want to change
@@ -271,13 +314,16 @@ class ExitPolicy(object):
 
     self._is_allowed_default = True
 
-  @lru_cache()
   def can_exit_to(self, address = None, port = None, strict = False):
     """
     Checks if this policy allows exiting to a given destination or not. If the
     address or port is omitted then this will check if we're allowed to exit to
     any instances of the defined address or port.
 
+    .. versionchanged:: 1.8.0
+       Destinations with both an address and port are checked against our
+       :func:`~stem.exit_policy.ExitPolicy.compile` tables.
+
     :param str address: IPv4 or IPv6 address (with or without brackets)
     :param int port: port number
     :param bool strict: if the address or port is excluded then check if we can
@@ -288,6 +334,8 @@ class ExitPolicy(object):
 
     if not self.is_exiting_allowed():
       return False
+    elif address is not None and port is not None:
+      return self.compile().can_exit_to(address, port)
 
     for rule in self._get_rules():
       if rule.is_match(address, port, strict):
@@ -295,6 +343,21 @@ class ExitPolicy(object):
 
     return self._is_allowed_default
 
+  def compile(self):
+    """
+    Provides lookup tables for quickly checking many destinations against this
+    policy. This is cached, so only the first call does any work.
+
+    .. versionadded:: 1.8.0
+
+    :returns: :class:`~stem.exit_policy.CompiledExitPolicy` for this policy
+    """
+
+    if self._compiled is None:
+      self._compiled = CompiledExitPolicy(self)
+
+    return self._compiled
+
   @lru_cache()
   def is_exiting_allowed(self):
     """
@@ -621,6 +684,242 @@ class MicroExitPolicy(ExitPolicy):
     return not self == other
 
 
+class CompiledExitPolicy(object):
+  """
+  Lookup tables for quickly checking destinations against an
+  :class:`~stem.exit_policy.ExitPolicy`. Rather than walking the policy's
+  rules, the address space of each IP version is divided into sorted
+  intervals that each have a table of port ranges, so checking a destination
+  is just a couple binary searches.
+
+  These are provided by :func:`~stem.exit_policy.ExitPolicy.compile`, and
+  accept both address strings and their integer representation (as provided by
+  :func:`~stem.util.connection.address_to_int`). For instance...
+
+  ::
+
+    >>> import stem.util.connection
+    >>> policy = ExitPolicy('reject 10.0.0.0/8:*', 'accept *:80', 'reject *:*')
+    >>> compiled = policy.compile()
+    >>> compiled.can_exit_to('75.119.206.243', 80)
+    True
+    >>> compiled.can_exit_to(stem.util.connection.address_to_int('10.2.3.4'), 80)
+    False
+    >>> compiled.can_exit_to_many([('75.119.206.243', 80), ('75.119.206.243', 443)])
+    [True, False]
+
+  Unlike :func:`~stem.exit_policy.ExitPolicy.can_exit_to` both an address and
+  port must be provided.
+
+  .. versionadded:: 1.8.0
+
+  :param stem.exit_policy.ExitPolicy policy: policy to be compiled
+  """
+
+  def __init__(self, policy):
+    self._tables = {}
+
+    for is_ipv6 in (False, True):
+      self._tables[is_ipv6] = _compile_exit_policy(policy, is_ipv6)
+
+  def can_exit_to(self, address, port, ipv6 = False):
+    """
+    Checks if our policy allows exiting to a given destination.
+
+    :param str,int address: IPv4 or IPv6 address (with or without brackets),
+      or its integer representation
+    :param int port: port number
+    :param bool ipv6: if the address is an integer, **True** if it's IPv6 and
+      **False** if it's IPv4
+
+    :returns: **True** if exiting to this destination is allowed, **False** otherwise
+
+    :raises: **ValueError** if provided with a malformed address or port
+    """
+
+    is_ipv6, address_int = _destination_address(address, ipv6)
+
+    if not stem.util.connection.is_valid_port(port):
+      raise ValueError("'%s' isn't a valid port" % port)
+
+    address_starts, port_tables, linear_rules, is_allowed_default = self._tables[is_ipv6]
+    port = int(port)
+
+    if linear_rules is not None:
+      for is_accept, mask, masked_address, min_port, max_port in linear_rules:
+        if (address_int & mask) == masked_address and min_port <= port <= max_port:
+          return is_accept
+
+      return is_allowed_default
+
+    port_starts, results = port_tables[bisect.bisect_right(address_starts, address_int) - 1]
+    return results[bisect.bisect_right(port_starts, port) - 1]
+
+  def can_exit_to_many(self, destinations, ipv6 = False):
+    """
+    Checks if our policy allows exiting to each of the given destinations.
+
+    :param list destinations: **(address, port)** tuples to be checked
+    :param bool ipv6: if addresses are integers, **True** if they're IPv6 and
+      **False** if they're IPv4
+
+    :returns: **list** of booleans for if exiting to each destination is allowed
+
+    :raises: **ValueError** if provided with a malformed address or port
+    """
+
+    return [self.can_exit_to(address, port, ipv6) for address, port in destinations]
+
+
+def _destination_address(address, ipv6 = False):
+  """
+  Provides an **(is_ipv6, address_int)** tuple for a destination's address.
+
+  :param str,int address: IPv4 or IPv6 address (with or without brackets),
+    or its integer representation
+  :param bool ipv6: if the address is an integer, **True** if it's IPv6 and
+    **False** if it's IPv4
+
+  :raises: **ValueError** if the address is malformed
+  """
+
+  if stem.util._is_int(address):
+    if address < 0 or address >= (1 << (128 if ipv6 else 32)):
+      raise ValueError("%i isn't a valid %s address" % (address, 'IPv6' if ipv6 else 'IPv4'))
+
+    return ipv6, address
+  elif stem.util.connection.is_valid_ipv4_address(address):
+    return False, stem.util.connection.address_to_int(address)
+  elif stem.util.connection.is_valid_ipv6_address(address, allow_brackets = True):
+    return True, stem.util.connection.address_to_int(address.lstrip('[').rstrip(']'))
+  else:
+    raise ValueError("'%s' isn't a valid IPv4 or IPv6 address" % address)
+
+
+def _compile_exit_policy(policy, is_ipv6):
+  """
+  Provides lookup tables for the destinations of an IP version. This is a tuple
+  of the form...
+
+  ::
+
+    (address_starts, port_tables, linear_rules, is_allowed_default)
+
+  The address space is divided into intervals beginning at each of the sorted
+  **address_starts**. Each interval has a **(port_starts, results)** port
+  table, similarly providing the result for port ranges beginning at each
+  **port_starts** entry.
+
+  Masks that aren't a number of bits (like '255.255.0.255') don't describe an
+  address range. If any rule has one we instead provide **linear_rules**, a
+  list of **(is_accept, mask, masked_address, min_port, max_port)** tuples to
+  be checked in order.
+  """
+
+  address_bits = 128 if is_ipv6 else 32
+  max_address = (1 << address_bits) - 1
+  is_allowed_default = policy._is_allowed_default
+
+  if not policy.is_exiting_allowed():
+    return [0], [([1], [False])], None, False
+
+  # (is_accept, min_address, max_address, min_port, max_port) for rules that
+  # can match this kind of address
+
+  rules, linear_rules = [], []
+
+  for rule in policy:
+    if rule._skip_rule:
+      continue
+
+    address_type = rule.get_address_type()
+
+    if address_type == AddressType.WILDCARD:
+      rule_min, rule_max, mask = 0, max_address, 0
+    elif address_type == (AddressType.IPv6 if is_ipv6 else AddressType.IPv4):
+      rule_min, mask = rule._get_address_bin(), rule._get_mask_bin()
+
+      if rule.get_masked_bits() is None:
+        rule_max = None
+      else:
+        rule_max = rule_min + (1 << (address_bits - rule.get_masked_bits())) - 1
+    else:
+      continue
+
+    rules.append((rule.is_accept, rule_min, rule_max, rule.min_port, rule.max_port))
+    linear_rules.append((rule.is_accept, mask, rule_min, rule.min_port, rule.max_port))
+
+  if any([rule_max is None for _, _, rule_max, _, _ in rules]):
+    return None, None, linear_rules, is_allowed_default
+
+  # Sweep over the address space, tracking the rules that apply to each
+  # interval. Intervals covered by the same rules share a port table.
+
+  starting, ending = {}, {}
+
+  for index, (_, rule_min, rule_max, _, _) in enumerate(rules):
+    starting.setdefault(rule_min, []).append(index)
+    ending.setdefault(rule_max + 1, []).append(index)
+
+  address_starts, port_tables = [], []
+  table_cache, active = {}, set()
+
+  for boundary in sorted(set([0]).union(starting, ending)):
+    if boundary > max_address:
+      break
+
+    active.difference_update(ending.get(boundary, []))
+    active.update(starting.get(boundary, []))
+
+    applicable = tuple(sorted(active))
+
+    if applicable not in table_cache:
+      table_cache[applicable] = _port_table([rules[index] for index in applicable], is_allowed_default)
+
+    port_table = table_cache[applicable]
+
+    if port_tables and port_tables[-1] is port_table:
+      continue  # adjacent interval with the same result
+
+    address_starts.append(boundary)
+    port_tables.append(port_table)
+
+  return address_starts, port_tables, None, is_allowed_default
+
+
+def _port_table(rules, is_allowed_default):
+  """
+  Provides a **(port_starts, results)** tuple for the first of the given rules
+  to match each port.
+  """
+
+  boundaries = set([1])
+
+  for _, _, _, min_port, max_port in rules:
+    boundaries.update((max(min_port, 1), max_port + 1))
+
+  port_starts, results = [], []
+
+  for port in sorted(boundaries):
+    if port > 65535:
+      break
+
+    result = is_allowed_default
+
+    for is_accept, _, _, min_port, max_port in rules:
+      if min_port <= port <= max_port:
+        result = is_accept
+        break
+
+    if results and results[-1] == result:
+      continue
+
+    port_starts.append(port)
+    results.append(result)
+
+  return port_starts, results
+
+
 class ExitPolicyRule(object):
   """
   Single rule from the user's exit policy. These rules are chained together to
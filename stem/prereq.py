@@ -22,6 +22,7 @@ Checks for stem dependencies. We require python 2.6 or greater (including the
 """
 
 import functools
+import hashlib
 import inspect
 import platform
 import sys
@@ -239,6 +240,37 @@ def _is_lru_cache_available():
     return hasattr(functools, 'lru_cache')
 
 
+def _is_asyncio_available():
+  """
+  Checks if we can use asyncio's async/await syntax, which requires Python
+  3.5 or later. This is needed by :mod:`stem.async_control`.
+
+  :returns: **True** if we meet this requirement and **False** otherwise
+  """
+
+  return sys.version_info >= (3, 5)
+
+
+def _is_sha3_available():
+  """
+  Check if hashlib has sha3 support. This requires Python 3.6+ *or* the `pysha3
+  module <https://github.com/tiran/pysha3>`_.
+
+  :returns: **True** if sha3 hashing is available and **False** otherwise
+  """
+
+  # If pysha3 is present then importing sha3 will monkey patch the methods we
+  # want onto hashlib.
+
+  if not hasattr(hashlib, 'sha3_256'):
+    try:
+      import sha3
+    except ImportError:
+      pass
+
+  return hasattr(hashlib, 'sha3_256')
+
+
 def _is_pynacl_available():
   """
   Checks if the pynacl functions we use are available. This is used for
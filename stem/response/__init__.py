@@ -170,9 +170,9 @@ class ControlMessage(object):
       raise ValueError("ControlMessages can't be empty")
 
     self._parsed_content = parsed_content
-    self._raw_content = raw_content
+    self._raw_content = raw_content  # None if our reader didn't keep it
     self._str = None
-    self._hash = stem.util._hash_attr(self, '_raw_content')
+    self._hash = stem.util._hash_attr(self, '_raw_content') if raw_content is not None else None
 
   def is_ok(self):
     """
@@ -228,7 +228,8 @@ class ControlMessage(object):
 
   def raw_content(self, get_bytes = False):
     """
-    Provides the unparsed content read from the control socket.
+    Provides the unparsed content read from the control socket. If our reader
+    didn't keep this then it's reconstructed from our parsed content.
 
     .. versionchanged:: 1.1.0
        Added the get_bytes argument.
@@ -238,6 +239,9 @@ class ControlMessage(object):
     :returns: **str** of the socket data used to generate this message
     """
 
+    if self._raw_content is None:
+      self._raw_content = _unparse(self._parsed_content)
+
     if stem.prereq.is_python_3() and not get_bytes:
       return stem.util.str_tools._to_unicode(self._raw_content)
     else:
@@ -303,6 +307,10 @@ class ControlMessage(object):
     return ControlLine(content)
 
   def __hash__(self):
+    if self._hash is None:
+      self.raw_content(get_bytes = True)  # reconstructs our content
+      self._hash = stem.util._hash_attr(self, '_raw_content')
+
     return self._hash
 
   def __eq__(self, other):
@@ -312,6 +320,38 @@ class ControlMessage(object):
     return not self == other
 
 
+def _unparse(parsed_content):
+  """
+  Reconstructs the socket content of a message from its parsed content.
+
+  :param list parsed_content: (status_code, divider, content) tuples of a
+    message
+
+  :returns: **bytes** with the socket content of the message
+  """
+
+  lines = []
+
+  for code, divider, content in parsed_content:
+    prefix = stem.util.str_tools._to_bytes(code + divider)
+
+    if divider == '+':
+      # data blocks end with a period, and periods starting their other lines
+      # are escaped
+
+      data_lines = content.split(b'\n')
+      lines.append(prefix + data_lines[0])
+
+      for line in data_lines[1:]:
+        lines.append(b'.' + line if line.startswith(b'.') else line)
+
+      lines.append(b'.')
+    else:
+      lines.append(prefix + content)
+
+  return b'\r\n'.join(lines) + b'\r\n'
+
+
 class ControlLine(str):
   """
   String subclass that represents a line of controller output. This behaves as
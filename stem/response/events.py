@@ -24,6 +24,22 @@ QUOTED_KW_ARG = re.compile('^(.*) ([A-Za-z0-9_]+)="(.*)"$')
 CELL_TYPE = re.compile('^[a-z0-9_]+$')
 PARSE_NEWCONSENSUS_EVENTS = True
 
+KEYWORD = re.compile('^[A-Za-z0-9_]+$')
+
+# Whitespace other than spaces. We split arguments on spaces, so content with
+# these is left to the KW_ARG and QUOTED_KW_ARG regexes.
+
+UNUSUAL_WHITESPACE = re.compile('[\t\n\r\x0b\x0c]')
+
+# Event classes mapped to a tuple of the form...
+#
+#   (positional_fields, keyword_fields)
+#
+# ... where positional fields are (attr_name, is_quoted, is_optionally_quoted)
+# tuples and keyword fields are (keyword, attr_name) tuples.
+
+_FIELD_MAPS = {}
+
 # TODO: We can remove the following when we drop python2.6 support.
 
 INT_TYPE = int if stem.prereq.is_python_3() else long
@@ -52,10 +68,12 @@ class Event(stem.response.ControlMessage):
     if arrived_at is None:
       arrived_at = int(time.time())
 
-    if not str(self).strip():
+    content = str(self)
+
+    if not content.strip():
       raise stem.ProtocolError('Received a blank tor event. Events must at the very least have a type.')
 
-    self.type = str(self).split()[0]
+    self.type = content.split(None, 1)[0]
     self.arrived_at = arrived_at
 
     # if we're a recognized event type then translate ourselves into that subclass
@@ -84,56 +102,48 @@ class Event(stem.response.ControlMessage):
     **_POSITIONAL_ARGS** and **_KEYWORD_ARGS**.
     """
 
-    # Tor events contain some number of positional arguments followed by
-    # key/value mappings. Parsing keyword arguments from the end until we hit
-    # something that isn't a key/value mapping. The rest are positional.
-
-    content = str(self)
-
-    while True:
-      match = QUOTED_KW_ARG.match(content)
-
-      if not match:
-        match = KW_ARG.match(content)
-
-      if match:
-        content, keyword, value = match.groups()
-        self.keyword_args[keyword] = value
-      else:
-        break
+    self.positional_args, self.keyword_args = _split_args(str(self))
+    positional_fields, keyword_fields = _field_map(type(self))
 
     # Setting attributes for the fields that we recognize.
 
-    self.positional_args = content.split()[1:]
-    positional = list(self.positional_args)
+    attributes = {}
+    positional = self.positional_args
+    index, positional_count = 0, len(positional)
 
-    for attr_name in self._POSITIONAL_ARGS:
+    for attr_name, is_quoted, is_optionally_quoted in positional_fields:
       attr_value = None
 
-      if positional:
-        if attr_name in self._QUOTED or (attr_name in self._OPTIONALLY_QUOTED and positional[0].startswith('"')):
-          attr_values = [positional.pop(0)]
+      if index < positional_count:
+        if is_quoted or (is_optionally_quoted and positional[index].startswith('"')):
+          start = index
+          index += 1
 
-          if not attr_values[0].startswith('"'):
+          if not positional[start].startswith('"'):
             raise stem.ProtocolError("The %s value should be quoted, but didn't have a starting quote: %s" % (attr_name, self))
 
           while True:
-            if not positional:
+            if index >= positional_count:
               raise stem.ProtocolError("The %s value should be quoted, but didn't have an ending quote: %s" % (attr_name, self))
 
-            attr_values.append(positional.pop(0))
+            index += 1
 
-            if attr_values[-1].endswith('"'):
+            if positional[index - 1].endswith('"'):
               break
 
-          attr_value = ' '.join(attr_values)[1:-1]
+          attr_value = ' '.join(positional[start:index])[1:-1]
         else:
-          attr_value = positional.pop(0)
+          attr_value = positional[index]
+          index += 1
+
+      attributes[attr_name] = attr_value
+
+    keyword_args = self.keyword_args
 
-      setattr(self, attr_name, attr_value)
+    for controller_attr_name, attr_name in keyword_fields:
+      attributes[attr_name] = keyword_args.get(controller_attr_name)
 
-    for controller_attr_name, attr_name in self._KEYWORD_ARGS.items():
-      setattr(self, attr_name, self.keyword_args.get(controller_attr_name))
+    self.__dict__.update(attributes)
 
   def _iso_timestamp(self, timestamp):
     """
@@ -180,6 +190,86 @@ class Event(stem.response.ControlMessage):
           log.log_once(log_id, log.INFO, unrecognized_msg)
 
 
+def _field_map(event_class):
+  """
+  Provides the fields an event class parses from its positional and keyword
+  arguments. These are derived from its **_POSITIONAL_ARGS**, **_QUOTED**,
+  **_OPTIONALLY_QUOTED**, and **_KEYWORD_ARGS** on first use.
+
+  :param class event_class: :class:`~stem.response.events.Event` subclass
+
+  :returns: **tuple** of the form (positional_fields, keyword_fields)
+  """
+
+  fields = _FIELD_MAPS.get(event_class)
+
+  if fields is None:
+    positional_fields = tuple([(attr_name, attr_name in event_class._QUOTED, attr_name in event_class._OPTIONALLY_QUOTED) for attr_name in event_class._POSITIONAL_ARGS])
+    keyword_fields = tuple(event_class._KEYWORD_ARGS.items())
+    fields = _FIELD_MAPS[event_class] = (positional_fields, keyword_fields)
+
+  return fields
+
+
+def _split_args(content):
+  """
+  Tor events contain some number of positional arguments followed by
+  key/value mappings. This parses keyword arguments from the end until we hit
+  something that isn't a key/value mapping. The rest are positional.
+
+  This is equivalent to repeatedly matching QUOTED_KW_ARG and KW_ARG against
+  our content, but splits it just once. Quoted values can contain spaces, so
+  once we reach one the remainder is left to those regexes.
+
+  :param str content: event content, starting with its type
+
+  :returns: **tuple** of the form (positional_args, keyword_args)
+  """
+
+  if UNUSUAL_WHITESPACE.search(content):
+    return _split_args_with_regex(content)
+
+  keyword_args = {}
+  args = content.split(' ')
+  index = len(args) - 1
+
+  while index > 0:
+    arg = args[index]
+
+    if arg.endswith('"'):
+      positional_args, quoted_keyword_args = _split_args_with_regex(' '.join(args[:index + 1]))
+      keyword_args.update(quoted_keyword_args)
+      return positional_args, keyword_args
+
+    keyword, divider, value = arg.partition('=')
+
+    if not divider or not KEYWORD.match(keyword):
+      break
+
+    keyword_args[keyword] = value
+    index -= 1
+
+  return [arg for arg in args[1:index + 1] if arg], keyword_args
+
+
+def _split_args_with_regex(content):
+  keyword_args = {}
+
+  while True:
+    match = QUOTED_KW_ARG.match(content)
+
+    if not match:
+      match = KW_ARG.match(content)
+
+    if match:
+      content, keyword, value = match.groups()
+      keyword_args[keyword] = value
+    else:
+      break
+
+  return content.split()[1:], keyword_args
+
+
 class AddrMapEvent(Event):
   """
   Event that indicates a new address mapping.
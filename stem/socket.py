@@ -91,6 +91,10 @@ ERROR_MSG = 'Error while receiving a control message (%s): %s'
 
 TRUNCATE_LOGS = 10
 
+# number of bytes we read at a time from a control socket
+
+READ_CHUNK_LEN = 64 * 1024
+
 # maximum number of bytes to read at a time from a relay socket
 
 MAX_READ_BUFFER_LEN = 10 * 1024 * 1024
@@ -429,6 +433,7 @@ class ControlSocket(BaseSocket):
 
   def __init__(self):
     super(ControlSocket, self).__init__()
+    self._reader = None  # _ControlReader for our present socket
 
   def send(self, message):
     """
@@ -449,11 +454,21 @@ class ControlSocket(BaseSocket):
 
     self._send(message, lambda s, sf, msg: send_message(sf, msg))
 
-  def recv(self):
+  def recv(self, get_data_handler = None, keep_raw_content = True):
     """
     Receives a message from the control socket, blocking until we've received
     one. For more information see the :func:`~stem.socket.recv_message` function.
 
+    .. versionchanged:: 1.8.0
+       Added the get_data_handler and keep_raw_content arguments, and we now
+       read from the socket in large chunks rather than line by line.
+
+    :param function get_data_handler: provides a function that should receive
+      the lines of a reply's data block, see
+      :func:`~stem.socket.recv_message`
+    :param bool keep_raw_content: retains the content we read for the
+      message's raw_content(), see :func:`~stem.socket.recv_message`
+
     :returns: :class:`~stem.response.ControlMessage` for the message received
 
     :raises:
@@ -461,7 +476,18 @@ class ControlSocket(BaseSocket):
       * :class:`stem.SocketClosed` if the socket closes before we receive a complete message
     """
 
-    return self._recv(lambda s, sf: recv_message(sf))
+    return self._recv(lambda s, sf: self._get_reader(s).recv(get_data_handler, keep_raw_content))
+
+  def _get_reader(self, control_socket):
+    """
+    Provides the reader for our present socket. Content our reader has
+    buffered is specific to its socket, so we replace it when we reconnect.
+    """
+
+    if self._reader is None or self._reader.socket is not control_socket:
+      self._reader = _ControlReader(control_socket)
+
+    return self._reader
 
 
 class ControlPort(ControlSocket):
@@ -643,13 +669,32 @@ def _write_to_socket(socket_file, message):
     raise stem.SocketClosed('file has been closed')
 
 
-def recv_message(control_file):
+def recv_message(control_file, get_data_handler = None, keep_raw_content = True):
   """
   Pulls from a control socket until we either have a complete message or
   encounter a problem.
 
+  Replies such as 'GETINFO md/all' can have several megabytes of content in
+  their data block. When a **get_data_handler** is provided it's called as
+  each data block of a reply (rather than an event) begins. If it provides a
+  function then that's given each line of the data block as it's read,
+  instead of it being included in our message.
+
+  Messages retain the content we read for their raw_content() method. If
+  **keep_raw_content** is **False** we instead reconstruct it from the parsed
+  content if it's requested, so large replies aren't held in memory twice.
+
+  .. versionchanged:: 1.8.0
+     Added the get_data_handler and keep_raw_content arguments.
+
   :param file control_file: file derived from the control socket (see the
     socket's makefile() method for more information)
+  :param function get_data_handler: provides a function that should receive
+    the lines of a reply's data block, or **None** if they should be part of
+    our message
+  :param bool keep_raw_content: retains the content we read for our
+    message's raw_content() if **True**, otherwise it's reconstructed if
+    requested
 
   :returns: :class:`~stem.response.ControlMessage` read from the socket
 
@@ -659,7 +704,7 @@ def recv_message(control_file):
       a complete message
   """
 
-  parsed_content, raw_content, first_line = None, None, True
+  parser = _MessageParser(get_data_handler, keep_raw_content)
 
   while True:
     try:
@@ -679,9 +724,85 @@ def recv_message(control_file):
       # Python 3:
       #   ValueError: I/O operation on closed file.
 
-      log.info(ERROR_MSG % ('SocketClosed', 'received exception "%s"' % exc))
+      if parser.is_in_data_block():
+        log.info(ERROR_MSG % ('SocketClosed', 'received an exception while mid-way through a data reply (exception: "%s", read content: "%s")' % (exc, log.escape(parser.raw_content))))
+      else:
+        log.info(ERROR_MSG % ('SocketClosed', 'received exception "%s"' % exc))
+
       raise stem.SocketClosed(exc)
 
+    message = parser.add_line(line)
+
+    if message:
+      return message
+
+
+class _MessageParser(object):
+  """
+  Incrementally parses the lines of a control message. This doesn't perform
+  any reading itself so it can be used with both blocking sockets (like
+  :func:`~stem.socket.recv_message`) and asyncio streams.
+
+  :param function get_data_handler: provides a function for the lines of a
+    reply's data block, see :func:`~stem.socket.recv_message`
+  :param bool keep_raw_content: retains the content we read for our message's
+    raw_content() if **True**, otherwise it's reconstructed if requested
+  """
+
+  def __init__(self, get_data_handler = None, keep_raw_content = True):
+    self._raw_content = [] if keep_raw_content else None  # lines we've received so far
+    self._parsed_content = []
+    self._data_lines = None  # lines of the data block we're within, if any
+    self._data_block_status = None
+    self._get_data_handler = get_data_handler
+    self._data_handler = None  # function receiving our data block's lines
+
+  @property
+  def raw_content(self):
+    """
+    Content of the lines we've received so far, if we're keeping it.
+    """
+
+    return b''.join(self._raw_content) if self._raw_content is not None else b''
+
+  def is_in_data_block(self):
+    """
+    Checks if we're mid-way through a multi-line data block.
+
+    :returns: **True** if we're within a data block, **False** otherwise
+    """
+
+    return self._data_lines is not None
+
+  def is_streaming(self):
+    """
+    Checks if the lines of our present data block are going to a data handler.
+
+    :returns: **True** if we're within a data block that we're streaming,
+      **False** otherwise
+    """
+
+    return self._data_handler is not None
+
+  def add_line(self, line):
+    """
+    Parses the next line of our control message.
+
+    :param bytes line: line read from the control socket, including its CRLF
+      ending
+
+    :returns: :class:`~stem.response.ControlMessage` if this completes our
+      message, **None** otherwise
+
+    :raises:
+      * :class:`stem.ProtocolError` the content from the socket is malformed
+      * :class:`stem.SocketClosed` if the line is empty, indicating that the
+        socket has been closed
+    """
+
+    if self._data_lines is not None:
+      return self._add_data_block_line(line)
+
     # Parses the tor control lines. These are of the form...
     # <status code><divider><content>\r\n
 
@@ -707,63 +828,224 @@ def recv_message(control_file):
     # Most controller responses are single lines, in which case we don't need
     # so much overhead.
 
-    if first_line:
-      if divider == ' ':
-        _log_trace(line)
-        return stem.response.ControlMessage([(status_code, divider, content)], line)
-      else:
-        parsed_content, raw_content, first_line = [], bytearray(), False
+    if divider == ' ' and not self._parsed_content:
+      _log_trace(line)
+      return stem.response.ControlMessage([(status_code, divider, content)], line)
 
-    raw_content += line
+    if self._raw_content is not None:
+      self._raw_content.append(line)
 
     if divider == '-':
       # mid-reply line, keep pulling for more content
-      parsed_content.append((status_code, divider, content))
+      self._parsed_content.append((status_code, divider, content))
     elif divider == ' ':
       # end of the message, return the message
-      parsed_content.append((status_code, divider, content))
-      _log_trace(bytes(raw_content))
-      return stem.response.ControlMessage(parsed_content, bytes(raw_content))
+      self._parsed_content.append((status_code, divider, content))
+      message = stem.response.ControlMessage(self._parsed_content, self.raw_content if self._raw_content is not None else None)
+
+      if log.is_tracing():
+        _log_trace(message.raw_content(get_bytes = True))
+
+      return message
     elif divider == '+':
       # data entry, all of the following lines belong to the content until we
       # get a line with just a period
 
-      content_block = bytearray(content)
+      self._data_lines = [content]
+      self._data_block_status = status_code
 
-      while True:
-        try:
-          line = control_file.readline()
-          raw_content += line
-        except socket.error as exc:
-          log.info(ERROR_MSG % ('SocketClosed', 'received an exception while mid-way through a data reply (exception: "%s", read content: "%s")' % (exc, log.escape(bytes(raw_content)))))
-          raise stem.SocketClosed(exc)
+      if self._get_data_handler and status_code != '650':
+        self._data_handler = self._get_data_handler()
+    else:
+      # this should never be reached due to the prefix regex, but might as well
+      # be safe...
 
-        if not line.endswith(b'\r\n'):
-          log.info(ERROR_MSG % ('ProtocolError', 'CRLF linebreaks missing from a data reply, "%s"' % log.escape(bytes(raw_content))))
-          raise stem.ProtocolError('All lines should end with CRLF')
-        elif line == b'.\r\n':
-          break  # data block termination
+      log.warn(ERROR_MSG % ('ProtocolError', "\"%s\" isn't a recognized divider type" % divider))
+      raise stem.ProtocolError("Unrecognized divider type '%s': %s" % (divider, stem.util.str_tools._to_unicode(line)))
 
-        line = line[:-2]  # strips off the CRLF
+    return None
 
-        # lines starting with a period are escaped by a second period (as per
-        # section 2.4 of the control-spec)
+  def add_data_block(self, block):
+    """
+    Parses the remainder of the data block we're within in one go, rather
+    than line by line. This is only applicable if we aren't streaming it.
 
-        if line.startswith(b'..'):
-          line = line[1:]
+    :param bytes block: lines of the data block, including its terminating
+      period
 
-        content_block += b'\n' + line
+    :raises: :class:`stem.ProtocolError` if the content is malformed
+    """
 
-      # joins the content using a newline rather than CRLF separator (more
-      # conventional for multi-line string content outside the windows world)
+    if self._raw_content is not None:
+      self._raw_content.append(block)
 
-      parsed_content.append((status_code, divider, bytes(content_block)))
+    if block == b'.\r\n':
+      data = None  # empty data block
     else:
-      # this should never be reached due to the prefix regex, but might as well
-      # be safe...
+      data = block[:-5]  # strips off the CRLF and period of the last lines
 
-      log.warn(ERROR_MSG % ('ProtocolError', "\"%s\" isn't a recognized divider type" % divider))
-      raise stem.ProtocolError("Unrecognized divider type '%s': %s" % (divider, stem.util.str_tools._to_unicode(line)))
+      if data.count(b'\n') != data.count(b'\r\n'):
+        log.info(ERROR_MSG % ('ProtocolError', 'CRLF linebreaks missing from a data reply, "%s"' % log.escape(self.raw_content + block)))
+        raise stem.ProtocolError('All lines should end with CRLF')
+
+      # see _add_data_block_line() for our unescaping and newlines
+
+      data = data.replace(b'\r\n', b'\n')
+
+      if data.startswith(b'..'):
+        data = data[1:]
+
+      if b'\n..' in data:
+        data = data.replace(b'\n..', b'\n.')
+
+    first_line = self._data_lines[0]
+    self._parsed_content.append((self._data_block_status, '+', first_line if data is None else b'\n'.join((first_line, data))))
+    self._data_lines, self._data_block_status = None, None
+
+  def _add_data_block_line(self, line):
+    if not line.endswith(b'\r\n'):
+      log.info(ERROR_MSG % ('ProtocolError', 'CRLF linebreaks missing from a data reply, "%s"' % log.escape(self.raw_content + line)))
+      raise stem.ProtocolError('All lines should end with CRLF')
+    elif line == b'.\r\n':
+      # data block termination, joins the content using a newline rather than
+      # CRLF separator (more conventional for multi-line string content outside
+      # the windows world)
+
+      if self._raw_content is not None:
+        self._raw_content.append(line)
+
+      self._parsed_content.append((self._data_block_status, '+', b'\n'.join(self._data_lines)))
+      self._data_lines, self._data_block_status, self._data_handler = None, None, None
+      return None
+
+    if self._raw_content is not None and not self._data_handler:
+      self._raw_content.append(line)
+
+    line = line[:-2]  # strips off the CRLF
+
+    # lines starting with a period are escaped by a second period (as per
+    # section 2.4 of the control-spec)
+
+    if line.startswith(b'..'):
+      line = line[1:]
+
+    if self._data_handler:
+      self._data_handler(line)
+    else:
+      self._data_lines.append(line)
+
+    return None
+
+
+class _ControlReader(object):
+  """
+  Reads control messages from a socket. Rather than reading line by line this
+  reads large chunks into a buffer, framing lines with memoryview slices. Data
+  blocks that aren't being streamed are parsed in one go once we have them.
+
+  :param socket.socket control_socket: socket to read from
+  """
+
+  def __init__(self, control_socket):
+    self.socket = control_socket
+
+    self._buffer = bytearray(READ_CHUNK_LEN)
+    self._start = 0  # start of content we've yet to parse
+    self._end = 0  # end of the content we've read
+    self._searched = 0  # bytes after our start we've searched for a delimiter
+
+  def recv(self, get_data_handler = None, keep_raw_content = True):
+    """
+    Reads the next message from our socket. This accepts the same arguments as
+    :func:`~stem.socket.recv_message`.
+
+    :returns: :class:`~stem.response.ControlMessage` read from the socket
+
+    :raises:
+      * :class:`stem.ProtocolError` the content from the socket is malformed
+      * :class:`stem.SocketClosed` if the socket closes before we receive
+        a complete message
+    """
+
+    parser = _MessageParser(get_data_handler, keep_raw_content)
+
+    while True:
+      if parser.is_in_data_block() and not parser.is_streaming():
+        if self._buffer.startswith(b'.\r\n', self._start):
+          end = self._start + 3  # empty data block
+        else:
+          end = self._find(b'\r\n.\r\n')
+
+          if end == -1:
+            self._read(parser)
+            continue
+
+          end += 5
+
+        parser.add_data_block(bytes(memoryview(self._buffer)[self._start:end]))
+        message = None
+      else:
+        end = self._find(b'\n')
+
+        if end == -1:
+          self._read(parser)
+          continue
+
+        end += 1
+        message = parser.add_line(bytes(memoryview(self._buffer)[self._start:end]))
+
+      self._start, self._searched = end, 0
+
+      if message:
+        return message
+
+  def _find(self, delimiter):
+    """
+    Provides the position of a delimiter after our start, or -1 if we have yet
+    to read it.
+    """
+
+    index = self._buffer.find(delimiter, self._start + self._searched, self._end)
+
+    if index == -1:
+      self._searched = max(0, self._end - self._start - len(delimiter) + 1)
+
+    return index
+
+  def _read(self, parser):
+    """
+    Reads more content from our socket, growing our buffer if it's full of
+    content we have yet to parse.
+    """
+
+    if self._end == len(self._buffer):
+      unparsed = self._end - self._start
+
+      if unparsed > len(self._buffer) // 2:
+        self._buffer.extend(bytearray(len(self._buffer)))
+      else:
+        self._buffer[:unparsed] = memoryview(self._buffer)[self._start:self._end]
+        self._start, self._end = 0, unparsed
+
+    try:
+      received = self.socket.recv_into(memoryview(self._buffer)[self._end:])
+    except (socket.error, ValueError) as exc:
+      if parser.is_in_data_block():
+        log.info(ERROR_MSG % ('SocketClosed', 'received an exception while mid-way through a data reply (exception: "%s", read content: "%s")' % (exc, log.escape(parser.raw_content))))
+      else:
+        log.info(ERROR_MSG % ('SocketClosed', 'received exception "%s"' % exc))
+
+      raise stem.SocketClosed(exc)
+
+    if not received:
+      # socket has been closed, giving our parser whatever remains as a
+      # readline() call would
+
+      remainder = bytes(memoryview(self._buffer)[self._start:self._end])
+      self._start, self._searched = self._end, 0
+      parser.add_line(remainder)
+
+    self._end += received
 
 
 def send_formatting(message):
@@ -88,6 +88,20 @@ class TestBaseController(unittest.TestCase):
       response = controller.msg('GETINFO blarg')
       self.assertEqual('Unrecognized key "blarg"', str(response))
 
+  @test.require.controller
+  def test_msg_async(self):
+    """
+    Pipelines several queries with the msg_async() method.
+    """
+
+    with test.runner.get_runner().get_tor_socket() as control_socket:
+      controller = stem.control.BaseController(control_socket)
+      futures = [controller.msg_async('GETINFO %s' % key) for key in ('version', 'blarg', 'config-file')]
+
+      self.assertTrue(str(futures[0].result()).startswith('version='))
+      self.assertEqual('Unrecognized key "blarg"', str(futures[1].result()))
+      self.assertTrue(str(futures[2].result()).startswith('config-file='))
+
   @test.require.controller
   def test_msg_repeatedly(self):
     """
@@ -100,6 +100,8 @@ def version(req_version):
 
 cryptography = needs(stem.prereq.is_crypto_available, 'requires cryptography')
 pynacl = needs(stem.prereq._is_pynacl_available, 'requires pynacl module')
+sha3 = needs(stem.prereq._is_sha3_available, 'requires sha3')
+asyncio = needs(stem.prereq._is_asyncio_available, 'requires python 3.5')
 proc = needs(stem.util.proc.is_available, 'proc unavailable')
 controller = needs(_can_access_controller, 'no connection')
 ptrace = needs(_can_ptrace, 'DisableDebuggerAttachment is set')
@@ -0,0 +1,237 @@
+"""
+Unit tests for stem.client.Circuit and stem.client.Stream.
+"""
+
+import hashlib
+import unittest
+
+import stem
+import stem.client
+import stem.prereq
+
+from stem.client import Circuit, Relay
+from stem.client.cell import RelayCell
+from stem.client.datatype import KDF, LinkProtocol, RelayCommand, Size
+
+KEY_MATERIAL = b'\xec\xec.\xeb7R\xf2\n\xcb\xce\x97\xf4\x86\x82\x19#\x10\x0f\x08\xf0\xa2Z\xdeJ\x8f2\x8cc\xf6\xfa\x0e\t\x83f\xc5\xe2\xb3\x94\xa8\x13'
+LINK_PROTOCOL = LinkProtocol(3)
+CIRC_ID = 1
+
+
+class FakeRelay(object):
+  """
+  ORPort socket that acts like a relay serving directory requests. Responses
+  respect our flow control windows, so we stall if our client doesn't send
+  SENDMEs.
+
+  :var dict responses: stream id => response for requests on that stream
+  :var set refused: stream ids we refuse to open
+  :var dict received: stream id => data we've received
+  :var list sendmes: (stream_id, payload) tuples for SENDMEs we've received
+  :var list circuit_digests: our running digest as of each 100th data cell
+  """
+
+  def __init__(self, kdf):
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+    from cryptography.hazmat.backends import default_backend
+
+    ctr = modes.CTR(b'\x00' * (algorithms.AES.block_size // 8))
+
+    self.forward_digest = hashlib.sha1(kdf.forward_digest)
+    self.backward_digest = hashlib.sha1(kdf.backward_digest)
+    self.forward_key = Cipher(algorithms.AES(kdf.forward_key), ctr, default_backend()).decryptor()
+    self.backward_key = Cipher(algorithms.AES(kdf.backward_key), ctr, default_backend()).encryptor()
+
+    self.responses = {}
+    self.refused = set()
+    self.received = {}
+    self.sendmes = []
+    self.circuit_digests = []
+
+    self._outbound = []  # cells waiting to be sent
+    self._pending_data = []  # (stream_id, data) cells we're withholding for flow control
+    self._circ_window = stem.client.CIRCUIT_WINDOW
+    self._stream_windows = {}
+    self._received_data_cells = {}
+    self._data_cells_sent = 0
+
+  def send(self, payload):
+    cell, self.forward_key, self.forward_digest = RelayCell.decrypt(LINK_PROTOCOL, payload, self.forward_key, self.forward_digest)
+
+    if cell.command == RelayCommand.BEGIN_DIR:
+      if cell.stream_id in self.refused:
+        self._reply(RelayCommand.END, Size.CHAR.pack(1), cell.stream_id)
+      else:
+        self._stream_windows[cell.stream_id] = stem.client.STREAM_WINDOW
+        self._reply(RelayCommand.CONNECTED, b'', cell.stream_id)
+    elif cell.command == RelayCommand.DATA:
+      self.received[cell.stream_id] = self.received.get(cell.stream_id, b'') + cell.data
+
+      # acknowledge what we receive, as a relay would
+
+      count = self._received_data_cells.get(cell.stream_id, 0) + 1
+      self._received_data_cells[cell.stream_id] = count
+
+      if count % stem.client.STREAM_WINDOW_INCREMENT == 0:
+        self._reply(RelayCommand.SENDME, b'', cell.stream_id)
+
+      if sum(self._received_data_cells.values()) % stem.client.CIRCUIT_WINDOW_INCREMENT == 0:
+        self._reply(RelayCommand.SENDME, b'', 0)
+
+      if cell.stream_id in self.responses and self.received[cell.stream_id].endswith(b'\r\n\r\n'):
+        response = self.responses.pop(cell.stream_id)
+
+        while response:
+          self._pending_data.append((cell.stream_id, response[:stem.client.RELAY_DATA_LEN]))
+          response = response[stem.client.RELAY_DATA_LEN:]
+
+        self._pending_data.append((cell.stream_id, None))  # end of the stream
+    elif cell.command == RelayCommand.SENDME:
+      self.sendmes.append((cell.stream_id, cell.data))
+
+      if cell.stream_id:
+        self._stream_windows[cell.stream_id] += stem.client.STREAM_WINDOW_INCREMENT
+      else:
+        self._circ_window += stem.client.CIRCUIT_WINDOW_INCREMENT
+
+    self._release_data()
+
+  def recv(self):
+    cells, self._outbound = self._outbound, []
+    return b''.join(cells)
+
+  def is_alive(self):
+    return True
+
+  def close(self):
+    pass
+
+  def _release_data(self):
+    # Send what our windows permit. Streams with an exhausted window are
+    # skipped so they don't block others.
+
+    blocked, unsent = set(), []
+
+    for stream_id, data in self._pending_data:
+      if stream_id in blocked:
+        unsent.append((stream_id, data))
+      elif data is None:
+        self._reply(RelayCommand.END, Size.CHAR.pack(6), stream_id)
+      elif self._circ_window > 0 and self._stream_windows[stream_id] > 0:
+        self._reply(RelayCommand.DATA, data, stream_id)
+        self._circ_window -= 1
+        self._stream_windows[stream_id] -= 1
+        self._data_cells_sent += 1
+
+        if self._data_cells_sent % stem.client.CIRCUIT_WINDOW_INCREMENT == 0:
+          self.circuit_digests.append(self.backward_digest.digest())
+      else:
+        blocked.add(stream_id)
+        unsent.append((stream_id, data))
+
+    self._pending_data = unsent
+
+  def _reply(self, command, data, stream_id):
+    cell = RelayCell(CIRC_ID, command, data, stream_id = stream_id)
+    payload, self.backward_key, self.backward_digest = cell.encrypt(LINK_PROTOCOL, self.backward_key, self.backward_digest)
+    self._outbound.append(payload)
+
+
+class TestCircuit(unittest.TestCase):
+  def setUp(self):
+    if not stem.prereq.is_crypto_available():
+      self.skipTest('(requires cryptography)')
+
+    kdf = KDF.from_value(KEY_MATERIAL)
+    self.orport = FakeRelay(kdf)
+    self.relay = Relay(self.orport, LINK_PROTOCOL)
+    self.circ = Circuit(self.relay, CIRC_ID, kdf)
+    self.relay._circuits[CIRC_ID] = self.circ
+
+  def _read_all(self, stream):
+    response = b''
+
+    while True:
+      data = stream.read()
+
+      if not data:
+        return response
+
+      response += data
+
+  def test_large_response(self):
+    """
+    Read a response that spans many flow control windows.
+    """
+
+    response = b''.join([b'line %i\n' % i for i in range(100000)])
+    self.orport.responses[1] = response
+
+    stream = self.circ.open_stream()
+    self.assertEqual(1, stream.id)
+
+    stream.write(b'GET /tor/server/all HTTP/1.0\r\n\r\n')
+    self.assertEqual(response, self._read_all(stream))
+    self.assertTrue(stream.is_closed)
+    self.assertEqual(6, stream.end_reason)
+
+    # circuit level SENDMEs echo the digest of the cell that prompted them
+
+    circuit_sendmes = [payload for stream_id, payload in self.orport.sendmes if stream_id == 0]
+    self.assertEqual([b'\x01\x00\x14' + digest for digest in self.orport.circuit_digests], circuit_sendmes)
+
+    stream_sendmes = [payload for stream_id, payload in self.orport.sendmes if stream_id == 1]
+    self.assertTrue(len(stream_sendmes) > 0)
+
+  def test_multiple_streams(self):
+    """
+    Interleave the responses of several streams.
+    """
+
+    self.orport.responses[1] = b'a' * 300000
+    self.orport.responses[2] = b'b' * 300000
+
+    stream_a = self.circ.open_stream()
+    stream_b = self.circ.open_stream()
+
+    stream_a.write(b'GET /a HTTP/1.0\r\n\r\n')
+    stream_b.write(b'GET /b HTTP/1.0\r\n\r\n')
+
+    self.assertEqual(b'b' * 300000, self._read_all(stream_b))
+    self.assertEqual(b'a' * 300000, self._read_all(stream_a))
+
+    # new streams continue to take the next id
+
+    self.assertEqual(3, self.circ.open_stream().id)
+
+  def test_large_write(self):
+    """
+    Send more than our flow control windows permit without acknowledgement.
+    """
+
+    request = b'x' * (stem.client.RELAY_DATA_LEN * 1200) + b'\r\n\r\n'
+
+    stream = self.circ.open_stream()
+    stream.write(request)
+    self.assertEqual(request, self.orport.received[1])
+
+  def test_refused_stream(self):
+    """
+    Relay refuses to open our stream.
+    """
+
+    self.orport.refused.add(1)
+    self.assertRaises(stem.ProtocolError, self.circ.open_stream)
+
+  def test_closed_circuit(self):
+    """
+    Streams can't be used once their circuit is closed.
+    """
+
+    stream = self.circ.open_stream()
+    self.circ._set_closed()
+
+    self.assertTrue(stream.is_closed)
+    self.assertEqual(b'', stream.read())
+    self.assertRaises(stem.SocketClosed, stream.write, b'hello')
+    self.assertRaises(stem.SocketClosed, self.circ.open_stream)
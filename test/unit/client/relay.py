@@ -0,0 +1,68 @@
+"""
+Unit tests for stem.client.Relay.
+"""
+
+import unittest
+
+import stem
+import stem.client.cell
+
+from stem.client import Relay
+from stem.client.datatype import Size
+
+try:
+  # added in python 3.3
+  from unittest.mock import Mock, patch
+except ImportError:
+  from mock import Mock, patch
+
+VERSIONS_CELL = stem.client.cell.VersionsCell([3, 4, 5]).pack(2)
+
+# Variable length CERTS cell for link protocol 5, whose circuit ids are four
+# bytes. Its content is irrelevant to us.
+
+CERTS_CELL = Size.LONG.pack(0) + Size.CHAR.pack(stem.client.cell.CertsCell.VALUE) + Size.SHORT.pack(20) + b'\x00' * 20
+
+
+class TestRelay(unittest.TestCase):
+  @patch('stem.socket.RelaySocket')
+  def test_connect_retains_cells_after_versions(self, socket_mock):
+    """
+    Keep the cells that arrive alongside the relay's VERSIONS cell, even if our
+    read ends partway through one.
+    """
+
+    orport = Mock()
+    orport.recv.side_effect = [VERSIONS_CELL + CERTS_CELL[:10], CERTS_CELL[10:]]
+    socket_mock.return_value = orport
+
+    relay = Relay.connect('127.0.0.1', 9001)
+    self.assertEqual(5, relay.link_protocol)
+    self.assertEqual([CERTS_CELL], relay._recv())
+
+  @patch('stem.socket.RelaySocket')
+  def test_connect_with_partial_versions(self, socket_mock):
+    """
+    Finish reading a VERSIONS cell that spans several reads.
+    """
+
+    orport = Mock()
+    orport.recv.side_effect = [VERSIONS_CELL[:4], VERSIONS_CELL[4:] + CERTS_CELL]
+    socket_mock.return_value = orport
+
+    relay = Relay.connect('127.0.0.1', 9001)
+    self.assertEqual(5, relay.link_protocol)
+    self.assertEqual([CERTS_CELL], relay._recv())
+
+  @patch('stem.socket.RelaySocket')
+  def test_connect_closed_during_versions(self, socket_mock):
+    """
+    Relay closes our connection partway through its VERSIONS cell.
+    """
+
+    orport = Mock()
+    orport.recv.side_effect = [VERSIONS_CELL[:4], b'']
+    socket_mock.return_value = orport
+
+    self.assertRaises(stem.SocketError, Relay.connect, '127.0.0.1', 9001)
+    self.assertTrue(orport.close.called)
@@ -0,0 +1,230 @@
+"""
+Unit tests for the stem.async_control.AsyncController class.
+"""
+
+import gc
+import socket
+import threading
+import unittest
+
+import stem
+import stem.prereq
+import test.require
+
+from stem.control import EventType
+
+if stem.prereq._is_asyncio_available():
+  import asyncio
+  import stem.async_control
+
+BW_EVENT = b'650 BW 15 25\r\n'
+CIRC_LAUNCHED = b'650 CIRC 7 LAUNCHED PURPOSE=GENERAL\r\n'
+CIRC_BUILT = b'650 CIRC 7 BUILT $999A226EBED397F331B612FE1E4CFAE5C1F201BA=piyaz PURPOSE=GENERAL\r\n'
+
+
+class FakeTor(object):
+  """
+  Replies to the requests we receive on one end of a socket pair. GETINFO
+  queries are echoed back, and other requests are answered with any response
+  we're provided for them. Replies are withheld until we've received a given
+  number of requests so we can check that they were pipelined.
+  """
+
+  def __init__(self, tor_socket, responses = None, batch_size = 1):
+    self.requests = []
+    self._socket = tor_socket
+    self._responses = responses if responses else {}
+    self._batch_size = batch_size
+    self._thread = threading.Thread(target = self._run)
+    self._thread.setDaemon(True)
+    self._thread.start()
+
+  def _run(self):
+    tor_file = self._socket.makefile(mode = 'rwb')
+    pending = []
+
+    while True:
+      line = tor_file.readline()
+
+      if not line:
+        break
+
+      request = line.decode('utf-8').strip()
+      self.requests.append(request)
+      pending.append(request)
+
+      if len(pending) >= self._batch_size:
+        for request in pending:
+          if request in self._responses:
+            tor_file.write(self._responses[request])
+          elif request.startswith('GETINFO '):
+            key = request.split(' ', 1)[1]
+            tor_file.write(('250-%s=%s\r\n250 OK\r\n' % (key, key)).encode('utf-8'))
+          else:
+            tor_file.write(b'250 OK\r\n')
+
+        tor_file.flush()
+        pending = []
+
+
+class TestAsyncController(unittest.TestCase):
+  def setUp(self):
+    if not stem.prereq._is_asyncio_available():
+      return
+
+    self.loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(self.loop)
+
+    controller_socket, self.tor_socket = socket.socketpair()
+    reader, writer = self.loop.run_until_complete(asyncio.open_connection(sock = controller_socket))
+    self.controller = stem.async_control.AsyncController(reader, writer, is_authenticated = True)
+
+  def tearDown(self):
+    if not stem.prereq._is_asyncio_available():
+      return
+
+    self.loop.run_until_complete(self.controller.close())
+    self.tor_socket.close()
+    self.loop.close()
+    asyncio.set_event_loop(None)
+
+  def _run(self, coroutine, timeout = 5):
+    return self.loop.run_until_complete(asyncio.wait_for(coroutine, timeout))
+
+  @test.require.asyncio
+  def test_get_info(self):
+    """
+    Pipeline several GETINFO queries. Our fake tor only replies after
+    receiving all of them, so this would deadlock if we waited for each reply
+    before sending the next query.
+    """
+
+    keys = ['version', 'config-file', 'fingerprint']
+    tor = FakeTor(self.tor_socket, {'GETINFO blarg': b'552 Unrecognized key "blarg"\r\n'}, batch_size = 4)
+
+    # gather() doesn't promise to start coroutines in order, so schedule them
+    # ourselves for our requests to be sent in this order
+
+    queries = [self.loop.create_task(self.controller.get_info(key)) for key in keys]
+    queries.append(self.loop.create_task(self.controller.get_info('blarg', 'my default')))
+
+    self.assertEqual(keys + ['my default'], self._run(asyncio.gather(*queries)))
+    self.assertEqual(['GETINFO %s' % key for key in keys + ['blarg']], tor.requests)
+
+  @test.require.asyncio
+  def test_get_info_when_invalid(self):
+    """
+    Query for a GETINFO option that tor doesn't recognize.
+    """
+
+    FakeTor(self.tor_socket, {'GETINFO blarg': b'552 Unrecognized key "blarg"\r\n'})
+    self.assertRaises(stem.InvalidArguments, self._run, self.controller.get_info('blarg'))
+
+  @test.require.asyncio
+  def test_get_conf(self):
+    """
+    Query tor's configuration.
+    """
+
+    FakeTor(self.tor_socket, {
+      'GETCONF exitpolicy': b'250-ExitPolicy=accept *:80\r\n250 ExitPolicy=reject *:*\r\n',
+      'GETCONF nickname': b'250 Nickname=caerSidi\r\n',
+    })
+
+    self.assertEqual('caerSidi', self._run(self.controller.get_conf('Nickname')))
+    self.assertEqual({'exitpolicy': ['accept *:80', 'reject *:*']}, self._run(self.controller.get_conf_map('exitpolicy')))
+
+  @test.require.asyncio
+  def test_set_options(self):
+    """
+    Change tor's configuration, including a rejected change.
+    """
+
+    tor = FakeTor(self.tor_socket, {
+      'SETCONF bombay="vanilla"': b"552 Unrecognized option: Unknown option 'bombay'.  Failing.\r\n",
+    })
+
+    self._run(self.controller.set_options({'Nickname': 'caerSidi'}))
+    self._run(self.controller.set_options([('ContactInfo', 'atagar')], reset = True))
+    self.assertRaises(stem.InvalidArguments, self._run, self.controller.set_conf('bombay', 'vanilla'))
+
+    self.assertEqual(['SETCONF Nickname="caerSidi"', 'RESETCONF ContactInfo="atagar"', 'SETCONF bombay="vanilla"'], tor.requests)
+
+  @test.require.asyncio
+  def test_events(self):
+    """
+    Deliver events to our listeners, interleaved with a reply.
+    """
+
+    FakeTor(self.tor_socket, {'GETINFO version': BW_EVENT + b'250-version=0.3.4.8\r\n250 OK\r\n' + BW_EVENT})
+
+    events = []
+
+    def async_listener(event):
+      # provides an awaitable that appends from another thread, so our order
+      # of events is only preserved if it's awaited
+
+      return self.loop.run_in_executor(None, events.append, ('async', event.read))
+
+    self._run(self.controller.add_event_listener(async_listener, EventType.BW))
+    self._run(self.controller.add_event_listener(lambda event: events.append(('sync', event.written)), EventType.BW))
+
+    self.assertEqual('0.3.4.8', self._run(self.controller.get_info('version')))
+    self._run(asyncio.sleep(0.1))
+
+    self.assertEqual([('async', 15), ('sync', 25), ('async', 15), ('sync', 25)], events)
+
+  @test.require.asyncio
+  def test_new_circuit(self):
+    """
+    Create a circuit, waiting for it to be built.
+    """
+
+    tor = FakeTor(self.tor_socket, {'EXTENDCIRCUIT 0 purpose=general': b'250 EXTENDED 7\r\n' + CIRC_LAUNCHED + CIRC_BUILT})
+
+    self.assertEqual('7', self._run(self.controller.new_circuit(await_build = True)))
+    self.assertEqual(['SETEVENTS CIRC', 'EXTENDCIRCUIT 0 purpose=general', 'SETEVENTS'], tor.requests)
+
+  @test.require.asyncio
+  def test_new_circuit_timeout(self):
+    """
+    Give up when a circuit isn't built in time.
+    """
+
+    FakeTor(self.tor_socket, {'EXTENDCIRCUIT 0 purpose=general': b'250 EXTENDED 7\r\n' + CIRC_LAUNCHED})
+    self.assertRaises(stem.Timeout, self._run, self.controller.new_circuit(await_build = True, timeout = 0.05))
+
+  @test.require.asyncio
+  def test_close(self):
+    """
+    Replies we're awaiting fail when our socket closes.
+    """
+
+    FakeTor(self.tor_socket, batch_size = 2)
+    query = asyncio.ensure_future(self.controller.msg('GETINFO version'))
+    self._run(asyncio.sleep(0.01))
+
+    self.assertFalse(query.done())
+    self._run(self.controller.close())
+
+    self.assertTrue(isinstance(query.exception(), stem.SocketClosed))
+    self.assertFalse(self.controller.is_alive())
+    self.assertRaises(stem.SocketClosed, self._run, self.controller.msg('GETINFO version'))
+
+  @test.require.asyncio
+  def test_tor_disconnects(self):
+    """
+    Notice when tor closes our connection.
+    """
+
+    # failures we raise shouldn't also be left unretrieved within a future
+
+    unretrieved = []
+    self.loop.set_exception_handler(lambda loop, context: unretrieved.append(context))
+
+    self.tor_socket.close()
+    self.assertRaises(stem.SocketClosed, self._run, self.controller.msg('GETINFO version'))
+    self.assertFalse(self.controller.is_alive())
+
+    gc.collect()
+    self.assertEqual([], unretrieved)
@@ -0,0 +1,536 @@
+"""
+Unit tests for the stem.control.BaseController class.
+"""
+
+import socket
+import threading
+import time
+import unittest
+
+import stem
+import stem.control
+import stem.socket
+
+from stem.control import EventQueuePolicy, EventQueueStats, ReplyFuture, _EventQueue
+from stem.descriptor.router_status_entry import RouterStatusEntryV3
+from stem.response import ControlMessage
+
+try:
+  # added in python 3.3
+  from unittest.mock import patch
+except ImportError:
+  from mock import patch
+
+
+RELAY = '$999A226EBED397F331B612FE1E4CFAE5C1F201BA=piyaz'
+
+
+def _event(content):
+  return ControlMessage.from_str('650 %s\r\n' % content)
+
+
+class PairedSocket(stem.socket.ControlSocket):
+  """
+  Control socket attached to one end of a socket pair.
+  """
+
+  def __init__(self, paired_socket):
+    super(PairedSocket, self).__init__()
+    self._paired_socket = paired_socket
+    self.connect()
+
+  def _make_socket(self):
+    return self._paired_socket
+
+
+class FakeTor(object):
+  """
+  Answers GETINFO requests on the other end of a socket pair, echoing back
+  the key. Replies are withheld until we've received a given number of
+  requests so we can check that they were pipelined.
+
+  Keys with data blocks are answered with a series of chunks. After the first
+  we wait for our **resume** event before sending each chunk.
+
+  :var list requests: keys of the requests we've received
+  :var list commands: commands of the requests we've received
+  """
+
+  def __init__(self, tor_socket, batch_size = 1, data_blocks = None, replies = None):
+    self.requests = []
+    self.commands = []
+    self.resume = threading.Event()
+    self._socket = tor_socket
+    self._tor_file = tor_socket.makefile(mode = 'rwb')
+    self._write_lock = threading.Lock()
+    self._batch_size = batch_size
+    self._data_blocks = data_blocks if data_blocks else {}
+    self._replies = replies if replies else {}  # request => reply we provide for it
+    self._thread = threading.Thread(target = self._run)
+    self._thread.setDaemon(True)
+    self._thread.start()
+
+  def send_event(self, content):
+    with self._write_lock:
+      self._tor_file.write(('650 %s\r\n' % content).encode('utf-8'))
+      self._tor_file.flush()
+
+  def _run(self):
+    tor_file = self._tor_file
+    pending = []
+
+    while True:
+      line = tor_file.readline()
+
+      if not line:
+        break
+
+      request = line.decode('utf-8').strip()
+      command, _, key = request.partition(' ')
+      self.requests.append(key)
+      self.commands.append(command)
+      pending.append((request, key))
+
+      if len(pending) >= self._batch_size:
+        self._write_lock.acquire()
+
+        for request, key in pending:
+          if request in self._replies:
+            tor_file.write(self._replies[request].replace('\n', '\r\n').encode('utf-8'))
+          elif not key:
+            tor_file.write(b'250 OK\r\n')
+          elif key == 'blarg':
+            tor_file.write(b'552 Unrecognized key "blarg"\r\n')
+          elif key in self._data_blocks:
+            tor_file.write(('250+%s=\r\n' % key).encode('utf-8'))
+
+            for i, chunk in enumerate(self._data_blocks[key]):
+              if i > 0:
+                tor_file.flush()
+                self.resume.wait()
+
+              tor_file.write(chunk)
+
+            tor_file.write(b'.\r\n250 OK\r\n')
+          else:
+            tor_file.write(('250-%s=%s\r\n250 OK\r\n' % (key, key)).encode('utf-8'))
+
+        tor_file.flush()
+        self._write_lock.release()
+        pending = []
+
+
+def _router_status_entries(count):
+  """
+  Provides the control port encoding of several router status entries.
+  """
+
+  content = b''
+
+  for i in range(count):
+    entry = RouterStatusEntryV3.create({'r': 'caerSidi%i p1aag7VwarGxqctS7/fS0y5FU+s oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0' % i})
+    content += entry.get_bytes().replace(b'\n', b'\r\n') + b'\r\n'
+
+  return content
+
+
+class TestBaseController(unittest.TestCase):
+  def setUp(self):
+    controller_socket, self.tor_socket = socket.socketpair()
+    self.controller = stem.control.BaseController(PairedSocket(controller_socket))
+
+  def tearDown(self):
+    self.controller.close()
+    self.tor_socket.close()
+
+  def test_msg(self):
+    """
+    Exchange a message with tor.
+    """
+
+    FakeTor(self.tor_socket)
+    self.assertEqual('version=version\nOK', str(self.controller.msg('GETINFO version')))
+
+  def test_msg_async(self):
+    """
+    Pipeline several messages. Our fake tor only replies after receiving all
+    of them, so this would deadlock if we waited for each reply before sending
+    the next message.
+    """
+
+    keys = ['version', 'blarg', 'config-file', 'fingerprint']
+    tor = FakeTor(self.tor_socket, batch_size = len(keys))
+    futures = [self.controller.msg_async('GETINFO %s' % key) for key in keys]
+
+    self.assertEqual('version=version\nOK', str(futures[0].result(5)))
+    self.assertEqual('Unrecognized key "blarg"', str(futures[1].result(5)))
+    self.assertEqual('config-file=config-file\nOK', str(futures[2].result(5)))
+    self.assertEqual('fingerprint=fingerprint\nOK', str(futures[3].result(5)))
+
+    self.assertEqual(keys, tor.requests)
+    self.assertTrue(all([future.done() for future in futures]))
+
+  def test_msg_async_when_closed(self):
+    """
+    Replies we're awaiting fail when our socket closes.
+    """
+
+    FakeTor(self.tor_socket, batch_size = 2)
+    future = self.controller.msg_async('GETINFO version')
+    self.assertFalse(future.done())
+
+    self.controller.close()
+
+    self.assertTrue(isinstance(future.exception(5), stem.SocketClosed))
+    self.assertRaises(stem.SocketClosed, future.result)
+    self.assertRaises(stem.SocketClosed, self.controller.msg_async, 'GETINFO version')
+    self.assertRaises(stem.SocketClosed, self.controller.msg, 'GETINFO version')
+
+  def test_reply_future(self):
+    """
+    Resolve a ReplyFuture.
+    """
+
+    future = ReplyFuture()
+    notified = []
+
+    future.add_done_callback(notified.append)
+    self.assertFalse(future.done())
+    self.assertRaises(stem.Timeout, future.result, 0.01)
+    self.assertEqual([], notified)
+
+    future._set_result('hello')
+
+    self.assertTrue(future.done())
+    self.assertEqual('hello', future.result())
+    self.assertEqual(None, future.exception())
+    self.assertEqual([future], notified)
+
+    future.add_done_callback(notified.append)  # already done, so called immediately
+    self.assertEqual([future, future], notified)
+
+    failed_future = ReplyFuture()
+    failed_future._set_result(None, stem.ProtocolError('malformed'))
+
+    self.assertRaises(stem.ProtocolError, failed_future.result)
+    self.assertTrue(isinstance(failed_future.exception(), stem.ProtocolError))
+
+  def test_event_queue_limit(self):
+    """
+    Configure our controller's event queue.
+    """
+
+    self.assertEqual(EventQueueStats(0, 0, 0), self.controller.get_event_queue_stats())
+
+    self.controller.set_event_queue_limit(10, EventQueuePolicy.DROP_OLDEST)
+    self.assertEqual(10, self.controller._event_queue.limit)
+    self.assertEqual(EventQueuePolicy.DROP_OLDEST, self.controller._event_queue.policy)
+
+    self.assertRaises(ValueError, self.controller.set_event_queue_limit, 0)
+    self.assertRaises(ValueError, self.controller.set_event_queue_limit, 10, 'DROP_EVERYTHING')
+
+  def test_event_queue_drop_policies(self):
+    """
+    Drop events when our queue is full.
+    """
+
+    event_queue = _EventQueue()
+    event_queue.set_limit(2, EventQueuePolicy.DROP_NEWEST)
+
+    for i in range(4):
+      event_queue.put(_event('BW %i 0' % i))
+
+    self.assertEqual(EventQueueStats(2, 2, 0), event_queue.stats())
+    self.assertEqual('BW 0 0', str(event_queue.get()))
+    self.assertEqual('BW 1 0', str(event_queue.get()))
+
+    event_queue.set_limit(2, EventQueuePolicy.DROP_OLDEST)
+
+    for i in range(4):
+      event_queue.put(_event('BW %i 0' % i))
+
+    self.assertEqual(EventQueueStats(2, 4, 0), event_queue.stats())
+    self.assertEqual('BW 2 0', str(event_queue.get()))
+    self.assertEqual('BW 3 0', str(event_queue.get()))
+
+  def test_event_queue_coalescing(self):
+    """
+    Replace queued bandwidth events with newer ones for the same connection.
+    """
+
+    event_queue = _EventQueue()
+    event_queue.set_limit(10, EventQueuePolicy.COALESCE)
+
+    event_queue.put(_event('CONN_BW ID=11 TYPE=DIR READ=1 WRITTEN=1'))
+    event_queue.put(_event('CIRC 4 LAUNCHED'))
+    event_queue.put(_event('CONN_BW ID=12 TYPE=DIR READ=2 WRITTEN=2'))
+    event_queue.put(_event('BW 15 25'))
+    event_queue.put(_event('CONN_BW ID=11 TYPE=DIR READ=3 WRITTEN=3'))
+    event_queue.put(_event('CIRC 4 BUILT'))
+    event_queue.put(_event('BW 16 26'))
+
+    self.assertEqual(EventQueueStats(5, 0, 2), event_queue.stats())
+
+    self.assertEqual([
+      'CONN_BW ID=11 TYPE=DIR READ=3 WRITTEN=3',
+      'CIRC 4 LAUNCHED',
+      'CONN_BW ID=12 TYPE=DIR READ=2 WRITTEN=2',
+      'BW 16 26',
+      'CIRC 4 BUILT',
+    ], [str(event_queue.get()) for i in range(5)])
+
+    # now that the BW event has been dequeued, a new one is queued
+
+    event_queue.put(_event('BW 17 27'))
+    self.assertEqual(EventQueueStats(1, 0, 2), event_queue.stats())
+
+    # token bucket events are coalesced by their bucket, and connection for
+    # ORCONN buckets
+
+    event_queue = _EventQueue()
+    event_queue.set_limit(10, EventQueuePolicy.COALESCE)
+
+    event_queue.put(_event('TB_EMPTY GLOBAL READ=93 WRITTEN=93 LAST=100'))
+    event_queue.put(_event('TB_EMPTY ORCONN ID=16 READ=0 WRITTEN=0 LAST=100'))
+    event_queue.put(_event('TB_EMPTY GLOBAL READ=95 WRITTEN=95 LAST=100'))
+    event_queue.put(_event('TB_EMPTY ORCONN ID=17 READ=0 WRITTEN=0 LAST=100'))
+    event_queue.put(_event('TB_EMPTY ORCONN ID=16 READ=1 WRITTEN=1 LAST=100'))
+
+    self.assertEqual([
+      'TB_EMPTY GLOBAL READ=95 WRITTEN=95 LAST=100',
+      'TB_EMPTY ORCONN ID=16 READ=1 WRITTEN=1 LAST=100',
+      'TB_EMPTY ORCONN ID=17 READ=0 WRITTEN=0 LAST=100',
+    ], [str(event_queue.get()) for i in range(3)])
+
+  def test_event_queue_blocking(self):
+    """
+    Block when our queue is full until there's room.
+    """
+
+    event_queue = _EventQueue()
+    event_queue.set_limit(1, EventQueuePolicy.BLOCK)
+    event_queue.put(_event('BW 1 0'))
+
+    putter = threading.Thread(target = event_queue.put, args = (_event('BW 2 0'),))
+    putter.setDaemon(True)
+    putter.start()
+    putter.join(0.05)
+    self.assertTrue(putter.is_alive())
+
+    self.assertEqual('BW 1 0', str(event_queue.get()))
+    putter.join(5)
+    self.assertFalse(putter.is_alive())
+    self.assertEqual('BW 2 0', str(event_queue.get()))
+
+  def test_event_queue_blocking_when_reply_awaited(self):
+    """
+    Exceed our limit rather than block while a reply is awaited.
+    """
+
+    is_reply_awaited = threading.Event()
+    event_queue = _EventQueue(is_reply_awaited.is_set)
+    event_queue.set_limit(1, EventQueuePolicy.BLOCK)
+    event_queue.put(_event('BW 1 0'))
+
+    putter = threading.Thread(target = event_queue.put, args = (_event('BW 2 0'),))
+    putter.setDaemon(True)
+    putter.start()
+    putter.join(0.05)
+    self.assertTrue(putter.is_alive())
+
+    is_reply_awaited.set()
+    event_queue.reply_awaited()
+    putter.join(5)
+    self.assertFalse(putter.is_alive())
+    self.assertEqual(EventQueueStats(2, 0, 0), event_queue.stats())
+
+  def test_event_queue_blocking_with_listener_messages(self):
+    """
+    Listeners that send messages while our queue is full receive their reply
+    rather than deadlocking with our reader.
+    """
+
+    controller, tor = self._tracking_controller()
+    controller.set_event_queue_limit(1, EventQueuePolicy.BLOCK)
+    replies = []
+
+    def bw_listener(event):
+      replies.append(str(controller.msg('GETINFO version')))
+
+    controller.add_event_listener(bw_listener, stem.control.EventType.BW)
+
+    for i in range(5):
+      tor.send_event('BW %i 0' % i)
+
+    start_time = time.time()
+
+    while len(replies) < 5 and time.time() - start_time < 5:
+      time.sleep(0.01)
+
+    self.assertEqual(['version=\n0.3.5.7\nOK'] * 5, replies)
+
+  def test_streaming_descriptors(self):
+    """
+    Provide descriptors as they're read from the socket, before we have the
+    whole reply.
+    """
+
+    controller, tor = self._streaming_controller({'ns/all': [_router_status_entries(2), _router_status_entries(2)]})
+    entries = controller.get_network_statuses()
+
+    self.assertEqual('caerSidi0', next(entries).nickname)
+    tor.resume.set()
+    self.assertEqual(['caerSidi1', 'caerSidi0', 'caerSidi1'], [entry.nickname for entry in entries])
+
+  @patch('stem.control.STREAM_BUFFER_LINES', 5)
+  def test_streaming_descriptors_with_other_messages(self):
+    """
+    Send other messages while we're part way through a reply that exceeds our
+    buffer. Our reader can't provide their replies until it's past ours, so
+    this would deadlock if we kept our buffer bounded.
+    """
+
+    controller, tor = self._streaming_controller({'ns/all': [_router_status_entries(20)]})
+    entries = controller.get_network_statuses()
+
+    self.assertEqual('caerSidi0', next(entries).nickname)
+    self.assertEqual('version=version\nOK', str(controller.msg_async('GETINFO version').result(5)))
+    self.assertEqual(['caerSidi%i' % i for i in range(1, 20)], [entry.nickname for entry in entries])
+
+  def test_streaming_descriptors_when_unavailable(self):
+    """
+    Tor has yet to download any descriptors.
+    """
+
+    controller, tor = self._streaming_controller({'ns/all': []})
+    self.assertRaises(stem.DescriptorUnavailable, list, controller.get_network_statuses())
+    self.assertEqual([], list(controller.get_network_statuses([])))
+
+  def test_circuit_tracking(self):
+    """
+    Track circuits and streams through their events, rather than querying tor
+    each time they're requested.
+    """
+
+    controller, tor = self._tracking_controller()
+    controller.set_circuit_tracking(True)
+
+    self.assertEqual(['7'], [circ.id for circ in controller.get_circuits()])
+    self.assertEqual(['12'], [stream.id for stream in controller.get_streams()])
+
+    tor.send_event('CIRC 8 LAUNCHED PURPOSE=GENERAL')
+    tor.send_event('CIRC 7 CLOSED %s PURPOSE=GENERAL REASON=FINISHED' % RELAY)
+    tor.send_event('CIRC_MINOR 8 PURPOSE_CHANGED PURPOSE=MEASURE_TIMEOUT OLD_PURPOSE=GENERAL')
+    tor.send_event('STREAM 12 CLOSED 7 www.torproject.org:443 REASON=DONE')
+    tor.send_event('STREAM 13 NEW 0 www.google.com:80')
+    controller.msg('GETINFO version')  # events are applied before this reply
+
+    self.assertEqual(['8'], [circ.id for circ in controller.get_circuits()])
+    self.assertEqual('MEASURE_TIMEOUT', controller.get_circuit('8').purpose)
+    self.assertEqual(['13'], [stream.id for stream in controller.get_streams()])
+    self.assertEqual(1, tor.requests.count('circuit-status'))
+    self.assertEqual(1, tor.requests.count('stream-status'))
+
+    # stops tracking
+
+    controller.set_circuit_tracking(False)
+    self.assertFalse(controller.is_circuit_tracking_enabled())
+    self.assertEqual(['7'], [circ.id for circ in controller.get_circuits()])
+    self.assertEqual(2, tor.requests.count('circuit-status'))
+
+  def test_apply_circ_minor(self):
+    """
+    Update a circuit's CIRC event with the changes of a CIRC_MINOR event.
+    """
+
+    circ = _event('CIRC 7 BUILT %s PURPOSE=GENERAL SOCKS_USERNAME="a b" SOCKS_PASSWORD="c"' % RELAY)
+    circ_minor = _event('CIRC_MINOR 7 PURPOSE_CHANGED PURPOSE=MEASURE_TIMEOUT OLD_PURPOSE=GENERAL')
+    stem.response.convert('EVENT', circ, arrived_at = 15)
+    stem.response.convert('EVENT', circ_minor, arrived_at = 20)
+
+    updated = stem.control._apply_circ_minor(circ, circ_minor)
+
+    self.assertEqual(('7', stem.CircStatus.BUILT, circ.path), (updated.id, updated.status, updated.path))
+    self.assertEqual(stem.CircPurpose.MEASURE_TIMEOUT, updated.purpose)
+    self.assertEqual(('a b', 'c'), (updated.socks_username, updated.socks_password))
+    self.assertEqual(['7', 'BUILT', RELAY], updated.positional_args)
+    self.assertEqual(15, updated.arrived_at)
+
+  def test_circuit_tracking_await_build(self):
+    """
+    Await circuits to be built without attaching a listener for each.
+    """
+
+    controller, tor = self._tracking_controller({
+      'EXTENDCIRCUIT 0 purpose=general': '250 EXTENDED 9\n650 CIRC 9 LAUNCHED\n650 CIRC 9 BUILT %s\n' % RELAY,
+      'EXTENDCIRCUIT 0 purpose=controller': '250 EXTENDED 10\n650 CIRC 10 LAUNCHED\n650 CIRC 10 FAILED REASON=TIMEOUT\n',
+    })
+
+    controller.set_circuit_tracking(True)
+    setevents = tor.commands.count('SETEVENTS')
+
+    self.assertEqual('9', controller.new_circuit(await_build = True, timeout = 5))
+    self.assertEqual(stem.CircStatus.BUILT, controller.get_circuit('9').status)
+    self.assertRaises(stem.CircuitExtensionFailed, controller.new_circuit, purpose = 'controller', await_build = True, timeout = 5)
+    self.assertEqual(setevents, tor.commands.count('SETEVENTS'))
+
+  def test_new_circuits(self):
+    """
+    Build several circuits at once, both with and without tracking circuits.
+    """
+
+    for tracking in (False, True):
+      controller, tor = self._tracking_controller({
+        'EXTENDCIRCUIT 0 A,B purpose=general': '250 EXTENDED 9\n650 CIRC 9 LAUNCHED\n',
+        'EXTENDCIRCUIT 0 A,C purpose=general': '250 EXTENDED 10\n650 CIRC 10 LAUNCHED\n650 CIRC 10 FAILED REASON=TIMEOUT\n650 CIRC 9 BUILT %s\n' % RELAY,
+        'EXTENDCIRCUIT 0 A,D purpose=general': '552 No such router "D"\n',
+        'EXTENDCIRCUIT 0 A,E purpose=general': '250 EXTENDED 11\n650 CIRC 11 LAUNCHED\n',
+      })
+
+      controller.set_circuit_tracking(tracking)
+      setevents = tor.commands.count('SETEVENTS')
+
+      built, failed, unknown, timed_out = controller.new_circuits([['A', 'B'], ['A', 'C'], ['A', 'D'], ['A', 'E']], timeout = 0.2)
+
+      self.assertEqual((['A', 'B'], '9', stem.CircStatus.BUILT, None, None), (built.path, built.id, built.status, built.reason, built.error))
+      self.assertTrue(built.build_time >= 0)
+
+      self.assertEqual(('10', stem.CircStatus.FAILED, stem.CircClosureReason.TIMEOUT), (failed.id, failed.status, failed.reason))
+      self.assertTrue(isinstance(failed.error, stem.CircuitExtensionFailed))
+
+      self.assertEqual((None, None), (unknown.id, unknown.status))
+      self.assertTrue(isinstance(unknown.error, stem.InvalidRequest))
+
+      self.assertEqual(('11', stem.CircStatus.LAUNCHED, None), (timed_out.id, timed_out.status, timed_out.build_time))
+      self.assertTrue(isinstance(timed_out.error, stem.Timeout))
+
+      # without tracking we add, then remove, a single CIRC listener
+
+      self.assertEqual(setevents + (0 if tracking else 2), tor.commands.count('SETEVENTS'))
+
+  def _tracking_controller(self, replies = None):
+    controller_socket, tor_socket = socket.socketpair()
+    replies = dict(replies if replies else {})
+    replies['GETCONF __owningcontrollerprocess'] = '250 __OwningControllerProcess\n'
+
+    tor = FakeTor(tor_socket, replies = replies, data_blocks = {
+      'version': [b'0.3.5.7\r\n'],
+      'circuit-status': [('7 BUILT %s PURPOSE=GENERAL\r\n' % RELAY).encode('utf-8')],
+      'stream-status': [b'12 SUCCEEDED 7 www.torproject.org:443\r\n'],
+    })
+
+    controller = stem.control.Controller(PairedSocket(controller_socket), is_authenticated = True)
+
+    self.addCleanup(tor_socket.close)
+    self.addCleanup(controller.close)
+
+    return controller, tor
+
+  def _streaming_controller(self, data_blocks):
+    controller_socket, tor_socket = socket.socketpair()
+    controller = stem.control.Controller(PairedSocket(controller_socket))
+
+    self.addCleanup(tor_socket.close)
+    self.addCleanup(controller.close)
+
+    return controller, FakeTor(tor_socket, data_blocks = data_blocks)
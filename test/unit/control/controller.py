@@ -5,6 +5,7 @@ integ tests, but a few bits lend themselves to unit testing.
 
 import datetime
 import io
+import threading
 import unittest
 
 import stem.descriptor.router_status_entry
@@ -15,7 +16,7 @@ import stem.util.system
 import stem.version
 
 from stem import ControllerError, DescriptorUnavailable, InvalidArguments, InvalidRequest, ProtocolError, UnsatisfiableRequest
-from stem.control import MALFORMED_EVENTS, _parse_circ_path, Listener, Controller, EventType
+from stem.control import MALFORMED_EVENTS, _parse_circ_path, Listener, Controller, EventQueuePolicy, EventQueueStats, EventType
 from stem.response import ControlMessage
 from stem.exit_policy import ExitPolicy
 
@@ -68,6 +69,40 @@ class TestControl(unittest.TestCase):
     msg_mock.return_value = ControlMessage.from_str('250-hello=hi right back!\r\n250 OK\r\n', 'GETINFO')
     self.assertEqual('hi right back!', self.controller.get_info('hello'))
 
+  @patch('stem.control.Controller.is_geoip_unavailable', Mock(return_value = False))
+  @patch('stem.control.Controller.msg')
+  def test_get_info_cache_limit(self, msg_mock):
+    self.controller.set_cache_limit('getinfo', max_entries = 2)
+
+    for address, locale in (('1.2.3.4', 'de'), ('5.6.7.8', 'fr'), ('1.2.3.4', 'de'), ('9.9.9.9', 'us')):
+      msg_mock.return_value = ControlMessage.from_str('250-ip-to-country/%s=%s\r\n250 OK\r\n' % (address, locale), 'GETINFO')
+      self.assertEqual(locale, self.controller.get_info('ip-to-country/%s' % address))
+
+    # our third query was cached, and it was more recently used than '5.6.7.8'
+
+    self.assertEqual(3, msg_mock.call_count)
+    self.assertEqual(stem.control.CacheStats(2, 1, 3, 1, 0), self.controller.get_cache_stats('getinfo'))
+    self.assertEqual(None, self.controller._get_cache('ip-to-country/5.6.7.8', 'getinfo'))
+    self.assertEqual('de', self.controller._get_cache('ip-to-country/1.2.3.4', 'getinfo'))
+
+  @patch('stem.control.time.time')
+  def test_cache_ttl(self, time_mock):
+    time_mock.return_value = 100
+    self.controller.set_cache_limit('exit_policy', ttl = 60)
+    self.controller._set_cache({'exit_policy': 'reject *:*', 'version': '0.3.5.7'})
+
+    time_mock.return_value = 150
+    self.assertEqual('reject *:*', self.controller._get_cache('exit_policy'))
+
+    time_mock.return_value = 160
+    self.assertEqual(None, self.controller._get_cache('exit_policy'))
+    self.assertEqual('0.3.5.7', self.controller._get_cache('version'))
+
+    self.assertEqual(stem.control.CacheStats(0, 1, 1, 0, 1), self.controller.get_cache_stats('exit_policy'))
+    self.assertEqual(stem.control.CacheStats(1, 2, 1, 0, 1), self.controller.get_cache_stats())
+
+    self.assertRaises(ValueError, self.controller.set_cache_limit, 'getconf', -1)
+
   @patch('stem.control.Controller.msg')
   def test_get_info_address_caching(self, msg_mock):
     msg_mock.return_value = ControlMessage.from_str('551 Address unknown\r\n')
@@ -698,6 +733,73 @@ class TestControl(unittest.TestCase):
     self._emit_event(BW_EVENT)
     self.bw_listener.assert_called_once_with(BW_EVENT)
 
+  def test_event_workers(self):
+    """
+    Notify listeners from a thread pool, where a listener that's blocked only
+    holds up events of its own type.
+    """
+
+    circ_started, circ_blocker, bw_received = threading.Event(), threading.Event(), threading.Event()
+    self.circ_listener.side_effect = lambda event: circ_started.set() or circ_blocker.wait(5)
+    self.bw_listener.side_effect = lambda event: bw_received.set()
+
+    self.controller.set_event_workers(2)
+
+    try:
+      self.controller._handle_event(ControlMessage.from_str(CIRC_EVENT.raw_content()))
+      self.controller._handle_event(ControlMessage.from_str(CIRC_EVENT.raw_content()))
+      self.controller._handle_event(ControlMessage.from_str(BW_EVENT.raw_content()))
+
+      self.assertTrue(bw_received.wait(5))
+      self.assertTrue(circ_started.wait(5))
+      self.assertEqual(1, self.circ_listener.call_count)  # second is pending
+    finally:
+      circ_blocker.set()
+      self.controller.set_event_workers(0)
+
+    self.assertEqual(None, self.controller._event_workers)
+    self.assertRaises(ValueError, self.controller.set_event_workers, -1)
+
+  def test_event_workers_with_queue_limit(self):
+    """
+    Events awaiting our workers count against our event queue's limit, so a
+    slow listener can't cause them to accumulate.
+    """
+
+    circ_started, circ_blocker = threading.Event(), threading.Event()
+    self.circ_listener.side_effect = lambda event: circ_started.set() or circ_blocker.wait(5)
+
+    self.controller.set_event_queue_limit(2, EventQueuePolicy.DROP_NEWEST)
+    self.controller.set_event_workers(1)
+    event_queue = self.controller._event_queue
+
+    try:
+      self.controller._handle_event(ControlMessage.from_str(CIRC_EVENT.raw_content()))
+      self.controller._handle_event(ControlMessage.from_str(CIRC_EVENT.raw_content()))
+      self.assertTrue(circ_started.wait(5))
+
+      event_queue.put(ControlMessage.from_str(BW_EVENT.raw_content()))
+      self.assertEqual(EventQueueStats(2, 1, 0), self.controller.get_event_queue_stats())
+
+      # when blocking our reader waits for the listener to catch up
+
+      event_queue.set_limit(2, EventQueuePolicy.BLOCK)
+      reader = threading.Thread(target = event_queue.put, args = (ControlMessage.from_str(BW_EVENT.raw_content()),))
+      reader.setDaemon(True)
+      reader.start()
+
+      reader.join(0.1)
+      self.assertTrue(reader.is_alive())
+
+      circ_blocker.set()
+      reader.join(5)
+      self.assertFalse(reader.is_alive())
+    finally:
+      circ_blocker.set()
+      self.controller.set_event_workers(0)
+
+    self.assertEqual(EventQueueStats(1, 1, 0), self.controller.get_event_queue_stats())
+
   def test_event_listing_with_malformed_event(self):
     """
     Attempt to parse a malformed event emitted from Tor. It's important this
@@ -865,7 +967,6 @@ class TestControl(unittest.TestCase):
 
           uncast_event = ControlMessage.from_str(event.raw_content())
           self.controller._event_queue.put(uncast_event)
-          self.controller._event_notice.set()
           self.controller._event_queue.join()  # block until the event is consumed
         finally:
           is_alive_mock.return_value = False
@@ -7,6 +7,7 @@ import os
 __all__ = [
   'export',
   'extrainfo_descriptor',
+  'index',
   'microdescriptor',
   'networkstatus',
   'reader',
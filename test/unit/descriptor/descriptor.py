@@ -4,9 +4,22 @@ Unit tests for the base stem.descriptor module.
 
 import unittest
 
-from stem.descriptor import Descriptor
+import stem.descriptor
+import test.require
+
+from stem.descriptor import Descriptor, validate_signatures, _descriptor_components, _MemoryMappedFile
+from stem.descriptor.microdescriptor import Microdescriptor
+from stem.descriptor.networkstatus import NetworkStatusDocumentV3
 from stem.descriptor.server_descriptor import RelayDescriptor
 
+from test.unit.descriptor import get_resource
+
+try:
+  # added in python 3.3
+  from unittest.mock import patch
+except ImportError:
+  from mock import patch
+
 
 class TestDescriptor(unittest.TestCase):
   def test_from_str(self):
@@ -49,3 +62,143 @@ class TestDescriptor(unittest.TestCase):
     self.assertEqual(0, len(RelayDescriptor.from_str('', multiple = True)))
 
     self.assertRaisesWith(ValueError, "Descriptor.from_str() expected a single descriptor, but had 2 instead. Please include 'multiple = True' if you want a list of results instead.", RelayDescriptor.from_str, desc_text)
+
+  def test_lazy_loading(self):
+    """
+    Attributes of lazy loaded descriptors are populated by their parsers, with
+    defaults for any they don't cover.
+    """
+
+    desc = RelayDescriptor(RelayDescriptor.content({'router': 'caerSidi 71.35.133.197 9001 0 0', 'bandwidth': 'hello world'}))
+    self.assertTrue(desc._lazy_loading)
+
+    self.assertEqual('caerSidi', desc.nickname)
+    self.assertEqual(9001, desc.or_port)
+    self.assertEqual(None, desc.socks_port)  # populated by the same parser as the nickname
+
+    # malformed line, so each attribute from the parser is its default
+
+    self.assertEqual(None, desc.average_bandwidth)
+    self.assertEqual(None, desc.burst_bandwidth)
+    self.assertEqual(None, desc.observed_bandwidth)
+
+    self.assertEqual(set(), desc.family)  # absent from the descriptor
+    self.assertRaises(AttributeError, getattr, desc, 'no_such_attribute')
+
+    # each descriptor class has its own mapping of parsers to attributes
+
+    relay_mapping = RelayDescriptor._attributes_by_parser()
+    microdescriptor_mapping = Microdescriptor._attributes_by_parser()
+
+    self.assertTrue(relay_mapping is RelayDescriptor._attributes_by_parser())
+    self.assertFalse(relay_mapping is microdescriptor_mapping)
+    self.assertEqual(set(RelayDescriptor.ATTRIBUTES), set([attr for attrs in relay_mapping.values() for attr, _ in attrs]))
+
+  def test_descriptor_components(self):
+    """
+    Breaks up content with keyword lines and pgp style blocks.
+    """
+
+    content = b'\n'.join((
+      b'nickname caerSidi',
+      b'opt fingerprint 1234',
+      b'',
+      b'onion-key',
+      b'-----BEGIN RSA PUBLIC KEY-----',
+      b'MIGJAoGBAJv5IIWQ+WDWYUdyA/0L8qbI',
+      b'-----END RSA PUBLIC KEY-----',
+      b'contact atagar',
+      b'contact damian',
+    ))
+
+    entries = _descriptor_components(content, True)
+
+    self.assertEqual(['nickname', 'fingerprint', 'onion-key', 'contact'], list(entries.keys()))
+    self.assertEqual([('caerSidi', None, None)], entries['nickname'])
+    self.assertEqual([('1234', None, None)], entries['fingerprint'])
+    self.assertEqual([('', 'RSA PUBLIC KEY', '-----BEGIN RSA PUBLIC KEY-----\nMIGJAoGBAJv5IIWQ+WDWYUdyA/0L8qbI\n-----END RSA PUBLIC KEY-----')], entries['onion-key'])
+    self.assertEqual([('atagar', None, None), ('damian', None, None)], entries['contact'])
+
+  def test_descriptor_components_with_unterminated_block(self):
+    """
+    Content with a pgp style block that lacks its ending line.
+    """
+
+    content = b'\n'.join((
+      b'nickname caerSidi',
+      b'onion-key',
+      b'-----BEGIN RSA PUBLIC KEY-----',
+      b'MIGJAoGBAJv5IIWQ+WDWYUdyA/0L8qbI',
+    ))
+
+    self.assertRaises(ValueError, _descriptor_components, content, True)
+    self.assertEqual(['nickname'], list(_descriptor_components(content, False).keys()))
+
+  def test_memory_mapped_readlines(self):
+    """
+    Read the remaining lines of a memory mapped file.
+    """
+
+    with open(get_resource('cached-consensus'), 'rb') as descriptor_file:
+      content = descriptor_file.read()
+      descriptor_file.seek(0)
+      descriptor_file.readline()
+
+      mapped_file = _MemoryMappedFile.for_file(descriptor_file)
+
+      try:
+        self.assertEqual(content.splitlines(True)[1:], mapped_file.readlines())
+        self.assertEqual(len(content), mapped_file.tell())
+        self.assertEqual([], mapped_file.readlines())
+      finally:
+        mapped_file.close()
+
+  @patch('stem.descriptor._digest_for_signature')
+  def test_validate_signatures_results(self, digest_mock):
+    """
+    Provide a result for each descriptor we're asked to validate.
+    """
+
+    valid_desc = RelayDescriptor.create()
+    invalid_desc = RelayDescriptor.create({'router': 'caerSidi 71.35.133.197 9001 0 0'})
+    malformed_desc = RelayDescriptor.create({'router': 'Unnamed 71.35.133.197 9001 0 0'})
+
+    def digest_for_signature(signing_key, signature):
+      if signature == malformed_desc.signature:
+        raise ValueError('Verification failed, malformed data')
+
+      return valid_desc.digest()
+
+    digest_mock.side_effect = digest_for_signature
+    results = validate_signatures([valid_desc, invalid_desc, malformed_desc, Microdescriptor.create()], workers = 0)
+
+    self.assertEqual(4, len(results))
+    self.assertEqual(None, results[0])
+    self.assertEqual('Decrypted digest does not match local digest (calculated: %s, local: %s)' % (valid_desc.digest(), invalid_desc.digest()), str(results[1]))
+    self.assertEqual('Verification failed, malformed data', str(results[2]))
+    self.assertEqual("Microdescriptor doesn't have signatures we can validate", str(results[3]))
+
+  @test.require.cryptography
+  def test_validate_signatures(self):
+    """
+    Validate a consensus and server descriptor within worker processes.
+    """
+
+    with open(get_resource('cached-consensus'), 'rb') as descriptor_file:
+      consensus_content = descriptor_file.read()
+
+    with open(get_resource('cached-certs'), 'rb') as cert_file:
+      certs = list(stem.descriptor.parse_file(cert_file, 'dir-key-certificate-3 1.0'))
+
+    with open(get_resource('example_descriptor'), 'rb') as descriptor_file:
+      server_desc = next(stem.descriptor.parse_file(descriptor_file, 'server-descriptor 1.0'))
+
+    consensus = NetworkStatusDocumentV3(consensus_content)
+    modified_consensus = NetworkStatusDocumentV3(consensus_content.replace(b'test002r', b'different_nickname'))
+
+    for workers in (0, 2):
+      results = validate_signatures([consensus, modified_consensus, server_desc], certs, workers = workers)
+
+      self.assertEqual(None, results[0])
+      self.assertEqual('Network Status Document has 0 valid signatures out of 2 total, needed 1', str(results[1]))
+      self.assertEqual(None, results[2])
@@ -0,0 +1,204 @@
+"""
+Unit tests for stem.descriptor.index.
+"""
+
+import datetime
+import os
+import shutil
+import tempfile
+import unittest
+
+import stem.descriptor.index
+import stem.prereq
+
+from stem.descriptor.index import DescriptorIndex
+from test.unit.descriptor import get_resource
+
+AMUNET1 = 'B6D83EC2D9E18B0A7A33428F8CFA9C536769E209'
+AMUNET11 = '1F43EE37A0670301AD9CB555D94AFEC2C89FDE86'
+CAERSIDI = 'A7569A83B5706AB1B1A9CB52EFF7D2D32E4553EB'
+
+
+class TestDescriptorIndex(unittest.TestCase):
+  def setUp(self):
+    if not stem.prereq.is_sqlite_available():
+      self.skipTest('(sqlite3 unavailable)')
+
+    self.temp_directory = tempfile.mkdtemp()
+    self.index_path = os.path.join(self.temp_directory, 'index.sqlite')
+
+  def tearDown(self):
+    shutil.rmtree(self.temp_directory)
+
+  def test_archive(self):
+    """
+    Indexes an uncompressed tarball, then reads descriptors from it.
+    """
+
+    archive_path = get_resource('descriptor_archive.tar')
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertEqual(3, index.add(archive_path))
+
+      entries = index.entries(fingerprint = AMUNET1)
+      self.assertEqual(1, len(entries))
+
+      entry = entries[0]
+      self.assertEqual('server-descriptor', entry.descriptor_type)
+      self.assertEqual('02C311D3D789F3F55C0880B5C85F3C196343552C', entry.digest)
+      self.assertEqual(datetime.datetime(2012, 3, 2, 9, 6, 14), entry.published)
+      self.assertEqual(os.path.abspath(archive_path), entry.path)
+      self.assertEqual('descriptor_archive/0/2/02c311d3d789f3f55c0880b5c85f3c196343552c', entry.archive_path)
+      self.assertEqual(None, entry.compression)
+      self.assertEqual('@type server-descriptor 1.0', entry.type_annotation)
+
+      desc = index.read(entry)
+      self.assertEqual('Amunet1', desc.nickname)
+      self.assertEqual(AMUNET1, desc.fingerprint)
+      self.assertEqual(os.path.abspath(archive_path), desc.get_path())
+      self.assertEqual(entry.archive_path, desc.get_archive_path())
+
+      desc = list(index.get_descriptors(digest = '1BB798CAE15E21479DB0BC700767EEE4733E9D4A'))[0]
+      self.assertEqual('Amunet11', desc.nickname)
+
+  def test_compressed_archive(self):
+    """
+    Reads descriptors from a gzip compressed tarball.
+    """
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertEqual(3, index.add(get_resource('descriptor_archive.tar.gz')))
+
+      entry = index.entries(fingerprint = AMUNET11)[0]
+      self.assertEqual('gz', entry.compression)
+      self.assertEqual('Amunet11', index.read(entry).nickname)
+
+  def test_published_range(self):
+    """
+    Queries for descriptors published within a given timeframe.
+    """
+
+    with DescriptorIndex(self.index_path) as index:
+      index.add(get_resource('descriptor_archive.tar'))
+
+      self.assertEqual(3, len(index.entries()))
+      self.assertEqual(['Amunet11', 'Amunet3', 'Amunet1'], [desc.nickname for desc in index.get_descriptors()])
+      self.assertEqual(['Amunet1'], [desc.nickname for desc in index.get_descriptors(start = datetime.datetime(2012, 3, 2))])
+      self.assertEqual(['Amunet11'], [desc.nickname for desc in index.get_descriptors(end = datetime.datetime(2012, 3, 1, 2, 58, 20))])
+
+  def test_get_latest(self):
+    """
+    Provides the latest descriptor of a relay as of a given time.
+    """
+
+    with DescriptorIndex(self.index_path) as index:
+      index.add(get_resource('example_descriptor'))
+
+      self.assertEqual('caerSidi', index.get_latest(CAERSIDI).nickname)
+      self.assertEqual('caerSidi', index.get_latest(CAERSIDI, datetime.datetime(2012, 3, 2)).nickname)
+      self.assertEqual(None, index.get_latest(CAERSIDI, datetime.datetime(2012, 3, 1)))
+      self.assertEqual(None, index.get_latest(AMUNET1))
+
+  def test_incremental_updates(self):
+    """
+    Only index files that are new or have changed.
+    """
+
+    descriptor_path = os.path.join(self.temp_directory, 'descriptors')
+    shutil.copy(get_resource('example_descriptor'), descriptor_path)
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertEqual(1, index.add(self.temp_directory))
+      self.assertEqual(0, index.add(self.temp_directory))
+
+    # index persists between instances
+
+    shutil.copy(get_resource('descriptor_archive.tar'), os.path.join(self.temp_directory, 'archive.tar'))
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertEqual(3, index.add(self.temp_directory))
+      self.assertEqual(4, len(index.entries()))
+
+      # changed files replace their prior entries
+
+      with open(descriptor_path, 'ab') as descriptor_file:
+        descriptor_file.write(b'\n')
+
+      self.assertEqual(1, index.add(descriptor_path))
+      self.assertEqual(4, len(index.entries()))
+
+      # deleted files are dropped from the index
+
+      os.remove(os.path.join(self.temp_directory, 'archive.tar'))
+      self.assertEqual(0, index.add(self.temp_directory))
+      self.assertEqual(1, len(index.entries()))
+
+  def test_unparseable_content(self):
+    """
+    Skip files we can't parse, along with the index's own database.
+    """
+
+    with open(os.path.join(self.temp_directory, 'unparseable'), 'wb') as descriptor_file:
+      descriptor_file.write(u'caf\xe9'.encode('utf-8') + b'\xff')
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertEqual(0, index.add(self.temp_directory))
+      self.assertEqual([], index.entries())
+
+      indexed_paths = [row[0] for row in index._conn.execute('SELECT path FROM files')]
+      self.assertTrue(os.path.abspath(self.index_path) not in indexed_paths)
+
+  def test_type_annotation_version(self):
+    """
+    Read descriptors using the version from their @type annotation.
+    """
+
+    with open(get_resource('example_descriptor'), 'rb') as descriptor_file:
+      content = descriptor_file.read()
+
+    self.assertTrue(content.startswith(b'@type server-descriptor 1.0\n'))
+    descriptor_path = os.path.join(self.temp_directory, 'descriptors')
+
+    with open(descriptor_path, 'wb') as descriptor_file:
+      descriptor_file.write(content.replace(b'@type server-descriptor 1.0', b'@type server-descriptor 1.2', 1))
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertEqual(1, index.add(descriptor_path))
+
+      entry = index.entries()[0]
+      self.assertEqual('server-descriptor', entry.descriptor_type)
+      self.assertEqual('@type server-descriptor 1.2', entry.type_annotation)
+      self.assertEqual('caerSidi', index.read(entry).nickname)
+
+  def test_missing_target(self):
+    """
+    Index a path that doesn't exist.
+    """
+
+    with DescriptorIndex(self.index_path) as index:
+      self.assertRaises(IOError, index.add, os.path.join(self.temp_directory, 'no_such_file'))
+
+  def test_incompatible_index(self):
+    """
+    Open an index from a different schema version, or a file that isn't an
+    index at all.
+    """
+
+    DescriptorIndex(self.index_path).close()
+
+    import sqlite3
+    conn = sqlite3.connect(self.index_path)
+
+    with conn:
+      conn.execute('UPDATE schema SET version = ?', (stem.descriptor.index.SCHEMA_VERSION + 1,))
+
+    conn.close()
+
+    self.assertRaises(IOError, DescriptorIndex, self.index_path)
+
+    not_an_index = os.path.join(self.temp_directory, 'not_an_index')
+
+    with open(not_an_index, 'w') as not_an_index_file:
+      not_an_index_file.write('hello world, this is not a sqlite database\n' * 10)
+
+    self.assertRaises(IOError, DescriptorIndex, not_an_index)
@@ -77,6 +77,20 @@ class TestMicrodescriptor(unittest.TestCase):
       self.assertEqual('uhCGfIM6RbeD1Z/C6e9ct41+NIl9EbpgP8wG7uZT2Rw', router.digest())
       self.assertEqual('@type microdescriptor 1.0', str(router.type_annotation()))
 
+  def test_local_microdescriptors_with_memory_map(self):
+    """
+    Reading microdescriptors through a memory map provides the same results.
+    """
+
+    descriptor_path = get_resource('cached-microdescs')
+    expected = list(stem.descriptor.parse_file(descriptor_path, 'microdescriptor 1.0'))
+    descriptors = list(stem.descriptor.parse_file(descriptor_path, 'microdescriptor 1.0', memory_map = True))
+
+    self.assertEqual(3, len(descriptors))
+    self.assertEqual(expected, descriptors)
+    self.assertEqual([desc.get_annotations() for desc in expected], [desc.get_annotations() for desc in descriptors])
+    self.assertEqual(THIRD_ONION_KEY, descriptors[2].onion_key)
+
   def test_minimal_microdescriptor(self):
     """
     Basic sanity check that we can parse a microdescriptor with minimal
@@ -165,6 +179,19 @@ class TestMicrodescriptor(unittest.TestCase):
     desc = Microdescriptor.create({'p': 'accept 80,110,143,443'})
     self.assertEqual(stem.exit_policy.MicroExitPolicy('accept 80,110,143,443'), desc.exit_policy)
 
+  def test_exit_policy_is_shared(self):
+    """
+    Microdescriptors with the same policy share a single instance of it.
+    """
+
+    desc1 = Microdescriptor.create({'p': 'accept 80,443', 'p6': 'accept 443'})
+    desc2 = Microdescriptor.create({'p': 'accept 80,443', 'p6': 'accept 443'})
+    desc3 = Microdescriptor.create({'p': 'accept 80'})
+
+    self.assertTrue(desc1.exit_policy is desc2.exit_policy)
+    self.assertTrue(desc1.exit_policy_v6 is desc2.exit_policy_v6)
+    self.assertFalse(desc1.exit_policy is desc3.exit_policy)
+
   def test_protocols(self):
     """
     Basic check for 'pr' lines.
@@ -2,4 +2,4 @@
 Unit tests for stem.descriptor.networkstatus.
 """
 
-__all__ = ['bridge_document', 'directory_authority', 'key_certificate', 'document_v2', 'document_v3']
+__all__ = ['bridge_document', 'directory_authority', 'key_certificate', 'document_v2', 'document_v3', 'consensus_table', 'exit_index']
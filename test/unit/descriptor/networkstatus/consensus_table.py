@@ -0,0 +1,85 @@
+"""
+Unit tests for the ConsensusTable of stem.descriptor.networkstatus.
+"""
+
+import datetime
+import unittest
+
+import stem.descriptor
+
+from stem.descriptor.networkstatus import ConsensusTable, NetworkStatusDocumentV3
+from stem.descriptor.router_status_entry import RouterStatusEntryV3, RouterStatusEntryMicroV3
+
+from test.unit.descriptor import get_resource
+
+
+class TestConsensusTable(unittest.TestCase):
+  def test_from_cached_consensus(self):
+    """
+    Checks our columns against the router status entries they came from.
+    """
+
+    entries = list(stem.descriptor.parse_file(get_resource('cached-consensus')))
+    table = ConsensusTable(stem.descriptor.parse_file(get_resource('cached-consensus')))
+
+    self.assertEqual(len(entries), len(table))
+    self.assertEqual(entries[0].document, table.document)
+
+    for index, entry in enumerate(entries):
+      self.assertEqual(entry.fingerprint, table.fingerprint(index))
+      self.assertEqual(entry.nickname, table.nicknames[index])
+      self.assertEqual(entry.address, table.address(index))
+      self.assertEqual(entry.or_port, table.or_ports[index])
+      self.assertEqual(entry.dir_port or 0, table.dir_ports[index])
+      self.assertEqual(entry.bandwidth or 0, table.bandwidths[index])
+      self.assertEqual(entry.flags, table.flags_for(index))
+      self.assertEqual(entry.published, datetime.datetime.utcfromtimestamp(table.published[index]))
+      self.assertEqual(index, table.index(entry.fingerprint))
+      self.assertEqual(entry, table.row(index))
+
+    self.assertEqual(entries, list(table))
+
+  def test_select(self):
+    """
+    Filter relays by their flags and bandwidth.
+    """
+
+    table = ConsensusTable([
+      RouterStatusEntryV3.create({'r': 'relay1 p1aag7VwarGxqctS7/fS0y5FU+s oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0', 's': 'Exit Fast', 'w': 'Bandwidth=500'}),
+      RouterStatusEntryV3.create({'r': 'relay2 ABSiBVJ42z6w5Z6nAXQUFq8YVVg oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.30 9001 0', 's': 'Exit Fast Stable', 'w': 'Bandwidth=10'}),
+      RouterStatusEntryV3.create({'r': 'relay3 AFn9TveYjdtZEsgh7QsWp3qC5kU oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.31 9001 0', 's': 'Fast', 'w': 'Bandwidth=900'}),
+    ])
+
+    self.assertEqual([0, 1, 2], table.select())
+    self.assertEqual([0, 1], table.select(flags = ('Exit', 'Fast')))
+    self.assertEqual([0], table.select(flags = ('Exit', 'Fast'), min_bandwidth = 100))
+    self.assertEqual([0, 2], table.select(exclude_flags = ('Stable',)))
+    self.assertEqual([2], table.select(exclude_flags = ('Exit', 'Authority')))
+    self.assertEqual([], table.select(flags = ('Authority',)))
+
+    self.assertEqual(0b11, table.flag_mask(('Exit', 'Fast')))
+    self.assertEqual(None, table.flag_mask(('Authority',)))
+
+  def test_microdescriptor_consensus(self):
+    """
+    Rows of a microdescriptor flavored consensus.
+    """
+
+    entry = RouterStatusEntryMicroV3.create()
+    document = NetworkStatusDocumentV3.create({'network-status-version': '3 microdesc'}, routers = (entry,))
+    table = ConsensusTable(document.routers.values())
+
+    self.assertEqual(1, len(table))
+    self.assertTrue(isinstance(table.row(0), RouterStatusEntryMicroV3))
+    self.assertEqual(entry.fingerprint, table.row(0).fingerprint)
+
+  def test_missing_relay(self):
+    """
+    Look up relays that aren't in the table.
+    """
+
+    table = ConsensusTable(stem.descriptor.parse_file(get_resource('cached-consensus')))
+
+    self.assertFalse('0000000000000000000000000000000000000000' in table)
+    self.assertRaises(ValueError, table.index, '0000000000000000000000000000000000000000')
+    self.assertRaises(ValueError, table.index, 'nope')
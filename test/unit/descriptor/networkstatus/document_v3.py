@@ -3,6 +3,7 @@ Unit tests for the NetworkStatusDocumentV3 of stem.descriptor.networkstatus.
 """
 
 import datetime
+import hashlib
 import io
 import unittest
 
@@ -37,6 +38,12 @@ try:
 except ImportError:
   from stem.util.ordereddict import OrderedDict
 
+try:
+  # added in python 3.3
+  from unittest.mock import Mock, patch
+except ImportError:
+  from mock import Mock, patch
+
 BANDWIDTH_WEIGHT_ENTRIES = (
   'Wbd', 'Wbe', 'Wbg', 'Wbm',
   'Wdb',
@@ -46,6 +53,23 @@ BANDWIDTH_WEIGHT_ENTRIES = (
 )
 
 
+def _consensus_diff(from_content, to_content, commands):
+  """
+  Consensus diff with the given ed commands, as tor would provide it. The
+  digest we're from is of the signed portion of that document, whereas the
+  digest we produce is of the full document.
+  """
+
+  signed_end = from_content.find(b'\ndirectory-signature ') + len(b'\ndirectory-signature ')
+  from_digest = hashlib.sha3_256(from_content[:signed_end]).hexdigest().upper().encode('ascii')
+  to_digest = hashlib.sha3_256(to_content).hexdigest().upper().encode('ascii')
+
+  return b'\n'.join([
+    b'network-status-diff-version 1',
+    b'hash ' + from_digest + b' ' + to_digest,
+  ] + commands) + b'\n'
+
+
 class TestNetworkStatusDocument(unittest.TestCase):
   def test_metrics_consensus(self):
     """
@@ -462,6 +486,122 @@ DnN5aFtYKiTc19qIC7Nmo+afPdDEf0MlJvEOP5EWl3w=
     self.assertEqual(entry1, entries[0])
     self.assertEqual(entry2, entries[1])
 
+  def test_parse_file_with_memory_map(self):
+    """
+    Read a consensus through a memory map with each of our document handlers.
+    """
+
+    descriptor_path = get_resource('cached-consensus')
+
+    for handler in stem.descriptor.DocumentHandler:
+      expected = list(stem.descriptor.parse_file(descriptor_path, document_handler = handler))
+      descriptors = list(stem.descriptor.parse_file(descriptor_path, document_handler = handler, memory_map = True))
+
+      self.assertEqual(expected, descriptors)
+
+    # the footer follows the router status entries
+
+    document = next(stem.descriptor.parse_file(descriptor_path, document_handler = stem.descriptor.DocumentHandler.DOCUMENT, memory_map = True))
+    self.assertEqual(2, len(document.signatures))
+    self.assertEqual('596CD48D61FDA4E868F4AA10FF559917BE3B1A35', document.signatures[0].identity)
+
+  @test.require.sha3
+  def test_apply_diff(self):
+    """
+    Apply a consensus diff that changes two of our three relays.
+    """
+
+    with open(get_resource('cached-consensus'), 'rb') as descriptor_file:
+      content = descriptor_file.read()
+
+    document = NetworkStatusDocumentV3(content)
+    lines = content.split(b'\n')
+    lines[24] = b'w Bandwidth=20'  # test002r
+    lines[31] = b'p accept 80,443'  # test001a
+    expected = b'\n'.join(lines[:49] + [b''])
+
+    diff = _consensus_diff(content, expected, [
+      b'50,$d',
+      b'32d',
+      b'31a',
+      b'p accept 80,443',
+      b'.',
+      b'25c',
+      b'w Bandwidth=20',
+      b'.',
+    ])
+
+    descriptor_components = Mock(wraps = stem.descriptor._descriptor_components)
+
+    with patch('stem.descriptor.router_status_entry._descriptor_components', descriptor_components):
+      new_document = document.apply_diff(diff)
+      self.assertEqual(expected, new_document.get_bytes())
+      self.assertEqual(3, len(new_document.routers))
+      self.assertEqual(1, len(new_document.signatures))
+
+    self.assertEqual(2, descriptor_components.call_count)  # only the changed entries are parsed
+
+    self.assertEqual(20, new_document.routers['348225F83C854796B2DD6364E65CB189B33BD696'].bandwidth)
+    self.assertEqual('accept 80,443', str(new_document.routers['AA0CD1A482925BCD3D1672F8B67B51B5680E8B0A'].exit_policy))
+
+    for fingerprint, router in new_document.routers.items():
+      self.assertEqual(new_document, router.document)
+      self.assertEqual(document.routers[fingerprint].nickname, router.nickname)
+
+    self.assertEqual(document, NetworkStatusDocumentV3(content))  # original is unchanged
+    self.assertEqual(new_document, NetworkStatusDocumentV3(expected))
+
+  @test.require.sha3
+  def test_apply_diff_with_wrong_digests(self):
+    """
+    Apply consensus diffs that are for another document or don't produce the
+    content they claim to.
+    """
+
+    with open(get_resource('cached-consensus'), 'rb') as descriptor_file:
+      content = descriptor_file.read()
+
+    document = NetworkStatusDocumentV3(content)
+    other_content = content.replace(b'consensus-method 26', b'consensus-method 25')
+
+    diff = _consensus_diff(other_content, content, [b'3c', b'consensus-method 26', b'.'])
+    self.assertRaises(ValueError, document.apply_diff, diff)
+
+    diff = _consensus_diff(content, other_content, [b'3c', b'consensus-method 24', b'.'])
+    self.assertRaises(ValueError, document.apply_diff, diff)
+
+    diff = _consensus_diff(content, other_content, [b'3c', b'consensus-method 25', b'.'])
+    self.assertEqual(25, document.apply_diff(diff).consensus_method)
+
+  @test.require.sha3
+  def test_apply_diff_malformed(self):
+    """
+    Apply consensus diffs with malformed content.
+    """
+
+    with open(get_resource('cached-consensus'), 'rb') as descriptor_file:
+      content = descriptor_file.read()
+
+    document = NetworkStatusDocumentV3(content)
+    diff = _consensus_diff(content, content, [])
+
+    test_inputs = (
+      b'',
+      diff.replace(b'network-status-diff-version 1', b'network-status-diff-version 2'),
+      diff.replace(b'hash ', b'hash-sha3 '),
+      diff + b'3x\n',  # unrecognized command
+      diff + b'3c\nconsensus-method 26\n',  # unterminated change
+      diff + b'5,3d\n',  # invalid range
+      diff + b'3,4a\nfoo\n.\n',  # append with a range
+      diff + b'900d\n',  # beyond the end of the document
+      diff + b'3d\n5d\n',  # ascending commands
+    )
+
+    for test_input in test_inputs:
+      self.assertRaises(ValueError, document.apply_diff, test_input)
+
+    self.assertEqual(document, document.apply_diff(diff))
+
   def test_missing_fields(self):
     """
     Excludes mandatory fields from both a vote and consensus document.
@@ -0,0 +1,103 @@
+"""
+Unit tests for the ExitIndex of stem.descriptor.networkstatus.
+"""
+
+import unittest
+
+import stem.descriptor
+
+from stem.descriptor.microdescriptor import Microdescriptor
+from stem.descriptor.networkstatus import ExitIndex, NetworkStatusDocumentV3
+from stem.descriptor.router_status_entry import RouterStatusEntryV3, RouterStatusEntryMicroV3
+from stem.exit_policy import ExitPolicy, MicroExitPolicy
+from stem.util.connection import address_to_int
+
+from test.unit.descriptor import get_resource
+
+try:
+  # added in python 3.3
+  from unittest.mock import Mock
+except ImportError:
+  from mock import Mock
+
+IDENTITIES = ('p1aag7VwarGxqctS7/fS0y5FU+s', 'ABSiBVJ42z6w5Z6nAXQUFq8YVVg', 'AFn9TveYjdtZEsgh7QsWp3qC5kU', 'ARIJF2zbqirB9IwsW0mQznccWww')
+
+
+def micro_entry(nickname, identity, microdescriptor):
+  return RouterStatusEntryMicroV3.create({
+    'r': '%s %s 2012-08-06 11:19:31 71.35.150.29 9001 0' % (nickname, identity),
+    'm': microdescriptor.digest(),
+  })
+
+
+class TestExitIndex(unittest.TestCase):
+  def test_microdescriptors(self):
+    """
+    Index a microdescriptor consensus, including relays with identical policies.
+    """
+
+    web_policy = Microdescriptor.create({'p': 'accept 80,443', 'p6': 'accept 443'})
+    open_policy = Microdescriptor.create({'p': 'reject 25', 'family': 'relay4'})
+    non_exit = Microdescriptor.create()
+
+    entries = [
+      micro_entry('relay1', IDENTITIES[0], web_policy),
+      micro_entry('relay2', IDENTITIES[1], web_policy),
+      micro_entry('relay3', IDENTITIES[2], open_policy),
+      micro_entry('relay4', IDENTITIES[3], non_exit),
+    ]
+
+    relay1, relay2, relay3, relay4 = [entry.fingerprint for entry in entries]
+    consensus = NetworkStatusDocumentV3.create({'network-status-version': '3 microdesc'}, routers = entries)
+    index = ExitIndex(consensus, [web_policy, open_policy, non_exit])
+
+    self.assertEqual(set([relay1, relay2, relay3, relay4]), set(index.fingerprints))
+    self.assertEqual(frozenset([relay1, relay2, relay3]), index.exits_to('75.119.206.243', 443))
+    self.assertEqual(frozenset([relay1, relay2, relay3]), index.exits_to(address_to_int('75.119.206.243'), 80))
+    self.assertEqual(frozenset([relay3]), index.exits_to('75.119.206.243', 22))
+    self.assertEqual(frozenset(), index.exits_to('75.119.206.243', 25))
+
+    # only the first two relays have an IPv6 policy
+
+    self.assertEqual(frozenset([relay1, relay2]), index.exits_to('[2001:db8::ff00:42:8329]', 443))
+    self.assertEqual(frozenset(), index.exits_to('2001:db8::ff00:42:8329', 80))
+
+    self.assertEqual([frozenset([relay3]), frozenset()], index.exits_to_many([('1.2.3.4', 22), ('1.2.3.4', 25)]))
+
+    self.assertRaises(ValueError, index.exits_to, 'not an address', 80)
+    self.assertRaises(ValueError, index.exits_to, '1.2.3.4', 70000)
+
+  def test_server_descriptors(self):
+    """
+    Index server descriptor policies, which can differ by address.
+    """
+
+    entries = [RouterStatusEntryV3.create({'r': 'relay%i %s oQZFLYe9e4A7bOkWKR7TaNxb0JE 2012-08-06 11:19:31 71.35.150.29 9001 0' % (i, identity)}) for i, identity in enumerate(IDENTITIES)]
+    relay1, relay2, relay3, relay4 = [entry.fingerprint for entry in entries]
+
+    descriptors = [
+      Mock(fingerprint = relay1, exit_policy = ExitPolicy('reject 10.0.0.0/8:*', 'reject 71.35.150.29:*', 'accept *:*'), exit_policy_v6 = MicroExitPolicy('reject 1-65535')),
+      Mock(fingerprint = relay2, exit_policy = ExitPolicy('reject 10.0.0.0/8:*', 'reject 71.35.150.30:*', 'accept *:*'), exit_policy_v6 = MicroExitPolicy('accept 1-65535')),
+      Mock(fingerprint = relay3, exit_policy = ExitPolicy('accept 10.0.0.0/255.0.255.0:22', 'reject *:*'), exit_policy_v6 = MicroExitPolicy('reject 1-65535')),
+    ]
+
+    index = ExitIndex(entries, descriptors)
+
+    self.assertEqual(frozenset([relay1, relay2]), index.exits_to('75.119.206.243', 22))
+    self.assertEqual(frozenset([relay2]), index.exits_to('71.35.150.29', 22))
+    self.assertEqual(frozenset([relay1]), index.exits_to('71.35.150.30', 22))
+    self.assertEqual(frozenset([relay3]), index.exits_to('10.5.0.8', 22))
+    self.assertEqual(frozenset(), index.exits_to('10.5.1.8', 22))
+    self.assertEqual(frozenset([relay2]), index.exits_to('::1', 22))
+
+  def test_matches_exit_policies(self):
+    """
+    Check the index against each relay's exit policy.
+    """
+
+    entries = list(stem.descriptor.parse_file(get_resource('cached-consensus')))
+    index = ExitIndex(entries)
+
+    for port in (1, 22, 25, 80, 443, 6667, 65535):
+      expected = frozenset([entry.fingerprint for entry in entries if entry.exit_policy.can_exit_to('75.119.206.243', port)])
+      self.assertEqual(expected, index.exits_to('75.119.206.243', port))
@@ -411,6 +411,48 @@ class TestDescriptorReader(unittest.TestCase):
       read_descriptors = [str(desc) for desc in list(reader)]
       self.assertEqual(expected_results, read_descriptors)
 
+  def test_workers(self):
+    """
+    Parses descriptor files and archive members with a process pool.
+    """
+
+    expected_results = _get_raw_tar_descriptors()
+    test_path = os.path.join(DESCRIPTOR_TEST_DATA, 'descriptor_archive.tar')
+
+    with stem.descriptor.reader.DescriptorReader(test_path, workers = 2) as reader:
+      read_descriptors = list(reader)
+      self.assertEqual(expected_results, [str(desc) for desc in read_descriptors])
+
+      for desc in read_descriptors:
+        self.assertEqual(test_path, desc.get_path())
+        self.assertTrue(desc.get_archive_path().startswith('descriptor_archive/'))
+
+        # lazily loaded attributes were parsed by our workers
+
+        self.assertTrue('nickname' in vars(desc))
+        self.assertTrue('published' in vars(desc))
+
+    with stem.descriptor.reader.DescriptorReader(test_path, workers = 2, ordered = False) as reader:
+      self.assertEqual(sorted(expected_results), sorted([str(desc) for desc in reader]))
+
+  def test_workers_skip_listener(self):
+    """
+    Skip listeners are notified of unparseable files when parsing with workers.
+    """
+
+    skip_listener = SkipListener()
+    reader = stem.descriptor.reader.DescriptorReader(os.path.join(DESCRIPTOR_TEST_DATA, 'unparseable'), workers = 2)
+    reader.register_skip_listener(skip_listener.listener)
+
+    with reader:
+      list(reader)  # iterates over all of the descriptors
+
+    skipped = [os.path.basename(path) for (path, exc) in skip_listener.results if not path.endswith('.swp')]
+    self.assertEqual(['cached-microdesc-consensus_with_carriage_returns', 'extrainfo_nonascii_v3_reqs', 'new_metrics_type', 'riddle', 'tiny.png', 'vote'], sorted(skipped))
+
+    for path, exc in skip_listener.results:
+      self.assertTrue(isinstance(exc, stem.descriptor.reader.UnrecognizedType))
+
   def test_stop(self):
     """
     Runs a DescriptorReader over the root directory, then checks that calling
@@ -2,15 +2,21 @@
 Unit tests for stem.descriptor.remote.
 """
 
+import hashlib
 import io
 import socket
 import time
 import unittest
+import zlib
 
 import stem
 import stem.descriptor.remote
 import stem.prereq
 import stem.util.str_tools
+import test.require
+
+from stem.descriptor import DocumentHandler
+from stem.descriptor.networkstatus import NetworkStatusDocumentV3
 
 from stem.descriptor.remote import Compression
 from test.unit.descriptor import read_resource
@@ -85,23 +91,22 @@ def _orport_mock(data, encoding = 'identity', response_code_header = None):
     response_code_header = b'HTTP/1.0 200 OK\r\n'
 
   data = response_code_header + stem.util.str_tools._to_bytes(HEADER % encoding) + b'\r\n\r\n' + data
-  cells = []
-
-  for hunk in [data[i:i + 50] for i in range(0, len(data), 50)]:
-    cell = Mock()
-    cell.data = hunk
-    cells.append(cell)
+  hunks = [data[i:i + 50] for i in range(0, len(data), 50)]
 
   connect_mock = MagicMock()
   relay_mock = connect_mock().__enter__()
   circ_mock = relay_mock.create_circuit().__enter__()
-  circ_mock.send.return_value = cells
+  circ_mock.open_stream.side_effect = lambda *args: Mock(read = Mock(side_effect = hunks + [b'']))
   return connect_mock
 
 
-def _dirport_mock(data, encoding = 'identity'):
+def _dirport_mock(data, encoding = 'identity', streaming = False):
   dirport_mock = Mock()
-  dirport_mock().read.return_value = data
+
+  if streaming:
+    dirport_mock().read.side_effect = io.BytesIO(data).read
+  else:
+    dirport_mock().read.return_value = data
 
   if stem.prereq.is_python_3():
     headers = HTTPMessage()
@@ -164,6 +169,62 @@ class TestDescriptorDownloader(unittest.TestCase):
 
       self.assertRaisesWith(stem.ProtocolError, "Response should begin with HTTP success, but was 'HTTP/1.0 500 Kaboom'", request.run)
 
+  def test_orport_connection_pool(self):
+    """
+    Reuse the connection and circuit for ORPort downloads.
+    """
+
+    response = b'HTTP/1.0 200 OK\r\n' + stem.util.str_tools._to_bytes(HEADER % 'identity') + b'\r\n\r\n' + TEST_DESCRIPTOR
+
+    connect_mock = Mock()
+    circ_mock = connect_mock().create_circuit()
+    circ_mock.is_closed = False
+    circ_mock.open_stream.side_effect = lambda *args: Mock(read = Mock(side_effect = [response, b'']))
+    connect_mock.reset_mock()
+
+    with patch('stem.client.Relay.connect', connect_mock):
+      with stem.descriptor.remote.ConnectionPool() as pool:
+        for _ in range(3):
+          reply = stem.descriptor.remote.their_server_descriptor(
+            endpoints = [stem.ORPort('12.34.56.78', 1100)],
+            connection_pool = pool,
+          )
+
+          self.assertEqual('moria1', reply.run()[0].nickname)
+
+      self.assertEqual(1, connect_mock.call_count)
+      self.assertEqual(3, circ_mock.open_stream.call_count)
+      self.assertEqual(1, connect_mock().close.call_count)
+
+  def test_orport_connection_pool_expiry(self):
+    """
+    Don't reuse connections that are idle too long, dead, or had a failed
+    request.
+    """
+
+    pool = stem.descriptor.remote.ConnectionPool(idle_timeout = 0.05)
+    endpoint = stem.ORPort('12.34.56.78', 1100)
+
+    with patch('stem.client.Relay.connect', Mock(side_effect = lambda *args: Mock(**{'create_circuit.return_value.is_closed': False}))) as connect_mock:
+      pooled = pool._acquire(endpoint)
+      pool._release(pooled, True)
+      self.assertEqual(pooled, pool._acquire(endpoint))
+
+      pool._release(pooled, False)
+      self.assertNotEqual(pooled, pool._acquire(endpoint))
+      self.assertEqual(1, pooled.relay.close.call_count)
+
+      pooled = pool._acquire(endpoint)
+      pool._release(pooled, True)
+      time.sleep(0.06)
+      self.assertNotEqual(pooled, pool._acquire(endpoint))
+
+      pooled = pool._acquire(endpoint)
+      pool._release(pooled, True)
+      pooled.relay.is_alive.return_value = False
+      self.assertNotEqual(pooled, pool._acquire(endpoint))
+      self.assertEqual(6, connect_mock.call_count)
+
   @patch(URL_OPEN, _dirport_mock(TEST_DESCRIPTOR))
   def test_using_dirport(self):
     """
@@ -399,3 +460,218 @@ class TestDescriptorDownloader(unittest.TestCase):
     self.assertEqual(1, len(list(query)))
     self.assertEqual(1, len(list(query)))
     self.assertEqual(1, len(list(query)))
+
+  @test.require.sha3
+  def test_consensus_diff(self):
+    """
+    Download a consensus diff and apply it to the consensus we already have.
+    """
+
+    content = read_resource('cached-consensus')
+    new_content = content.replace(b'consensus-method 26', b'consensus-method 27')
+    consensus = NetworkStatusDocumentV3(content)
+
+    signed_end = content.find(b'\ndirectory-signature ') + len(b'\ndirectory-signature ')
+    from_digest = hashlib.sha3_256(content[:signed_end]).hexdigest().upper().encode('ascii')
+    to_digest = hashlib.sha3_256(new_content).hexdigest().upper().encode('ascii')
+
+    diff = b'\n'.join((
+      b'network-status-diff-version 1',
+      b'hash ' + from_digest + b' ' + to_digest,
+      b'3c',
+      b'consensus-method 27',
+      b'.',
+    )) + b'\n'
+
+    for document_handler in (DocumentHandler.DOCUMENT, DocumentHandler.ENTRIES):
+      dirport_mock = _dirport_mock(diff)
+
+      with patch(URL_OPEN, dirport_mock):
+        query = stem.descriptor.remote.get_consensus(
+          from_consensus = consensus,
+          endpoints = [stem.DirPort('12.34.56.78', 1100)],
+          document_handler = document_handler,
+        )
+
+        descriptors = list(query)
+
+      request = dirport_mock.call_args[0][0]
+      self.assertEqual(consensus.digest(stem.descriptor.DigestHash.SHA3_256), request.get_header('X-or-diff-from-consensus'))
+      self.assertEqual(None, query.error)
+
+      if document_handler == DocumentHandler.DOCUMENT:
+        self.assertEqual([NetworkStatusDocumentV3(new_content)], descriptors)
+        self.assertEqual(27, descriptors[0].consensus_method)
+      else:
+        self.assertEqual(set(consensus.routers.values()), set(descriptors))
+
+  @patch(URL_OPEN, _dirport_mock(read_resource('cached-consensus')))
+  def test_consensus_diff_declined(self):
+    """
+    Directories reply with the full consensus if they lack a diff from ours.
+    """
+
+    consensus = NetworkStatusDocumentV3(read_resource('cached-consensus'))
+
+    query = stem.descriptor.remote.get_consensus(
+      from_consensus = consensus,
+      endpoints = [stem.DirPort('12.34.56.78', 1100)],
+      document_handler = DocumentHandler.DOCUMENT,
+    )
+
+    self.assertEqual([consensus], list(query))
+
+  @patch(URL_OPEN)
+  def test_batch_query(self, dirport_mock):
+    """
+    Request more descriptors than fit in a single url.
+    """
+
+    dirport_mock.side_effect = lambda *args, **kwargs: _dirport_mock(TEST_DESCRIPTOR)()
+
+    fingerprints = ['9695DFC35FFEB861329B9F1AB04C46397020CE31'] * 200
+
+    self.assertRaises(ValueError, stem.descriptor.remote.get_server_descriptors, fingerprints, endpoints = [stem.DirPort('12.34.56.78', 1100)])
+
+    query = stem.descriptor.remote.get_server_descriptors(
+      fingerprints,
+      batch = True,
+      workers = 2,
+      endpoints = [stem.DirPort('12.34.56.78', 1100)],
+    )
+
+    self.assertEqual([96, 96, 8], [len(q.resource.split('/')[-1].split('+')) for q in query.queries])
+    self.assertEqual(['moria1', 'moria1', 'moria1'], [desc.nickname for desc in query.run()])
+    self.assertEqual(3, dirport_mock.call_count)
+    self.assertTrue(query.is_done)
+    self.assertEqual(None, query.error)
+
+  @patch(URL_OPEN)
+  def test_batch_query_with_failure(self, dirport_mock):
+    """
+    Provide the descriptors that preceded a failed request, then its error.
+    """
+
+    def urlopen_call(request, *args, **kwargs):
+      if '/tor/micro/d/hash_b' in request.get_full_url():
+        raise socket.timeout('connection timed out')
+
+      return _dirport_mock(read_resource('cached-microdescs'))()
+
+    dirport_mock.side_effect = urlopen_call
+
+    query = stem.descriptor.remote.get_microdescriptors(
+      ['hash_a'] * 90 + ['hash_b'] * 90 + ['hash_c'] * 20,
+      batch = True,
+      retries = 0,
+      endpoints = [stem.DirPort('12.34.56.78', 1100)],
+    )
+
+    microdescs_per_request = len(list(stem.descriptor.parse_file(io.BytesIO(read_resource('cached-microdescs')), 'microdescriptor 1.0')))
+
+    self.assertEqual(microdescs_per_request, len(list(query)))
+    self.assertEqual(socket.timeout, type(query.error))
+    self.assertRaises(socket.timeout, query.run)
+
+  @patch(URL_OPEN)
+  def test_streaming_query(self, dirport_mock):
+    """
+    Parse descriptors as their compressed content is read.
+    """
+
+    content = read_resource('cached-microdescs')
+    dirport_mock.side_effect = lambda *args, **kwargs: _dirport_mock(zlib.compress(content), 'gzip', streaming = True)()
+
+    query = stem.descriptor.remote.get_microdescriptors(
+      ['hash_a', 'hash_b', 'hash_c'],
+      compression = Compression.GZIP,
+      stream = True,
+      endpoints = [stem.DirPort('12.34.56.78', 1100)],
+    )
+
+    self.assertEqual(0, dirport_mock.call_count)  # request is made as we iterate
+
+    expected = list(stem.descriptor.parse_file(io.BytesIO(content), 'microdescriptor 1.0'))
+    self.assertEqual(expected, list(query))
+    self.assertEqual(None, query.content)
+    self.assertEqual(None, query.error)
+    self.assertTrue(query.is_done)
+
+    # iterating again makes another request
+
+    self.assertEqual(expected, query.run())
+    self.assertEqual(2, dirport_mock.call_count)
+
+  def test_streaming_decompression_is_bounded(self):
+    """
+    Highly compressed content shouldn't be fully decompressed into memory when
+    we only need a line of it.
+    """
+
+    content = b'router caerSidi 71.35.133.197 9001 0 0\n' * 100000
+    compressed = {Compression.GZIP: zlib.compress(content)}
+
+    if stem.prereq.is_lzma_available():
+      import lzma
+      compressed[Compression.LZMA] = lzma.compress(content)
+
+    for encoding, compressed_content in compressed.items():
+      streaming_file = stem.descriptor.remote._StreamingFile(io.BytesIO(compressed_content), encoding)
+      lines, largest_buffer = 0, 0
+
+      while True:
+        streaming_file.tell()
+        line = streaming_file.readline()
+        largest_buffer = max(largest_buffer, len(streaming_file._buffer))
+
+        if not line:
+          break
+
+        lines += 1
+
+      self.assertEqual(100000, lines)
+      self.assertTrue(largest_buffer < 4 * stem.descriptor.remote.STREAM_READ_SIZE, 'buffered %i bytes for %s' % (largest_buffer, encoding))
+
+  @patch(URL_OPEN)
+  def test_streaming_query_retries(self, dirport_mock):
+    """
+    Retry streaming requests that fail before providing descriptors.
+    """
+
+    responses = [socket.timeout('connection timed out'), _dirport_mock(TEST_DESCRIPTOR, streaming = True)()]
+
+    def urlopen_call(*args, **kwargs):
+      response = responses.pop(0)
+
+      if isinstance(response, Exception):
+        raise response
+
+      return response
+
+    dirport_mock.side_effect = urlopen_call
+
+    query = stem.descriptor.remote.Query(
+      TEST_RESOURCE,
+      endpoints = [stem.DirPort('12.34.56.78', 1100)],
+      stream = True,
+    )
+
+    self.assertEqual(['moria1'], [desc.nickname for desc in query.run()])
+    self.assertEqual(2, dirport_mock.call_count)
+
+  @patch(URL_OPEN)
+  def test_streaming_query_with_malformed_content(self, dirport_mock):
+    dirport_mock.side_effect = lambda *args, **kwargs: _dirport_mock(b'some malformed stuff', streaming = True)()
+
+    query = stem.descriptor.remote.Query(
+      TEST_RESOURCE,
+      'server-descriptor 1.0',
+      endpoints = [stem.DirPort('12.34.56.78', 1100)],
+      validate = True,
+      stream = True,
+    )
+
+    self.assertEqual([], list(query))
+    self.assertEqual(ValueError, type(query.error))
+    self.assertRaises(ValueError, query.run)
+    self.assertEqual(2, dirport_mock.call_count)  # malformed content isn't retried
@@ -6,8 +6,10 @@ import datetime
 import functools
 import hashlib
 import io
+import os
 import pickle
 import tarfile
+import tempfile
 import time
 import unittest
 
@@ -176,6 +178,37 @@ Qlx9HNCqCY877ztFRC624ja2ql6A2hBcuoYMbkHjcQ4=
       self.assertEqual('Unnamed', descriptors[1].nickname)
       self.assertEqual('5366F1D198759F8894EA6E5FF768C667F59AFD24', descriptors[1].fingerprint)
 
+  def test_metrics_descriptor_multiple_with_memory_map(self):
+    """
+    Reading server descriptors through a memory map provides the same results.
+    """
+
+    descriptor_path = get_resource('metrics_server_desc_multiple')
+    expected = list(stem.descriptor.parse_file(descriptor_path, 'server-descriptor 1.0'))
+    descriptors = list(stem.descriptor.parse_file(descriptor_path, 'server-descriptor 1.0', memory_map = True))
+
+    self.assertEqual(2, len(descriptors))
+    self.assertEqual(expected, descriptors)
+    self.assertEqual(['anonion', 'Unnamed'], [desc.nickname for desc in descriptors])
+    self.assertEqual(os.path.abspath(descriptor_path), descriptors[0].get_path())
+
+    # files with CRLF newlines are split the same way too
+
+    with open(descriptor_path, 'rb') as descriptor_file:
+      content = descriptor_file.read().replace(b'\n', b'\r\n')
+
+    crlf_path = tempfile.mkstemp(prefix = 'stem-unit-tests-')[1]
+    self.addCleanup(os.remove, crlf_path)
+
+    with open(crlf_path, 'wb') as crlf_file:
+      crlf_file.write(content + b'router-signature\n' + content)
+
+    expected = list(stem.descriptor.parse_file(crlf_path, 'server-descriptor 1.0', validate = False))
+    descriptors = list(stem.descriptor.parse_file(crlf_path, 'server-descriptor 1.0', validate = False, memory_map = True))
+
+    self.assertEqual(2, len(descriptors))
+    self.assertEqual([desc.get_bytes() for desc in expected], [desc.get_bytes() for desc in descriptors])
+
   def test_old_descriptor(self):
     """
     Parses a relay server descriptor from 2005.
@@ -2,9 +2,12 @@
 Unit tests for the stem.exit_policy.ExitPolicy class.
 """
 
+import gc
 import pickle
 import unittest
 
+import stem.exit_policy
+
 try:
   # added in python 3.3
   from unittest.mock import Mock, patch
@@ -19,6 +22,8 @@ from stem.exit_policy import (
   ExitPolicyRule,
 )
 
+from stem.util.connection import address_to_int
+
 
 class TestExitPolicy(unittest.TestCase):
   def test_example(self):
@@ -272,6 +277,90 @@ class TestExitPolicy(unittest.TestCase):
     self.assertFalse(policy.can_exit_to('127.0.0.1', 79))
     self.assertTrue(policy.can_exit_to('127.0.0.1', 80))
 
+  def test_compile(self):
+    policy = ExitPolicy(
+      'reject 10.0.0.0/8:*',
+      'accept 10.1.0.0/16:*',
+      'accept 192.168.0.1:1-1024',
+      'reject6 [fe80::]/16:*',
+      'accept *:80',
+      'accept *:443',
+      'reject *:*',
+    )
+
+    compiled = policy.compile()
+    self.assertTrue(compiled is policy.compile())
+
+    test_inputs = {
+      ('10.1.0.5', 80): False,  # earlier rule takes precedence
+      ('11.1.0.5', 80): True,
+      ('11.1.0.5', 81): False,
+      ('192.168.0.1', 22): True,
+      ('192.168.0.2', 22): False,
+      ('192.168.0.1', 1025): False,
+      ('[fe80::1]', 80): False,
+      ('fe80::1', 80): False,
+      ('fe81::1', 443): True,
+      ('::1', 22): False,
+    }
+
+    for (address, port), expected in test_inputs.items():
+      self.assertEqual(expected, compiled.can_exit_to(address, port))
+      self.assertEqual(expected, policy.can_exit_to(address, port))
+      self.assertEqual(expected, compiled.can_exit_to(address_to_int(address.strip('[]')), port, ipv6 = ':' in address))
+
+    destinations = list(test_inputs.keys())
+    self.assertEqual([test_inputs[dest] for dest in destinations], compiled.can_exit_to_many(destinations))
+
+    self.assertRaises(ValueError, compiled.can_exit_to, '300.1.1.1', 80)
+    self.assertRaises(ValueError, compiled.can_exit_to, '1.1.1.1', 0)
+    self.assertRaises(ValueError, compiled.can_exit_to, 2 ** 32, 80)
+    self.assertRaises(ValueError, compiled.can_exit_to, -1, 80)
+
+  def test_compile_with_unusual_policies(self):
+    # masks that can't be represented as a number of bits
+
+    policy = ExitPolicy('reject 10.0.0.0/255.0.255.0:*', 'accept *:*')
+    self.assertFalse(policy.compile().can_exit_to('10.5.0.8', 80))
+    self.assertTrue(policy.compile().can_exit_to('10.5.1.8', 80))
+
+    # policies that don't allow any exiting
+
+    policy = ExitPolicy('reject *:*')
+    self.assertFalse(policy.compile().can_exit_to('1.2.3.4', 80))
+
+    # microdescriptor policies only concern ports
+
+    policy = MicroExitPolicy('reject 1-1024')
+    self.assertEqual([False, True, True], policy.compile().can_exit_to_many([('1.2.3.4', 80), ('1.2.3.4', 8080), ('[::1]', 65535)]))
+
+    # an empty policy allows everything
+
+    self.assertTrue(ExitPolicy().compile().can_exit_to('1.2.3.4', 80))
+
+  def test_interned_policies(self):
+    policy = stem.exit_policy._get_interned_policy(ExitPolicy, 'accept *:80', 'reject *:*')
+    self.assertTrue(policy is stem.exit_policy._get_interned_policy(ExitPolicy, 'accept *:80', 'reject *:*'))
+    self.assertFalse(policy is stem.exit_policy._get_interned_policy(ExitPolicy, 'accept *:443', 'reject *:*'))
+    self.assertEqual(ExitPolicy('accept *:80', 'reject *:*'), policy)
+
+    # policies of different classes aren't shared
+
+    micro_policy = stem.exit_policy._get_interned_policy(MicroExitPolicy, 'accept 80')
+    self.assertTrue(isinstance(micro_policy, MicroExitPolicy))
+    self.assertTrue(micro_policy is stem.exit_policy._get_interned_policy(MicroExitPolicy, 'accept 80'))
+
+    # entries are dropped when they're no longer referenced
+
+    key = (MicroExitPolicy, ('accept 80',))
+    self.assertTrue(key in stem.exit_policy._INTERNED_POLICIES)
+
+    del micro_policy
+    gc.collect()
+    self.assertFalse(key in stem.exit_policy._INTERNED_POLICIES)
+
+    self.assertRaises(ValueError, stem.exit_policy._get_interned_policy, MicroExitPolicy, 'permit 80')
+
   def test_get_config_policy(self):
     test_inputs = {
       '': ExitPolicy(),
@@ -11,6 +11,12 @@ import stem.response
 import stem.response.getinfo
 import stem.util.str_tools
 
+try:
+  # added in python 3.3
+  from unittest.mock import patch
+except ImportError:
+  from mock import patch
+
 OK_REPLY = '250 OK\r\n'
 
 EVENT_BW = '650 BW 32326 2856\r\n'
@@ -33,6 +39,14 @@ version -- The current version of Tor.
 250 OK
 """.replace('\n', '\r\n')
 
+GETINFO_ESCAPED = """250+config-text=
+..ControlPort 9051
+.
+250+config-defaults=
+.
+250 OK
+""".replace('\n', '\r\n')
+
 
 class TestControlMessage(unittest.TestCase):
   def test_from_str(self):
@@ -192,6 +206,68 @@ class TestControlMessage(unittest.TestCase):
     self.assertNotEqual(event1, event2)
     self.assertEqual(event1, event3)
 
+  @patch('stem.socket.READ_CHUNK_LEN', 7)
+  def test_chunked_reader(self):
+    """
+    Read messages from a socket in chunks that split their lines and data
+    blocks, growing our buffer to fit them.
+    """
+
+    replies = [OK_REPLY, GETINFO_INFONAMES, EVENT_BW, GETINFO_ESCAPED, GETINFO_VERSION]
+    reader = self._reader(''.join(replies))
+
+    for reply in replies:
+      message = reader.recv()
+      expected = stem.socket.recv_message(io.BytesIO(stem.util.str_tools._to_bytes(reply)))
+
+      self.assertEqual(expected.content(), message.content())
+      self.assertEqual(reply, message.raw_content())
+
+    self.assertRaises(stem.SocketClosed, reader.recv)
+
+  def test_chunked_reader_streaming(self):
+    """
+    Stream the lines of a data block from our chunked reader.
+    """
+
+    lines = []
+    message = self._reader(GETINFO_ESCAPED).recv(lambda: lines.append)
+
+    self.assertEqual([b'.ControlPort 9051'], lines)
+    self.assertEqual([('250', '+', 'config-text='), ('250', '+', 'config-defaults='), ('250', ' ', 'OK')], message.content())
+
+  def test_chunked_reader_when_truncated(self):
+    """
+    Socket closes part way through a message.
+    """
+
+    self.assertRaises(stem.SocketClosed, self._reader(GETINFO_VERSION[:-8]).recv)
+    self.assertRaises(stem.ProtocolError, self._reader(GETINFO_INFONAMES[:-12]).recv)
+
+  def test_without_raw_content(self):
+    """
+    Reconstruct the content of messages whose raw content we didn't keep.
+    """
+
+    for reply in (OK_REPLY, EVENT_BW, GETINFO_VERSION, GETINFO_INFONAMES, GETINFO_ESCAPED):
+      message = stem.socket.recv_message(io.BytesIO(stem.util.str_tools._to_bytes(reply)), keep_raw_content = False)
+      self.assertEqual(reply, message.raw_content())
+      self.assertEqual(stem.response.ControlMessage.from_str(reply), message)
+
+  def _reader(self, content):
+    """
+    Provides a chunked reader for a socket that's given the content.
+    """
+
+    control_socket, tor_socket = socket.socketpair()
+    self.addCleanup(control_socket.close)
+    self.addCleanup(tor_socket.close)
+
+    tor_socket.sendall(stem.util.str_tools._to_bytes(content))
+    tor_socket.shutdown(socket.SHUT_WR)
+
+    return stem.socket._ControlReader(control_socket)
+
   def _assert_message_parses(self, controller_reply):
     """
     Performs some basic sanity checks that a reply mirrors its parsed result.
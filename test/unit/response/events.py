@@ -570,6 +570,32 @@ class TestEvents(unittest.TestCase):
     self.assertEqual(['SOLID', '"NON', 'SENSE"'], event.positional_args)
     self.assertEqual({'condition': 'MEH', 'quoted': '1 2 3'}, event.keyword_args)
 
+  def test_split_args(self):
+    """
+    Check that our argument tokenizer matches the KW_ARG and QUOTED_KW_ARG
+    regexes it replaced, for all of our test events and some contrived ones.
+    """
+
+    contents = [value[4:] for name, value in globals().items() if name.isupper() and isinstance(value, str) and value.startswith('650 ')]
+
+    contents += [
+      'NONE',
+      'NONE ',
+      'NONE A=1  B=2',
+      'NONE A=b=c D=',
+      'NONE =1 A=1',
+      'NONE A=1 positional B=2',
+      'NONE K="v" A=b"',
+      'NONE K="a=" B="c d" E=f',
+      'NONE K="v" trailing" B=2',
+      'NONE A=1 A=2',
+      'NONE X-Y=1 A=\xe9',
+      'NONE A="1\t2" B=3',
+    ]
+
+    for content in contents:
+      self.assertEqual(stem.response.events._split_args_with_regex(content), stem.response.events._split_args(content), content)
+
   def test_log_events(self):
     event = _get_event('650 DEBUG connection_edge_process_relay_cell(): Got an extended cell! Yay.')
 